@@ -1,15 +1,40 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from project.router.global_router import router as conversor_router
+from project.router.health_router import router as health_router
+from project.router.jobs_router import router as jobs_router
+from project.router.metrics_router import router as metrics_router
+from project.router.disconnect import CancelOnDisconnectMiddleware
+from project.router.profiling import ProfilingMiddleware
+from project.router.quality_tier import QualityTierMiddleware
+from project.router.server_timing import ServerTimingMiddleware
+from project.conversor.admission.controller import AdmissionRejected
+from project.conversor.cancellation import ConversionCancelled
 from project.core.application import Application
+from project.core.startup import StartupManager
+from project.tts.endpoint_pool import KokoroUnavailable
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from starlette.middleware.base import BaseHTTPMiddleware
-from logging_config import logger
+from project.core.logging_pipeline import reset_request_id, set_request_id
+import uuid
 
 app = Application()
+logger = app.logger
+
+
+@asynccontextmanager
+async def lifespan(server: FastAPI):
+    # the model and speakers load in the background so the port binds right away
+    startup = StartupManager()
+    startup.start()
+    yield
+    await startup.shutdown()
+
 
 server = FastAPI(
+    lifespan=lifespan,
     title="wsi Voice Conversor API",
     description="API for wsi Voice Conversor",
     version="0.0.1",
@@ -21,21 +46,38 @@ server = FastAPI(
 
 class ExceptionLoggingMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request, call_next):
+        # the client's X-Request-ID (or a new one) tags every log record of the request
+        request_id = request.headers.get("x-request-id", "")[:64] or uuid.uuid4().hex
+        token = set_request_id(request_id)
         try:
             response = await call_next(request)
+            response.headers["X-Request-ID"] = request_id
             return response
         except Exception as exc:
             logger.error("Unhandled exception: %s", str(exc), exc_info=True)
             raise
+        finally:
+            reset_request_id(token)
+
 
+CONVERSION_PATHS = ["/api/rvc", "/api/rvc/multi", "/api/tts"]
 
+# inside the request id middleware, the profile summaries carry it
+server.add_middleware(ProfilingMiddleware, paths=CONVERSION_PATHS)
 server.add_middleware(ExceptionLoggingMiddleware)
+if app.envs.QUALITY_TIERS_ENABLED:
+    server.add_middleware(QualityTierMiddleware, paths=CONVERSION_PATHS)
+if app.envs.CANCEL_ON_DISCONNECT:
+    # a client that leaves also cancels the request's middlewares
+    server.add_middleware(CancelOnDisconnectMiddleware, paths=CONVERSION_PATHS)
+if app.envs.SERVER_TIMING:
+    # outermost, so the total covers every other middleware
+    server.add_middleware(ServerTimingMiddleware)
 
 
 @server.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     logger.info("Validation error: %s - Body: %s", exc.errors(), exc.body)
-    print(f"Validation error: {exc.errors()} - Body: {exc.body}")
     return JSONResponse(
         status_code=422,
         content={"detail": exc.errors(), "body": exc.body},
@@ -45,18 +87,46 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 @server.exception_handler(StarletteHTTPException)
 async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     logger.info("HTTP error: %s", exc.detail)
-    print(f"HTTP error: {exc.detail}")
     return JSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail},
+        headers=exc.headers,
+    )
+
+
+@server.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    logger.info("Admission rejected: %s", exc.reason)
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is at capacity", "reason": exc.reason},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@server.exception_handler(ConversionCancelled)
+async def conversion_cancelled_handler(request: Request, exc: ConversionCancelled):
+    # a client that disconnected never reads it; a passed deadline gets it
+    logger.info("Conversion cancelled: %s", str(exc))
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Conversion cancelled", "reason": exc.reason},
+    )
+
+
+@server.exception_handler(KokoroUnavailable)
+async def kokoro_unavailable_handler(request: Request, exc: KokoroUnavailable):
+    logger.info("Kokoro unavailable: %s", str(exc))
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Speech synthesis backend unavailable"},
+        headers={"Retry-After": str(exc.retry_after)},
     )
 
 
 @server.exception_handler(Exception)
 async def unhandled_exception_handler(request: Request, exc: Exception):
     logger.info("Unhandled error: %s", str(exc), exc_info=True)
-    print(f"Unhandled error: {str(exc)}")
-    print(f"Request: {request}")
     return JSONResponse(
         status_code=500,
         content={"detail": str(exc)},
@@ -64,3 +134,6 @@ async def unhandled_exception_handler(request: Request, exc: Exception):
 
 
 server.include_router(conversor_router, prefix="/api", tags=["Voice Conversion"])
+server.include_router(jobs_router, prefix="/api", tags=["Jobs"])
+server.include_router(health_router)
+server.include_router(metrics_router)
@@ -0,0 +1,151 @@
+"""
+Benchmark de inicialização: checkpoint ``.pth`` (pickle) vs ``model.safetensors`` mapeado.
+
+Cada caminho roda em processos filhos novos, que carregam o modelo via
+``ModelFactory``, executam uma inferência curta e reportam tempo, RSS, USS e PSS.
+Com ``--processes N`` os N filhos ficam carregados ao mesmo tempo, o que mostra
+as páginas do checkpoint mapeado sendo compartilhadas pelo page cache (PSS).
+
+Uso:
+    python benchmarks/checkpoint_loading.py /path/to/models/openvoice_v2
+    python benchmarks/checkpoint_loading.py --synthetic --processes 2
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MB = 1024 * 1024
+
+
+def create_synthetic_checkpoint(model_dir: str) -> None:
+    """Write a randomly initialised OpenVoice checkpoint with the default config"""
+    import torch
+    from TTS.vc.configs.openvoice_config import OpenVoiceConfig  # type: ignore
+    from TTS.vc.models.openvoice import OpenVoice  # type: ignore
+
+    config = OpenVoiceConfig()
+    model = OpenVoice(config)
+    torch.save({"model": model.state_dict()}, os.path.join(model_dir, "model.pth"))
+    audio = config.audio
+    with open(os.path.join(model_dir, "config.json"), "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "data": {
+                    "sampling_rate": audio.input_sample_rate,
+                    "filter_length": audio.fft_size,
+                    "hop_length": audio.hop_length,
+                    "win_length": audio.win_length,
+                }
+            },
+            f,
+        )
+
+
+def run_child(mode: str, model_dir: str) -> None:
+    import numpy as np
+    import psutil  # type: ignore
+    import torch
+    from project.model.factory import ModelFactory
+
+    start = time.perf_counter()
+    model = ModelFactory(use_mmap=mode == "mmap").create_model(os.path.join(model_dir, "model.pth"))
+    load_s = time.perf_counter() - start
+
+    audio = (0.05 * np.random.default_rng(0).standard_normal(24000)).astype(np.float32)
+    start = time.perf_counter()
+    with torch.inference_mode():
+        src_se, src_spec = model.extract_se(audio)
+        model.inference(src_spec, {"g_src": src_se, "g_tgt": src_se})
+    first_inference_s = time.perf_counter() - start
+
+    print("ready", flush=True)
+    sys.stdin.readline()
+    memory = psutil.Process().memory_full_info()
+    print(
+        json.dumps(
+            {
+                "mode": mode,
+                "load_s": load_s,
+                "first_inference_s": first_inference_s,
+                "rss_mb": memory.rss / MB,
+                "uss_mb": memory.uss / MB,
+                "pss_mb": memory.pss / MB,
+            }
+        ),
+        flush=True,
+    )
+
+
+def run_mode(mode: str, model_dir: str, processes: int) -> list[dict]:
+    children = [
+        subprocess.Popen(
+            [sys.executable, __file__, "--child", mode, model_dir],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            cwd=ROOT,
+        )
+        for _ in range(processes)
+    ]
+    for child in children:
+        line = child.stdout.readline().strip()
+        if line != "ready":
+            raise RuntimeError(f"Child process failed for mode {mode}")
+    results = []
+    for child in children:
+        child.stdin.write("\n")
+        child.stdin.flush()
+        results.append(json.loads(child.stdout.readline()))
+        child.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("model_dir", nargs="?", help="Directory with config.json and model.pth")
+    parser.add_argument("--synthetic", action="store_true", help="Benchmark a random OpenVoice checkpoint")
+    parser.add_argument("--processes", type=int, default=1, help="Concurrent processes per mode")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "MODEL_DIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    from project.model.checkpoint import SAFETENSORS_FILENAME, convert_checkpoint
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_dir = args.model_dir
+        if args.synthetic:
+            model_dir = tmp_dir
+            create_synthetic_checkpoint(model_dir)
+        if not model_dir:
+            parser.error("model_dir is required unless --synthetic is used")
+        if not os.path.exists(os.path.join(model_dir, SAFETENSORS_FILENAME)):
+            convert_checkpoint(model_dir)
+
+        results = {mode: run_mode(mode, model_dir, args.processes) for mode in ("pth", "mmap")}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'mode':<6}{'load s':>10}{'1st inf s':>11}{'RSS MB':>10}{'USS MB':>10}{'PSS MB':>10}")
+    for mode, runs in results.items():
+        for run in runs:
+            print(
+                f"{mode:<6}{run['load_s']:>10.3f}{run['first_inference_s']:>11.3f}"
+                f"{run['rss_mb']:>10.1f}{run['uss_mb']:>10.1f}{run['pss_mb']:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Rajadas de requisições idênticas com e sem ``COALESCE_CONVERSIONS``.
+
+Sobe o app real com o modelo falso da suíte (como ``benchmarks/load_test.py``)
+duas vezes e, em cada uma, manda ``--rounds`` rajadas de ``--burst`` ``POST /api/rvc``
+iguais ao mesmo tempo (mesmo áudio de ``--seconds`` segundos e locutor, como
+retries ou um prompt popular). Mostra a latência por requisição (p50/p95), o
+tempo até a última resposta da rajada e ``conversion_coalescing_requests_total``
+do ``/metrics``. Também mede o custo da chave (BLAKE2 do áudio decodificado).
+
+Uso:
+    python benchmarks/coalescing.py
+    python benchmarks/coalescing.py --burst 16 --seconds 10 --rounds 5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import aiohttp
+import numpy as np
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCHMARKS)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCHMARKS)
+
+import disconnects  # noqa: E402
+import load_test  # noqa: E402
+
+
+def fingerprint_us(seconds: float, sample_rate: int = 22050) -> float:
+    from project.conversor.coalescing import fingerprint
+
+    audio = np.random.default_rng(0).standard_normal(int(seconds * sample_rate)).astype(np.float32)
+    best = float("inf")
+    for _ in range(20):
+        start = time.perf_counter()
+        fingerprint(audio, "alice", None, None, "standard")
+        best = min(best, time.perf_counter() - start)
+    return best * 1e6
+
+
+async def post(session: aiohttp.ClientSession, url: str, data: bytes) -> float:
+    start = time.perf_counter()
+    async with session.post(f"{url}/api/rvc", data=disconnects.form(data)) as response:
+        await response.read()
+        if response.status != 200:
+            raise RuntimeError(f"/api/rvc returned {response.status}")
+    return time.perf_counter() - start
+
+
+async def scrape(url: str) -> Dict[str, float]:
+    counts: Dict[str, float] = {}
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"{url}/metrics") as response:
+            text = await response.text()
+    for line in text.splitlines():
+        if line.startswith("conversion_coalescing_requests_total{"):
+            result = line.split('result="', 1)[1].split('"', 1)[0]
+            counts[result] = float(line.rsplit(" ", 1)[1])
+    return counts
+
+
+async def run(url: str, data: bytes, burst: int, rounds: int) -> dict:
+    latencies: List[float] = []
+    bursts: List[float] = []
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=burst)) as session:
+        await post(session, url, data)  # warm-up
+        for _ in range(rounds):
+            start = time.perf_counter()
+            latencies += await asyncio.gather(*(post(session, url, data) for _ in range(burst)))
+            bursts.append(time.perf_counter() - start)
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "burst_ms": float(np.median(bursts)) * 1000,
+        **await scrape(url),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--burst", type=int, default=8, help="identical requests sent at once")
+    parser.add_argument("--seconds", type=float, default=5.0, help="audio seconds of the request")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="wsi-coalescing-")
+    data = disconnects.read_input(workdir, args.seconds)
+    print(f"chave: {fingerprint_us(args.seconds):.0f} us para {args.seconds:g} s de áudio")
+    print(f"{'COALESCE_CONVERSIONS':<22} {'p50 ms':>8} {'p95 ms':>8} {'rajada ms':>10} {'leader':>7} {'coalesced':>10}")
+    for enabled in ("true", "false"):
+        process, url, _ = load_test.spawn_app(
+            os.path.join(workdir, enabled), None, disconnects.NO_KOKORO, extra_env={"COALESCE_CONVERSIONS": enabled}
+        )
+        try:
+            row = asyncio.run(run(url, data, args.burst, args.rounds))
+        finally:
+            process.terminate()
+            process.wait()
+        print(
+            f"{enabled:<22} {row['p50_ms']:>8.0f} {row['p95_ms']:>8.0f} {row['burst_ms']:>10.0f} "
+            f"{row.get('leader', 0):>7.0f} {row.get('coalesced', 0):>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
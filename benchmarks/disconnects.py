@@ -0,0 +1,139 @@
+"""
+Quanto os clientes que desistem custam para os que esperam, com e sem
+``CANCEL_ON_DISCONNECT``.
+
+Sobe o app real com o modelo falso da suíte (como ``benchmarks/load_test.py``)
+duas vezes. Em cada uma, ``--abandoners`` clientes mandam em laço ``POST /api/rvc``
+com ``--abandon-seconds`` de áudio e desistem depois de ``--client-timeout``
+segundos, fechando a conexão; ao mesmo tempo um cliente paciente converte
+``--seconds`` de áudio em sequência. Mostra o p50/p95 do cliente paciente, quantas
+requisições ele completou e, do ``/metrics`` do app,
+``conversions_cancelled_total`` e ``conversion_wasted_compute_seconds_total``.
+
+Uso:
+    python benchmarks/disconnects.py
+    python benchmarks/disconnects.py --abandoners 4 --abandon-seconds 30 --client-timeout 0.3 --duration 20
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import aiohttp
+import numpy as np
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCHMARKS)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCHMARKS)
+
+import fixtures  # noqa: E402
+import load_test  # noqa: E402
+import suite  # noqa: E402
+
+# nothing listens there, /api/rvc does not use Kokoro
+NO_KOKORO = "http://127.0.0.1:9/v1"
+
+
+def read_input(workdir: str, seconds: float) -> bytes:
+    item = fixtures.write_fixtures(os.path.join(workdir, "inputs"), durations=(seconds,), sample_rates=(24000,))[0]
+    with open(item.path, "rb") as f:
+        return f.read()
+
+
+def form(data: bytes) -> aiohttp.FormData:
+    body = aiohttp.FormData()
+    body.add_field("audio_file", data, filename="input.wav", content_type="audio/wav")
+    body.add_field("speaker", suite.SPEAKERS[0])
+    return body
+
+
+async def abandon(url: str, data: bytes, timeout_s: float, until: float) -> int:
+    sent = 0
+    while time.perf_counter() < until:
+        # a fresh connection per request, closed when the client gives up
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout_s)) as session:
+            sent += 1
+            try:
+                async with session.post(f"{url}/api/rvc", data=form(data)) as response:
+                    await response.read()
+            except (asyncio.TimeoutError, aiohttp.ClientError):
+                pass
+    return sent
+
+
+async def wait_patiently(url: str, data: bytes, until: float) -> List[float]:
+    latencies = []
+    async with aiohttp.ClientSession() as session:
+        while time.perf_counter() < until:
+            start = time.perf_counter()
+            async with session.post(f"{url}/api/rvc", data=form(data)) as response:
+                await response.read()
+                if response.status == 200:
+                    latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def scrape(url: str) -> Dict[str, float]:
+    """Sum of every sample of the cancellation metrics"""
+    totals = {"conversions_cancelled_total": 0.0, "conversion_wasted_compute_seconds_total": 0.0}
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"{url}/metrics") as response:
+            text = await response.text()
+    for line in text.splitlines():
+        name = line.split("{", 1)[0].split(" ", 1)[0]
+        if name in totals:
+            totals[name] += float(line.rsplit(" ", 1)[1])
+    return totals
+
+
+async def run(url: str, args: argparse.Namespace, abandoned: bytes, patient: bytes) -> dict:
+    until = time.perf_counter() + args.duration
+    results = await asyncio.gather(
+        wait_patiently(url, patient, until),
+        *(abandon(url, abandoned, args.client_timeout, until) for _ in range(args.abandoners)),
+    )
+    # let the server settle the last abandoned requests before reading the counters
+    await asyncio.sleep(args.abandon_seconds * 0.1 + 1)
+    latencies = np.array(results[0]) * 1000
+    return {
+        "patient": len(latencies),
+        "p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else float("nan"),
+        "p95_ms": float(np.percentile(latencies, 95)) if len(latencies) else float("nan"),
+        "abandoned": sum(results[1:]),
+        **await scrape(url),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--abandoners", type=int, default=3, help="clients that give up on every request")
+    parser.add_argument("--abandon-seconds", type=float, default=30.0, help="audio seconds the abandoners send")
+    parser.add_argument("--client-timeout", type=float, default=0.3, help="seconds before an abandoner gives up")
+    parser.add_argument("--seconds", type=float, default=1.0, help="audio seconds the patient client sends")
+    parser.add_argument("--duration", type=float, default=15.0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="wsi-disconnects-")
+    abandoned, patient = read_input(workdir, args.abandon_seconds), read_input(workdir, args.seconds)
+    print(f"{'CANCEL_ON_DISCONNECT':<22} {'ok':>5} {'p50 ms':>8} {'p95 ms':>8} {'desist.':>8} {'cancel.':>8} {'wasted s':>9}")
+    for enabled in ("true", "false"):
+        process, url, _ = load_test.spawn_app(
+            os.path.join(workdir, enabled), None, NO_KOKORO, extra_env={"CANCEL_ON_DISCONNECT": enabled}
+        )
+        try:
+            row = asyncio.run(run(url, args, abandoned, patient))
+        finally:
+            process.terminate()
+            process.wait()
+        print(
+            f"{enabled:<22} {row['patient']:>5} {row['p50_ms']:>8.0f} {row['p95_ms']:>8.0f} {row['abandoned']:>8} "
+            f"{row['conversions_cancelled_total']:>8.0f} {row['conversion_wasted_compute_seconds_total']:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
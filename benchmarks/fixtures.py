@@ -0,0 +1,75 @@
+"""
+Áudios sintéticos para os benchmarks, gerados de forma determinística.
+
+``synthetic_voice`` produz um sinal parecido com fala (fundamental com contorno
+de pitch, harmônicos, pausas e um pouco de ruído com semente fixa);
+``write_fixtures`` grava WAVs PCM 16-bit para cada combinação de duração e taxa
+de amostragem, com nomes ``voice_{segundos}s_{taxa}hz.wav``.
+
+Uso:
+    python benchmarks/fixtures.py /tmp/fixtures --seconds 1 5 15 --sample-rates 16000 22050 44100
+"""
+import argparse
+import os
+from dataclasses import dataclass
+from typing import Iterable, List
+
+import numpy as np
+import soundfile as sf
+
+DURATIONS = (1.0, 5.0, 15.0)
+SAMPLE_RATES = (16000, 22050, 44100)
+
+
+@dataclass(frozen=True)
+class Fixture:
+    path: str
+    seconds: float
+    sample_rate: int
+
+    @property
+    def name(self) -> str:
+        return os.path.splitext(os.path.basename(self.path))[0]
+
+
+def synthetic_voice(seconds: float, sample_rate: int, seed: int = 0) -> np.ndarray:
+    """Voiced-like signal with a 110-220 Hz pitch contour, harmonics and a pause every 0.8 s"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    pitch = 165 + 55 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+    voice = sum(np.sin(k * phase) / k for k in range(1, 6))
+    envelope = (np.mod(t, 0.8) < 0.65) * (1 + 0.3 * np.sin(2 * np.pi * 3 * t))
+    audio = 0.08 * voice * envelope + 0.003 * rng.standard_normal(len(t))
+    return audio.astype(np.float32)
+
+
+def write_fixtures(
+    directory: str,
+    durations: Iterable[float] = DURATIONS,
+    sample_rates: Iterable[int] = SAMPLE_RATES,
+) -> List[Fixture]:
+    """Write one WAV per (duration, sample rate), existing files are reused"""
+    os.makedirs(directory, exist_ok=True)
+    fixtures = []
+    for seconds in durations:
+        for sample_rate in sample_rates:
+            path = os.path.join(directory, f"voice_{seconds:g}s_{sample_rate}hz.wav")
+            if not os.path.exists(path):
+                sf.write(path, synthetic_voice(seconds, sample_rate), sample_rate, subtype="PCM_16")
+            fixtures.append(Fixture(path, seconds, sample_rate))
+    return fixtures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory")
+    parser.add_argument("--seconds", type=float, nargs="+", default=list(DURATIONS))
+    parser.add_argument("--sample-rates", type=int, nargs="+", default=list(SAMPLE_RATES))
+    args = parser.parse_args()
+    for fixture in write_fixtures(args.directory, args.seconds, args.sample_rates):
+        print(fixture.path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Gateway com afinidade por locutor na frente de vários nós locais.
+
+Primeiro o anel sozinho (``project/gateway/hash_ring.py``): equilíbrio das chaves
+entre os nós e quantas chaves mudam de dono quando um nó sai ou entra, contra
+``hash % N``. Depois sobe ``--nodes`` instâncias do app com o modelo falso da
+suíte (portas diferentes, ``--speakers`` locutores sintéticos cada) e o gateway
+(``gateway:server`` com ``GATEWAY_NODES``), manda conversões de 1 s para locutores
+sorteados pelo gateway e direto a um nó, e mostra a latência (custo do salto
+extra) e quantos locutores distintos cada nó atendeu (com afinidade cada nó só
+precisa manter residente a sua parte). Por fim derruba um nó e mede os erros e a
+latência das requisições que caíam nele e foram para a réplica.
+
+Uso:
+    python benchmarks/gateway.py
+    python benchmarks/gateway.py --nodes 4 --speakers 40 --requests 200
+"""
+import argparse
+import asyncio
+import collections
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+import aiohttp
+import numpy as np
+import soundfile as sf
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCHMARKS)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCHMARKS)
+
+import disconnects  # noqa: E402
+import fixtures  # noqa: E402
+import load_test  # noqa: E402
+import suite  # noqa: E402
+
+from project.gateway.hash_ring import HashRing, _position  # noqa: E402
+from project.gateway.proxy import routing_key  # noqa: E402
+
+
+def bench_ring(nodes: int, keys: int = 20000) -> None:
+    urls = [f"http://node-{index}" for index in range(nodes)]
+    names = [routing_key(None, f"speaker_{index}") for index in range(keys)]
+    ring = HashRing(urls)
+    owners = {key: ring.owner(key) for key in names}
+    shares = np.array(list(collections.Counter(owners.values()).values())) / keys
+    modulo = {key: urls[_position(key) % nodes] for key in names}
+
+    ring.remove(urls[-1])
+    left = sum(owners[key] != ring.owner(key) for key in names) / keys
+    modulo_left = sum(modulo[key] != urls[:-1][_position(key) % (nodes - 1)] for key in names) / keys
+    ring.add(urls[-1])
+    ring.add("http://node-new")
+    joined = sum(owners[key] != ring.owner(key) for key in names) / keys
+    modulo_joined = sum(modulo[key] != (urls + ["http://node-new"])[_position(key) % (nodes + 1)] for key in names) / keys
+    print(f"anel, {nodes} nós: parte por nó {shares.min():.1%}..{shares.max():.1%}")
+    print(f"{'chaves que mudam de dono':<28} {'anel':>8} {'hash % N':>10}")
+    print(f"{'um nó sai':<28} {left:>8.1%} {modulo_left:>10.1%}")
+    print(f"{'um nó entra':<28} {joined:>8.1%} {modulo_joined:>10.1%}")
+
+
+def add_speakers(workdir: str, count: int) -> List[str]:
+    """Synthetic speakers beyond the suite's, in the directory configure_environment uses"""
+    suite.configure_environment(workdir, None)
+    speakers = list(suite.SPEAKERS)
+    for index in range(len(speakers), count):
+        name = f"speaker_{index}"
+        sf.write(os.path.join(workdir, "speakers", f"{name}.wav"), fixtures.synthetic_voice(3.0, 22050, 100 + index), 22050)
+        speakers.append(name)
+    return speakers
+
+
+def form(data: bytes, speaker: str) -> aiohttp.FormData:
+    body = aiohttp.FormData()
+    body.add_field("audio_file", data, filename="input.wav", content_type="audio/wav")
+    body.add_field("speaker", speaker)
+    return body
+
+
+async def send(url: str, data: bytes, speakers: List[str], requests: int, seed: int) -> Tuple[List[float], Dict[str, set], int]:
+    rng = random.Random(seed)
+    latencies: List[float] = []
+    served: Dict[str, set] = collections.defaultdict(set)
+    errors = 0
+    async with aiohttp.ClientSession() as session:
+        for _ in range(requests):
+            speaker = rng.choice(speakers)
+            start = time.perf_counter()
+            async with session.post(f"{url}/api/rvc", data=form(data, speaker)) as response:
+                await response.read()
+                if response.status != 200:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+                served[response.headers.get("X-Gateway-Node", url)].add(speaker)
+    return latencies, served, errors
+
+
+def report(name: str, latencies: List[float], served: Dict[str, set], errors: int) -> None:
+    values = np.array(latencies) * 1000
+    per_node = " ".join(str(len(speakers)) for _, speakers in sorted(served.items()))
+    print(
+        f"{name:<24} {np.percentile(values, 50):>8.1f} {np.percentile(values, 95):>8.1f} {np.max(values):>8.1f} "
+        f"{errors:>7} {per_node:>16}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=3)
+    parser.add_argument("--speakers", type=int, default=24, help="synthetic speakers on every node")
+    parser.add_argument("--requests", type=int, default=120, help="requests per scenario")
+    parser.add_argument("--seconds", type=float, default=1.0, help="audio seconds per request")
+    args = parser.parse_args()
+
+    bench_ring(args.nodes)
+
+    workdir = tempfile.mkdtemp(prefix="wsi-gateway-")
+    data = disconnects.read_input(workdir, args.seconds)
+    processes, urls = [], []
+    try:
+        for index in range(args.nodes):
+            node_dir = os.path.join(workdir, f"node-{index}")
+            speakers = add_speakers(node_dir, args.speakers)
+            process, url, _ = load_test.spawn_app(node_dir, None, disconnects.NO_KOKORO)
+            processes.append(process)
+            urls.append(url)
+        gateway, gateway_url, _ = load_test.spawn_app(
+            os.path.join(workdir, "gateway"),
+            None,
+            disconnects.NO_KOKORO,
+            extra_env={"GATEWAY_NODES": ",".join(urls), "GATEWAY_HEALTH_INTERVAL_S": "1"},
+            target="gateway:server",
+        )
+        processes.append(gateway)
+
+        print(f"\n{'':<24} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'erros':>7} {'locutores/nó':>16}")
+        asyncio.run(send(gateway_url, data, speakers, 10, seed=99))  # warm-up
+        report("direto a um nó", *asyncio.run(send(urls[0], data, speakers, args.requests, seed=1)))
+        report("pelo gateway", *asyncio.run(send(gateway_url, data, speakers, args.requests, seed=1)))
+        processes[0].kill()
+        processes[0].wait()
+        report("gateway, 1 nó morto", *asyncio.run(send(gateway_url, data, speakers, args.requests, seed=2)))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
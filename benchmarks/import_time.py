@@ -0,0 +1,61 @@
+"""
+Mede o custo de importação de um módulo (por padrão ``app``) com ``python -X importtime``.
+
+Mostra o tempo total e os pacotes de topo mais caros, para garantir que
+importar a aplicação não carregue torch/TTS antes de o servidor abrir a porta.
+
+Uso:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py project.conversor.service --top 15
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(module: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+        check=True,
+    )
+    packages: dict[str, int] = {}
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # top level imports are the ones with a single space of indentation in the tree
+        if not name.startswith("  "):
+            total_us += int(cumulative_us)
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0) + int(self_us)
+    return {"module": module, "total_s": total_us / 1e6, "packages_s": {k: v / 1e6 for k, v in packages.items()}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("module", nargs="?", default="app")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    result = measure(args.module)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"import {result['module']}: {result['total_s']:.3f} s")
+    ranked = sorted(result["packages_s"].items(), key=lambda item: item[1], reverse=True)
+    for package, seconds in ranked[: args.top]:
+        print(f"  {package:<30}{seconds:>8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
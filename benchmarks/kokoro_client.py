@@ -0,0 +1,110 @@
+"""
+Teste de carga do cliente Kokoro: sessão nova por chamada vs sessão compartilhada.
+
+Sobe o servidor falso (``benchmarks/stub_kokoro.py``) em outro processo, dispara
+``--requests`` sínteses com ``--concurrency`` simultâneas e mostra throughput,
+p50/p99 e de onde veio o tempo (fila, conexão, TTFB, corpo).
+
+Uso:
+    python benchmarks/kokoro_client.py
+    python benchmarks/kokoro_client.py --requests 2000 --concurrency 64 --max-connections 16
+    python benchmarks/kokoro_client.py --url http://localhost:8880/v1   # Kokoro já em execução
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import aiohttp
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import stub_kokoro  # noqa: E402
+from project.tts.tts_provider import TtsProvider  # noqa: E402
+
+
+async def per_call_session(url: str, text: str) -> None:
+    """Previous behaviour: a new session, connector and TCP connection per request"""
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=60)) as session:
+        async with session.post(f"{url}/audio/speech", json={"input": text}) as response:
+            await response.read()
+
+
+async def run(mode: str, url: str, requests: int, concurrency: int, max_connections: int) -> dict:
+    provider = TtsProvider(url=url, max_connections=max_connections)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, phases = [], []
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            if mode == "per_call":
+                await per_call_session(url, f"request {i}")
+            else:
+                result = await provider.synthesize(f"request {i}")
+                phases.append(result["timings"])
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    await provider.close()
+
+    result = {
+        "mode": mode,
+        "requests": requests,
+        "concurrency": concurrency,
+        "throughput_rps": requests / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p99_ms": float(np.percentile(latencies, 99) * 1000),
+    }
+    if phases:
+        for phase in ("queued_s", "connect_s", "ttfb_s", "body_s"):
+            result[f"mean_{phase[:-2]}_ms"] = float(np.mean([p[phase] for p in phases]) * 1000)
+        result["reused_connections"] = sum(p["reused_connection"] for p in phases)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Use a running Kokoro instead of the local stub")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--max-connections", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Stub synthesis latency")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    process, url = (None, args.url) if args.url else stub_kokoro.spawn("--latency-ms", str(args.latency_ms))
+    try:
+        results = [
+            asyncio.run(run(mode, url, args.requests, args.concurrency, args.max_connections))
+            for mode in ("per_call", "pooled")
+        ]
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for result in results:
+        print(
+            f"{result['mode']:<9} {result['throughput_rps']:8.1f} req/s  "
+            f"p50 {result['p50_ms']:7.1f} ms  p99 {result['p99_ms']:7.1f} ms"
+        )
+        if "mean_ttfb_ms" in result:
+            print(
+                f"          queued {result['mean_queued_ms']:.1f} ms  connect {result['mean_connect_ms']:.1f} ms  "
+                f"ttfb {result['mean_ttfb_ms']:.1f} ms  body {result['mean_body_ms']:.1f} ms  "
+                f"reused {result['reused_connections']}/{result['requests']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
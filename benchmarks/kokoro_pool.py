@@ -0,0 +1,99 @@
+"""
+Latência do cliente Kokoro com várias instâncias, com e sem requisições hedged.
+
+Sobe duas instâncias do Kokoro falso (``benchmarks/stub_kokoro.py``); uma delas
+atrasa ``--slow-rate`` das requisições em ``--slow-ms`` (cauda longa de uma GPU
+ocupada, GC, etc.). Mede p50/p95/p99 com ``KOKORO_HEDGE`` desligado e ligado, e o
+comportamento com uma instância que devolve erro em ``--fail-rate`` das chamadas.
+
+Uso:
+    python benchmarks/kokoro_pool.py
+    python benchmarks/kokoro_pool.py --requests 400 --slow-rate 0.05
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import stub_kokoro  # noqa: E402
+from project.tts.tts_provider import TtsProvider  # noqa: E402
+
+
+async def measure(urls: list[str], hedge: bool, args) -> dict:
+    provider = TtsProvider(urls=urls, hedge=hedge)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies, errors = [], 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await provider.synthesize(f"request {i}", {"response_format": "pcm"})
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                errors += 1
+
+    try:
+        # warm up the first byte samples the hedge delay is computed from
+        await asyncio.gather(*(one(i) for i in range(40)))
+        latencies.clear()
+        await asyncio.gather(*(one(i) for i in range(args.requests)))
+    finally:
+        await provider.close()
+    ms = np.array(latencies) * 1000
+    return {
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-ms", type=float, default=1000.0)
+    parser.add_argument("--fail-rate", type=float, default=0.5)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    common = ("--latency-ms", str(args.latency_ms), "--audio-seconds", "0.5")
+    processes = []
+    try:
+        fast, fast_url = stub_kokoro.spawn(*common)
+        slow, slow_url = stub_kokoro.spawn(*common, "--slow-rate", str(args.slow_rate), "--slow-ms", str(args.slow_ms))
+        failing, failing_url = stub_kokoro.spawn(*common, "--fail-rate", str(args.fail_rate))
+        processes = [fast, slow, failing]
+        results = {
+            "tail_no_hedge": asyncio.run(measure([fast_url, slow_url], False, args)),
+            "tail_hedge": asyncio.run(measure([fast_url, slow_url], True, args)),
+            "failing_endpoint": asyncio.run(measure([fast_url, failing_url], False, args)),
+        }
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, result in results.items():
+        print(
+            f"{name:<17} p50 {result['p50_ms']:7.1f} ms  p95 {result['p95_ms']:7.1f} ms  "
+            f"p99 {result['p99_ms']:7.1f} ms  errors {result['errors']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+Teste de carga ponta a ponta de ``/api/tts`` e ``/api/rvc``: quantas requisições
+por segundo um pod aguenta antes do p99 estourar.
+
+Sobe o Kokoro falso (``benchmarks/stub_kokoro.py``, latência e RTF ajustáveis) e
+o app real com uvicorn numa porta local, num processo separado, com o modelo
+falso e os locutores sintéticos da suíte (``benchmarks/suite.py``; ``--model-dir``
+usa um checkpoint real). Com ``--url`` o alvo é um servidor já em execução.
+
+A carga é de malha aberta: as chegadas seguem um processo de Poisson com a taxa
+de cada degrau (``--rates``), independente de quanto o servidor demora a
+responder, como tráfego real. Cada requisição sorteia o endpoint (``--mix``), a
+duração da entrada (``--lengths``, em segundos de áudio; no TTS o texto tem
+``--chars-per-second`` caracteres por segundo) e o locutor (``--speakers``),
+todos no formato ``nome:peso``, com semente fixa.
+
+Por degrau: vazão (respostas 200 por segundo), latência p50/p95/p99 das
+respostas 200, taxa de erro por código (503 de admissão, 5xx, timeout) e o mesmo
+por endpoint. O degrau satura quando o p99 passa de ``--slo-p99-ms``, os erros
+passam de ``--max-error-rate`` ou a vazão fica abaixo de 90% da taxa oferecida;
+a capacidade é a maior taxa antes da saturação. O JSON vai para ``--output``.
+
+Uso:
+    python benchmarks/load_test.py --rates 1 2 4 8 --duration 20
+    python benchmarks/load_test.py --mix tts:1 --lengths 2:3,10:1 --kokoro-latency-ms 150 --kokoro-rtf 0.05
+    python benchmarks/load_test.py --url http://localhost:8881 --speakers voice:1 --rates 2 4
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+import numpy as np
+import soundfile as sf
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCHMARKS)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCHMARKS)
+
+import fixtures  # noqa: E402
+import stub_kokoro  # noqa: E402
+import suite  # noqa: E402
+
+TEXT = "The quick brown fox jumps over the lazy dog while the band plays on. "
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """``"tts:1,rvc:3"`` -> {"tts": 0.25, "rvc": 0.75}"""
+    weights = {}
+    for item in value.split(","):
+        name, _, weight = item.strip().rpartition(":")
+        weights[name] = float(weight)
+    total = sum(weights.values())
+    return {name: weight / total for name, weight in weights.items()}
+
+
+@dataclass
+class Outcome:
+    endpoint: str
+    status: str
+    latency_s: float
+
+
+@dataclass
+class Step:
+    rate: float
+    outcomes: List[Outcome] = field(default_factory=list)
+    elapsed_s: float = 0.0
+
+
+class Workload:
+    """Seeded draws of endpoint, input length and speaker, with the request bodies prepared up front"""
+
+    def __init__(self, mix: str, lengths: str, speakers: str, chars_per_second: float, seed: int = 0):
+        self.rng = random.Random(seed)
+        self.mix, self.lengths, self.speakers = parse_mix(mix), parse_mix(lengths), parse_mix(speakers)
+        self.texts = {
+            length: (TEXT * (1 + int(float(length) * chars_per_second) // len(TEXT)))[: int(float(length) * chars_per_second)]
+            for length in self.lengths
+        }
+        self.wavs = {}
+        for length in self.lengths:
+            buffer = io.BytesIO()
+            sf.write(buffer, fixtures.synthetic_voice(float(length), 24000), 24000, format="WAV", subtype="PCM_16")
+            self.wavs[length] = buffer.getvalue()
+
+    def _draw(self, weights: Dict[str, float]) -> str:
+        return self.rng.choices(list(weights), list(weights.values()))[0]
+
+    def next(self) -> Tuple[str, aiohttp.FormData]:
+        endpoint, length, speaker = self._draw(self.mix), self._draw(self.lengths), self._draw(self.speakers)
+        form = aiohttp.FormData()
+        form.add_field("speaker", speaker)
+        if endpoint == "tts":
+            form.add_field("text", self.texts[length])
+        else:
+            form.add_field("audio_file", self.wavs[length], filename="input.wav", content_type="audio/wav")
+        return endpoint, form
+
+
+async def run_step(url: str, workload: Workload, rate: float, duration_s: float, timeout_s: float) -> Step:
+    """Poisson arrivals at ``rate`` per second for ``duration_s``, then wait for every response"""
+    step = Step(rate)
+    timeout = aiohttp.ClientTimeout(total=timeout_s)
+
+    async def one(session: aiohttp.ClientSession, endpoint: str, form: aiohttp.FormData) -> None:
+        start = time.perf_counter()
+        try:
+            async with session.post(f"{url}/api/{endpoint}", data=form) as response:
+                await response.read()
+                status = str(response.status)
+        except asyncio.TimeoutError:
+            status = "timeout"
+        except aiohttp.ClientError:
+            status = "connection"
+        step.outcomes.append(Outcome(endpoint, status, time.perf_counter() - start))
+
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0), timeout=timeout) as session:
+        tasks = []
+        started = time.perf_counter()
+        next_at = started
+        while True:
+            next_at += workload.rng.expovariate(rate)
+            if next_at - started >= duration_s:
+                break
+            await asyncio.sleep(max(next_at - time.perf_counter(), 0))
+            tasks.append(asyncio.create_task(one(session, *workload.next())))
+        await asyncio.gather(*tasks)
+        step.elapsed_s = time.perf_counter() - started
+    return step
+
+
+def summarize(outcomes: List[Outcome], elapsed_s: float) -> dict:
+    ok = [outcome.latency_s * 1000 for outcome in outcomes if outcome.status == "200"]
+    errors: Dict[str, int] = {}
+    for outcome in outcomes:
+        if outcome.status != "200":
+            errors[outcome.status] = errors.get(outcome.status, 0) + 1
+    percentiles = np.percentile(ok, (50, 95, 99)) if ok else [float("nan")] * 3
+    return {
+        "requests": len(outcomes),
+        "ok": len(ok),
+        "throughput_rps": round(len(ok) / elapsed_s, 3) if elapsed_s else 0.0,
+        "p50_ms": round(float(percentiles[0]), 1),
+        "p95_ms": round(float(percentiles[1]), 1),
+        "p99_ms": round(float(percentiles[2]), 1),
+        "error_rate": round(1 - len(ok) / len(outcomes), 4) if outcomes else 0.0,
+        "errors": errors,
+    }
+
+
+def report_step(step: Step, slo_p99_ms: float, max_error_rate: float) -> dict:
+    row = {"rate": step.rate, **summarize(step.outcomes, step.elapsed_s)}
+    row["endpoints"] = {
+        endpoint: summarize([outcome for outcome in step.outcomes if outcome.endpoint == endpoint], step.elapsed_s)
+        for endpoint in sorted({outcome.endpoint for outcome in step.outcomes})
+    }
+    reasons = []
+    if not row["ok"] or row["p99_ms"] > slo_p99_ms:
+        reasons.append("p99")
+    if row["error_rate"] > max_error_rate:
+        reasons.append("errors")
+    if row["throughput_rps"] < 0.9 * step.rate:
+        reasons.append("throughput")
+    row["saturated"] = reasons
+    return row
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def spawn_app(
+    workdir: str,
+    model_dir: Optional[str],
+    kokoro_url: str,
+    ready_timeout_s: float = 180.0,
+    extra_env: Optional[Dict[str, str]] = None,
+    target: str = "app:server",
+):
+    """Run the app (or target) with uvicorn in a child process, return it and its base url once ready"""
+    meta = suite.configure_environment(workdir, model_dir)
+    env = dict(
+        os.environ,
+        KOKORO_URL=kokoro_url,
+        LOG_FILE=os.path.join(workdir, "app.log"),
+        PYTHONPATH=os.pathsep.join([ROOT, BENCHMARKS]),
+        **(extra_env or {}),
+    )
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", target, "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+
+    async def ready() -> bool:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"{url}/health/ready") as response:
+                return response.status == 200
+
+    deadline = time.time() + ready_timeout_s
+    while time.time() < deadline and process.poll() is None:
+        try:
+            if asyncio.run(ready()):
+                return process, url, meta
+        except aiohttp.ClientError:
+            pass
+        time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"App did not become ready, logs in {workdir}/app.log")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="already running server, nothing is spawned")
+    parser.add_argument("--model-dir", help="real checkpoint directory instead of the stub model")
+    parser.add_argument("--rates", type=float, nargs="+", default=[1, 2, 4, 8, 16], help="arrivals per second, one step each")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds of arrivals per step")
+    parser.add_argument("--mix", default="tts:1,rvc:1", help="endpoint weights")
+    parser.add_argument("--lengths", default="1:5,5:3,15:1", help="input seconds of audio and their weights")
+    parser.add_argument("--speakers", default="alice:3,bruno:1", help="target speakers and their weights")
+    parser.add_argument("--chars-per-second", type=float, default=15.0, help="text characters per second of TTS audio")
+    parser.add_argument("--kokoro-latency-ms", type=float, default=50.0)
+    parser.add_argument("--kokoro-rtf", type=float, default=0.02, help="fake Kokoro synthesis seconds per audio second")
+    parser.add_argument("--timeout", type=float, default=60.0, help="client timeout per request")
+    parser.add_argument("--slo-p99-ms", type=float, default=2000.0)
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--keep-going", action="store_true", help="run every rate even after saturation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args()
+
+    processes = []
+    meta = {"model": "external"}
+    try:
+        url = args.url
+        if url is None:
+            kokoro, kokoro_url = stub_kokoro.spawn(
+                "--latency-ms", str(args.kokoro_latency_ms),
+                "--rtf", str(args.kokoro_rtf),
+                "--chars-per-second", str(args.chars_per_second),
+            )
+            processes.append(kokoro)
+            server, url, meta = spawn_app(tempfile.mkdtemp(prefix="wsi-load-"), args.model_dir, kokoro_url)
+            processes.append(server)
+
+        workload = Workload(args.mix, args.lengths, args.speakers, args.chars_per_second, args.seed)
+        print(f"{'rate':>6} {'reqs':>5} {'ok/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}  saturated")
+        steps = []
+        for rate in args.rates:
+            row = report_step(
+                asyncio.run(run_step(url, workload, rate, args.duration, args.timeout)),
+                args.slo_p99_ms,
+                args.max_error_rate,
+            )
+            steps.append(row)
+            print(
+                f"{rate:>6g} {row['requests']:>5} {row['throughput_rps']:>7.2f} {row['p50_ms']:>8.0f} "
+                f"{row['p95_ms']:>8.0f} {row['p99_ms']:>8.0f} {row['error_rate']:>7.1%}  {','.join(row['saturated'])}"
+            )
+            if row["saturated"] and not args.keep_going:
+                break
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    saturation = next((row for row in steps if row["saturated"]), None)
+    sustained = steps[: steps.index(saturation)] if saturation else steps
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "model": meta["model"],
+        "steps": steps,
+        "capacity_rps": sustained[-1]["rate"] if sustained else None,
+        "saturation_rps": saturation["rate"] if saturation else None,
+    }
+    print(f"capacity: {report['capacity_rps']} req/s, saturated at: {report['saturation_rps']} req/s")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
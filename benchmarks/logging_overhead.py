@@ -0,0 +1,156 @@
+"""
+Custo dos logs no caminho da requisição: quanto a thread que loga gasta por
+chamada e por requisição com a fila (``project/core/logging_pipeline.py``) e com
+handlers síncronos (stderr + arquivo escritos pela própria thread, como era o
+``logging_config.py``).
+
+Por chamada: ``debug`` abaixo do nível com f-string e com ``%s``, ``info`` com
+handlers síncronos, com a fila em texto e em JSON, e ``print`` (stdout em
+/dev/null). Por requisição: ``POST /api/rvc`` no app real com o modelo falso da
+suíte, com ``LOG_LEVEL=INFO`` na fila, ``INFO`` síncrono e ``DEBUG`` na fila
+(os diagnósticos do processador só rodam nesse último), e quantos registros cada
+requisição gera.
+
+Uso:
+    python benchmarks/logging_overhead.py
+    python benchmarks/logging_overhead.py --calls 50000 --repeats 60 --seconds 5
+"""
+import argparse
+import contextlib
+import logging
+import os
+import sys
+import tempfile
+import time
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCHMARKS)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCHMARKS)
+
+import fixtures  # noqa: E402
+import suite  # noqa: E402
+
+SPEAKERS = {f"speaker_{index}": index for index in range(20)}
+
+
+class Counter(logging.Filter):
+    def __init__(self):
+        super().__init__()
+        self.records = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        self.records += 1
+        return True
+
+
+def per_call_us(function, calls: int) -> float:
+    """Best of three runs, in microseconds per call"""
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        best = min(best, time.perf_counter() - start)
+    return best / calls * 1e6
+
+
+def install_sync_handlers(log_file: str, stream) -> None:
+    """Handlers that format and write in the thread that logs, like the former logging_config.py"""
+    from project.core import logging_pipeline
+
+    logging_pipeline.shutdown_logging()
+    root = logging.getLogger()
+    root.handlers[:] = []
+    formatter = logging.Formatter(logging_pipeline.TEXT_FORMAT)
+    for handler in (logging.StreamHandler(stream), logging.FileHandler(log_file, mode="a")):
+        handler.setFormatter(formatter)
+        handler.addFilter(logging_pipeline.RequestContextFilter())
+        root.addHandler(handler)
+
+
+def configure(mode: str, level: str, log_file: str, stream) -> None:
+    from project.core import logging_pipeline
+
+    logging.getLogger().handlers[:] = []
+    if mode == "sync":
+        install_sync_handlers(log_file, stream)
+        logging.getLogger().setLevel(level)
+    else:
+        with contextlib.redirect_stderr(stream):
+            logging_pipeline.configure_logging(level=level, fmt=mode, file_path=log_file)
+
+
+def bench_calls(calls: int, log_file: str, stream) -> None:
+    logger = logging.getLogger("project.bench")
+    scenarios = [
+        ("debug desligado, f-string", "text", "INFO", lambda: logger.debug(f"Available speakers: {list(SPEAKERS.keys())}")),
+        ("debug desligado, %s", "text", "INFO", lambda: logger.debug("Available speakers: %s", SPEAKERS)),
+        ("info, síncrono", "sync", "INFO", lambda: logger.info("Converted %d samples for %s", 24000, "alice")),
+        ("info, fila texto", "text", "INFO", lambda: logger.info("Converted %d samples for %s", 24000, "alice")),
+        ("info, fila json", "json", "INFO", lambda: logger.info("Converted %d samples for %s", 24000, "alice")),
+        ("print", "text", "INFO", lambda: print("Converted", 24000, "samples for alice")),
+    ]
+    print(f"{'por chamada':<28} {'us':>8}")
+    for name, mode, level, function in scenarios:
+        configure(mode, level, log_file, stream)
+        with contextlib.redirect_stdout(stream):
+            elapsed = per_call_us(function, calls)
+        print(f"{name:<28} {elapsed:>8.2f}")
+
+
+def bench_requests(repeats: int, seconds: float, workdir: str, log_file: str, stream) -> None:
+    from fastapi.testclient import TestClient
+
+    item = fixtures.write_fixtures(os.path.join(workdir, "inputs"), durations=(seconds,), sample_rates=(24000,))[0]
+    with open(item.path, "rb") as f:
+        data = f.read()
+    counter = Counter()
+
+    with contextlib.redirect_stderr(stream):
+        from app import server
+
+    with TestClient(server) as client:
+        while client.get("/health/ready").status_code != 200:
+            time.sleep(0.1)
+
+        def convert():
+            response = client.post(
+                "/api/rvc",
+                files={"audio_file": ("input.wav", data, "audio/wav")},
+                data={"speaker": suite.SPEAKERS[1]},
+            )
+            if response.status_code != 200:
+                raise RuntimeError(f"/api/rvc returned {response.status_code}: {response.text}")
+
+        print(f"\n{'por requisição (' + f'{seconds:g}' + ' s)':<28} {'p50 ms':>8} {'p95 ms':>8} {'registros':>10}")
+        for name, mode, level in (("INFO, fila", "text", "INFO"), ("INFO, síncrono", "sync", "INFO"), ("DEBUG, fila", "text", "DEBUG")):
+            configure(mode, level, log_file, stream)
+            logging.getLogger().handlers[0].addFilter(counter)
+            counter.records = 0
+            result = suite.measure(convert, repeats, seconds)
+            records = counter.records / (result["samples"] + 1)
+            print(f"{name:<28} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {records:>10.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20000, help="log calls per per-call scenario")
+    parser.add_argument("--repeats", type=int, default=30, help="requests per request scenario")
+    parser.add_argument("--seconds", type=float, default=1.0, help="duration of the converted audio")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="wsi-logging-")
+    suite.configure_environment(workdir, None)
+    log_file = os.path.join(workdir, "app.log")
+    with open(os.devnull, "w") as devnull:
+        bench_calls(args.calls, log_file, devnull)
+        bench_requests(args.repeats, args.seconds, workdir, log_file, devnull)
+
+    from project.core import logging_pipeline
+
+    logging_pipeline.shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Latência total do /api/tts em função do tamanho do texto: uma chamada única
+(Kokoro inteiro + conversão inteira) vs. modo texto longo (frases em paralelo).
+
+Usa o Kokoro falso (``benchmarks/stub_kokoro.py``) e um conversor sintético que
+ocupa um de ``--workers`` threads por ``--base-ms`` + ``--rtf`` × duração,
+como os workers de conversão do ``CoreConversionService``.
+
+Uso:
+    python benchmarks/long_text.py
+    python benchmarks/long_text.py --chars 250 1000 3000 --workers 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import stub_kokoro  # noqa: E402
+from project.conversor.audio.pcm import decode_tts_audio  # noqa: E402
+from project.tts.long_text import LongTextPipeline  # noqa: E402
+from project.tts.tts_provider import TtsProvider  # noqa: E402
+
+SENTENCES = [
+    "Your call is important to us.",
+    "Please stay on the line and an agent will answer shortly.",
+    "For billing questions, press one.",
+    "To report a problem with your service, press two, or say the word support at any time.",
+    "You can also visit our website, where most requests are handled in a few minutes.",
+]
+
+
+def make_text(chars: int) -> str:
+    text, index = "", 0
+    while len(text) < chars:
+        text += SENTENCES[index % len(SENTENCES)] + " "
+        index += 1
+    return text.strip()
+
+
+async def run(url: str, args) -> list[dict]:
+    provider = TtsProvider(url=url, max_connections=8)
+    executor = ThreadPoolExecutor(max_workers=args.workers)
+
+    async def synthesize(text: str) -> np.ndarray:
+        result = await provider.synthesize(text, {"response_format": "pcm"})
+        return decode_tts_audio(result["audio"], result["content_type"])
+
+    async def convert(audio: np.ndarray) -> np.ndarray:
+        seconds = args.base_ms / 1000 + args.rtf * len(audio) / 24000
+        await asyncio.get_running_loop().run_in_executor(executor, time.sleep, seconds)
+        return audio
+
+    results = []
+    try:
+        for chars in args.chars:
+            text = make_text(chars)
+            start = time.perf_counter()
+            await convert(await synthesize(text))
+            single = time.perf_counter() - start
+
+            pipeline = LongTextPipeline(synthesize, convert, conversion_concurrency=args.workers)
+            start = time.perf_counter()
+            audio, timings = await pipeline.run(text)
+            parallel = time.perf_counter() - start
+            results.append({
+                "chars": len(text),
+                "audio_s": round(len(audio) / 24000, 1),
+                "segments": len(timings),
+                "single_ms": single * 1000,
+                "long_text_ms": parallel * 1000,
+            })
+    finally:
+        await provider.close()
+        executor.shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Use a running Kokoro instead of the local stub")
+    parser.add_argument("--chars", type=int, nargs="+", default=[150, 500, 1500, 3000])
+    parser.add_argument("--workers", type=int, default=2, help="Conversion workers (CONVERSION_WORKERS)")
+    parser.add_argument("--kokoro-latency-ms", type=float, default=150.0)
+    parser.add_argument("--kokoro-rtf", type=float, default=0.2, help="Stub synthesis seconds per audio second")
+    parser.add_argument("--base-ms", type=float, default=60.0, help="Fixed cost of one conversion call")
+    parser.add_argument("--rtf", type=float, default=0.2, help="Conversion seconds per audio second")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    process, url = (None, args.url) if args.url else stub_kokoro.spawn(
+        "--latency-ms", str(args.kokoro_latency_ms), "--rtf", str(args.kokoro_rtf)
+    )
+    try:
+        results = asyncio.run(run(url, args))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'chars':>6}{'audio':>8}{'segments':>10}{'single':>12}{'long text':>12}")
+    for r in results:
+        print(
+            f"{r['chars']:>6}{r['audio_s']:>7.1f}s{r['segments']:>10}"
+            f"{r['single_ms']:>10.0f}ms{r['long_text_ms']:>10.0f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark da conversão para vários locutores: N chamadas independentes (cada uma
+com ``extract_se`` + inferência completa) vs ``voice_conversion_multi`` (fonte
+analisada e codificada uma vez, fluxo reverso e decoder em lote por alvo).
+
+Usa um OpenVoice com pesos aleatórios e a config padrão; o custo por amostra é o
+mesmo do modelo treinado. Também confere que a saída em lote é igual à da
+conversão individual (com ``tau=0`` para tirar a amostragem do encoder).
+
+Uso:
+    python benchmarks/multi_target.py --seconds 1 --speakers 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def build_processor():
+    from TTS.vc.configs.openvoice_config import OpenVoiceConfig  # type: ignore
+    from TTS.vc.models.openvoice import OpenVoice  # type: ignore
+
+    from project.conversor.processor import VoiceConverterProcessor
+    from project.conversor.wrapper.model_wrapper import VoiceConverterModelWrapper
+    from project.model.factory import OpenVoiceModelAdapter
+
+    model = OpenVoice(OpenVoiceConfig())
+    model.eval()
+    model.tau = 0.0
+    adapter = object.__new__(OpenVoiceModelAdapter)
+    adapter.model, adapter.config = model, model.config
+    wrapper = object.__new__(VoiceConverterModelWrapper)
+    wrapper.model = adapter
+    return wrapper, VoiceConverterProcessor(wrapper)
+
+
+def timed(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=1.0, help="source audio duration")
+    parser.add_argument("--speakers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeats", type=int, default=2)
+    args = parser.parse_args()
+
+    import numpy as np
+    import torch
+
+    torch.manual_seed(0)
+    wrapper, processor = build_processor()
+    sample_rate = wrapper.config.audio.input_sample_rate
+    t = np.arange(int(args.seconds * sample_rate)) / sample_rate
+    audio = (0.3 * np.sin(2 * np.pi * 180 * t) * (1 + 0.5 * np.sin(2 * np.pi * 3 * t))).astype(np.float32)
+    targets = [torch.randn(1, wrapper.model.model.args.gin_channels, 1) for _ in range(max(args.speakers))]
+
+    def sequential(n):
+        return [processor.voice_conversion_with_target_se(audio, tgt) for tgt in targets[:n]]
+
+    def batched(n):
+        return processor.voice_conversion_multi(audio, targets[:n])
+
+    # quiet the per-call diagnostics of the single-target path
+    sys.stdout, stdout = open(os.devnull, "w"), sys.stdout
+    try:
+        single = sequential(2)
+        multi = batched(2)
+        rows = [(n, timed(lambda: sequential(n), args.repeats), timed(lambda: batched(n), args.repeats)) for n in args.speakers]
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    error = max(float(np.max(np.abs(a - b))) for a, b in zip(single, multi))
+    print(f"source {args.seconds:.1f} s, torch threads {torch.get_num_threads()}, max |single - batched| = {error:.2e}")
+    print(f"{'speakers':>8} {'sequential s':>13} {'batched s':>10} {'speedup':>8}")
+    for n, seq_s, multi_s in rows:
+        print(f"{n:>8} {seq_s:>13.3f} {multi_s:>10.3f} {seq_s / multi_s:>7.2f}x")
+    if len(rows) > 1:
+        (n0, seq0, multi0), (n1, seq1, multi1) = rows[0], rows[-1]
+        print(
+            f"marginal cost per extra speaker: sequential {1000 * (seq1 - seq0) / (n1 - n0):.0f} ms, "
+            f"batched {1000 * (multi1 - multi0) / (n1 - n0):.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Memória por worker e vazão: ``python main.py`` (um processo uvicorn) vs gunicorn
+(``gunicorn.conf.py``) com e sem preload no master.
+
+Cada configuração sobe o app real numa porta local com o modelo falso da suíte
+(``STUB_MODEL_EXTRA_MB`` simula o tamanho do checkpoint) e os locutores
+sintéticos. Depois do aquecimento mede a memória da árvore de processos (PSS
+soma as páginas compartilhadas divididas entre quem as usa, USS é o que só o
+worker tem) e dispara ``POST /api/rvc`` com ``--concurrency`` requisições
+simultâneas por ``--duration`` segundos.
+
+Uso:
+    python benchmarks/prefork.py --workers 2 --extra-mb 128
+    python benchmarks/prefork.py --workers 4 --configs gunicorn-preload gunicorn --concurrency 8
+"""
+import argparse
+import asyncio
+import io
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import aiohttp
+import numpy as np
+import psutil
+import soundfile as sf
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCHMARKS)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCHMARKS)
+
+import fixtures  # noqa: E402
+import suite  # noqa: E402
+
+CONFIGS = ("main", "gunicorn", "gunicorn-preload")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(url: str, process: subprocess.Popen, timeout_s: float = 180.0) -> None:
+    deadline = time.time() + timeout_s
+    while time.time() < deadline and process.poll() is None:
+        try:
+            with urllib.request.urlopen(f"{url}/health/ready", timeout=2) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not become ready")
+
+
+def start(config: str, workdir: str, workers: int) -> tuple:
+    port = _free_port()
+    env = dict(os.environ, PORT=str(port), WEB_WORKERS=str(workers), PYTHONPATH=os.pathsep.join([ROOT, BENCHMARKS]))
+    if config == "main":
+        command = [sys.executable, os.path.join(ROOT, "main.py")]
+    else:
+        env["WEB_PRELOAD"] = "true" if config == "gunicorn-preload" else "false"
+        command = [sys.executable, "-m", "gunicorn", "-c", os.path.join(ROOT, "gunicorn.conf.py"), "app:server"]
+    process = subprocess.Popen(command, cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    wait_ready(url, process)
+    return process, url
+
+
+def memory(pid: int) -> dict:
+    """PSS of the whole process tree and PSS/USS of the serving processes, in MB"""
+    root = psutil.Process(pid)
+    children = root.children(recursive=True)
+    info = {process.pid: process.memory_full_info() for process in [root, *children]}
+    workers = children or [root]
+    return {
+        "processes": len(info),
+        "total_pss_mb": sum(item.pss for item in info.values()) / 2**20,
+        "worker_pss_mb": float(np.mean([info[process.pid].pss for process in workers])) / 2**20,
+        "worker_uss_mb": float(np.mean([info[process.pid].uss for process in workers])) / 2**20,
+    }
+
+
+async def load(url: str, body: bytes, concurrency: int, duration_s: float) -> dict:
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration_s
+
+    async def client(session: aiohttp.ClientSession) -> None:
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            form = aiohttp.FormData()
+            form.add_field("speaker", suite.SPEAKERS[0])
+            form.add_field("audio_file", body, filename="input.wav", content_type="audio/wav")
+            start = time.perf_counter()
+            async with session.post(f"{url}/api/rvc", data=form) as response:
+                await response.read()
+                if response.status == 200:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+
+    started = time.perf_counter()
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=120)) as session:
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)) * 1000 if latencies else float("nan"),
+        "p99_ms": float(np.percentile(latencies, 99)) * 1000 if latencies else float("nan"),
+        "errors": errors,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--configs", nargs="+", default=list(CONFIGS), choices=CONFIGS)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--extra-mb", type=int, default=128, help="unused stub weights, the size of a real checkpoint")
+    parser.add_argument("--seconds", type=float, default=1.0, help="duration of the converted audio")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=8.0)
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds of load before measuring")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="wsi-prefork-")
+    suite.configure_environment(workdir, None)
+    os.environ["STUB_MODEL_EXTRA_MB"] = str(args.extra_mb)
+    buffer = io.BytesIO()
+    sf.write(buffer, fixtures.synthetic_voice(args.seconds, 24000), 24000, format="WAV", subtype="PCM_16")
+    body = buffer.getvalue()
+
+    print(
+        f"{args.workers} workers, stub model +{args.extra_mb} MB, {args.seconds:g} s inputs, "
+        f"concurrency {args.concurrency}, {psutil.cpu_count()} CPUs"
+    )
+    print(f"{'config':<18} {'procs':>5} {'total PSS':>10} {'worker PSS':>11} {'worker USS':>11} {'req/s':>7} {'p50 ms':>7} {'p99 ms':>7}")
+    for config in args.configs:
+        process, url = start(config, workdir, args.workers)
+        try:
+            asyncio.run(load(url, body, args.concurrency, args.warmup))
+            time.sleep(1)
+            before = memory(process.pid)
+            result = asyncio.run(load(url, body, args.concurrency, args.duration))
+            after = memory(process.pid)
+        finally:
+            process.send_signal(signal.SIGTERM)
+            process.wait(timeout=60)
+        print(
+            f"{config:<18} {before['processes']:>5} {before['total_pss_mb']:>9.0f}M {before['worker_pss_mb']:>10.0f}M "
+            f"{before['worker_uss_mb']:>10.0f}M {result['throughput_rps']:>7.2f} {result['p50_ms']:>7.0f} {result['p99_ms']:>7.0f}"
+        )
+        print(
+            f"{'  after load':<18} {'':>5} {after['total_pss_mb']:>9.0f}M {after['worker_pss_mb']:>10.0f}M "
+            f"{after['worker_uss_mb']:>10.0f}M {'':>7} {'':>7} {result['errors']:>5} err"
+        )
+
+
+if __name__ == "__main__":
+    main()
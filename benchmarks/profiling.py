@@ -0,0 +1,127 @@
+"""
+Custo do header ``Server-Timing`` e da captura de perfis.
+
+Mede a conversão de ``VoiceConverterProcessor`` num OpenVoice com pesos aleatórios
+nos workers de ``CoreConversionService``: sem nada, com o ``RequestTimings`` no
+contexto (o que todo request paga) e perfilada (``torch.profiler`` no worker e
+amostras Python), mais o tempo de exportar os traces depois da resposta e o
+tamanho da captura. Também mede o ``ServerTimingMiddleware`` sozinho, por requisição.
+
+Uso:
+    python benchmarks/profiling.py
+    python benchmarks/profiling.py --seconds 5 --repeats 3
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import torch
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCHMARKS)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCHMARKS)
+
+import multi_target  # noqa: E402
+
+from project.conversor.core_conversion_service import CoreConversionService  # noqa: E402
+from project.router.server_timing import ServerTimingMiddleware  # noqa: E402
+from project.shared.metrics.pipeline import (  # noqa: E402
+    RequestTimings,
+    reset_request_timings,
+    server_timing_header,
+    set_request_timings,
+)
+from project.shared.metrics.profiling import Profiler, reset_profile_session, set_profile_session  # noqa: E402
+
+
+def bench_middleware(requests: int = 20000) -> None:
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        pass
+
+    async def run(handler):
+        start = time.perf_counter()
+        for _ in range(requests):
+            await handler({"type": "http", "path": "/api/rvc"}, None, send)
+        return (time.perf_counter() - start) / requests
+
+    bare = asyncio.run(run(app))
+    timed = asyncio.run(run(ServerTimingMiddleware(app)))
+    print(f"ServerTimingMiddleware: {1e6 * (timed - bare):.1f} µs por requisição")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=2.0, help="source audio duration")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    wrapper, processor = multi_target.build_processor()
+    sample_rate = wrapper.config.audio.input_sample_rate
+    t = np.arange(int(args.seconds * sample_rate)) / sample_rate
+    audio = (0.3 * np.sin(2 * np.pi * 180 * t) * (1 + 0.5 * np.sin(2 * np.pi * 3 * t))).astype(np.float32)
+    target = torch.randn(1, wrapper.model.model.args.gin_channels, 1)
+    service = object.__new__(CoreConversionService)
+    service.conversion_executor = ThreadPoolExecutor(max_workers=1)
+    profiler = Profiler(tempfile.mkdtemp(prefix="wsi-profiles-"))
+
+    async def convert(timings: bool, profiled: bool):
+        timings_token = set_request_timings(RequestTimings() if timings else None)
+        session = profiler.start("/api/rvc") if profiled else None
+        session_token = set_profile_session(session)
+        start = time.perf_counter()
+        try:
+            await service._run_on_workers(processor.voice_conversion_with_target_se, audio, target)
+        finally:
+            elapsed = time.perf_counter() - start
+            reset_profile_session(session_token)
+            reset_request_timings(timings_token)
+        return elapsed, session
+
+    def measure(timings: bool, profiled: bool):
+        best, sessions = float("inf"), []
+        for _ in range(args.repeats):
+            if profiled:
+                profiler.arm(1)
+            elapsed, session = asyncio.run(convert(timings, profiled))
+            best, sessions = min(best, elapsed), sessions + [session]
+        return best, sessions
+
+    asyncio.run(convert(False, False))  # warm-up
+    profiler.arm(1)
+    _, first = asyncio.run(convert(True, True))  # the first torch.profiler start pays its setup
+    profiler.finish(first, {"duration_ms": 0.0})
+
+    print(f"{'':<28} {'ms':>9} {'RTF':>7}")
+    for name, timings, profiled in (
+        ("sem Server-Timing", False, False),
+        ("com Server-Timing", True, False),
+        ("perfilada", True, True),
+    ):
+        best, sessions = measure(timings, profiled)
+        print(f"{name:<28} {1000 * best:>9.1f} {best / args.seconds:>7.3f}")
+
+    for session in sessions[:-1]:
+        profiler.finish(session, {"duration_ms": 1000 * best})
+    start = time.perf_counter()
+    profiler.finish(sessions[-1], {"duration_ms": 1000 * best})
+    export = time.perf_counter() - start
+    files = profiler.capture_files(sessions[-1].id)
+    size = sum(os.path.getsize(path) for path in files)
+    print(f"exportar a captura (fora da resposta): {1000 * export:.0f} ms, {size / 1e6:.1f} MB")
+    print(f"Server-Timing de exemplo: {server_timing_header({'decode': 0.004, 'inference': best}, best + 0.004)}")
+    bench_middleware()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Custo e qualidade de cada nível de qualidade sob sobrecarga.
+
+Para cada nível (``full``, ``reduced``, ``capped``) mede a conversão completa de
+``VoiceConverterProcessor`` num OpenVoice com pesos aleatórios (o custo por amostra
+é o do modelo treinado): tempo, RTF e SNR da saída contra a do nível ``full``
+(``tau=0`` tira a amostragem do encoder). ``capped`` converte como ``reduced`` e
+ainda recusa entradas longas: a tabela final mostra, numa mistura de durações,
+a parte das requisições e do tempo de GPU/CPU que o limite corta. Também mede o
+custo de ``QualityGovernor.choose`` por requisição.
+
+Uso:
+    python benchmarks/quality_tiers.py
+    python benchmarks/quality_tiers.py --seconds 2 5 10 --max-input 20
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import torch
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCHMARKS)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCHMARKS)
+
+import multi_target  # noqa: E402
+
+from project.conversor.admission.quality import QualityGovernor, reset_quality_tier, set_quality_tier  # noqa: E402
+
+
+def snr_db(reference: np.ndarray, output: np.ndarray) -> float:
+    noise = reference - output
+    return float(10 * np.log10(np.sum(reference ** 2) / max(np.sum(noise ** 2), 1e-20)))
+
+
+def convert(processor, audio: np.ndarray, target: torch.Tensor, tier) -> np.ndarray:
+    token = set_quality_tier(tier)
+    try:
+        return processor.voice_conversion_with_target_se(audio, target)
+    finally:
+        reset_quality_tier(token)
+
+
+def bench_tiers(seconds_list, repeats: int, max_input_s: float) -> None:
+    torch.manual_seed(0)
+    wrapper, processor = multi_target.build_processor()
+    wrapper.model._reduced_dec, wrapper.model._reduced_lock = None, threading.Lock()
+    tiers = QualityGovernor(queue_depth=lambda: 0, max_input_s=max_input_s).tiers
+    sample_rate = wrapper.config.audio.input_sample_rate
+    target = torch.randn(1, wrapper.model.model.args.gin_channels, 1)
+
+    print(f"{'nível':<10} {'áudio s':>8} {'ms':>9} {'RTF':>7} {'SNR dB':>8}")
+    for seconds in seconds_list:
+        t = np.arange(int(seconds * sample_rate)) / sample_rate
+        audio = (0.3 * np.sin(2 * np.pi * 180 * t) * (1 + 0.5 * np.sin(2 * np.pi * 3 * t))).astype(np.float32)
+        reference = None
+        for tier in tiers:
+            convert(processor, audio, target, tier)  # warm-up, builds the reduced decoder once
+            best, output = float("inf"), None
+            for _ in range(repeats):
+                start = time.perf_counter()
+                output = convert(processor, audio, target, tier)
+                best = min(best, time.perf_counter() - start)
+            reference = output if reference is None else reference
+            snr = "-" if output is reference else f"{snr_db(reference, output):.1f}"
+            print(f"{tier.name:<10} {seconds:>8.1f} {1000 * best:>9.1f} {best / seconds:>7.3f} {snr:>8}")
+
+
+def bench_cap(max_input_s: float, requests: int = 10000) -> None:
+    # request lengths skewed to short clips with a long tail, as in the load test mix
+    durations = np.random.default_rng(0).lognormal(mean=np.log(6), sigma=0.9, size=requests)
+    shed = durations > max_input_s
+    print(
+        f"\ncapped, entradas > {max_input_s:.0f} s: {shed.mean():.1%} das requisições recusadas, "
+        f"{durations[shed].sum() / durations.sum():.1%} do tempo de conversão poupado"
+    )
+
+
+def bench_governor(calls: int = 100000) -> None:
+    governor = QualityGovernor(queue_depth=lambda: 3)
+    for _ in range(200):
+        governor.observe(1.0)
+    start = time.perf_counter()
+    for _ in range(calls):
+        governor.choose()
+    print(f"QualityGovernor.choose: {1e6 * (time.perf_counter() - start) / calls:.1f} µs por requisição")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, nargs="+", default=[2.0, 5.0])
+    parser.add_argument("--repeats", type=int, default=2)
+    parser.add_argument("--max-input", type=float, default=20.0, help="QUALITY_TIER_MAX_INPUT_S")
+    args = parser.parse_args()
+
+    bench_tiers(args.seconds, args.repeats, args.max_input)
+    bench_cap(args.max_input)
+    bench_governor()
+
+
+if __name__ == "__main__":
+    main()
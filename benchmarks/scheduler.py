@@ -0,0 +1,82 @@
+"""
+Benchmark do escalonador: latência de requisições interativas atrás de um backlog bulk.
+
+Um worker simulado (a conversão é um ``asyncio.sleep`` com o custo previsto) tem
+memória para uma conversão por vez. Um job bulk enfileira ``--bulk`` segmentos e
+requisições interativas chegam a cada ``--interval-ms``. Compara a fila FIFO (todas
+na mesma classe) com as classes de prioridade.
+
+Uso:
+    python benchmarks/scheduler.py --bulk 40 --interactive 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from project.conversor.admission.controller import MB, AdmissionController, CostProfile  # noqa: E402
+from project.conversor.admission.scheduler import (  # noqa: E402
+    BULK,
+    INTERACTIVE,
+    SchedulingContext,
+    set_scheduling_context,
+)
+
+# 1 s of audio takes 20 ms and 100 MB, the budget fits one conversion
+PROFILE = CostProfile(base_memory_bytes=0, memory_bytes_per_second=100 * MB, base_seconds=0, seconds_per_second=0.02)
+
+
+async def convert(controller, context, latencies=None):
+    set_scheduling_context(context)
+    start = time.perf_counter()
+    async with controller.admit(1.0) as (_, seconds):
+        await asyncio.sleep(seconds)
+    if latencies is not None:
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(bulk: int, interactive: int, interval_s: float, prioritized: bool) -> list:
+    controller = AdmissionController(
+        memory_budget_bytes=100 * MB,
+        max_queue=bulk + interactive,
+        queue_timeout_s=600,
+        memory_headroom_bytes=0,
+        available_memory=lambda: 10_000 * MB,
+    )
+    controller.set_profile(None, PROFILE)
+    latencies = []
+    backlog = [asyncio.create_task(convert(controller, SchedulingContext(priority=BULK))) for _ in range(bulk)]
+    await asyncio.sleep(0)
+    live = []
+    for _ in range(interactive):
+        context = SchedulingContext(priority=INTERACTIVE if prioritized else BULK)
+        live.append(asyncio.create_task(convert(controller, context, latencies)))
+        await asyncio.sleep(interval_s)
+    await asyncio.gather(*backlog, *live)
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bulk", type=int, default=40)
+    parser.add_argument("--interactive", type=int, default=20)
+    parser.add_argument("--interval-ms", type=float, default=30)
+    args = parser.parse_args()
+
+    print(f"{args.bulk} queued bulk segments, {args.interactive} interactive requests every {args.interval_ms:.0f} ms")
+    print(f"{'queue':>10} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, prioritized in (("fifo", False), ("priority", True)):
+        latencies = sorted(asyncio.run(run(args.bulk, args.interactive, args.interval_ms / 1000, prioritized)))
+        p99 = latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))]
+        print(
+            f"{name:>10} {1000 * statistics.median(latencies):>8.0f} {1000 * p99:>8.0f} {1000 * latencies[-1]:>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Servidor Kokoro falso para benchmarks e testes de carga.
+
+Responde ``POST /v1/audio/speech`` com áudio sintético a 24 kHz. A duração do
+áudio acompanha o tamanho do texto (``--chars-per-second``) e o tempo de resposta
+simula a síntese: ``--latency-ms`` até o primeiro byte e ``--rtf`` segundos de
+síntese por segundo de áudio. Com ``stream=true`` o PCM é enviado em pedaços
+conforme é "gerado", como o Kokoro faz. ``--fail-rate`` e ``--slow-rate`` injetam
+erros 500 e atrasos extras (``--slow-ms``) para testar o pool de endpoints.
+
+Uso:
+    python benchmarks/stub_kokoro.py --port 8880 --latency-ms 50
+"""
+import argparse
+import asyncio
+import functools
+import io
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import numpy as np
+import soundfile as sf
+from aiohttp import web
+
+SAMPLE_RATE = 24000
+
+
+@functools.lru_cache(maxsize=256)
+def synthetic_speech(seconds: float, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Voiced-like tone with a short pause every 0.8 s, so segment cuts have quiet spots"""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    envelope = (np.mod(t, 0.8) < 0.65).astype(np.float32)
+    audio = 0.1 * np.sin(2 * np.pi * 180 * t) * (1 + 0.3 * np.sin(2 * np.pi * 3 * t))
+    return (audio * envelope).astype(np.float32)
+
+
+@functools.lru_cache(maxsize=256)
+def encoded_speech(seconds: float, response_format: str) -> tuple[bytes, str]:
+    return encode(synthetic_speech(seconds), response_format)
+
+
+def encode(audio: np.ndarray, response_format: str) -> tuple[bytes, str]:
+    if response_format == "pcm":
+        return (np.clip(audio, -1, 1) * 32767).astype("<i2").tobytes(), "audio/pcm"
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, SAMPLE_RATE, format="WAV")
+    return buffer.getvalue(), "audio/wav"
+
+
+def create_app(
+    latency_s: float = 0.05,
+    audio_seconds: float = 1.0,
+    chars_per_second: float = 15.0,
+    rtf: float = 0.0,
+    chunk_s: float = 0.25,
+    fail_rate: float = 0.0,
+    slow_rate: float = 0.0,
+    slow_s: float = 1.0,
+) -> web.Application:
+    stats = {"requests": 0, "connections": set()}
+    rng = random.Random(0)
+
+    async def health(request: web.Request) -> web.Response:
+        return web.json_response({"status": "healthy"})
+
+    async def speech(request: web.Request) -> web.StreamResponse:
+        payload = await request.json()
+        stats["requests"] += 1
+        stats["connections"].add(request.transport.get_extra_info("peername"))
+        seconds = round(max(audio_seconds, len(payload.get("input", "")) / chars_per_second), 2)
+        response_format = payload.get("response_format", "mp3")
+        await asyncio.sleep(latency_s + (slow_s if rng.random() < slow_rate else 0.0))
+        if rng.random() < fail_rate:
+            return web.json_response({"detail": "injected failure"}, status=500)
+
+        if not payload.get("stream"):
+            await asyncio.sleep(seconds * rtf)
+            body, content_type = encoded_speech(seconds, response_format)
+            return web.Response(body=body, content_type=content_type)
+
+        audio = synthetic_speech(seconds)
+        response = web.StreamResponse(headers={"Content-Type": "audio/pcm"})
+        await response.prepare(request)
+        chunk = int(chunk_s * SAMPLE_RATE)
+        started = time.perf_counter()
+        for offset in range(0, len(audio), chunk):
+            piece = audio[offset:offset + chunk]
+            # a chunk is sent once its synthesis time has passed
+            ready_at = started + (offset + len(piece)) / SAMPLE_RATE * rtf
+            await asyncio.sleep(max(ready_at - time.perf_counter(), 0))
+            await response.write(encode(piece, "pcm")[0])
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app["stats"] = stats
+    app.router.add_get("/health", health)
+    app.router.add_post("/v1/audio/speech", speech)
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def spawn(*args: str) -> tuple[subprocess.Popen, str]:
+    """Run the stub in a child process, return it and its base url once it accepts connections"""
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--port", str(port), *args],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process, f"http://127.0.0.1:{port}/v1"
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("Stub Kokoro server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8880)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Delay before the first byte")
+    parser.add_argument("--audio-seconds", type=float, default=1.0, help="Minimum audio duration")
+    parser.add_argument("--chars-per-second", type=float, default=15.0)
+    parser.add_argument("--rtf", type=float, default=0.0, help="Synthesis seconds per audio second")
+    parser.add_argument("--chunk-ms", type=float, default=250.0, help="Streamed chunk duration")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of requests answered with 500")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Share of requests delayed by --slow-ms")
+    parser.add_argument("--slow-ms", type=float, default=1000.0)
+    args = parser.parse_args()
+    web.run_app(
+        create_app(
+            args.latency_ms / 1000,
+            args.audio_seconds,
+            args.chars_per_second,
+            args.rtf,
+            args.chunk_ms / 1000,
+            args.fail_rate,
+            args.slow_rate,
+            args.slow_ms / 1000,
+        ),
+        host=args.host,
+        port=args.port,
+        print=None,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Modelo de conversão falso para benchmarks, sem checkpoint, GPU ou rede.
+
+``StubVoiceModel`` implementa ``VoiceModel`` com as mesmas formas do OpenVoice
+(embedding ``[1, 256, 1]``, espectrograma linear ``[1, 513, T]`` e áudio
+``[1, 1, T * hop]``) e gasta CPU de forma determinística: cada quadro do
+espectrograma passa por ``layers`` camadas densas de largura ``hidden``,
+condicionadas pelo embedding do locutor alvo. Os pesos saem de uma semente fixa,
+então a mesma entrada gera sempre a mesma saída com o mesmo custo.
+
+O custo vem da chave ``stub`` do ``config.json`` do diretório do modelo e pode
+ser sobrescrito por ``STUB_MODEL_HIDDEN`` e ``STUB_MODEL_LAYERS``;
+``STUB_MODEL_EXTRA_MB`` acrescenta pesos que não entram no cálculo, para o stub
+ocupar a memória de um checkpoint real (o do OpenVoice tem ~130 MB). O serviço usa
+o stub com ``VOICE_MODEL_CLASS=stub_model:StubVoiceModel`` e ``benchmarks/`` no
+``PYTHONPATH``; ``write_checkpoint`` cria o diretório de modelo esperado.
+
+Uso:
+    python benchmarks/stub_model.py --seconds 1 5 --hidden 512 --layers 8
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+from typing import Any, Tuple
+
+import numpy as np
+import torch
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from project.model.factory import ModelConfig, VoiceModel  # noqa: E402
+
+SAMPLE_RATE = 22050
+EMBEDDING_DIM = 256
+DEFAULT_HIDDEN = 512
+DEFAULT_LAYERS = 8
+SEED = 1234
+
+
+def write_checkpoint(model_dir: str, hidden: int = DEFAULT_HIDDEN, layers: int = DEFAULT_LAYERS) -> str:
+    """Create the ``model.pth`` + ``config.json`` pair the model wrapper expects"""
+    os.makedirs(model_dir, exist_ok=True)
+    with open(os.path.join(model_dir, "config.json"), "w", encoding="utf-8") as f:
+        json.dump({"stub": {"hidden": hidden, "layers": layers}}, f)
+    open(os.path.join(model_dir, "model.pth"), "wb").close()
+    return model_dir
+
+
+class StubNet(torch.nn.Module):
+    """Dense layers sized like a small vocoder, every weight drawn from a fixed seed"""
+
+    def __init__(self, n_freqs: int, hop_length: int, hidden: int, layers: int, extra_mb: int = 0):
+        super().__init__()
+        generator = torch.Generator().manual_seed(SEED)
+
+        def weight(*shape):
+            return torch.nn.Parameter(torch.randn(*shape, generator=generator) / shape[0] ** 0.5, requires_grad=False)
+
+        self.w_se = weight(n_freqs, EMBEDDING_DIM)
+        self.w_in = weight(n_freqs, hidden)
+        self.w_g = weight(EMBEDDING_DIM, hidden)
+        self.w_layers = torch.nn.ParameterList([weight(hidden, hidden) for _ in range(layers)])
+        self.w_out = weight(hidden, hop_length)
+        self.w_extra = weight(extra_mb * 2**18, 1) if extra_mb else None
+
+
+class StubVoiceModel(VoiceModel):
+    """Deterministic VoiceModel with a configurable CPU cost per spectrogram frame"""
+
+    def __init__(self, config: ModelConfig):
+        self.config = SimpleNamespace(
+            audio=SimpleNamespace(
+                input_sample_rate=SAMPLE_RATE,
+                output_sample_rate=SAMPLE_RATE,
+                fft_size=1024,
+                hop_length=256,
+                win_length=1024,
+            )
+        )
+        self.hidden, self.layers, self.extra_mb = DEFAULT_HIDDEN, DEFAULT_LAYERS, 0
+        self.model = self._build()
+
+    def _build(self) -> StubNet:
+        audio = self.config.audio
+        return StubNet(audio.fft_size // 2 + 1, audio.hop_length, self.hidden, self.layers, self.extra_mb).eval()
+
+    @property
+    def device(self) -> torch.device:
+        return self.model.w_in.device
+
+    def load_checkpoint(self, config: ModelConfig) -> None:
+        config_path = os.path.join(os.path.dirname(config.model_path), "config.json")
+        stub = {}
+        if os.path.exists(config_path):
+            with open(config_path, encoding="utf-8") as f:
+                stub = json.load(f).get("stub", {})
+        self.hidden = int(os.environ.get("STUB_MODEL_HIDDEN", stub.get("hidden", DEFAULT_HIDDEN)))
+        self.layers = int(os.environ.get("STUB_MODEL_LAYERS", stub.get("layers", DEFAULT_LAYERS)))
+        self.extra_mb = int(os.environ.get("STUB_MODEL_EXTRA_MB", stub.get("extra_mb", 0)))
+        self.model = self._build()
+
+    def to_cuda(self) -> None:
+        self.model.cuda()
+
+    def to_cpu(self) -> None:
+        self.model.cpu()
+
+    def load_audio(self, src: Any) -> torch.Tensor:
+        if isinstance(src, str):
+            import librosa
+
+            src, _ = librosa.load(src, sr=self.config.audio.input_sample_rate)
+        return torch.as_tensor(np.asarray(src, dtype=np.float32)).to(self.device)
+
+    def spectrogram(self, src: Any) -> torch.Tensor:
+        audio = self.config.audio
+        y = self.load_audio(src)
+        pad = (audio.fft_size - audio.hop_length) // 2
+        y = torch.nn.functional.pad(y.view(1, 1, -1), (pad, pad), mode="reflect").view(-1)
+        spec = torch.stft(
+            y,
+            audio.fft_size,
+            hop_length=audio.hop_length,
+            win_length=audio.win_length,
+            window=torch.hann_window(audio.win_length, device=y.device),
+            center=False,
+            return_complex=True,
+        )
+        return torch.sqrt(spec.abs().pow(2) + 1e-6).unsqueeze(0)
+
+    def extract_se(self, src: Any) -> Tuple[torch.Tensor, Any]:
+        spec = self.spectrogram(src)
+        g = torch.tanh(spec.mean(-1) @ self.model.w_se)
+        return torch.nn.functional.normalize(g, dim=1).unsqueeze(-1), spec
+
+    def _encode(self, src_spec: torch.Tensor) -> torch.Tensor:
+        return src_spec[0].transpose(0, 1) @ self.model.w_in
+
+    def _decode(self, h: torch.Tensor, g_src: torch.Tensor, g_tgt: torch.Tensor) -> torch.Tensor:
+        cond = (g_tgt - g_src).reshape(1, -1) @ self.model.w_g
+        for w in self.model.w_layers:
+            h = torch.tanh(h @ w + cond)
+        return (0.1 * torch.tanh(h @ self.model.w_out)).reshape(1, 1, -1)
+
+    def inference(self, src_spec: torch.Tensor, aux_input: Any) -> torch.Tensor:
+        wav = self._decode(self._encode(src_spec), aux_input["g_src"], aux_input["g_tgt"])
+        return {"model_outputs": wav}
+
+    def inference_multi(self, src_spec: torch.Tensor, g_src: torch.Tensor, g_tgts: torch.Tensor) -> torch.Tensor:
+        h = self._encode(src_spec)
+        return torch.cat([self._decode(h, g_src, g_tgt) for g_tgt in g_tgts])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, nargs="+", default=[1.0, 5.0])
+    parser.add_argument("--hidden", type=int, default=DEFAULT_HIDDEN)
+    parser.add_argument("--layers", type=int, default=DEFAULT_LAYERS)
+    args = parser.parse_args()
+
+    os.environ["STUB_MODEL_HIDDEN"], os.environ["STUB_MODEL_LAYERS"] = str(args.hidden), str(args.layers)
+    model = StubVoiceModel(ModelConfig(config_path="", model_path=""))
+    model.load_checkpoint(ModelConfig(config_path="", model_path=""))
+    print(f"hidden {args.hidden}, layers {args.layers}, torch threads {torch.get_num_threads()}")
+    for seconds in args.seconds:
+        t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+        audio = (0.1 * np.sin(2 * np.pi * 180 * t)).astype(np.float32)
+        with torch.inference_mode():
+            g, spec = model.extract_se(audio)
+            start = time.perf_counter()
+            model.inference(spec, {"g_src": g, "g_tgt": -g})
+            elapsed = time.perf_counter() - start
+        print(f"{seconds:>6.1f} s audio: inference {1000 * elapsed:.1f} ms, RTF {elapsed / seconds:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""
+Suíte de benchmarks reprodutível: roda numa máquina só com CPU, sem rede e sem o
+checkpoint do OpenVoice.
+
+Por padrão o modelo é o ``StubVoiceModel`` (``benchmarks/stub_model.py``),
+carregado pelo próprio serviço via ``VOICE_MODEL_CLASS``; com ``--model-dir`` a
+mesma suíte roda com um checkpoint real. Os áudios de entrada e os locutores são
+gerados por ``benchmarks/fixtures.py`` num diretório temporário.
+
+Cenários (um resultado por duração, e por taxa de amostragem no decode):
+
+- ``decode``: upload de um WAV → ``AudioLoadingService`` (arquivo temporário,
+  librosa e reamostragem para 24 kHz);
+- ``conversion``: ``VoiceConverterProcessor`` com o áudio já decodificado;
+- ``postprocess``: saída float32 da conversão → WAV em memória;
+- ``http``: ``POST /api/rvc`` ponta a ponta no app real (``TestClient``), com
+  carregamento do modelo, embeddings, admissão e escrita da resposta.
+
+Para cada resultado: latência p50/p95/p99 (ms), RTF (p50 / duração do áudio) e
+pico de RSS do processo (MB). As repetições são divididas em rodadas e vale a
+melhor rodada. O JSON vai para ``--output`` (ou stdout).
+
+``--baseline`` compara com um resultado gravado e sai com código 1 quando p50,
+p95 ou o pico de RSS pioram mais que ``--tolerance`` (diferenças abaixo de
+``--min-delta-ms`` são ignoradas); ``--update-baseline`` regrava o arquivo. Antes
+de cada grupo de cenários a suíte cronometra uma carga fixa de CPU
+(``calibration_ms``) e as latências do baseline são escaladas pela razão entre as
+duas calibrações, assim uma máquina mais lenta ou ocupada não vira regressão; uma
+regressão só é reportada se aparecer de novo numa segunda medição
+(``--retries``). O baseline só vale para o modelo (stub ou checkpoint) em que foi gravado.
+
+Uso:
+    python benchmarks/suite.py --baseline benchmarks/baseline.json
+    python benchmarks/suite.py --baseline benchmarks/baseline.json --update-baseline
+    python benchmarks/suite.py --model-dir /mnt/data/wsi_vc/vc_models --output real.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCHMARKS)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCHMARKS)
+
+import fixtures  # noqa: E402
+
+STUB_MODEL_CLASS = "stub_model:StubVoiceModel"
+LOADING_SAMPLE_RATE = 24000
+SPEAKERS = ("alice", "bruno")
+COMPARED = ("p50_ms", "p95_ms")
+
+
+def configure_environment(workdir: str, model_dir: Optional[str]) -> dict:
+    """Point the service at the fixtures, must run before anything under project/ is imported"""
+    speakers_dir = os.path.join(workdir, "speakers")
+    os.makedirs(speakers_dir, exist_ok=True)
+    for seed, speaker in enumerate(SPEAKERS, start=1):
+        import soundfile as sf
+
+        sf.write(os.path.join(speakers_dir, f"{speaker}.wav"), fixtures.synthetic_voice(3.0, 22050, seed), 22050)
+    if model_dir is None:
+        import stub_model
+
+        model_dir = stub_model.write_checkpoint(os.path.join(workdir, "model"))
+        model_class = STUB_MODEL_CLASS
+    else:
+        model_class = ""
+    os.environ.update(
+        {
+            "MODELS_DIR_PATH": model_dir,
+            "SPEAKERS_DIR_PATH": speakers_dir,
+            "VOICE_MODEL_CLASS": model_class,
+            "JOBS_DIR": os.path.join(workdir, "jobs"),
+            # nothing listens there, the voice mapping precompute fails right away
+            "KOKORO_URL": "http://127.0.0.1:9/v1",
+        }
+    )
+    return {"model": "stub" if model_class else "checkpoint", "model_dir": model_dir}
+
+
+@contextlib.contextmanager
+def quiet():
+    """Keep the services' logs out of the timings output"""
+    logging.disable(logging.CRITICAL)
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            yield
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+def measure(function: Callable[[], object], repeats: int, seconds: float, rounds: int = 3) -> dict:
+    """
+    Latency percentiles, real-time factor and peak RSS of ``repeats`` calls after one warm-up.
+
+    The calls are split in ``rounds`` and each percentile is the lowest of the rounds,
+    so a burst of noise from other processes does not read as a regression.
+    """
+    from project.conversor.admission.controller import _PeakRssSampler
+
+    function()
+    per_round = max(1, repeats // rounds)
+    percentiles = []
+    with _PeakRssSampler() as sampler:
+        for _ in range(rounds):
+            samples = []
+            for _ in range(per_round):
+                start = time.perf_counter()
+                function()
+                samples.append(time.perf_counter() - start)
+            percentiles.append(np.percentile(samples, (50, 95, 99)) * 1000)
+    p50, p95, p99 = (float(value) for value in np.min(percentiles, axis=0))
+    return {
+        "seconds": seconds,
+        "samples": per_round * rounds,
+        "p50_ms": round(p50, 3),
+        "p95_ms": round(p95, 3),
+        "p99_ms": round(p99, 3),
+        "rtf": round(p50 / 1000 / seconds, 5),
+        "peak_rss_mb": round(sampler.peak / 2**20, 1),
+    }
+
+
+def calibrate(repeats: int = 5) -> float:
+    """Best time in ms of a fixed CPU workload, used to scale the baseline to this machine"""
+    import torch
+
+    a = torch.linspace(-1, 1, 256 * 256).reshape(256, 256)
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(50):
+            torch.tanh(a @ a)
+        np.sort(np.sin(np.arange(200_000)))
+        samples.append(time.perf_counter() - start)
+    return min(samples) * 1000
+
+
+def bench_decode(items: List[fixtures.Fixture], repeats: int) -> Dict[str, dict]:
+    from fastapi import UploadFile
+    from project.conversor.audio.loading_service import AudioLoadingService
+
+    loader = AudioLoadingService()
+    loop = asyncio.new_event_loop()
+    results = {}
+    for item in items:
+        with open(item.path, "rb") as f:
+            data = f.read()
+
+        def decode():
+            upload = UploadFile(file=io.BytesIO(data), filename=os.path.basename(item.path))
+            _, temp_file_path = loop.run_until_complete(loader.load_from_upload_file(upload))
+            loader.cleanup_temp_file(temp_file_path)
+
+        results[f"decode/{item.seconds:g}s_{item.sample_rate}hz"] = measure(decode, repeats, item.seconds)
+    loop.close()
+    return results
+
+
+def bench_conversion(durations: List[float], repeats: int) -> Dict[str, dict]:
+    import torch
+    from project.conversor.audio.pcm import encode_wav
+    from project.conversor.processor import VoiceConverterProcessor
+    from project.conversor.wrapper.model_wrapper import VoiceConverterModelWrapper
+
+    wrapper = VoiceConverterModelWrapper()
+    wrapper.load_model(os.environ["MODELS_DIR_PATH"])
+    processor = VoiceConverterProcessor(wrapper)
+    with torch.inference_mode():
+        target = wrapper.extract_se(os.path.join(os.environ["SPEAKERS_DIR_PATH"], f"{SPEAKERS[0]}.wav"))[0]
+
+    results = {}
+    for seconds in durations:
+        audio = fixtures.synthetic_voice(seconds, LOADING_SAMPLE_RATE)
+        results[f"conversion/{seconds:g}s"] = measure(
+            lambda: processor.voice_conversion_with_target_se(audio, target), repeats, seconds
+        )
+        output = processor.voice_conversion_with_target_se(audio, target)
+        results[f"postprocess/{seconds:g}s"] = measure(lambda: encode_wav(output), repeats, seconds)
+    return results
+
+
+def bench_http(items: List[fixtures.Fixture], repeats: int, ready_timeout_s: float = 120.0) -> Dict[str, dict]:
+    from fastapi.testclient import TestClient
+    from app import server
+
+    results = {}
+    with TestClient(server) as client:
+        deadline = time.monotonic() + ready_timeout_s
+        while client.get("/health/ready").status_code != 200:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Service not ready: {client.get('/health/ready').json()}")
+            time.sleep(0.1)
+        for item in items:
+            with open(item.path, "rb") as f:
+                data = f.read()
+
+            def convert():
+                response = client.post(
+                    "/api/rvc",
+                    files={"audio_file": (os.path.basename(item.path), data, "audio/wav")},
+                    data={"speaker": SPEAKERS[1]},
+                )
+                if response.status_code != 200:
+                    raise RuntimeError(f"/api/rvc returned {response.status_code}: {response.text}")
+
+            results[f"http/{item.seconds:g}s"] = measure(convert, repeats, item.seconds)
+    return results
+
+
+def compare(current: dict, baseline: dict, tolerance: float, min_delta_ms: float, rss_tolerance: float) -> List[str]:
+    """Human readable regressions of ``current`` against ``baseline``, empty when none"""
+    if current["meta"]["model"] != baseline["meta"]["model"]:
+        return [f"baseline was recorded with the {baseline['meta']['model']} model, not {current['meta']['model']}"]
+    # latencies scale with the speed of the machine, the peak RSS does not
+    speed = current["meta"]["calibration_ms"] / baseline["meta"]["calibration_ms"]
+    # scenario groups left out with --skip are not compared
+    groups = {key.split("/")[0] for key in current["results"]}
+    regressions = []
+    for key, before in baseline["results"].items():
+        after = current["results"].get(key)
+        if key.split("/")[0] not in groups:
+            continue
+        if after is None:
+            regressions.append(f"{key}: missing from the current run")
+            continue
+        for metric in COMPARED:
+            expected = before[metric] * speed
+            if after[metric] > expected * (1 + tolerance) and after[metric] - expected > min_delta_ms:
+                regressions.append(f"{key} {metric}: expected {expected:.2f} -> {after[metric]:.2f} ms")
+        if after["peak_rss_mb"] > before["peak_rss_mb"] * (1 + rss_tolerance):
+            regressions.append(f"{key} peak_rss_mb: {before['peak_rss_mb']:.1f} -> {after['peak_rss_mb']:.1f} MB")
+    return regressions
+
+
+def print_table(report: dict, baseline: Optional[dict]) -> None:
+    results = report["results"]
+    before = (baseline or {}).get("results", {})
+    if baseline is not None:
+        print(f"calibration {report['meta']['calibration_ms']:.2f} ms, baseline {baseline['meta']['calibration_ms']:.2f} ms", file=sys.stderr)
+    print(f"{'scenario':<26} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'RTF':>8} {'RSS MB':>8} {'p50 vs base':>12}", file=sys.stderr)
+    for key, row in results.items():
+        delta = f"{row['p50_ms'] / before[key]['p50_ms'] - 1:+.1%}" if key in before and before[key]["p50_ms"] else ""
+        print(
+            f"{key:<26} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f} "
+            f"{row['rtf']:>8.4f} {row['peak_rss_mb']:>8.1f} {delta:>12}",
+            file=sys.stderr,
+        )
+
+
+def run(args: argparse.Namespace, items: List[fixtures.Fixture], http_items: List[fixtures.Fixture]):
+    """Every scenario not skipped, with the calibration measured before each group"""
+    results: Dict[str, dict] = {}
+    calibrations = []
+    with quiet():
+        if "decode" not in args.skip:
+            calibrations.append(calibrate())
+            results.update(bench_decode(items, args.repeats))
+        if "conversion" not in args.skip:
+            calibrations.append(calibrate())
+            results.update(bench_conversion(args.seconds, args.repeats))
+        if "http" not in args.skip:
+            calibrations.append(calibrate())
+            results.update(bench_http(http_items, args.http_repeats))
+        calibrations.append(calibrate())
+    return results, round(float(np.median(calibrations)), 3)
+
+
+def merge(first, second):
+    """Best of two runs, metric by metric"""
+    (results, calibration), (other, other_calibration) = first, second
+    merged = {
+        key: {metric: min(value, other[key][metric]) if key in other else value for metric, value in row.items()}
+        for key, row in results.items()
+    }
+    return merged, min(calibration, other_calibration)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-dir", help="real checkpoint directory (model.pth + config.json) instead of the stub")
+    parser.add_argument("--seconds", type=float, nargs="+", default=list(fixtures.DURATIONS))
+    parser.add_argument("--sample-rates", type=int, nargs="+", default=list(fixtures.SAMPLE_RATES))
+    parser.add_argument("--repeats", type=int, default=15)
+    parser.add_argument("--http-repeats", type=int, default=9)
+    parser.add_argument("--skip", nargs="*", default=[], choices=["decode", "conversion", "http"])
+    parser.add_argument("--output", help="write the JSON results here instead of stdout")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="overwrite --baseline with this run")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed relative slowdown of p50/p95")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore slowdowns smaller than this")
+    parser.add_argument("--rss-tolerance", type=float, default=0.2, help="allowed relative growth of the peak RSS")
+    parser.add_argument("--retries", type=int, default=1, help="runs repeated to confirm a regression")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="wsi-bench-")
+    meta = configure_environment(workdir, args.model_dir)
+    items = fixtures.write_fixtures(os.path.join(workdir, "fixtures"), args.seconds, args.sample_rates)
+    http_items = [item for item in items if item.sample_rate == max(args.sample_rates)]
+
+    import torch
+
+    torch.manual_seed(0)
+    results, calibration = run(args, items, http_items)
+    report = {
+        "meta": {
+            "model": meta["model"],
+            "python": platform.python_version(),
+            "torch": torch.__version__,
+            "torch_threads": torch.get_num_threads(),
+            "machine": platform.machine(),
+            "calibration_ms": calibration,
+        },
+        "results": results,
+    }
+    baseline = None
+    if args.baseline and os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_table(report, baseline)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline and (args.update_baseline or baseline is None):
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"baseline written to {args.baseline}", file=sys.stderr)
+        return 0
+    if baseline is not None:
+        regressions = compare(report, baseline, args.tolerance, args.min_delta_ms, args.rss_tolerance)
+        for attempt in range(args.retries):
+            if not regressions:
+                break
+            # a real regression survives a second run, a burst of load on the machine does not
+            print(f"{len(regressions)} possible regressions, measuring again", file=sys.stderr)
+            results, calibration = merge((results, calibration), run(args, items, http_items))
+            report["results"], report["meta"]["calibration_ms"] = results, calibration
+            regressions = compare(report, baseline, args.tolerance, args.min_delta_ms, args.rss_tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+        print("no regression against the baseline", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
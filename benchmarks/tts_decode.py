@@ -0,0 +1,101 @@
+"""
+CPU gasta por requisição para transformar a resposta do Kokoro em amostras float32.
+
+- mp3 (caminho antigo): bytes MP3 → ``UploadFile`` → arquivo temporário → librosa
+  (decodifica e reamostra para 24 kHz).
+- pcm (caminho novo): bytes PCM 16-bit a 24 kHz → ``np.frombuffer``.
+
+Também mostra o custo de codificar o MP3, que o Kokoro deixa de pagar.
+
+Uso:
+    python benchmarks/tts_decode.py
+    python benchmarks/tts_decode.py --seconds 5 10 30 --repeat 20
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import soundfile as sf
+from fastapi import UploadFile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import stub_kokoro  # noqa: E402
+from project.conversor.audio.loading_service import AudioLoadingService  # noqa: E402
+from project.conversor.audio.pcm import decode_tts_audio, float_to_pcm16  # noqa: E402
+
+SAMPLE_RATE = 24000
+
+
+def encode_mp3(audio: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, SAMPLE_RATE, format="MP3")
+    return buffer.getvalue()
+
+
+def cpu_ms(function, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.process_time()
+        function()
+        samples.append(time.process_time() - start)
+    return float(np.median(samples) * 1000)
+
+
+def measure(seconds: float, repeat: int) -> dict:
+    audio = stub_kokoro.synthetic_speech(seconds)
+    mp3 = encode_mp3(audio)
+    pcm = float_to_pcm16(audio)
+    loader = AudioLoadingService()
+
+    def mp3_path():
+        upload = UploadFile(file=io.BytesIO(mp3), filename="synthesized_audio.wav")
+        array, temp_file_path = asyncio.run(loader.load_from_upload_file(upload))
+        loader.cleanup_temp_file(temp_file_path)
+        return array
+
+    def pcm_path():
+        return decode_tts_audio(pcm, "audio/pcm")
+
+    mp3_path()  # warm librosa/audioread caches
+    return {
+        "audio_s": seconds,
+        "kokoro_mp3_encode_ms": cpu_ms(lambda: encode_mp3(audio), repeat),
+        "mp3_decode_ms": cpu_ms(mp3_path, repeat),
+        "pcm_decode_ms": cpu_ms(pcm_path, repeat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, nargs="+", default=[2.0, 10.0, 30.0])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    # the loading service prints progress for every file
+    stdout, sys.stdout = sys.stdout, io.StringIO()
+    try:
+        results = [measure(seconds, args.repeat) for seconds in args.seconds]
+    finally:
+        sys.stdout = stdout
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'audio':>8}{'mp3 encode':>14}{'mp3 decode':>14}{'pcm decode':>14}   (CPU ms per request)")
+    for r in results:
+        print(
+            f"{r['audio_s']:>7.1f}s{r['kokoro_mp3_encode_ms']:>14.1f}{r['mp3_decode_ms']:>14.1f}"
+            f"{r['pcm_decode_ms']:>14.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Tempo até o primeiro áudio (TTFA) do pipeline TTS → conversão, com e sem streaming.
+
+Usa o Kokoro falso (``benchmarks/stub_kokoro.py``) com atrasos realistas e um
+conversor sintético que gasta ``--base-ms`` + ``--rtf`` × duração por chamada
+(substitui o modelo, medido em separado em ``checkpoint_loading.py``).
+
+- full: espera o áudio inteiro, decodifica, converte tudo e só então responde.
+- stream: pede ``stream=true`` ao Kokoro e converte segmento a segmento.
+
+Uso:
+    python benchmarks/tts_streaming.py
+    python benchmarks/tts_streaming.py --chars 600 --kokoro-rtf 0.3 --rtf 0.25
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import soundfile as sf
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import stub_kokoro  # noqa: E402
+from project.conversor.stream.pipeline import StreamingConversionPipeline  # noqa: E402
+from project.tts.tts_provider import TtsProvider  # noqa: E402
+
+
+def synthetic_converter(base_s: float, rtf: float, sample_rate: int = 24000):
+    async def convert(audio: np.ndarray) -> np.ndarray:
+        await asyncio.to_thread(time.sleep, base_s + rtf * len(audio) / sample_rate)
+        return audio
+
+    return convert
+
+
+async def full(provider: TtsProvider, text: str, convert) -> dict:
+    start = time.perf_counter()
+    result = await provider.synthesize(text, {"response_format": "wav"})
+    audio, _ = sf.read(io.BytesIO(result["audio"]), dtype="float32")
+    converted = await convert(audio)
+    elapsed = time.perf_counter() - start
+    return {"ttfa_s": elapsed, "total_s": elapsed, "audio_s": len(converted) / 24000}
+
+
+async def stream(provider: TtsProvider, text: str, convert) -> dict:
+    start = time.perf_counter()
+    pipeline = StreamingConversionPipeline(convert, started_at=start)
+    samples = 0
+    async for audio in pipeline.run(provider.stream(text)):
+        samples += len(audio)
+    return {
+        "ttfa_s": pipeline.time_to_first_audio,
+        "total_s": time.perf_counter() - start,
+        "audio_s": samples / 24000,
+        "segments": len(pipeline.segment_timings),
+    }
+
+
+async def run(url: str, args) -> list[dict]:
+    provider = TtsProvider(url=url)
+    convert = synthetic_converter(args.base_ms / 1000, args.rtf)
+    text = ("The quick brown fox jumps over the lazy dog. " * 100)[: args.chars]
+    results = []
+    try:
+        for mode, runner in (("full", full), ("stream", stream)):
+            runs = [await runner(provider, text, convert) for _ in range(args.repeat)]
+            results.append({
+                "mode": mode,
+                "ttfa_ms": float(np.median([r["ttfa_s"] for r in runs]) * 1000),
+                "total_ms": float(np.median([r["total_s"] for r in runs]) * 1000),
+                "audio_s": runs[0]["audio_s"],
+                **({"segments": runs[0]["segments"]} if "segments" in runs[0] else {}),
+            })
+    finally:
+        await provider.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Use a running Kokoro instead of the local stub")
+    parser.add_argument("--chars", type=int, default=200, help="Text length (~15 chars per audio second)")
+    parser.add_argument("--repeat", type=int, default=2)
+    parser.add_argument("--kokoro-latency-ms", type=float, default=150.0)
+    parser.add_argument("--kokoro-rtf", type=float, default=0.2, help="Stub synthesis seconds per audio second")
+    parser.add_argument("--base-ms", type=float, default=60.0, help="Fixed cost of one conversion call")
+    parser.add_argument("--rtf", type=float, default=0.2, help="Conversion seconds per audio second")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    process, url = (None, args.url) if args.url else stub_kokoro.spawn(
+        "--latency-ms", str(args.kokoro_latency_ms), "--rtf", str(args.kokoro_rtf)
+    )
+    try:
+        results = asyncio.run(run(url, args))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for result in results:
+        print(
+            f"{result['mode']:<7} ttfa {result['ttfa_ms']:8.1f} ms  total {result['total_ms']:8.1f} ms  "
+            f"audio {result['audio_s']:.1f} s" + (f"  segments {result['segments']}" if "segments" in result else "")
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from project.core.application import Application
+from project.gateway.proxy import ROUTED_PATHS, GatewayProxy, GatewayUnavailable
+from project.gateway.router import router as gateway_router
+from project.router.disconnect import CancelOnDisconnectMiddleware
+from project.router.metrics_router import router as metrics_router
+
+app = Application()
+logger = app.logger
+
+
+@asynccontextmanager
+async def lifespan(server: FastAPI):
+    gateway = GatewayProxy.get_instance()
+    await gateway.start()
+    yield
+    await gateway.close()
+
+
+server = FastAPI(
+    lifespan=lifespan,
+    title="wsi Voice Conversor Gateway",
+    description="Routes conversions to the node that owns their (model, speaker) shard",
+    version="0.0.1",
+)
+
+if app.envs.CANCEL_ON_DISCONNECT:
+    # a client that leaves closes the connection to the node, which cancels the conversion there
+    server.add_middleware(CancelOnDisconnectMiddleware, paths=ROUTED_PATHS)
+
+
+@server.exception_handler(GatewayUnavailable)
+async def gateway_unavailable_handler(request: Request, exc: GatewayUnavailable):
+    logger.info("Gateway unavailable: %s", str(exc))
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "No backend node available"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+server.include_router(metrics_router)
+# the catch-all proxy route goes last
+server.include_router(gateway_router)
@@ -0,0 +1,39 @@
+"""
+Configuração do gunicorn para produção (lida automaticamente do diretório atual):
+
+    gunicorn app:server
+
+``WEB_WORKERS`` workers uvicorn com uvloop e httptools. Com ``WEB_PRELOAD`` o
+master carrega o modelo e os locutores uma vez e os workers compartilham essas
+páginas copy-on-write (na GPU cada worker carrega o seu). Cada worker usa
+``TORCH_THREADS_PER_WORKER`` threads do torch (0 = CPUs / workers) e é
+reiniciado de forma graciosa após ``WEB_MAX_REQUESTS`` requisições (com jitter)
+ou quando a memória privada passa de ``WEB_WORKER_MAX_MEMORY_MB``.
+"""
+from project.core import server as production
+from project.core.application import Application
+
+envs = Application().envs
+
+bind = f"0.0.0.0:{envs.PORT}"
+workers = envs.WEB_WORKERS
+worker_class = "project.core.server.UvloopWorker"
+preload_app = envs.WEB_PRELOAD
+max_requests = envs.WEB_MAX_REQUESTS
+max_requests_jitter = envs.WEB_MAX_REQUESTS_JITTER
+timeout = envs.WEB_TIMEOUT_S
+graceful_timeout = envs.WEB_GRACEFUL_TIMEOUT_S
+keepalive = 5
+
+
+def on_starting(server):
+    if preload_app and production.preload_services():
+        server.log.info("Model and speakers preloaded in the master, workers share them copy-on-write")
+
+
+def post_fork(server, worker):
+    threads = production.torch_threads_per_worker(workers, envs.TORCH_THREADS_PER_WORKER)
+    production.configure_worker(threads)
+    if envs.WEB_WORKER_MAX_MEMORY_MB > 0:
+        production.MemoryWatchdog(envs.WEB_WORKER_MAX_MEMORY_MB * 2**20, envs.WEB_MEMORY_CHECK_INTERVAL_S).start()
+    server.log.info("Worker %s using %d torch threads", worker.pid, threads)
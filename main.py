@@ -4,4 +4,7 @@ import uvicorn
 app = Application()
 
 if __name__ == "__main__":
-    uvicorn.run("app:server", host="0.0.0.0", port=app.envs.PORT, reload=True)
\ No newline at end of file
+    # with GATEWAY_NODES this process only routes requests to those nodes
+    target = "gateway:server" if app.envs.GATEWAY_NODES else "app:server"
+    # log_config=None: uvicorn logs go through the application queue instead of its own handlers
+    uvicorn.run(target, host="0.0.0.0", port=app.envs.PORT, reload=app.envs.RELOAD, log_config=None)
\ No newline at end of file
@@ -0,0 +1,324 @@
+"""
+Controle de admissão baseado no custo previsto de cada conversão.
+
+O custo (pico de memória e tempo de CPU/GPU) é estimado a partir da duração do
+áudio com um ``CostProfile`` linear medido no warmup de cada modelo. Uma
+requisição só é admitida enquanto a memória reservada somada à estimativa cabe no
+orçamento e na memória livre do sistema; caso contrário ela espera na fila do
+``scheduler`` (prioridade por classe e fair queuing por tenant) ou é rejeitada com
+``AdmissionRejected`` (503). Requisições cujo deadline não pode mais ser cumprido
+são descartadas antes de consumir CPU/GPU.
+"""
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, Optional, Tuple
+
+import numpy as np
+import psutil  # type: ignore
+
+from project.conversor.admission.scheduler import (
+    PRIORITIES,
+    FairQueue,
+    SchedulingContext,
+    Ticket,
+    get_scheduling_context,
+    parse_tenant_weights,
+    tenant_id,
+)
+from project.core.application import Application
+from project.shared.metrics.pipeline import add_request_timing
+from project.shared.metrics.registry import MetricsRegistry
+from project.shared.system.check_available_memory import get_available_memory
+
+MB = 1024 * 1024
+
+
+class AdmissionRejected(Exception):
+    """The request does not fit the memory budget and cannot wait for it"""
+
+    def __init__(self, reason: str, retry_after: int = 5):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass
+class CostProfile:
+    """Linear cost model of one conversion as a function of the input duration"""
+
+    base_memory_bytes: float
+    memory_bytes_per_second: float
+    base_seconds: float
+    seconds_per_second: float
+
+    def estimate(self, duration_s: float) -> Tuple[int, float]:
+        """Return (peak memory bytes, compute seconds) for an input duration"""
+        memory = self.base_memory_bytes + self.memory_bytes_per_second * duration_s
+        seconds = self.base_seconds + self.seconds_per_second * duration_s
+        return int(memory), seconds
+
+
+DEFAULT_COST_PROFILE = CostProfile(
+    base_memory_bytes=64 * MB,
+    memory_bytes_per_second=16 * MB,
+    base_seconds=0.2,
+    seconds_per_second=0.5,
+)
+
+
+class _PeakRssSampler:
+    """Samples the process RSS on a thread to find the peak of a run"""
+
+    def __init__(self, interval_s: float = 0.002):
+        self.interval_s = interval_s
+        self.process = psutil.Process()
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.process.memory_info().rss)
+            self._stop.wait(self.interval_s)
+
+    def __enter__(self):
+        self.baseline = self.process.memory_info().rss
+        self.peak = self.baseline
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.process.memory_info().rss)
+
+
+def measure_cost_profile(
+    convert: Callable[[np.ndarray], object],
+    sample_rate: int = 24000,
+    durations: Tuple[float, float] = (1.0, 4.0),
+) -> CostProfile:
+    """Fit a CostProfile by running ``convert`` on synthetic audio of two durations"""
+    rng = np.random.default_rng(0)
+    points = []
+    for duration in durations:
+        audio = (0.05 * rng.standard_normal(int(duration * sample_rate))).astype(np.float32)
+        start = time.perf_counter()
+        with _PeakRssSampler() as sampler:
+            convert(audio)
+        points.append((duration, sampler.peak - sampler.baseline, time.perf_counter() - start))
+
+    (d0, m0, t0), (d1, m1, t1) = points
+    memory_slope = max((m1 - m0) / (d1 - d0), 0.0)
+    seconds_slope = max((t1 - t0) / (d1 - d0), 0.0)
+    return CostProfile(
+        base_memory_bytes=max(m0 - memory_slope * d0, 0.0),
+        memory_bytes_per_second=memory_slope,
+        base_seconds=max(t0 - seconds_slope * d0, 0.0),
+        seconds_per_second=seconds_slope,
+    )
+
+
+class AdmissionController:
+    """Admits conversions while their predicted peak memory fits the budget"""
+
+    _instance = None
+
+    def __init__(
+        self,
+        memory_budget_bytes: int,
+        max_queue: int = 16,
+        queue_timeout_s: float = 30.0,
+        memory_headroom_bytes: int = 512 * MB,
+        available_memory: Callable[[], int] = get_available_memory,
+        tenant_weights: Optional[Dict[str, float]] = None,
+    ):
+        self.app = Application()
+        self.memory_budget_bytes = memory_budget_bytes
+        self.max_queue = max_queue
+        self.queue_timeout_s = queue_timeout_s
+        self.memory_headroom_bytes = memory_headroom_bytes
+        self.available_memory = available_memory
+        self.profiles: Dict[str, CostProfile] = {}
+        self.default_profile = DEFAULT_COST_PROFILE
+        self.reserved_bytes = 0
+        self.reserved_seconds = 0.0
+        self._waiters = FairQueue(tenant_weights)
+
+        metrics = MetricsRegistry()
+        metrics.gauge("admission_memory_budget_bytes", "Memory budget for admitted conversions").set(
+            memory_budget_bytes
+        )
+        metrics.gauge("admission_memory_reserved_bytes", "Predicted peak memory of admitted conversions") \
+            .set_function(lambda: self.reserved_bytes)
+        metrics.gauge("admission_queue_length", "Conversions waiting for admission") \
+            .set_function(lambda: len(self._waiters))
+        metrics.gauge("system_memory_available_bytes", "Memory available in the system") \
+            .set_function(self.available_memory)
+        self._admitted = metrics.counter("admission_admitted_total", "Conversions admitted")
+        self._rejected = metrics.counter("admission_rejected_total", "Conversions rejected", ["reason"])
+        self._wait_seconds = metrics.histogram("admission_wait_seconds", "Time spent waiting for admission")
+        self._class_wait_seconds = metrics.histogram(
+            "admission_class_wait_seconds", "Time spent waiting for admission per priority class", ["priority"]
+        )
+        self._deadline_dropped = metrics.counter(
+            "admission_deadline_dropped_total", "Requests dropped because their deadline could not be met", ["priority"]
+        )
+        depth = metrics.gauge("admission_queue_depth", "Conversions waiting for admission per priority class", ["priority"])
+        for priority in PRIORITIES:
+            depth.labels(priority=priority).set_function(lambda priority=priority: self._waiters.depth(priority))
+
+    @classmethod
+    def get_instance(cls) -> "AdmissionController":
+        if cls._instance is None:
+            envs = Application().envs
+            cls._instance = AdmissionController(
+                memory_budget_bytes=envs.ADMISSION_MEMORY_BUDGET_MB * MB,
+                max_queue=envs.ADMISSION_MAX_QUEUE,
+                queue_timeout_s=envs.ADMISSION_QUEUE_TIMEOUT_S,
+                memory_headroom_bytes=envs.ADMISSION_MEMORY_HEADROOM_MB * MB,
+                # weights are configured per API key, requests carry the hashed tenant id
+                tenant_weights={
+                    tenant_id(key): weight
+                    for key, weight in parse_tenant_weights(envs.SCHEDULER_TENANT_WEIGHTS).items()
+                },
+            )
+        return cls._instance
+
+    def set_profile(self, model_id: Optional[str], profile: CostProfile) -> None:
+        """Set the cost profile of a model, None sets the default model profile"""
+        if model_id is None:
+            self.default_profile = profile
+        else:
+            self.profiles[model_id] = profile
+        self.app.logger.info("[Admission] Cost profile for %s: %s", model_id or "default model", profile)
+
+    def estimate(self, duration_s: float, model_id: Optional[str] = None) -> Tuple[int, float]:
+        profile = self.profiles.get(model_id) if model_id else None
+        return (profile or self.default_profile).estimate(duration_s)
+
+    def _fits(self, memory_bytes: int) -> bool:
+        within_budget = self.reserved_bytes + memory_bytes <= self.memory_budget_bytes
+        # nothing admitted yet means the measured free memory already includes everything running
+        within_system = memory_bytes <= self.available_memory() - self.memory_headroom_bytes
+        return within_budget and (within_system or self.reserved_bytes == 0)
+
+    def _rejection(self, reason: str, context: Optional[SchedulingContext] = None) -> AdmissionRejected:
+        self._rejected.labels(reason=reason).inc()
+        if reason == "deadline" and context is not None:
+            self._deadline_dropped.labels(priority=context.priority).inc()
+        self.app.logger.warning("[Admission] Request rejected: %s", reason)
+        return AdmissionRejected(reason)
+
+    def _reject(self, reason: str, context: Optional[SchedulingContext] = None) -> None:
+        raise self._rejection(reason, context)
+
+    @asynccontextmanager
+    async def admit(self, duration_s: float, model_id: Optional[str] = None) -> AsyncIterator[Tuple[int, float]]:
+        """Reserve the predicted cost of a conversion for the duration of the block
+
+        Priority, tenant and deadline come from the current SchedulingContext.
+        """
+        context = get_scheduling_context()
+        memory_bytes, seconds = self.estimate(duration_s, model_id)
+        if memory_bytes > self.memory_budget_bytes:
+            self._reject("too_large")
+        remaining = context.remaining()
+        if remaining is not None and remaining < seconds:
+            self._reject("deadline", context)
+
+        start = time.perf_counter()
+        if not self._waiters and self._fits(memory_bytes):
+            self._reserve(memory_bytes, seconds)
+        else:
+            await self._wait_turn(memory_bytes, seconds, context)
+        waited = time.perf_counter() - start
+        self._wait_seconds.observe(waited)
+        self._class_wait_seconds.labels(priority=context.priority).observe(waited)
+        add_request_timing("admission", waited)
+        self._admitted.inc()
+        try:
+            yield memory_bytes, seconds
+        finally:
+            self._release(memory_bytes, seconds)
+
+    def _reserve(self, memory_bytes: int, seconds: float) -> None:
+        self.reserved_bytes += memory_bytes
+        self.reserved_seconds += seconds
+
+    def _release(self, memory_bytes: int, seconds: float) -> None:
+        self.reserved_bytes -= memory_bytes
+        self.reserved_seconds -= seconds
+        self._wake_waiters()
+
+    async def _wait_turn(self, memory_bytes: int, seconds: float, context: SchedulingContext) -> None:
+        """Queue until _wake_waiters reserves the cost on behalf of this request"""
+        if len(self._waiters) >= self.max_queue:
+            # a full queue makes room for higher classes by dropping the newest lower-class request
+            victim = self._waiters.lowest_below(context.priority)
+            if victim is None:
+                self._reject("queue_full")
+            self._waiters.remove(victim)
+            victim.waiter.set_exception(self._rejection("preempted"))
+        # work already admitted or served first has to finish before this request runs
+        queued_seconds = self.reserved_seconds + self._waiters.seconds_ahead_of(context.priority)
+        if queued_seconds > self.queue_timeout_s:
+            self._reject("queue_too_slow")
+        timeout = self.queue_timeout_s
+        remaining = context.remaining()
+        if remaining is not None:
+            if queued_seconds + seconds > remaining:
+                self._reject("deadline", context)
+            timeout = min(timeout, remaining - seconds)
+
+        waiter = asyncio.get_running_loop().create_future()
+        ticket = Ticket(waiter, memory_bytes, seconds, context)
+        self._waiters.push(ticket)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            if not waiter.done():
+                self._abandon(ticket)
+                self._reject("deadline" if timeout < self.queue_timeout_s else "queue_timeout", context)
+            # settled just as the timeout fired: admitted, or dropped by _wake_waiters
+            if waiter.exception() is not None:
+                raise waiter.exception()
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                self._release(memory_bytes, seconds)
+            elif not waiter.done():
+                self._abandon(ticket)
+            raise
+
+    def _abandon(self, ticket: Ticket) -> None:
+        self._waiters.remove(ticket)
+        ticket.waiter.cancel()
+        self._wake_waiters()
+
+    def _wake_waiters(self) -> None:
+        """Admit queued requests in scheduling order while the next one fits"""
+        while self._waiters:
+            ticket = self._waiters.peek()
+            remaining = ticket.context.remaining()
+            if remaining is not None and remaining < ticket.seconds:
+                # would finish too late, drop it before it takes the slot
+                self._waiters.pop()
+                ticket.waiter.set_exception(self._rejection("deadline", ticket.context))
+                continue
+            if not self._fits(ticket.memory_bytes):
+                break
+            self._waiters.pop()
+            self._reserve(ticket.memory_bytes, ticket.seconds)
+            ticket.waiter.set_result(None)
+
+    def get_status(self) -> dict:
+        return {
+            "memory_budget_bytes": self.memory_budget_bytes,
+            "reserved_bytes": self.reserved_bytes,
+            "available_bytes": self.available_memory(),
+            "queue_length": len(self._waiters),
+            "queue_depth": {priority: self._waiters.depth(priority) for priority in PRIORITIES},
+        }
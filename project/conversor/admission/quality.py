@@ -0,0 +1,158 @@
+"""
+Níveis de qualidade para sobrecarga.
+
+Quando a fila de admissão cresce ou a latência das conversões passa do SLO, as
+requisições novas recebem um nível mais barato em vez de todas ficarem lentas
+juntas:
+
+- ``full``: caminho normal.
+- ``reduced``: o decoder do modelo (quase todo o custo da inferência) roda em
+  bfloat16 (float16 na GPU); encoder e flows continuam em float32.
+- ``capped``: ``reduced`` e entradas mais longas que ``QUALITY_TIER_MAX_INPUT_S``
+  recebem ``503`` (``input_too_long``) em vez de ocupar os workers.
+
+O nível sobe assim que um sinal passa do limite (profundidade da fila em
+``QUALITY_TIER_QUEUE_DEPTHS``; p95 da latência na janela acima do SLO para
+``reduced`` e acima de 2x o SLO para ``capped``) e desce um degrau por vez depois
+de ``QUALITY_TIER_COOLDOWN_S`` abaixo dos limites. O nível é escolhido na entrada
+da requisição, fica num ``ContextVar`` até o fim e vai no header ``X-Quality-Tier``.
+"""
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+from typing import Callable, Deque, Optional, Sequence, Tuple
+
+import numpy as np
+
+from project.core.application import Application
+from project.shared.metrics.registry import MetricsRegistry
+
+
+@dataclass(frozen=True)
+class QualityTier:
+    name: str
+    level: int
+    reduced_precision: bool = False
+    max_input_s: Optional[float] = None
+
+
+FULL = QualityTier("full", 0)
+REDUCED = QualityTier("reduced", 1, reduced_precision=True)
+
+_tier: ContextVar[QualityTier] = ContextVar("quality_tier", default=FULL)
+
+
+def get_quality_tier() -> QualityTier:
+    return _tier.get()
+
+
+def set_quality_tier(tier: QualityTier) -> Token:
+    """Applies to the current task and the tasks it creates from now on"""
+    return _tier.set(tier)
+
+
+def reset_quality_tier(token: Token) -> None:
+    _tier.reset(token)
+
+
+def parse_queue_depths(value: str) -> Tuple[int, int]:
+    """``"4,8"`` -> queue depths at which reduced and capped start"""
+    reduced, capped = (int(item) for item in value.split(","))
+    return reduced, capped
+
+
+class QualityGovernor:
+    """Picks the tier of new requests from the admission queue depth and recent latencies"""
+
+    _instance = None
+
+    def __init__(
+        self,
+        queue_depth: Callable[[], int],
+        queue_depths: Sequence[int] = (4, 8),
+        slo_s: float = 3.0,
+        max_input_s: float = 20.0,
+        window_s: float = 30.0,
+        cooldown_s: float = 15.0,
+        min_samples: int = 10,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.tiers = (FULL, REDUCED, QualityTier("capped", 2, reduced_precision=True, max_input_s=max_input_s))
+        self.queue_depth = queue_depth
+        self.queue_depths = tuple(queue_depths)
+        self.slo_s = slo_s
+        self.window_s = window_s
+        self.cooldown_s = cooldown_s
+        self.min_samples = min_samples
+        self.clock = clock
+        self.level = 0
+        self._calm_since: Optional[float] = None
+        self._latencies: Deque[Tuple[float, float]] = deque()
+        self._lock = threading.Lock()
+
+        metrics = MetricsRegistry()
+        metrics.gauge("quality_tier_level", "Tier given to new requests: 0 full, 1 reduced, 2 capped").set_function(
+            lambda: self.level
+        )
+        self._requests = metrics.counter("quality_tier_requests_total", "Requests served per quality tier", ["tier"])
+
+    @classmethod
+    def get_instance(cls) -> "QualityGovernor":
+        if cls._instance is None:
+            from project.conversor.admission.controller import AdmissionController
+
+            envs = Application().envs
+            controller = AdmissionController.get_instance()
+            cls._instance = QualityGovernor(
+                queue_depth=lambda: controller.get_status()["queue_length"],
+                queue_depths=parse_queue_depths(envs.QUALITY_TIER_QUEUE_DEPTHS),
+                slo_s=envs.QUALITY_TIER_SLO_MS / 1000,
+                max_input_s=envs.QUALITY_TIER_MAX_INPUT_S,
+                window_s=envs.QUALITY_TIER_WINDOW_S,
+                cooldown_s=envs.QUALITY_TIER_COOLDOWN_S,
+            )
+        return cls._instance
+
+    def observe(self, latency_s: float) -> None:
+        """Latency of a finished conversion request"""
+        with self._lock:
+            self._latencies.append((self.clock(), latency_s))
+
+    def latency_p95(self) -> Optional[float]:
+        with self._lock:
+            horizon = self.clock() - self.window_s
+            while self._latencies and self._latencies[0][0] < horizon:
+                self._latencies.popleft()
+            if len(self._latencies) < self.min_samples:
+                return None
+            return float(np.percentile([latency for _, latency in self._latencies], 95))
+
+    def target_level(self) -> int:
+        """Level the current signals call for, before hysteresis"""
+        depth = self.queue_depth()
+        level = sum(depth >= threshold for threshold in self.queue_depths)
+        p95 = self.latency_p95()
+        if p95 is not None:
+            level = max(level, 2 if p95 > 2 * self.slo_s else 1 if p95 > self.slo_s else 0)
+        return level
+
+    def update(self) -> QualityTier:
+        target, now = self.target_level(), self.clock()
+        with self._lock:
+            if target >= self.level:
+                self.level = target
+                self._calm_since = None
+            elif self._calm_since is None:
+                self._calm_since = now
+            elif now - self._calm_since >= self.cooldown_s:
+                # one step down per cooldown, the next step waits another cooldown
+                self.level -= 1
+                self._calm_since = now
+            return self.tiers[self.level]
+
+    def choose(self) -> QualityTier:
+        tier = self.update()
+        self._requests.labels(tier=tier.name).inc()
+        return tier
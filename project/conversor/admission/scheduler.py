@@ -0,0 +1,149 @@
+"""
+Fila de admissão com classes de prioridade, deadlines e fair queuing por tenant.
+
+Cada requisição carrega um ``SchedulingContext`` (classe, tenant e deadline) num
+``ContextVar``, definido pela rota a partir dos headers ``X-Priority``,
+``X-Deadline-Ms`` e ``X-API-Key`` (ou pelo worker de jobs, sempre ``bulk``). A fila
+atende as classes em prioridade estrita (interactive > standard > bulk) e, dentro
+de cada classe, os tenants por weighted fair queuing: cada pedido recebe uma tag de
+término virtual ``início + custo / peso`` e sai primeiro o de menor tag, então um
+tenant com uma fila grande não atrasa os outros.
+"""
+import hashlib
+import itertools
+import time
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+INTERACTIVE, STANDARD, BULK = "interactive", "standard", "bulk"
+PRIORITIES = (INTERACTIVE, STANDARD, BULK)
+ANONYMOUS = "anonymous"
+
+
+@dataclass(frozen=True)
+class SchedulingContext:
+    priority: str = STANDARD
+    tenant: str = ANONYMOUS
+    # time.monotonic() after which the result is useless to the caller
+    deadline: Optional[float] = None
+
+    def remaining(self) -> Optional[float]:
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+
+_context: ContextVar[SchedulingContext] = ContextVar("scheduling_context", default=SchedulingContext())
+
+
+def get_scheduling_context() -> SchedulingContext:
+    return _context.get()
+
+
+def set_scheduling_context(context: SchedulingContext) -> Token:
+    """Applies to the current task and the tasks it creates from now on"""
+    return _context.set(context)
+
+
+def reset_scheduling_context(token: Token) -> None:
+    _context.reset(token)
+
+
+def tenant_id(api_key: Optional[str]) -> str:
+    """Non-reversible tenant of an API key, safe to keep in the job store and in logs"""
+    if not api_key:
+        return ANONYMOUS
+    return "tenant-" + hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+def parse_tenant_weights(value: str) -> Dict[str, float]:
+    """``"key-a:4,key-b:2"`` -> {"key-a": 4.0, "key-b": 2.0}"""
+    weights = {}
+    for item in value.split(","):
+        if ":" in item:
+            tenant, weight = item.rsplit(":", 1)
+            weights[tenant.strip()] = float(weight)
+    return weights
+
+
+@dataclass(eq=False)
+class Ticket:
+    """A request waiting for admission"""
+
+    waiter: object
+    memory_bytes: int
+    seconds: float
+    context: SchedulingContext
+    start_tag: float = 0.0
+    finish_tag: float = 0.0
+    sequence: int = 0
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class FairQueue:
+    """Strict priority between classes, weighted fair queuing across tenants inside a class"""
+
+    def __init__(self, tenant_weights: Optional[Dict[str, float]] = None):
+        self.tenant_weights = tenant_weights or {}
+        self._queues: Dict[str, List[Ticket]] = {priority: [] for priority in PRIORITIES}
+        self._virtual_time: Dict[str, float] = {priority: 0.0 for priority in PRIORITIES}
+        self._last_finish: Dict[Tuple[str, str], float] = {}
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def __iter__(self) -> Iterator[Ticket]:
+        for priority in PRIORITIES:
+            yield from self._queues[priority]
+
+    def depth(self, priority: str) -> int:
+        return len(self._queues[priority])
+
+    def push(self, ticket: Ticket) -> None:
+        priority, tenant = ticket.context.priority, ticket.context.tenant
+        weight = max(self.tenant_weights.get(tenant, 1.0), 1e-6)
+        ticket.start_tag = max(self._virtual_time[priority], self._last_finish.get((priority, tenant), 0.0))
+        # zero-cost requests still advance the tag so a tenant cannot flood the class for free
+        ticket.finish_tag = ticket.start_tag + max(ticket.seconds, 1e-3) / weight
+        ticket.sequence = next(self._sequence)
+        self._last_finish[(priority, tenant)] = ticket.finish_tag
+        self._queues[priority].append(ticket)
+
+    def peek(self) -> Optional[Ticket]:
+        for priority in PRIORITIES:
+            queue = self._queues[priority]
+            if queue:
+                return min(queue, key=lambda ticket: (ticket.finish_tag, ticket.sequence))
+        return None
+
+    def pop(self) -> Ticket:
+        ticket = self.peek()
+        priority = ticket.context.priority
+        self._queues[priority].remove(ticket)
+        self._virtual_time[priority] = ticket.start_tag
+        self._forget_idle(priority)
+        return ticket
+
+    def remove(self, ticket: Ticket) -> None:
+        priority = ticket.context.priority
+        self._queues[priority].remove(ticket)
+        self._forget_idle(priority)
+
+    def _forget_idle(self, priority: str) -> None:
+        # finish tags only matter while a class has a backlog
+        if not self._queues[priority]:
+            for key in [key for key in self._last_finish if key[0] == priority]:
+                del self._last_finish[key]
+
+    def seconds_ahead_of(self, priority: str) -> float:
+        """Queued compute served before a new request of this class"""
+        rank = PRIORITIES.index(priority)
+        return sum(ticket.seconds for p in PRIORITIES[:rank + 1] for ticket in self._queues[p])
+
+    def lowest_below(self, priority: str) -> Optional[Ticket]:
+        """Most recently queued request of the lowest class below ``priority``"""
+        rank = PRIORITIES.index(priority)
+        for p in reversed(PRIORITIES[rank + 1:]):
+            if self._queues[p]:
+                return max(self._queues[p], key=lambda ticket: (ticket.finish_tag, ticket.sequence))
+        return None
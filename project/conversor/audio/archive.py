@@ -0,0 +1,35 @@
+"""
+Arquivo ZIP gerado em streaming, entrada por entrada, sem arquivo temporário.
+"""
+import zipfile
+from typing import AsyncIterator, Tuple
+
+
+class _ChunkWriter:
+    """Unseekable sink for ZipFile, zipfile then writes data descriptors after each entry"""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def stream_zip(entries: AsyncIterator[Tuple[str, bytes]]) -> AsyncIterator[bytes]:
+    """Yield the bytes of a stored (uncompressed) ZIP as each entry becomes available"""
+    sink = _ChunkWriter()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as archive:
+        async for name, data in entries:
+            archive.writestr(name, data)
+            yield sink.drain()
+    # central directory, written on close
+    yield sink.drain()
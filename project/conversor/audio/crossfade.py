@@ -0,0 +1,46 @@
+"""
+Utilitários para emendar segmentos de áudio convertidos separadamente.
+"""
+import numpy as np
+
+
+def crossfade(tail: np.ndarray, head: np.ndarray) -> np.ndarray:
+    """Linear crossfade of two conversions of the same stretch of audio
+
+    Both sides are strongly correlated, so equal-gain (not equal-power) keeps the level flat.
+    """
+    length = min(len(tail), len(head))
+    if length == 0:
+        return head[:0]
+    fade_in = np.linspace(0.0, 1.0, length, dtype=np.float32)
+    return tail[:length] * (1.0 - fade_in) + head[:length] * fade_in
+
+
+def join_segments(segments: list[np.ndarray], overlap: int) -> np.ndarray:
+    """Concatenate segments whose first ``overlap`` samples repeat the previous segment's tail"""
+    if not segments:
+        return np.zeros(0, dtype=np.float32)
+    output = [segments[0]]
+    for segment in segments[1:]:
+        previous = output[-1]
+        length = min(overlap, len(previous), len(segment))
+        if length:
+            output[-1] = previous[:-length]
+            output.append(crossfade(previous[-length:], segment[:length]))
+        output.append(segment[length:])
+    return np.concatenate(output).astype(np.float32, copy=False)
+
+
+def join_with_pauses(segments: list[np.ndarray], pause: int, fade: int) -> np.ndarray:
+    """Concatenate independent segments with ``pause`` samples of silence, fading the edges"""
+    output = []
+    ramp = np.linspace(0.0, 1.0, fade, dtype=np.float32) if fade else None
+    for index, segment in enumerate(segments):
+        segment = np.array(segment, dtype=np.float32)
+        if ramp is not None and len(segment) >= 2 * fade:
+            segment[:fade] *= ramp
+            segment[-fade:] *= ramp[::-1]
+        if index:
+            output.append(np.zeros(pause, dtype=np.float32))
+        output.append(segment)
+    return np.concatenate(output) if output else np.zeros(0, dtype=np.float32)
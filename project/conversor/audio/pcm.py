@@ -0,0 +1,47 @@
+"""
+Conversões entre PCM 16-bit cru e arrays float32, sem codecs nem arquivos temporários.
+"""
+import io
+import struct
+
+import numpy as np
+import soundfile as sf
+
+from project.shared.metrics.pipeline import stage
+
+PCM_SAMPLE_RATE = 24000
+
+
+def pcm16_to_float(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def float_to_pcm16(audio: np.ndarray) -> bytes:
+    return (np.clip(audio, -1.0, 1.0) * 32767.0).astype("<i2").tobytes()
+
+
+def wav_stream_header(sample_rate: int = PCM_SAMPLE_RATE, channels: int = 1) -> bytes:
+    """WAV header for 16-bit PCM of unknown length, sizes are set to the maximum"""
+    byte_rate = sample_rate * channels * 2
+    return (
+        b"RIFF" + struct.pack("<I", 0xFFFFFFFF) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, channels, sample_rate, byte_rate, channels * 2, 16)
+        + b"data" + struct.pack("<I", 0xFFFFFFFF)
+    )
+
+
+def decode_tts_audio(data: bytes, content_type: str, sample_rate: int = PCM_SAMPLE_RATE) -> np.ndarray:
+    """Float32 samples from a raw PCM or WAV body already at ``sample_rate``"""
+    if content_type.startswith("audio/pcm") or content_type.startswith("application/octet-stream"):
+        return pcm16_to_float(data[: len(data) - len(data) % 2])
+    audio, rate = sf.read(io.BytesIO(data), dtype="float32", always_2d=True)
+    if rate != sample_rate:
+        raise ValueError(f"Expected {sample_rate} Hz audio from the TTS, got {rate} Hz")
+    return audio.mean(axis=1) if audio.shape[1] > 1 else audio[:, 0]
+
+
+def encode_wav(audio: np.ndarray, samplerate: int = PCM_SAMPLE_RATE) -> bytes:
+    with stage("encode").time():
+        buffer = io.BytesIO()
+        sf.write(buffer, audio, samplerate, format="WAV", subtype="PCM_16")
+        return buffer.getvalue()
@@ -41,7 +41,7 @@ class AudioProcessor():
     def apply_audio_silence(self, output) -> bytes:
         """Main method to process audio with silence padding."""
         silence_duration = 250
-        logger.info(f"Applying audio silence: {silence_duration} ms")
+        logger.debug("Applying audio silence: %s ms", silence_duration)
 
         # Initial processing with numpy and torch
         buffer = io.BytesIO()
@@ -94,7 +94,7 @@ def apply_audio_silence_clean(output) -> bytes:
     start_end_silence = 250
     padding = 0.95
 
-    logger.info("Applying audio silence: {} ms".format(start_end_silence)) 
+    logger.debug("Applying audio silence: %s ms", start_end_silence) 
 
     audio_trim = librosa.effects.trim(output, top_db=50)[0]
 
@@ -0,0 +1,114 @@
+"""
+Cancelamento de conversões que ninguém vai receber.
+
+Cada requisição de conversão carrega um ``CancellationToken`` num ``ContextVar``
+(definido por ``CancelOnDisconnectMiddleware`` e copiado para os workers de
+conversão). O token é cancelado quando o cliente desconecta (``disconnect``) ou
+quando o deadline do ``X-Deadline-Ms`` passa no meio da conversão (``deadline``).
+Os workers chamam ``check_cancelled`` entre as etapas (fila do executor, embedding,
+inferência, pós-processamento, lotes) e param com ``ConversionCancelled``; uma
+inferência já iniciada não é interrompida, mas nada depois dela roda.
+
+``conversions_cancelled_total{reason,stage}`` conta as requisições canceladas pela
+etapa em que pararam (``waiting`` = fora dos workers: fila de admissão, upload,
+Kokoro) e ``conversion_wasted_compute_seconds_total{reason}`` soma o tempo de worker
+gasto nelas.
+"""
+import threading
+from contextvars import ContextVar, Token
+from typing import Optional
+
+from project.conversor.admission.scheduler import get_scheduling_context
+from project.shared.metrics.registry import MetricsRegistry
+
+DISCONNECT, DEADLINE = "disconnect", "deadline"
+WAITING = "waiting"
+
+_cancelled = MetricsRegistry().counter(
+    "conversions_cancelled_total", "Conversion requests cancelled before their response was sent", ["reason", "stage"]
+)
+_wasted = MetricsRegistry().counter(
+    "conversion_wasted_compute_seconds_total", "Conversion worker seconds spent on cancelled requests", ["reason"]
+)
+
+
+class ConversionCancelled(Exception):
+    """Raised between conversion stages once the request's token is cancelled"""
+
+    def __init__(self, reason: str, stage: str):
+        super().__init__(f"Conversion cancelled ({reason}) at {stage}")
+        self.reason = reason
+        self.stage = stage
+
+
+class CancellationToken:
+    """Cancellation state of one request, shared by the event loop and the conversion workers"""
+
+    def __init__(self):
+        self.reason: Optional[str] = None
+        self.stage: Optional[str] = None
+        self.compute_s = 0.0
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._recorded = False
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str) -> None:
+        """The first reason wins"""
+        with self._lock:
+            if self.reason is None:
+                self.reason = reason
+        self._event.set()
+
+    def add_compute(self, seconds: float) -> None:
+        with self._lock:
+            self.compute_s += seconds
+
+    def raise_if_cancelled(self, stage: str) -> None:
+        if self._event.is_set():
+            self.stage = self.stage or stage
+            raise ConversionCancelled(self.reason, stage)
+
+    def record(self, count: bool = True) -> None:
+        """
+        Count the cancellation and its wasted compute once.
+
+        count=False only adds the compute, for work shared by requests that count themselves.
+        """
+        with self._lock:
+            if self._recorded or self.reason is None:
+                return
+            self._recorded = True
+        if count:
+            _cancelled.labels(reason=self.reason, stage=self.stage or WAITING).inc()
+        _wasted.labels(reason=self.reason).inc(self.compute_s)
+
+
+_token: ContextVar[Optional[CancellationToken]] = ContextVar("cancellation_token", default=None)
+
+
+def get_cancellation_token() -> Optional[CancellationToken]:
+    return _token.get()
+
+
+def set_cancellation_token(token: Optional[CancellationToken]) -> Token:
+    """Applies to the current task and the tasks it creates from now on"""
+    return _token.set(token)
+
+
+def reset_cancellation_token(token: Token) -> None:
+    _token.reset(token)
+
+
+def check_cancelled(stage: str) -> None:
+    """Stop the current conversion if its client is gone or its deadline has passed"""
+    token = _token.get()
+    if token is None:
+        return
+    remaining = get_scheduling_context().remaining()
+    if remaining is not None and remaining <= 0:
+        token.cancel(DEADLINE)
+    token.raise_if_cancelled(stage)
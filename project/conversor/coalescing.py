@@ -0,0 +1,150 @@
+"""
+Coalescência de conversões idênticas em andamento.
+
+Requisições iguais que chegam juntas (retries agressivos, o mesmo texto popular
+em rajada) fazem uma conversão só. A chave é um hash BLAKE2 do áudio decodificado
+com o locutor alvo, o modelo, o embedding da fonte (quando já conhecido) e a
+classe de prioridade; no ``/api/tts`` o mesmo texto e voz geram o mesmo PCM (a
+síntese já é coalescida pelo ``SynthesisCache``), então também caem na mesma chave.
+
+A conversão roda numa task própria, com o contexto (request id, prioridade,
+deadline) da primeira requisição e um ``CancellationToken`` só dela: se a
+primeira requisição desconecta, as outras continuam esperando e a conversão
+segue; ela só é cancelada quando todas foram embora. Se ela falha por motivo da
+requisição que a iniciou (``AdmissionRejected``, ``ConversionCancelled`` pelo
+deadline), as demais tentam de novo por conta própria; outros erros valem para
+todas. Cada requisição que entrou numa conversão já em andamento espera no máximo
+até o próprio deadline (``X-Deadline-Ms``) e sai com ``ConversionCancelled``, sem
+cancelar a conversão das outras. Nada fica guardado depois que a conversão termina.
+
+O hash do áudio roda fora do event loop (``asyncio.to_thread``): o BLAKE2 solta o
+GIL, e um upload de vários minutos levaria dezenas de milissegundos.
+"""
+import asyncio
+import hashlib
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+import numpy as np
+
+from project.conversor.admission.controller import AdmissionRejected
+from project.conversor.admission.scheduler import get_scheduling_context
+from project.conversor.cancellation import (
+    DEADLINE,
+    DISCONNECT,
+    WAITING,
+    CancellationToken,
+    ConversionCancelled,
+    get_cancellation_token,
+    set_cancellation_token,
+)
+from project.shared.metrics.registry import MetricsRegistry
+
+T = TypeVar("T")
+
+# errors caused by the request that started the conversion, not by its input
+_LEADER_ERRORS = (AdmissionRejected, ConversionCancelled)
+
+
+def fingerprint(*parts: Any) -> str:
+    """Hash of strings, arrays and tensors; None and "" are distinct"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if part is None:
+            digest.update(b"\x00")
+        elif isinstance(part, str):
+            digest.update(b"s" + part.encode())
+        else:
+            if hasattr(part, "detach"):
+                part = part.detach().cpu().numpy()
+            array = np.ascontiguousarray(part)
+            digest.update(f"a{array.dtype}{array.shape}".encode())
+            digest.update(array)
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+class _Flight:
+    """One running conversion and the requests waiting for it"""
+
+    def __init__(self, key: str, task: "asyncio.Task", token: CancellationToken):
+        self.key = key
+        self.task = task
+        self.token = token
+        self.subscribers = 0
+
+
+class ConversionCoalescer:
+    """Runs identical concurrent conversions once"""
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self._requests = MetricsRegistry().counter(
+            "conversion_coalescing_requests_total",
+            "Conversions by whether they started the work, joined a running one, retried after its leader failed "
+            "or gave up waiting at their deadline",
+            ["result"],
+        )
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def run(self, key: str, convert: Callable[[], Awaitable[T]]) -> T:
+        flight = self._flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = self._start(key, convert)
+        self._requests.labels(result="leader" if leader else "coalesced").inc()
+        flight.subscribers += 1
+        try:
+            if not leader:
+                # a follower waits no longer than its own deadline, the leader's bounds the work itself
+                remaining = get_scheduling_context().remaining()
+                await asyncio.wait({flight.task}, timeout=None if remaining is None else max(0.0, remaining))
+            if leader or flight.task.done():
+                return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            self._leave(flight)
+            raise
+        except _LEADER_ERRORS:
+            if leader:
+                raise
+            self._requests.labels(result="retried").inc()
+            return await self.run(key, convert)
+
+        self._leave(flight)
+        self._requests.labels(result="expired").inc()
+        token = get_cancellation_token()
+        if token is not None:
+            token.cancel(DEADLINE)
+            token.raise_if_cancelled(WAITING)
+        raise ConversionCancelled(DEADLINE, WAITING)
+
+    def _start(self, key: str, convert: Callable[[], Awaitable[T]]) -> _Flight:
+        token = CancellationToken()
+        flight: Optional[_Flight] = None
+
+        async def fly() -> T:
+            # the task's own copy of the context, the requests keep their tokens
+            set_cancellation_token(token)
+            try:
+                return await convert()
+            finally:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                token.record(count=False)
+
+        # ensure_future copies the leader's context: request id, priority, deadline
+        flight = _Flight(key, asyncio.ensure_future(fly()), token)
+        # nobody may be left to retrieve the error
+        flight.task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        self._flights[key] = flight
+        return flight
+
+    def _leave(self, flight: _Flight) -> None:
+        flight.subscribers -= 1
+        if flight.subscribers == 0 and not flight.task.done():
+            # the last waiting request went away, the result has no reader; a retry starts a new flight
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+            flight.token.cancel(DISCONNECT)
+            flight.task.cancel()
@@ -1,68 +1,222 @@
 # filepath: src/conversor/core_conversion_service.py
+import asyncio
+import contextvars
+import logging
 import numpy as np
 import time
 import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from project.conversor.admission.controller import CostProfile, measure_cost_profile
+from project.conversor.cancellation import DISCONNECT, check_cancelled, get_cancellation_token
 from project.conversor.processor import VoiceConverterProcessor
 from project.conversor.manager.file_model_manager import FileModelManager
+from project.conversor.manager.model_registry import ModelRegistry
 from project.embedding.factory import EmbeddingFactory
 from project.embedding.manager import EmbeddingManager
 from project.core.application import Application
+from project.observers.model_swap_observer import ModelSwapObserver
+from project.shared.metrics.pipeline import stage
+from project.shared.metrics.profiling import get_profile_session
+import torch
 
-class CoreConversionService:
-    def __init__(self):
+logger = logging.getLogger(__name__)
+
+
+class CoreConversionService(ModelSwapObserver):
+    def __init__(self, on_progress: Optional[Callable[[str, int, int], None]] = None):
         self.app = Application()
-        self.app.logger.info("Initializing CoreConversionService")
+        report_progress = on_progress or (lambda stage, done, total: None)
+        logger.info("Initializing CoreConversionService")
         self.model_manager = FileModelManager.get_instance()
         model_base_path = self.app.envs.MODELS_DIR_PATH
         speakers_path = self.app.envs.SPEAKERS_DIR_PATH
         
         if not os.path.exists(model_base_path):
-            self.app.logger.error(f"Model base path does not exist: {model_base_path}")
+            logger.error("Model base path does not exist: %s", model_base_path)
             raise FileNotFoundError(f"Model base path does not exist: {model_base_path}")
         
-        self.app.logger.info(f"Loading model from {model_base_path}")
+        logger.info("Loading model from %s", model_base_path)
+        report_progress("loading_model", 0, 1)
         try:
             self.model_manager.load_model(model_base_path)
             if not self.model_manager.model.is_loaded():
                 raise RuntimeError("Model failed to load")
         except Exception as e:
-            self.app.logger.error(f"Failed to load model: {str(e)}", exc_info=True)
+            logger.error("Failed to load model: %s", e, exc_info=True)
             raise
             
         self.model = self.model_manager.model
         self.embedding_factory = EmbeddingFactory(self.model)
-        self.embedding_manager = EmbeddingManager(self.embedding_factory, speakers_path)
+        report_progress("loading_model", 1, 1)
+        self.embedding_manager = EmbeddingManager(
+            self.embedding_factory,
+            speakers_path,
+            on_progress=lambda done, total: report_progress("loading_speakers", done, total),
+        )
         self.voice_converter = VoiceConverterProcessor(self.model)
-        self.app.logger.info("CoreConversionService initialized successfully")
+
+        self.model_registry = ModelRegistry.get_instance()
+        self.model_registry.register(self.model_registry.default_model_id, self.model)
+        self.model_registry.add_observer(self)
+        self.model_manager.add_observer(self)
+        self.embedding_managers: Dict[str, EmbeddingManager] = {
+            self.model_registry.default_model_id: self.embedding_manager
+        }
+        self.conversion_executor = ThreadPoolExecutor(
+            max_workers=self.app.envs.CONVERSION_WORKERS, thread_name_prefix="conversion"
+        )
+        logger.info("CoreConversionService initialized successfully")
+
+    def update(self, event: Any) -> None:
+        """Drop the embeddings of models unloaded by the registry"""
+        if event.get("event") == "model_unloaded":
+            self.embedding_managers.pop(event["model_id"], None)
+
+    def prepare_swap(self, model: Any) -> EmbeddingManager:
+        """Recompute every speaker embedding with the candidate model and validate them"""
+        logger.info("[ModelSwap] Recomputing speaker embeddings for candidate model")
+        embedding_manager = EmbeddingManager(EmbeddingFactory(model), self.app.envs.SPEAKERS_DIR_PATH)
+        for speaker, embedding in embedding_manager.embeddings.items():
+            if not torch.isfinite(embedding).all():
+                raise ValueError(f"Non-finite embedding for speaker {speaker}")
+            current = self.embedding_manager.embeddings.get(speaker)
+            if current is not None and current.shape != embedding.shape:
+                raise ValueError(
+                    f"Embedding shape changed for speaker {speaker}: {tuple(current.shape)} -> {tuple(embedding.shape)}"
+                )
+        return embedding_manager
+
+    def commit_swap(self, model: Any, prepared: EmbeddingManager) -> None:
+        """Serve new requests with the swapped model"""
+        default_model_id = self.model_registry.default_model_id
+        self.model = model
+        self.embedding_factory = prepared.factory
+        self.embedding_manager = prepared
+        self.voice_converter = VoiceConverterProcessor(model)
+        self.embedding_managers[default_model_id] = prepared
+        self.model_registry.register(default_model_id, model, model_path=self.model_manager.model_path)
+
+    def measure_conversion_cost(self) -> CostProfile:
+        """Measure peak memory and time of a conversion with the default model"""
+
+        @torch.inference_mode()
+        def convert(audio: np.ndarray) -> None:
+            src_se, src_spec = self.model.extract_se(audio)
+            self.model.inference(src_spec, {"g_src": src_se, "g_tgt": src_se})
+
+        return measure_cost_profile(convert)
+
+    async def ensure_model(self, model_id: Optional[str] = None) -> None:
+        """Load a model off the event loop, concurrent callers share the same load"""
+        await self.model_registry.aget(model_id)
+
+    def get_embedding_manager(self, model_id: Optional[str] = None) -> EmbeddingManager:
+        return self._get_embedding_manager(model_id)
+
+    async def extract_embedding(self, audio_array: np.ndarray, model_id: Optional[str] = None) -> torch.Tensor:
+        """Speaker embedding of an in-memory clip, computed on the conversion workers"""
+        def extract(model) -> torch.Tensor:
+            with torch.inference_mode():
+                return model.extract_se(audio_array)[0]
+
+        async with self.model_registry.use(model_id) as model:
+            return await self._run_on_workers(extract, model)
+
+    async def convert_voice_multi(
+        self,
+        audio_array: np.ndarray,
+        target_embeddings: List[torch.Tensor],
+        model_id: Optional[str] = None,
+        source_embedding: Optional[torch.Tensor] = None,
+    ) -> List[np.ndarray]:
+        """One source converted to several targets in a single batched inference"""
+        async with self.model_registry.use(model_id) as model:
+            voice_converter = self.voice_converter if model is self.model else VoiceConverterProcessor(model)
+            return await self._run_on_workers(
+                voice_converter.voice_conversion_multi, audio_array, target_embeddings, source_embedding
+            )
+
+    async def _run_on_workers(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run fn on the conversion workers, with the caller's context (request id, cancellation token).
+
+        When the caller is cancelled the token stops the worker at its next stage, and the
+        caller waits for it: the admitted memory and the model stay held until the thread is done.
+        """
+        token = get_cancellation_token()
+        session = get_profile_session()
+        context = contextvars.copy_context()
+
+        def call() -> Any:
+            start = time.perf_counter()
+            try:
+                context.run(check_cancelled, "queued")
+                if session is None:
+                    return context.run(fn, *args)
+                # torch.profiler only sees the thread it runs on
+                with session.worker():
+                    return context.run(fn, *args)
+            finally:
+                if token is not None:
+                    token.add_compute(time.perf_counter() - start)
+
+        future = asyncio.get_running_loop().run_in_executor(self.conversion_executor, call)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if token is not None:
+                token.cancel(DISCONNECT)
+            await asyncio.wait({future})
+            raise
+
+    def _get_embedding_manager(self, model_id: Optional[str]) -> EmbeddingManager:
+        model_id = self.model_registry.resolve_id(model_id)
+        manager = self.embedding_managers.get(model_id)
+        if manager is None:
+            model = self.model_registry.get(model_id)
+            # speaker embeddings depend on the model, extract them lazily per speaker
+            manager = EmbeddingManager(
+                EmbeddingFactory(model), self.app.envs.SPEAKERS_DIR_PATH, preload=False
+            )
+            self.embedding_managers[model_id] = manager
+        return manager
     
     async def get_speakers(self) -> list[str]:
         """Get list of available speakers"""
-        self.app.logger.info("Retrieving available speakers")
         return self.embedding_manager.get_all_embeddings_names()
     
-    def get_speaker_embedding(self, speaker: str) -> np.ndarray:
+    def get_speaker_embedding(self, speaker: str, model_id: Optional[str] = None) -> np.ndarray:
         """Get embedding for a specific speaker"""
-        self.app.logger.info(f"[Audio] Getting embedding for speaker: {speaker}")
-        embedding_start = time.time()
-        target_embedding = self.embedding_manager.get_embedding(speaker)
-        embedding_time = time.time() - embedding_start
-        self.app.logger.info(f"[Audio] Speaker embedding obtained in {embedding_time:.2f} seconds")
-        return target_embedding
-
-    async def convert_voice(self, audio_array: np.ndarray, target_embedding: np.ndarray) -> np.ndarray:
-        """Execute core voice conversion"""
-        self.app.logger.info("[Audio] Processing voice conversion")
+        with stage("embedding_lookup").time():
+            return self._get_embedding_manager(model_id).get_embedding(speaker)
+
+    async def convert_voice(
+        self,
+        audio_array: np.ndarray,
+        target_embedding: np.ndarray,
+        model_id: Optional[str] = None,
+        source_embedding: Optional[torch.Tensor] = None,
+    ) -> np.ndarray:
+        """Execute core voice conversion, source_embedding skips analysing the source speaker"""
         conversion_start = time.time()
         try:
-            output_buffer = await self.voice_converter.convert_voice(audio_array, target_embedding)
+            async with self.model_registry.use(model_id) as model:
+                voice_converter = (
+                    self.voice_converter if model is self.model else VoiceConverterProcessor(model)
+                )
+                # inference releases the GIL, workers convert segments in parallel off the event loop
+                output_buffer = await self._run_on_workers(
+                    voice_converter.voice_conversion_with_target_se, audio_array, target_embedding, source_embedding
+                )
             if output_buffer is None or len(output_buffer) == 0:
-                self.app.logger.error("[Audio] Empty audio buffer after voice conversion")
+                logger.error("[Audio] Empty audio buffer after voice conversion")
                 raise ValueError("Empty audio buffer after voice conversion")
                 
             conversion_time = time.time() - conversion_start
-            self.app.logger.info(f"[Audio] Voice conversion completed in {conversion_time:.2f} seconds")
+            logger.info("[Audio] Voice conversion completed in %.2f seconds", conversion_time)
             return output_buffer
         except Exception as e:
             conversion_time = time.time() - conversion_start
-            self.app.logger.error(f"[Audio] Error during voice conversion after {conversion_time:.2f} seconds: {str(e)}", exc_info=True)
+            logger.error("[Audio] Error during voice conversion after %.2f seconds: %s", conversion_time, e, exc_info=True)
             raise
@@ -1,6 +1,25 @@
 from project.conversor.wrapper.model_wrapper import VoiceConverterModelWrapper
+from project.core.application import Application
+from project.observers.model_swap_observer import ModelSwapObserver
 from project.observers.observable import Observable
+from dataclasses import dataclass, asdict
 from typing import Optional
+import numpy as np
+import threading
+import time
+import torch
+
+
+@dataclass
+class ModelSwapStatus:
+    """Progress of the last model hot-swap"""
+
+    state: str = "idle"
+    model_path: Optional[str] = None
+    previous_model_path: Optional[str] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
 
 
 class FileModelManager(Observable):
@@ -9,6 +28,8 @@ class FileModelManager(Observable):
     """
     _instance = None
     model: VoiceConverterModelWrapper
+    wrapper_factory = VoiceConverterModelWrapper
+    swap_in_progress_states = ("loading", "warming", "switching", "draining")
 
     def __new__(cls, *args, **kwargs):
         if cls._instance is None:
@@ -19,13 +40,101 @@ class FileModelManager(Observable):
     def __init__(self):
         if not hasattr(self, 'initialized'):
             super().__init__()
+            self.app = Application()
+            self.model_path: Optional[str] = None
+            self.swap_status = ModelSwapStatus()
+            self._swap_lock = threading.Lock()
             self.initialized = True
-            
+
     def load_model(self, model_path: str):
         """Load model and notify observers"""
         self.model.load_model(model_path)
+        self.model_path = model_path
         self.notify_observers({})
 
+    def swap_model(self, model_path: str, drain_timeout: Optional[float] = None) -> ModelSwapStatus:
+        """
+        Hot-swap the served checkpoint without dropping requests.
+
+        The new checkpoint is loaded and warmed on a background thread while the
+        current one keeps serving. Swap observers then rebuild their per-model
+        state (speaker embeddings), new requests are switched atomically and the
+        previous model is freed once its in-flight conversions drain. Any failure
+        before the switch leaves the current model in place.
+        """
+        with self._swap_lock:
+            if self.swap_status.state in self.swap_in_progress_states:
+                raise RuntimeError("A model swap is already in progress")
+            self.swap_status = ModelSwapStatus(
+                state="loading",
+                model_path=model_path,
+                previous_model_path=self.model_path,
+                started_at=time.time(),
+            )
+        if drain_timeout is None:
+            drain_timeout = self.app.envs.MODEL_SWAP_DRAIN_TIMEOUT_S
+
+        thread = threading.Thread(
+            target=self._run_swap, args=(model_path, drain_timeout), name="model-swap", daemon=True
+        )
+        thread.start()
+        return self.swap_status
+
+    def get_swap_status(self) -> dict:
+        return asdict(self.swap_status)
+
+    def _run_swap(self, model_path: str, drain_timeout: float) -> None:
+        candidate = self.wrapper_factory()
+        try:
+            self.app.logger.info("[ModelSwap] Loading candidate model from %s", model_path)
+            candidate.load_model(model_path)
+
+            self.swap_status.state = "warming"
+            self.warmup(candidate)
+            observers = [o for o in self._observers if isinstance(o, ModelSwapObserver)]
+            prepared = [(observer, observer.prepare_swap(candidate)) for observer in observers]
+        except Exception as e:
+            self.app.logger.error("[ModelSwap] Candidate model rejected, keeping current model: %s", e, exc_info=True)
+            candidate.unload()
+            self._finish_swap("rolled_back", error=str(e))
+            return
+
+        self.swap_status.state = "switching"
+        with self._swap_lock:
+            previous = self.model
+            self.model = candidate
+            self.model_path = model_path
+            for observer, state in prepared:
+                observer.commit_swap(candidate, state)
+        self.app.logger.info("[ModelSwap] New requests now served by %s", model_path)
+
+        self.swap_status.state = "draining"
+        if not previous.wait_idle(drain_timeout):
+            # freeing the weights under a running conversion would crash it, the last one out unloads them
+            self.app.logger.warning(
+                "[ModelSwap] %d conversions still running on the previous model after %.0f seconds, "
+                "it is freed when they finish",
+                previous.in_flight, drain_timeout,
+            )
+        previous.retire()
+        self._finish_swap("completed")
+
+    def _finish_swap(self, state: str, error: Optional[str] = None) -> None:
+        self.swap_status.state = state
+        self.swap_status.error = error
+        self.swap_status.finished_at = time.time()
+        self.notify_observers({"event": "model_swap_" + state, "status": self.get_swap_status()})
+
+    @torch.inference_mode()
+    def warmup(self, model: VoiceConverterModelWrapper, duration_s: float = 1.0, sample_rate: int = 24000) -> None:
+        """Run a short conversion so weights are paged in and the output is sane"""
+        rng = np.random.default_rng(0)
+        audio = (0.05 * rng.standard_normal(int(duration_s * sample_rate))).astype(np.float32)
+        src_se, src_spec = model.extract_se(audio)
+        output = model.inference(src_spec, {"g_src": src_se, "g_tgt": src_se})
+        if not torch.isfinite(output["model_outputs"]).all():
+            raise ValueError("Warmup produced non-finite audio")
+
     @classmethod
     def get_instance(cls) -> "FileModelManager":
         if cls._instance is None:
@@ -0,0 +1,243 @@
+import asyncio
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, Optional
+
+from project.conversor.wrapper.model_wrapper import VoiceConverterModelWrapper
+from project.core.application import Application
+from project.observers.observable import Observable
+from project.shared.system.check_available_memory import check_available_memory
+
+MODEL_ID_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+
+
+@dataclass
+class RegisteredModel:
+    """A resident model and the bookkeeping used for LRU eviction"""
+
+    model_id: str
+    model_path: str
+    wrapper: VoiceConverterModelWrapper
+    size_bytes: int
+    last_used: float
+    pinned: bool = False
+
+
+class ModelRegistry(Observable):
+    """
+    Keeps several voice conversion checkpoints resident, addressed by model id.
+
+    Models are loaded on demand from ``<models_dir>/<model_id>/model.pth`` and the
+    least recently used ones are unloaded whenever the resident models exceed the
+    memory budget or the system runs low on free memory. Observers receive
+    ``{"event": "model_loaded" | "model_unloaded", "model_id": ...}``.
+    """
+
+    _instance = None
+
+    def __init__(
+        self,
+        models_dir: str,
+        memory_budget_bytes: int,
+        default_model_id: str = "default",
+        wrapper_factory: Callable[[], VoiceConverterModelWrapper] = VoiceConverterModelWrapper,
+        memory_check: Callable[[], bool] = check_available_memory,
+    ):
+        super().__init__()
+        self.app = Application()
+        self.models_dir = models_dir
+        self.memory_budget_bytes = memory_budget_bytes
+        self.default_model_id = default_model_id
+        self.wrapper_factory = wrapper_factory
+        self.memory_check = memory_check
+        self._models: "OrderedDict[str, RegisteredModel]" = OrderedDict()
+        self._loading: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="model-loader")
+
+    @classmethod
+    def get_instance(cls) -> "ModelRegistry":
+        if cls._instance is None:
+            envs = Application().envs
+            cls._instance = ModelRegistry(
+                models_dir=envs.MODELS_DIR_PATH,
+                memory_budget_bytes=envs.MODEL_MEMORY_BUDGET_MB * 1024 * 1024,
+                default_model_id=envs.DEFAULT_MODEL_ID,
+                memory_check=lambda: check_available_memory(envs.MIN_AVAILABLE_MEMORY_GB),
+            )
+        return cls._instance
+
+    def resolve_id(self, model_id: Optional[str]) -> str:
+        """Map an optional request model id to a registry key"""
+        return model_id or self.default_model_id
+
+    def resolve_path(self, model_id: str) -> str:
+        """Return the checkpoint directory for a model id"""
+        if model_id == self.default_model_id:
+            return self.models_dir
+        if not MODEL_ID_PATTERN.match(model_id):
+            raise ValueError(f"Invalid model id: {model_id}")
+        model_path = os.path.join(self.models_dir, model_id)
+        if not os.path.exists(os.path.join(model_path, "model.pth")):
+            raise FileNotFoundError(f"Model not found: {model_id}")
+        return model_path
+
+    def register(
+        self,
+        model_id: str,
+        wrapper: VoiceConverterModelWrapper,
+        pinned: bool = True,
+        model_path: Optional[str] = None,
+    ) -> None:
+        """Register (or replace) an already loaded model, pinned models are never evicted"""
+        with self._lock:
+            self._models[model_id] = RegisteredModel(
+                model_id=model_id,
+                model_path=model_path or self.resolve_path(model_id),
+                wrapper=wrapper,
+                size_bytes=wrapper.memory_footprint(),
+                last_used=time.monotonic(),
+                pinned=pinned,
+            )
+            self._models.move_to_end(model_id)
+
+    def is_resident(self, model_id: str) -> bool:
+        with self._lock:
+            return model_id in self._models
+
+    def get(self, model_id: Optional[str] = None) -> VoiceConverterModelWrapper:
+        """Return a loaded model, loading it on this call if needed"""
+        return self._request(self.resolve_id(model_id)).result()
+
+    async def aget(self, model_id: Optional[str] = None) -> VoiceConverterModelWrapper:
+        """Async variant of get, the load runs on the loader thread"""
+        return await asyncio.wrap_future(self._request(self.resolve_id(model_id)))
+
+    @asynccontextmanager
+    async def use(self, model_id: Optional[str] = None) -> AsyncIterator[VoiceConverterModelWrapper]:
+        """Hold a model for the duration of a conversion so it is not evicted, loading it off the event loop"""
+        model_id = self.resolve_id(model_id)
+        while True:
+            wrapper = await self.aget(model_id)
+            with self._lock:
+                entry = self._models.get(model_id)
+                # the model may have been evicted or replaced between the load and this point
+                if entry is not None and entry.wrapper is wrapper:
+                    wrapper.acquire()
+                    break
+        try:
+            yield wrapper
+        finally:
+            wrapper.release()
+            with self._lock:
+                entry.last_used = time.monotonic()
+
+    def _request(self, model_id: str) -> Future:
+        with self._lock:
+            entry = self._models.get(model_id)
+            if entry is not None:
+                entry.last_used = time.monotonic()
+                self._models.move_to_end(model_id)
+                future: Future = Future()
+                future.set_result(entry.wrapper)
+                return future
+
+            pending = self._loading.get(model_id)
+            if pending is not None:
+                return pending
+
+            model_path = self.resolve_path(model_id)
+            future = Future()
+            self._loading[model_id] = future
+
+        self._executor.submit(self._load, model_id, model_path, future)
+        return future
+
+    def _load(self, model_id: str, model_path: str, future: Future) -> None:
+        evicted: list[str] = []
+        try:
+            if not self.memory_check():
+                self.app.logger.warning("[ModelRegistry] Low memory before loading %s, evicting", model_id)
+                with self._lock:
+                    evicted += self._evict(0, until_memory_ok=True)
+
+            load_start = time.time()
+            wrapper = self.wrapper_factory()
+            wrapper.load_model(model_path)
+            size_bytes = wrapper.memory_footprint()
+            self.app.logger.info(
+                "[ModelRegistry] Model %s loaded in %.2f seconds (%.1f MB)",
+                model_id, time.time() - load_start, size_bytes / (1024 * 1024),
+            )
+
+            with self._lock:
+                evicted += self._evict(size_bytes)
+                self._models[model_id] = RegisteredModel(
+                    model_id=model_id,
+                    model_path=model_path,
+                    wrapper=wrapper,
+                    size_bytes=size_bytes,
+                    last_used=time.monotonic(),
+                )
+                self._loading.pop(model_id, None)
+        except Exception as e:
+            self.app.logger.error("[ModelRegistry] Failed to load model %s: %s", model_id, e, exc_info=True)
+            with self._lock:
+                self._loading.pop(model_id, None)
+            for evicted_id in evicted:
+                self.notify_observers({"event": "model_unloaded", "model_id": evicted_id})
+            future.set_exception(e)
+            return
+
+        for evicted_id in evicted:
+            self.notify_observers({"event": "model_unloaded", "model_id": evicted_id})
+        self.notify_observers({"event": "model_loaded", "model_id": model_id})
+        future.set_result(wrapper)
+
+    def _evict(self, incoming_bytes: int, until_memory_ok: bool = False) -> list[str]:
+        """Unload LRU models until the budget fits, must hold the lock"""
+        evicted = []
+        while True:
+            over_budget = self.resident_bytes() + incoming_bytes > self.memory_budget_bytes
+            low_memory = until_memory_ok and not self.memory_check()
+            if not over_budget and not low_memory:
+                break
+            victim = next(
+                (e for e in self._models.values() if not e.pinned and e.wrapper.in_flight == 0),
+                None,
+            )
+            if victim is None:
+                self.app.logger.warning("[ModelRegistry] No evictable model left, running over budget")
+                break
+            del self._models[victim.model_id]
+            victim.wrapper.unload()
+            evicted.append(victim.model_id)
+            self.app.logger.info("[ModelRegistry] Evicted model %s (%d bytes)", victim.model_id, victim.size_bytes)
+        return evicted
+
+    def resident_bytes(self) -> int:
+        return sum(entry.size_bytes for entry in self._models.values())
+
+    def get_status(self) -> dict:
+        """Snapshot of the resident models for diagnostics"""
+        with self._lock:
+            return {
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "resident_bytes": self.resident_bytes(),
+                "loading": list(self._loading.keys()),
+                "models": [
+                    {
+                        "model_id": entry.model_id,
+                        "size_bytes": entry.size_bytes,
+                        "in_flight": entry.wrapper.in_flight,
+                        "pinned": entry.pinned,
+                    }
+                    for entry in self._models.values()
+                ],
+            }
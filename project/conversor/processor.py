@@ -1,9 +1,15 @@
 import torch
 import torch.nn.functional as F
+from project.conversor.admission.quality import get_quality_tier
+from project.conversor.cancellation import check_cancelled
 from project.core.application import Application
 from project.dto.tts_dto import KokoroTtsDto, RvcDTO, RvcTtsDTO
+from project.shared.metrics.pipeline import stage
 import logging
 import numpy as np
+import os
+
+logger = logging.getLogger(__name__)
 
 
 class VoiceConverterProcessor:
@@ -12,71 +18,42 @@ class VoiceConverterProcessor:
         self.app = Application()
 
     async def convert_voice(self, src_wav, target_embedding):
-        print(f"[VoiceConverterProcessor] Iniciando conversão de voz. Shape do áudio fonte: {src_wav.shape}")
-        print(f"[VoiceConverterProcessor] Shape do embedding alvo: {target_embedding.shape}")
+        logger.debug(
+            "[VoiceConverterProcessor] Iniciando conversão de voz. Shape do áudio fonte: %s, embedding alvo: %s",
+            src_wav.shape, target_embedding.shape,
+        )
         result = self.voice_conversion_with_target_se(src_wav, target_embedding)
-        print(f"[VoiceConverterProcessor] Conversão concluída. Shape do resultado: {result.shape if result is not None else 'None'}")
         if result is None:
-            print("[VoiceConverterProcessor] A conversão retornou None")
+            logger.warning("[VoiceConverterProcessor] A conversão retornou None")
         return result
         
     @torch.inference_mode()
-    def voice_conversion_with_target_se(self, src, tgt_se):
-        print("[VoiceConverterProcessor] Extraindo source embedding e spectrograma")
-        src_se, src_spec = self.model.extract_se(src)
-        print(f"[VoiceConverterProcessor] Source embedding shape: {src_se.shape}, Source spec shape: {src_spec.shape}")
-        # compute and show similarity between source and target embeddings
-        try:
-            # ensure embeddings have shape [1, C, 1] or [1, C]
-            src_vec = src_se.squeeze(-1)
-            tgt_vec = tgt_se.squeeze(-1)
-            # normalize before similarity
-            src_norm = F.normalize(src_vec, p=2, dim=1)
-            tgt_norm = F.normalize(tgt_vec, p=2, dim=1)
-            cosine = F.cosine_similarity(src_norm, tgt_norm, dim=1).item()
-            l2 = torch.norm(src_vec - tgt_vec).item()
-            print(f"[VoiceConverterProcessor] Embedding similarity -> cosine: {cosine:.4f}, L2: {l2:.4f}")
-            # additional diagnostics: model config and tensor devices/values
-            try:
-                # unwrap nested wrappers to find underlying model
-                model_obj = self.model
-                depth = 0
-                while hasattr(model_obj, 'model') and depth < 5:
-                    model_obj = getattr(model_obj, 'model')
-                    depth += 1
-                zero_g = getattr(model_obj, 'zero_g', None)
-                print(f"[VoiceConverterProcessor] Model zero_g: {zero_g}")
-            except Exception:
-                print("[VoiceConverterProcessor] Could not read model zero_g flag")
+    def voice_conversion_with_target_se(self, src, tgt_se, src_se=None):
+        if src_se is None:
+            with stage("extract_se").time():
+                src_se, src_spec = self.model.extract_se(src)
+        else:
+            # source speaker already known (mapped Kokoro voice), only the spectrogram is needed
+            with stage("spectrogram").time():
+                src_spec = self.model.spectrogram(src)
+        check_cancelled("inference")
+        # the diagnostics synchronise with the device, only pay for them when they are logged
+        if logger.isEnabledFor(logging.DEBUG):
+            self._log_embedding_diagnostics(src_se, tgt_se, src_spec)
 
+        # Optional quick test: replace target embedding with a random normalized vector to check effect
+        if os.environ.get('RVC_TEST_RANDOM_GT', '0') == '1':
             try:
-                print(f"[VoiceConverterProcessor] src_se device: {src_se.device}, dtype: {src_se.dtype}")
-                print(f"[VoiceConverterProcessor] tgt_se device: {tgt_se.device}, dtype: {tgt_se.dtype}")
-                print(f"[VoiceConverterProcessor] src_spec device: {src_spec.device}, dtype: {src_spec.dtype}")
-                print(f"[VoiceConverterProcessor] src_se stats mean/std/min/max: {src_se.mean().item():.4f}/{src_se.std().item():.4f}/{src_se.min().item():.4f}/{src_se.max().item():.4f}")
-                print(f"[VoiceConverterProcessor] tgt_se stats mean/std/min/max: {tgt_se.mean().item():.4f}/{tgt_se.std().item():.4f}/{tgt_se.min().item():.4f}/{tgt_se.max().item():.4f}")
-                print(f"[VoiceConverterProcessor] src and tgt equal: {torch.allclose(src_se, tgt_se, atol=1e-6)}")
-            except Exception as e:
-                print(f"[VoiceConverterProcessor] Could not compute extended embedding diagnostics: {e}")
-
-            # Optional quick test: replace target embedding with a random normalized vector to check effect
-            try:
-                import os
-                if os.environ.get('RVC_TEST_RANDOM_GT', '0') == '1':
-                    device = getattr(self.model, 'device', None)
-                    # determine device from src_spec if not on model
-                    if device is None:
-                        device = src_spec.device
-                    C = src_vec.shape[1]
-                    rand = torch.randn((1, C), device=device)
-                    rand = F.normalize(rand, p=2, dim=1).unsqueeze(-1)
-                    tgt_se = rand
-                    tgt_vec = tgt_se.squeeze(-1)
-                    print('[VoiceConverterProcessor] Replaced target SE with random vector for quick test')
+                device = getattr(self.model, 'device', None)
+                # determine device from src_spec if not on model
+                if device is None:
+                    device = src_spec.device
+                C = src_se.squeeze(-1).shape[1]
+                rand = torch.randn((1, C), device=device)
+                tgt_se = F.normalize(rand, p=2, dim=1).unsqueeze(-1)
+                logger.info('[VoiceConverterProcessor] Replaced target SE with random vector for quick test')
             except Exception as e:
-                print(f"[VoiceConverterProcessor] Could not apply random gt override: {e}")
-        except Exception as e:
-            print(f"[VoiceConverterProcessor] Could not compute embedding similarity: {e}")
+                logger.warning("[VoiceConverterProcessor] Could not apply random gt override: %s", e)
 
         # keep original SE shapes returned by extract_se (e.g., [1, C, 1])
         try:
@@ -96,19 +73,19 @@ class VoiceConverterProcessor:
             pass
 
         aux_input = {"g_src": src_se, "g_tgt": tgt_se}
-        print("[VoiceConverterProcessor] Iniciando inferência do modelo")
 
         # use a diagnostic wrapper around model.inference to log auxiliary info and compare outputs
-        audio = self._run_inference_with_diagnostics(
-            self.model,
-            src_spec,
-            aux_input,
-            src_wave_numpy=src if isinstance(src, (np.ndarray,)) else None,
-        )
+        with stage("inference").time():
+            audio = self._run_inference_with_diagnostics(
+                self.model,
+                src_spec,
+                aux_input,
+                src_wave_numpy=src if isinstance(src, (np.ndarray,)) else None,
+                reduced_precision=get_quality_tier().reduced_precision,
+            )
 
         # Optional: run a second inference with a random target SE and compare outputs
         try:
-            import os
             if os.environ.get('RVC_DIAG_COMPARE_RANDOM', '0') == '1':
                 # build random normalized SE matching dims
                 src_vec = src_se.squeeze(-1)
@@ -129,27 +106,80 @@ class VoiceConverterProcessor:
                     b = out_b[:n].astype(np.float32)
                     mse_ab = float(np.mean((a - b) ** 2))
                     corr_ab = float(np.corrcoef(a.flatten(), b.flatten())[0, 1]) if n > 1 else float('nan')
-                    print(f"[VoiceConverterProcessor] Diagnostic compare: MSE between original-target and random-target outputs: {mse_ab:.6e}, Corr: {corr_ab:.6f}")
+                    logger.info(
+                        "[VoiceConverterProcessor] Diagnostic compare: MSE between original-target and random-target outputs: %.6e, Corr: %.6f",
+                        mse_ab, corr_ab,
+                    )
                 except Exception:
-                    print("[VoiceConverterProcessor] Diagnostic compare: could not compare outputs (missing model_outputs)")
+                    logger.info("[VoiceConverterProcessor] Diagnostic compare: could not compare outputs (missing model_outputs)")
         except Exception:
             pass
-        print(f"[VoiceConverterProcessor] Inferência concluída. Keys do resultado: {audio.keys()}")
-
         if "model_outputs" not in audio:
-            print("[VoiceConverterProcessor] Nenhum output do modelo encontrado")
+            logger.error("[VoiceConverterProcessor] Nenhum output do modelo encontrado, keys: %s", list(audio.keys()))
             return None
 
-        result = audio["model_outputs"][0, 0].data.cpu().float().numpy()
-        print(f"[VoiceConverterProcessor] Áudio convertido com sucesso. Shape do resultado: {result.shape}")
+        check_cancelled("postprocess")
+        with stage("postprocess").time():
+            result = audio["model_outputs"][0, 0].data.cpu().float().numpy()
+        logger.debug("[VoiceConverterProcessor] Áudio convertido com sucesso. Shape do resultado: %s", result.shape)
         return result
 
-    def _run_inference_with_diagnostics(self, model, src_spec, aux_input, src_wave_numpy=None):
-        logger = logging.getLogger("logger")
+    @torch.inference_mode()
+    def voice_conversion_multi(self, src, tgt_ses, src_se=None):
+        """Convert one source to several target embeddings in a single batched pass"""
+        if src_se is None:
+            with stage("extract_se").time():
+                src_se, src_spec = self.model.extract_se(src)
+        else:
+            with stage("spectrogram").time():
+                src_spec = self.model.spectrogram(src)
+        src_se = src_se.to(device=src_spec.device, dtype=src_spec.dtype)
+        g_tgts = torch.cat(
+            [torch.as_tensor(tgt_se).to(device=src_spec.device, dtype=src_spec.dtype).reshape(1, -1, 1) for tgt_se in tgt_ses]
+        )
+        logger.debug("[VoiceConverterProcessor] Conversão para %d alvos. Source spec shape: %s", len(tgt_ses), src_spec.shape)
+        check_cancelled("inference")
+        with stage("inference").time():
+            outputs = self.model.inference_multi(src_spec, src_se, g_tgts)
+        check_cancelled("postprocess")
+        with stage("postprocess").time():
+            return [output[0].data.cpu().float().numpy() for output in outputs]
+
+    def _log_embedding_diagnostics(self, src_se, tgt_se, src_spec):
+        """Similarity and stats of the source and target embeddings, at DEBUG level"""
+        try:
+            # ensure embeddings have shape [1, C, 1] or [1, C]
+            src_vec = src_se.squeeze(-1)
+            tgt_vec = tgt_se.squeeze(-1)
+            # normalize before similarity
+            src_norm = F.normalize(src_vec, p=2, dim=1)
+            tgt_norm = F.normalize(tgt_vec, p=2, dim=1)
+            cosine = F.cosine_similarity(src_norm, tgt_norm, dim=1).item()
+            l2 = torch.norm(src_vec - tgt_vec).item()
+            logger.debug("[VoiceConverterProcessor] Embedding similarity -> cosine: %.4f, L2: %.4f", cosine, l2)
+            # unwrap nested wrappers to find underlying model
+            model_obj = self.model
+            depth = 0
+            while hasattr(model_obj, 'model') and depth < 5:
+                model_obj = getattr(model_obj, 'model')
+                depth += 1
+            logger.debug("[VoiceConverterProcessor] Model zero_g: %s", getattr(model_obj, 'zero_g', None))
+            for name, t in (("src_se", src_se), ("tgt_se", tgt_se)):
+                logger.debug(
+                    "[VoiceConverterProcessor] %s device: %s, dtype: %s, stats mean/std/min/max: %.4f/%.4f/%.4f/%.4f",
+                    name, t.device, t.dtype, t.mean().item(), t.std().item(), t.min().item(), t.max().item(),
+                )
+            logger.debug("[VoiceConverterProcessor] src_spec shape: %s, device: %s, dtype: %s", src_spec.shape, src_spec.device, src_spec.dtype)
+            logger.debug("[VoiceConverterProcessor] src and tgt equal: %s", torch.allclose(src_se, tgt_se, atol=1e-6))
+        except Exception as e:
+            logger.debug("[VoiceConverterProcessor] Could not compute embedding diagnostics: %s", e)
+
+    def _run_inference_with_diagnostics(self, model, src_spec, aux_input, src_wave_numpy=None, reduced_precision=False):
+        debug = logger.isEnabledFor(logging.DEBUG)
         try:
             # Log aux_input keys
             try:
-                logger.debug(f"[Diagnostic] aux_input keys: {list(aux_input.keys())}")
+                logger.debug("[Diagnostic] aux_input keys: %s", list(aux_input.keys()))
             except Exception:
                 logger.debug("[Diagnostic] aux_input not a dict or keys not accessible")
 
@@ -175,11 +205,12 @@ class VoiceConverterProcessor:
                         param_dtype = first_param.dtype
                         param_device = first_param.device
                         # count params (best-effort)
-                        try:
-                            cnt = 1 + sum(1 for _ in params_iter)
-                            logger.debug("[Diagnostic] model param count (approx): %d", cnt)
-                        except Exception:
-                            pass
+                        if debug:
+                            try:
+                                cnt = 1 + sum(1 for _ in params_iter)
+                                logger.debug("[Diagnostic] model param count (approx): %d", cnt)
+                            except Exception:
+                                pass
                         logger.debug("[Diagnostic] model param dtype: %s, device: %s", str(param_dtype), str(param_device))
                 else:
                     logger.debug("[Diagnostic] underlying model object has no 'parameters' attribute")
@@ -214,16 +245,19 @@ class VoiceConverterProcessor:
 
             # Log shapes and stats for known keys
             try:
-                for name in ["g_src", "g_tgt", "src_se", "tgt_se", "spk_embed"]:
+                for name in ["g_src", "g_tgt", "src_se", "tgt_se", "spk_embed"] if debug else ():
                     if name in aux_input and isinstance(aux_input[name], torch.Tensor):
                         t = aux_input[name]
                         stats = (float(t.mean()), float(t.std()), float(t.min()), float(t.max()))
-                        logger.debug(f"[Diagnostic] {name} shape: {tuple(t.shape)}, dtype: {t.dtype}, stats mean/std/min/max: {stats[0]:.4f}/{stats[1]:.4f}/{stats[2]:.4f}/{stats[3]:.4f}")
+                        logger.debug("[Diagnostic] %s shape: %s, dtype: %s, stats mean/std/min/max: %.4f/%.4f/%.4f/%.4f", name, tuple(t.shape), t.dtype, *stats)
             except Exception:
                 pass
 
-            # Run inference
-            result = model.inference(src_spec, aux_input)
+            # Run inference, the overload quality tiers ask for the cheaper variant
+            inference = model.inference_reduced_precision if reduced_precision else model.inference
+            result = inference(src_spec, aux_input)
+            if not debug:
+                return result
 
             # If we have src_wave_numpy, compute mse/corr with result (if result is waveform or can be converted)
             try:
@@ -283,10 +317,10 @@ class VoiceConverterProcessor:
                 else:
                     logger.debug("[Diagnostic] Skipping MSE/corr (missing src_wave or out_wave)")
             except Exception as e:
-                logger.debug(f"[Diagnostic] Error computing MSE/corr: {e}")
+                logger.debug("[Diagnostic] Error computing MSE/corr: %s", e)
 
             return result
         except Exception as e:
-            logger.exception(f"[Diagnostic] Inference wrapper failed: {e}")
+            logger.exception("[Diagnostic] Inference wrapper failed: %s", e)
             # fallback to direct inference to avoid breaking pipeline
             return model.inference(src_spec, aux_input)
\ No newline at end of file
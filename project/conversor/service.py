@@ -1,88 +1,170 @@
+from contextlib import asynccontextmanager
 from fastapi import UploadFile
+from project.conversor.admission.controller import AdmissionController, AdmissionRejected
+from project.conversor.admission.quality import get_quality_tier
+from project.conversor.admission.scheduler import get_scheduling_context
 from project.conversor.audio.loading_service import AudioLoadingService
+from project.conversor.cancellation import check_cancelled
+from project.conversor.coalescing import ConversionCoalescer, fingerprint
 from project.conversor.core_conversion_service import CoreConversionService
+from project.conversor.stream.pipeline import StreamingConversionPipeline
 from project.core.application import Application
 from project.dto.tts_dto import RvcDTO
+from project.shared.metrics.pipeline import in_flight, input_duration, real_time_factor
+from typing import Any, AsyncIterator, Callable, List, Optional, Tuple
+import asyncio
+import logging
+import numpy as np
+import time
+
+logger = logging.getLogger(__name__)
 
 
 class ConversorService:
-    def __init__(self):
+    def __init__(self, on_progress: Optional[Callable[[str, int, int], None]] = None):
         self.app = Application()
-        print("Initializing ConversorService")
-        self.core_service = CoreConversionService()
+        logger.info("Initializing ConversorService")
+        self.core_service = CoreConversionService(on_progress)
         self.audio_loading_service = AudioLoadingService()
+        self.admission_controller = AdmissionController.get_instance()
+        self.coalescer = ConversionCoalescer()
 
     async def get_speakers(self) -> list[str]:
-        print("Retrieving available speakers")
-        speakers = await self.core_service.get_speakers()
-        print("speakers", speakers)
-        return speakers
+        return await self.core_service.get_speakers()
 
     async def convert_voice_for_file(self, dto: RvcDTO, audio_file: UploadFile):
-        print(f"[Audio] Starting voice conversion for {audio_file.filename}")
+        logger.debug("[Audio] Starting voice conversion for %s", audio_file.filename)
         try:
+            await self.core_service.ensure_model(dto.model_id)
             audio_array, temp_file_path = (
                 await self.audio_loading_service.load_from_upload_file(audio_file)
             )
-
-            target_embedding = self.core_service.get_speaker_embedding(
-                dto.target_voice or "voice"
-            )
-            output_buffer = await self.core_service.convert_voice(
-                audio_array, target_embedding
-            )
-
-            self.audio_loading_service.cleanup_temp_file(temp_file_path)
-            return output_buffer
+            try:
+                return await self.convert_audio_array(dto, audio_array)
+            finally:
+                self.audio_loading_service.cleanup_temp_file(temp_file_path)
 
         except Exception as e:
-            self.app.logger.error(
-                "[Audio] Error converting voice: %s", str(e), exc_info=True
-            )
+            logger.error("[Audio] Error converting voice: %s", e, exc_info=True)
             raise
 
     async def get_converted_audio(self, dto: RvcDTO, audio_file: UploadFile):
-        print("Processing audio conversion")
         try:
-            print("Loading audio file...")
+            await self.core_service.ensure_model(dto.model_id)
             audio_array, temp_file_path = (
                 await self.audio_loading_service.load_from_upload_file(audio_file)
             )
-            if audio_array is None or len(audio_array) == 0:
-                print("Audio array is empty after loading. Check the input file.")
-                raise ValueError("Audio array is empty after loading.")
-            print(
-                f"Audio array loaded. Shape: {audio_array.shape}, Temp file path: {temp_file_path}"
-            )
+            try:
+                if audio_array is None or len(audio_array) == 0:
+                    raise ValueError("Audio array is empty after loading.")
+                logger.debug("Audio array loaded. Shape: %s", audio_array.shape)
+                return await self.convert_audio_array(dto, audio_array)
+            finally:
+                self.audio_loading_service.cleanup_temp_file(temp_file_path)
+
+        except Exception as e:
+            logger.error("Error during audio conversion: %s", e, exc_info=True)
+            raise
+
+    async def convert_audio_array(
+        self, dto: RvcDTO, audio_array: np.ndarray, source_embedding: Optional[Any] = None
+    ) -> np.ndarray:
+        """Convert decoded audio at the loading sample rate, under admission control"""
+        duration_s = len(audio_array) / self.audio_loading_service.sample_rate
+        input_duration.observe(duration_s)
+        self._check_input_cap(duration_s)
+        if not self.app.envs.COALESCE_CONVERSIONS:
+            return await self._convert_admitted(dto, audio_array, duration_s, source_embedding)
+        # off the event loop, hashing a long upload takes tens of milliseconds
+        key = await asyncio.to_thread(
+            fingerprint,
+            audio_array,
+            dto.target_voice or "voice",
+            dto.model_id,
+            source_embedding,
+            get_scheduling_context().priority,
+            get_quality_tier().name,
+        )
+        return await self.coalescer.run(
+            key, lambda: self._convert_admitted(dto, audio_array, duration_s, source_embedding)
+        )
 
-            print("Getting target speaker embedding...")
-            target_embedding = self.core_service.get_speaker_embedding(
-                dto.target_voice or "voice"
+    async def _convert_admitted(
+        self, dto: RvcDTO, audio_array: np.ndarray, duration_s: float, source_embedding: Optional[Any]
+    ) -> np.ndarray:
+        async with self.admission_controller.admit(duration_s, dto.model_id), self._running(duration_s):
+            # a speaker missing from the cache is extracted by the model, keep it off the event loop
+            target_embedding = await asyncio.to_thread(
+                self.core_service.get_speaker_embedding, dto.target_voice or "voice", dto.model_id
             )
             if target_embedding is None:
-                print("Failed to retrieve target speaker embedding.")
                 raise ValueError("Target speaker embedding is None.")
-            print(f"Target embedding shape: {target_embedding.shape}")
-
-            print("Converting voice...")
             output_buffer = await self.core_service.convert_voice(
-                audio_array, target_embedding
+                audio_array, target_embedding, dto.model_id, source_embedding
             )
             if output_buffer is None or len(output_buffer) == 0:
-                print("Output buffer is empty after voice conversion.")
                 raise ValueError("Output buffer is empty after voice conversion.")
-            print(
-                f"Output buffer type: {type(output_buffer)}, Length: {len(output_buffer)}"
-            )
+            return output_buffer
 
-            self.audio_loading_service.cleanup_temp_file(temp_file_path)
-            print("Temporary file cleaned up.")
+    async def convert_audio_array_multi(
+        self,
+        audio_array: np.ndarray,
+        speakers: List[str],
+        model_id: Optional[str] = None,
+        source_embedding: Optional[Any] = None,
+    ) -> AsyncIterator[Tuple[str, np.ndarray]]:
+        """Convert one decoded clip to every speaker, yielding (speaker, audio) batch by batch"""
+        duration_s = len(audio_array) / self.audio_loading_service.sample_rate
+        self._check_input_cap(duration_s)
+        target_embeddings = [
+            await asyncio.to_thread(self.core_service.get_speaker_embedding, speaker, model_id) for speaker in speakers
+        ]
+        if source_embedding is None:
+            # the source speaker is analysed once for every batch
+            source_embedding = await self.core_service.extract_embedding(audio_array, model_id)
+        batch_size = max(1, self.app.envs.MULTI_TARGET_BATCH_SIZE)
+        for start in range(0, len(speakers), batch_size):
+            # a client that left stops the remaining batches, not only the running one
+            check_cancelled("batch")
+            batch = speakers[start:start + batch_size]
+            # each target costs about one conversion of the clip
+            cost_s = duration_s * len(batch)
+            async with self.admission_controller.admit(cost_s, model_id), self._running(cost_s):
+                outputs = await self.core_service.convert_voice_multi(
+                    audio_array, target_embeddings[start:start + batch_size], model_id, source_embedding
+                )
+            for speaker, output in zip(batch, outputs):
+                yield speaker, output
 
-            return output_buffer
+    def _check_input_cap(self, duration_s: float) -> None:
+        """Under heavy overload the capped quality tier turns long inputs away before they queue"""
+        max_input_s = get_quality_tier().max_input_s
+        if max_input_s is not None and duration_s > max_input_s:
+            raise AdmissionRejected("input_too_long")
 
-        except Exception as e:
-            self.app.logger.error(
-                "Error during audio conversion: %s", str(e), exc_info=True
-            )
-            print(f"Error during audio conversion: {str(e)}")
-            raise
+    @asynccontextmanager
+    async def _running(self, duration_s: float) -> AsyncIterator[None]:
+        """In-flight gauge and real-time factor of an admitted conversion"""
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            in_flight.dec()
+        if duration_s > 0:
+            real_time_factor.observe((time.perf_counter() - start) / duration_s)
+
+    def stream_converted_wav(
+        self,
+        dto: RvcDTO,
+        pcm_chunks: AsyncIterator[bytes],
+        started_at: Optional[float] = None,
+        source_embedding: Optional[Any] = None,
+    ) -> AsyncIterator[bytes]:
+        """Convert streamed 24 kHz PCM segment by segment, as a chunked WAV byte stream"""
+        pipeline = StreamingConversionPipeline(
+            lambda audio: self.convert_audio_array(dto, audio, source_embedding),
+            sample_rate=self.audio_loading_service.sample_rate,
+            started_at=started_at,
+        )
+        return pipeline.stream_wav(pcm_chunks)
@@ -0,0 +1,136 @@
+"""
+Pipeline de streaming TTS → conversão.
+
+Recebe o PCM (int16, mono) que o Kokoro envia em ``stream=True``, corta o áudio em
+segmentos no ponto mais silencioso perto do tamanho alvo, converte cada segmento
+assim que ele fica completo e devolve o áudio convertido em pedaços. Cada segmento
+leva ``overlap_s`` do anterior como contexto e as emendas são feitas com crossfade.
+"""
+import asyncio
+import time
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+import numpy as np
+
+from project.conversor.audio.crossfade import crossfade
+from project.conversor.audio.pcm import PCM_SAMPLE_RATE, float_to_pcm16, pcm16_to_float, wav_stream_header
+from project.shared.metrics.registry import MetricsRegistry
+
+
+def _fit(audio: np.ndarray, length: int) -> np.ndarray:
+    """Trim or zero-pad the model output to the input length (hop rounding)"""
+    if len(audio) >= length:
+        return audio[:length]
+    return np.concatenate([audio, np.zeros(length - len(audio), dtype=np.float32)])
+
+
+class StreamingConversionPipeline:
+    """Converts a stream of PCM chunks segment by segment"""
+
+    def __init__(
+        self,
+        convert: Callable[[np.ndarray], Awaitable[np.ndarray]],
+        sample_rate: int = PCM_SAMPLE_RATE,
+        first_segment_s: float = 0.5,
+        segment_s: float = 2.0,
+        search_s: float = 0.25,
+        overlap_s: float = 0.05,
+        started_at: Optional[float] = None,
+    ):
+        self.convert = convert
+        self.sample_rate = sample_rate
+        # the first segment is short so audio starts quickly, later ones amortize the model overhead
+        self.first_segment = int(first_segment_s * sample_rate)
+        self.segment = int(segment_s * sample_rate)
+        self.search = int(search_s * sample_rate)
+        self.overlap = int(overlap_s * sample_rate)
+        self.frame = max(sample_rate // 100, 1)
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.time_to_first_audio: Optional[float] = None
+        self.segment_timings: list[dict] = []
+        self._ttfa = MetricsRegistry().histogram(
+            "tts_time_to_first_audio_seconds", "Time until the first converted audio is sent", ["mode"]
+        )
+
+    def _cut_point(self, audio: np.ndarray, target: int) -> int:
+        """Quietest 10 ms frame boundary in the ``search`` window before ``target``"""
+        start = max(target - self.search, self.overlap + self.frame)
+        frames = (target - start) // self.frame
+        if frames <= 0:
+            return target
+        window = audio[start:start + frames * self.frame].reshape(frames, self.frame)
+        energy = np.square(window).mean(axis=1)
+        return start + int(np.argmin(energy)) * self.frame
+
+    async def segments(self, pcm_chunks: AsyncIterator[bytes]) -> AsyncIterator[np.ndarray]:
+        """Yield input segments, each starting with ``overlap`` samples of the previous one"""
+        buffer = np.zeros(0, dtype=np.float32)
+        leftover = b""
+        target = self.first_segment
+        async for chunk in pcm_chunks:
+            data = leftover + chunk
+            # int16 samples may be split across network chunks
+            leftover = data[len(data) - len(data) % 2:]
+            buffer = np.concatenate([buffer, pcm16_to_float(data[:len(data) - len(data) % 2])])
+            while len(buffer) >= target:
+                cut = self._cut_point(buffer, target)
+                yield buffer[:cut]
+                buffer = buffer[cut - self.overlap:]
+                target = self.segment
+        if len(buffer) > self.overlap:
+            yield buffer
+
+    async def run(self, pcm_chunks: AsyncIterator[bytes]) -> AsyncIterator[np.ndarray]:
+        """Yield converted audio while Kokoro is still streaming"""
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def read():
+            try:
+                async for segment in self.segments(pcm_chunks):
+                    await queue.put(segment)
+                await queue.put(None)
+            except Exception as e:
+                await queue.put(e)
+
+        reader = asyncio.create_task(read())
+        tail: Optional[np.ndarray] = None
+        try:
+            while True:
+                segment = await queue.get()
+                if segment is None:
+                    break
+                if isinstance(segment, Exception):
+                    raise segment
+                converted = await self._convert(segment)
+                if tail is not None:
+                    head = crossfade(tail, converted[:len(tail)])
+                    converted = np.concatenate([head, converted[len(head):]])
+                # the end of this segment is crossfaded with the start of the next one
+                tail = converted[-self.overlap:] if self.overlap else converted[:0]
+                yield self._first_audio(converted[:len(converted) - len(tail)])
+            if tail is not None and len(tail):
+                yield self._first_audio(tail)
+        finally:
+            reader.cancel()
+
+    async def _convert(self, segment: np.ndarray) -> np.ndarray:
+        start = time.perf_counter()
+        converted = _fit(np.asarray(await self.convert(segment), dtype=np.float32), len(segment))
+        self.segment_timings.append({
+            "duration_s": len(segment) / self.sample_rate,
+            "conversion_s": time.perf_counter() - start,
+        })
+        return converted
+
+    def _first_audio(self, audio: np.ndarray) -> np.ndarray:
+        if self.time_to_first_audio is None and len(audio):
+            self.time_to_first_audio = time.perf_counter() - self.started_at
+            self._ttfa.labels(mode="stream").observe(self.time_to_first_audio)
+        return audio
+
+    async def stream_wav(self, pcm_chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """Converted audio as a chunked 16-bit WAV byte stream"""
+        yield wav_stream_header(self.sample_rate)
+        async for audio in self.run(pcm_chunks):
+            if len(audio):
+                yield float_to_pcm16(audio)
@@ -1,11 +1,14 @@
 import numpy as np
 import io
 import base64
+import logging
 from project.core.application import Application
 from project.dto.tts_dto import RvcDTO
 from project.conversor.service import ConversorService
 from typing import BinaryIO, Dict, Union
 
+logger = logging.getLogger(__name__)
+
 
 class StreamService:
     def __init__(self):
@@ -18,29 +21,25 @@ class StreamService:
         return await self.handle_get_stream_audio(dto, audio_file)
 
     async def handle_get_stream_audio(self, dto, audio_file):
-        self.app.logger.info("Converting audio...")
+        logger.info("Converting audio...")
         audio_buffer = await self.conversor_service.get_converted_audio(dto, audio_file)
-        self.app.logger.info("Audio conversion completed")
+        logger.info("Audio conversion completed")
 
         if isinstance(audio_buffer, io.BytesIO):
-            print("Converting BytesIO to bytes")
             audio_bytes = audio_buffer.getvalue()
         else:
             audio_bytes = audio_buffer
 
         if isinstance(audio_bytes, np.ndarray):
-            print("Converting ndarray to bytes")
             audio_bytes = audio_bytes.tobytes()
         elif isinstance(audio_bytes, memoryview):
-            print("Converting memoryview to bytes")
             audio_bytes = audio_bytes.tobytes()
         elif isinstance(audio_bytes, bytearray):
-            print("Converting bytearray to bytes")
             audio_bytes = bytes(audio_bytes)
 
-        print(f"Audio size: {len(audio_bytes)} bytes")
+        logger.debug("Audio size: %d bytes", len(audio_bytes))
         encoded_audio = base64.b64encode(audio_bytes).decode("utf-8")
-        self.app.logger.info("Audio successfully encoded to base64")
+        logger.info("Audio successfully encoded to base64")
 
         return {
             "status": "success",
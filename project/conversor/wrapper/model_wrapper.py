@@ -1,32 +1,46 @@
-from project.model.factory import ModelFactory
+from project.model.factory import ModelFactory, load_model_class
+import logging
 import os
+import threading
 import torch
 from project.core.application import Application
+from project.shared.system.torch_util import module_memory_bytes, release_cached_memory
 from TTS.vc.models.openvoice import OpenVoice# type: ignore
 
+logger = logging.getLogger(__name__)
+
 class VoiceConverterModelWrapper:
     """Wrapper class for the voice converter model"""
     
     def __init__(self):
         self.app = Application()
         self.model: OpenVoice | None = None
-        self.factory = ModelFactory()
+        self.factory = ModelFactory(
+            model_class=load_model_class(self.app.envs.VOICE_MODEL_CLASS),
+            use_mmap=self.app.envs.MMAP_CHECKPOINTS,
+        )
+        self._in_flight = 0
+        self._idle = threading.Condition()
+        self._retired = False
         
     def load_model(self, model_path: str):
         """Load the model from the given path"""
-        print(f"[ModelWrapper] Loading model from {model_path}")
+        logger.info("[ModelWrapper] Loading model from %s", model_path)
         checkpoint_path = os.path.join(model_path, "model.pth")
         
         if not os.path.exists(checkpoint_path):
-            print(f"[ModelWrapper] Config file not found: {checkpoint_path}")
+            logger.error("[ModelWrapper] Config file not found: %s", checkpoint_path)
             raise FileNotFoundError(f"Config file not found: {checkpoint_path}")
 
         try:
             self.model = self.factory.create_model(checkpoint_path)
-            print("[ModelWrapper] Model loaded successfully")
+            if self.app.envs.QUALITY_TIERS_ENABLED:
+                # before the registry measures the footprint, so the budget counts the copy
+                self.model.prepare_reduced_precision()
+            logger.info("[ModelWrapper] Model loaded successfully")
             return self.model
         except Exception as e:
-            print(f"[ModelWrapper] Error loading model: {str(e)}")
+            logger.error("[ModelWrapper] Error loading model: %s", e)
             raise
     
     def extract_se(self, src):
@@ -35,12 +49,30 @@ class VoiceConverterModelWrapper:
             raise RuntimeError("Model not loaded. Call load_model first.")
         return self.model.extract_se(src)
     
+    def spectrogram(self, src):
+        """Spectrogram as computed by extract_se, without running the reference encoder"""
+        if not self.is_loaded():
+            raise RuntimeError("Model not loaded. Call load_model first.")
+        return self.model.spectrogram(src)
+
     def inference(self, src_spec, aux_input):
         """Run inference on the model"""
         if not self.is_loaded():
             raise RuntimeError("Model not loaded. Call load_model first.")
         return self.model.inference(src_spec, aux_input)
 
+    def inference_reduced_precision(self, src_spec, aux_input):
+        """Cheaper inference the overload quality tiers use"""
+        if not self.is_loaded():
+            raise RuntimeError("Model not loaded. Call load_model first.")
+        return self.model.inference_reduced_precision(src_spec, aux_input)
+
+    def inference_multi(self, src_spec, g_src, g_tgts):
+        """Same as inference for several targets g_tgts [B, C, 1], the source is encoded once"""
+        if not self.is_loaded():
+            raise RuntimeError("Model not loaded. Call load_model first.")
+        return self.model.inference_multi(src_spec, g_src, g_tgts)
+
     @property
     def config(self):
         """Get model config"""
@@ -49,3 +81,54 @@ class VoiceConverterModelWrapper:
     def is_loaded(self) -> bool:
         """Check if model is loaded"""
         return self.model is not None
+
+    def memory_footprint(self) -> int:
+        """Bytes held by the loaded model weights and buffers"""
+        if not self.is_loaded():
+            return 0
+        memory_modules = getattr(self.model, "memory_modules", None)
+        if memory_modules is not None:
+            return sum(module_memory_bytes(module) for module in memory_modules())
+        module = getattr(self.model, "model", self.model)
+        if not isinstance(module, torch.nn.Module):
+            return 0
+        return module_memory_bytes(module)
+
+    @property
+    def in_flight(self) -> int:
+        """Number of conversions currently running on this model"""
+        return self._in_flight
+
+    def acquire(self):
+        """Mark a conversion as running on this model"""
+        with self._idle:
+            self._in_flight += 1
+
+    def release(self):
+        """Mark a conversion as finished on this model, the last one out unloads a retired model"""
+        with self._idle:
+            self._in_flight -= 1
+            idle = self._in_flight == 0
+            if idle:
+                self._idle.notify_all()
+            unload = idle and self._retired
+        if unload:
+            self.unload()
+
+    def wait_idle(self, timeout: float | None = None) -> bool:
+        """Block until no conversion is running, returns False on timeout"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._in_flight == 0, timeout)
+
+    def retire(self):
+        """Unload now if idle, otherwise when the last running conversion releases the model"""
+        with self._idle:
+            self._retired = True
+            idle = self._in_flight == 0
+        if idle:
+            self.unload()
+
+    def unload(self):
+        """Drop the loaded model so its memory can be reclaimed"""
+        self.model = None
+        release_cached_memory()
@@ -1,11 +1,8 @@
 from project.core.environment_variables import environment_variables
+from project.core.logging_pipeline import configure_logging
 from project.shared.meta.observable_singleton import ObservableSingletonMeta
-from project.shared.system.torch_util import gpu_is_available
 from project.observers.observable import Observable
 import logging
-import os
-pid = os.getpid()
-using_gpu = gpu_is_available()
 
 class Application(Observable, metaclass=ObservableSingletonMeta):
     def __init__(self):
@@ -13,12 +10,16 @@ class Application(Observable, metaclass=ObservableSingletonMeta):
         self.initialize_logger()
 
     def initialize_logger(self):
-        log_level = logging.DEBUG
-        logger = logging.getLogger("logger")
-        logger.setLevel(log_level)
-        logger.addFilter(lambda record: setattr(record, 'pid', pid) or True)
-
-        self.logger = logger
+        envs = self.envs
+        configure_logging(
+            level=envs.LOG_LEVEL,
+            module_levels=envs.LOG_LEVELS,
+            fmt=envs.LOG_FORMAT,
+            file_path=envs.LOG_FILE,
+            queue_size=envs.LOG_QUEUE_SIZE,
+        )
+        # parent of the modules' logging.getLogger(__name__), so LOG_LEVELS=project=DEBUG covers both
+        self.logger = logging.getLogger("project")
 
         self.logger.info("Loading application settings and environment variables")
 
@@ -5,11 +5,86 @@ from decouple import config
 environment_variables = SimpleNamespace(
     **{
         "PORT": int(config("PORT", default="8881")),
+        "RELOAD": config("RELOAD", default="false", cast=bool),
+        "LOG_LEVEL": config("LOG_LEVEL", default="INFO"),
+        "LOG_LEVELS": config("LOG_LEVELS", default=""),
+        "LOG_FORMAT": config("LOG_FORMAT", default="text"),
+        "LOG_FILE": config("LOG_FILE", default=""),
+        "LOG_QUEUE_SIZE": int(config("LOG_QUEUE_SIZE", default="10000")),
+        "WEB_WORKERS": int(config("WEB_WORKERS", default="2")),
+        "WEB_PRELOAD": config("WEB_PRELOAD", default="true", cast=bool),
+        "WEB_MAX_REQUESTS": int(config("WEB_MAX_REQUESTS", default="1000")),
+        "WEB_MAX_REQUESTS_JITTER": int(config("WEB_MAX_REQUESTS_JITTER", default="100")),
+        "WEB_WORKER_MAX_MEMORY_MB": int(config("WEB_WORKER_MAX_MEMORY_MB", default="3072")),
+        "WEB_MEMORY_CHECK_INTERVAL_S": float(config("WEB_MEMORY_CHECK_INTERVAL_S", default="10")),
+        "WEB_TIMEOUT_S": int(config("WEB_TIMEOUT_S", default="120")),
+        "WEB_GRACEFUL_TIMEOUT_S": int(config("WEB_GRACEFUL_TIMEOUT_S", default="60")),
+        "TORCH_THREADS_PER_WORKER": int(config("TORCH_THREADS_PER_WORKER", default="0")),
         "MODELS_DIR_PATH": config(
             "MODELS_DIR_PATH", default="/mnt/data/wsi_vc/vc_models/"
         ),
         "SPEAKERS_DIR_PATH": config(
             "SPEAKERS_DIR_PATH", default="/mnt/data/wsi_vc/speakers/"
         ),
+        "DEFAULT_MODEL_ID": config("DEFAULT_MODEL_ID", default="default"),
+        "MODEL_MEMORY_BUDGET_MB": int(config("MODEL_MEMORY_BUDGET_MB", default="4096")),
+        "MIN_AVAILABLE_MEMORY_GB": float(
+            config("MIN_AVAILABLE_MEMORY_GB", default="1.3")
+        ),
+        "VOICE_MODEL_CLASS": config("VOICE_MODEL_CLASS", default=""),
+        "MMAP_CHECKPOINTS": config("MMAP_CHECKPOINTS", default="true", cast=bool),
+        "MODEL_SWAP_DRAIN_TIMEOUT_S": float(
+            config("MODEL_SWAP_DRAIN_TIMEOUT_S", default="300")
+        ),
+        "ADMIN_TOKEN": config("ADMIN_TOKEN", default=""),
+        "ADMISSION_MEMORY_BUDGET_MB": int(config("ADMISSION_MEMORY_BUDGET_MB", default="2048")),
+        "ADMISSION_MEMORY_HEADROOM_MB": int(config("ADMISSION_MEMORY_HEADROOM_MB", default="512")),
+        "ADMISSION_MAX_QUEUE": int(config("ADMISSION_MAX_QUEUE", default="16")),
+        "ADMISSION_QUEUE_TIMEOUT_S": float(config("ADMISSION_QUEUE_TIMEOUT_S", default="30")),
+        "CONVERSION_WORKERS": int(config("CONVERSION_WORKERS", default="2")),
+        "CANCEL_ON_DISCONNECT": config("CANCEL_ON_DISCONNECT", default="true", cast=bool),
+        "COALESCE_CONVERSIONS": config("COALESCE_CONVERSIONS", default="true", cast=bool),
+        "QUALITY_TIERS_ENABLED": config("QUALITY_TIERS_ENABLED", default="false", cast=bool),
+        "QUALITY_TIER_QUEUE_DEPTHS": config("QUALITY_TIER_QUEUE_DEPTHS", default="4,8"),
+        "QUALITY_TIER_SLO_MS": float(config("QUALITY_TIER_SLO_MS", default="3000")),
+        "QUALITY_TIER_WINDOW_S": float(config("QUALITY_TIER_WINDOW_S", default="30")),
+        "QUALITY_TIER_COOLDOWN_S": float(config("QUALITY_TIER_COOLDOWN_S", default="15")),
+        "QUALITY_TIER_MAX_INPUT_S": float(config("QUALITY_TIER_MAX_INPUT_S", default="20")),
+        "SCHEDULER_TENANT_WEIGHTS": config("SCHEDULER_TENANT_WEIGHTS", default=""),
+        "LONG_TEXT_MIN_CHARS": int(config("LONG_TEXT_MIN_CHARS", default="300")),
+        "MULTI_TARGET_MAX_SPEAKERS": int(config("MULTI_TARGET_MAX_SPEAKERS", default="16")),
+        "MULTI_TARGET_BATCH_SIZE": int(config("MULTI_TARGET_BATCH_SIZE", default="8")),
+        "TTS_CACHE_MEMORY_MB": int(config("TTS_CACHE_MEMORY_MB", default="64")),
+        "TTS_CACHE_DIR": config("TTS_CACHE_DIR", default=""),
+        "TTS_CACHE_DISK_MB": int(config("TTS_CACHE_DISK_MB", default="1024")),
+        "KOKORO_URL": config("KOKORO_URL", default="http://localhost:8880/v1"),
+        "KOKORO_MAX_CONNECTIONS": int(config("KOKORO_MAX_CONNECTIONS", default="16")),
+        "KOKORO_KEEPALIVE_TIMEOUT_S": float(config("KOKORO_KEEPALIVE_TIMEOUT_S", default="30")),
+        "KOKORO_TIMEOUT_S": float(config("KOKORO_TIMEOUT_S", default="60")),
+        "KOKORO_URLS": config("KOKORO_URLS", default=""),
+        "KOKORO_HEALTH_INTERVAL_S": float(config("KOKORO_HEALTH_INTERVAL_S", default="10")),
+        "KOKORO_FAILURE_THRESHOLD": int(config("KOKORO_FAILURE_THRESHOLD", default="3")),
+        "KOKORO_CIRCUIT_RESET_S": float(config("KOKORO_CIRCUIT_RESET_S", default="30")),
+        "KOKORO_HEDGE": config("KOKORO_HEDGE", default="false", cast=bool),
+        "KOKORO_HEDGE_MIN_DELAY_MS": float(config("KOKORO_HEDGE_MIN_DELAY_MS", default="50")),
+        "GATEWAY_NODES": config("GATEWAY_NODES", default=""),
+        "GATEWAY_VIRTUAL_NODES": int(config("GATEWAY_VIRTUAL_NODES", default="160")),
+        "GATEWAY_REPLICAS": int(config("GATEWAY_REPLICAS", default="2")),
+        "GATEWAY_HEALTH_INTERVAL_S": float(config("GATEWAY_HEALTH_INTERVAL_S", default="5")),
+        "GATEWAY_TIMEOUT_S": float(config("GATEWAY_TIMEOUT_S", default="300")),
+        "GATEWAY_ADMIN_TOKEN": config("GATEWAY_ADMIN_TOKEN", default=""),
+        "SERVER_TIMING": config("SERVER_TIMING", default="true", cast=bool),
+        "PROFILE_DIR": config("PROFILE_DIR", default="profiles"),
+        "PROFILE_MAX_CAPTURES": int(config("PROFILE_MAX_CAPTURES", default="20")),
+        "PROFILE_SAMPLE_INTERVAL_MS": float(config("PROFILE_SAMPLE_INTERVAL_MS", default="5")),
+        "JOBS_DIR": config("JOBS_DIR", default="jobs"),
+        "JOBS_WORKERS": int(config("JOBS_WORKERS", default="1")),
+        "JOBS_RESULT_TTL_S": float(config("JOBS_RESULT_TTL_S", default="3600")),
+        "JOBS_SEGMENT_S": float(config("JOBS_SEGMENT_S", default="30")),
+        "KOKORO_VOICES": config(
+            "KOKORO_VOICES",
+            default="af_heart,af_bella,af_kore,af_nicole,af_sky,am_adam,am_michael,am_onyx,bf_emma,bm_george,pf_dora,pm_alex",
+        ),
+        "VOICE_MAPPING_RETRY_S": float(config("VOICE_MAPPING_RETRY_S", default="60")),
     }
 )
@@ -0,0 +1,175 @@
+"""
+Logs fora do caminho da requisição.
+
+Todo logger propaga para o root, que tem um único ``QueueHandler``: quem loga só
+junta a mensagem com os argumentos e coloca o registro numa fila limitada (se a
+fila encher o registro é descartado e contado em ``log_records_dropped_total``,
+nunca bloqueia). Uma thread (``QueueListener``) formata e escreve no stderr e,
+se ``LOG_FILE`` estiver definido, no arquivo.
+
+Cada registro leva o ``request_id`` da requisição (``ContextVar`` definido pelo
+middleware a partir do header ``X-Request-ID``) e o pid. ``LOG_FORMAT=json``
+escreve uma linha JSON por registro. ``LOG_LEVEL`` é o nível do root e
+``LOG_LEVELS`` ajusta módulos (``"project.conversor=DEBUG,uvicorn.access=WARNING"``);
+como os níveis são verificados antes de criar o registro, uma chamada abaixo do
+nível custa só essa verificação, desde que a mensagem use ``%s`` em vez de f-string.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from contextvars import ContextVar, Token
+from typing import Dict, List, Optional
+
+from project.shared.metrics.registry import MetricsRegistry
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s"
+NO_REQUEST = "-"
+
+_request_id: ContextVar[str] = ContextVar("request_id", default=NO_REQUEST)
+_lock = threading.Lock()
+_handler: Optional["NonBlockingQueueHandler"] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+_outputs: List[logging.Handler] = []
+_queue_size = 0
+
+_dropped = MetricsRegistry().counter(
+    "log_records_dropped_total", "Log records discarded because the log queue was full"
+)
+
+
+def get_request_id() -> str:
+    return _request_id.get()
+
+
+def set_request_id(request_id: str) -> Token:
+    """Applies to the current task and the tasks it creates from now on"""
+    return _request_id.set(request_id)
+
+
+def reset_request_id(token: Token) -> None:
+    _request_id.reset(token)
+
+
+def parse_module_levels(value: str) -> Dict[str, int]:
+    """``"project.conversor=DEBUG,uvicorn.access=warning"`` -> {"project.conversor": 10, "uvicorn.access": 30}"""
+    levels = {}
+    for item in value.split(","):
+        if "=" in item:
+            name, level = item.rsplit("=", 1)
+            levels[name.strip()] = logging.getLevelName(level.strip().upper())
+    return levels
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamps the request id and pid on the record, in the thread that logged it"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        record.pid = record.process
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", NO_REQUEST),
+            "pid": record.process,
+            "thread": record.threadName,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the writer thread; a full queue drops the record instead of waiting"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # merge the arguments now, they may change after the call returns; the
+        # formatter (timestamp, JSON) runs in the writer thread
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            # the traceback would keep the caller's frames alive until written
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # SimpleQueue has no maxsize, but its put is a fraction of Queue.put's cost
+        if self.queue.qsize() >= _queue_size:
+            _dropped.inc()
+            return
+        self.queue.put_nowait(record)
+
+
+def _start_listener() -> None:
+    global _listener
+    _handler.queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(_handler.queue, *_outputs, respect_handler_level=True)
+    _listener.start()
+
+
+def _restart_in_child() -> None:
+    # the writer thread does not survive fork (gunicorn workers of a preloaded master)
+    if _handler is not None:
+        _start_listener()
+
+
+os.register_at_fork(after_in_child=_restart_in_child)
+
+
+def configure_logging(
+    level: str = "INFO",
+    module_levels: str = "",
+    fmt: str = "text",
+    file_path: str = "",
+    queue_size: int = 10000,
+) -> None:
+    """Route every logger through the queue; calling it again replaces the previous setup"""
+    global _handler, _queue_size
+    with _lock:
+        shutdown_logging()
+        formatter = JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT)
+        _outputs[:] = [logging.StreamHandler(sys.stderr)]
+        if file_path:
+            _outputs.append(logging.FileHandler(file_path, mode="a", encoding="utf-8"))
+        for output in _outputs:
+            output.setFormatter(formatter)
+
+        root = logging.getLogger()
+        if _handler is not None:
+            root.removeHandler(_handler)
+        _queue_size = queue_size
+        _handler = NonBlockingQueueHandler(None)
+        _handler.addFilter(RequestContextFilter())
+        _start_listener()
+        root.addHandler(_handler)
+        root.setLevel(level.upper())
+        for name, module_level in parse_module_levels(module_levels).items():
+            logging.getLogger(name).setLevel(module_level)
+
+
+def shutdown_logging() -> None:
+    """Write what is still queued and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        for output in _outputs:
+            output.close()
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,112 @@
+"""
+Servidor de produção: gunicorn com workers uvicorn (uvloop + httptools).
+
+O master carrega o modelo e os embeddings uma vez (``preload_services``) antes
+de criar os workers; depois do ``fork`` os pesos e os objetos da inicialização
+ficam em páginas compartilhadas copy-on-write entre todos os workers. Cada
+worker ajusta as threads do torch para não disputar CPU com os demais
+(``configure_worker``) e se reinicia de forma graciosa quando a memória privada
+passa do limite (``MemoryWatchdog``). A configuração fica em ``gunicorn.conf.py``.
+"""
+import gc
+import logging
+import os
+import signal
+import threading
+
+import psutil
+from uvicorn.workers import UvicornWorker
+
+logger = logging.getLogger(__name__)
+
+
+class UvloopWorker(UvicornWorker):
+    """Uvicorn worker pinned to uvloop and httptools instead of the auto-detection"""
+
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools"}
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on, honouring the container/cgroup affinity"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def torch_threads_per_worker(workers: int, configured: int = 0) -> int:
+    """Configured value, or the CPUs split evenly between the workers"""
+    if configured > 0:
+        return configured
+    return max(1, available_cpus() // max(1, workers))
+
+
+def preload_services() -> bool:
+    """
+    Load the model and speakers in the gunicorn master, returns False when skipped.
+
+    CUDA cannot be used across fork, so with a GPU every worker loads on its own.
+    """
+    # is_available must not initialise CUDA in the master
+    os.environ.setdefault("PYTORCH_NVML_BASED_CUDA_CHECK", "1")
+    import torch
+
+    if torch.cuda.is_available():
+        logger.warning("CUDA available, skipping the preload: workers load the model after fork")
+        return False
+    # an OpenMP pool started in the master does not survive fork
+    torch.set_num_threads(1)
+
+    from project.core.startup import StartupManager
+
+    startup = StartupManager()
+    startup.initialize()
+    if not startup.is_ready():
+        raise RuntimeError(f"Preload failed: {startup.error}")
+    # keep the collector from writing to (and so copying) the preloaded objects' pages
+    gc.collect()
+    gc.freeze()
+    return True
+
+
+def configure_worker(threads: int) -> None:
+    """Torch thread pools of a freshly forked worker"""
+    import torch
+
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # already set before the fork
+        pass
+
+
+class MemoryWatchdog(threading.Thread):
+    """Sends SIGTERM to its own worker once the private memory (USS) exceeds the limit"""
+
+    def __init__(self, limit_bytes: int, interval_s: float = 10.0, on_exceeded=None):
+        super().__init__(name="memory-watchdog", daemon=True)
+        self.limit_bytes = limit_bytes
+        self.interval_s = interval_s
+        self.process = psutil.Process()
+        self.on_exceeded = on_exceeded or (lambda: os.kill(os.getpid(), signal.SIGTERM))
+        self._halt = threading.Event()
+
+    def private_memory(self) -> int:
+        return self.process.memory_full_info().uss
+
+    def run(self) -> None:
+        while not self._halt.wait(self.interval_s):
+            used = self.private_memory()
+            if used > self.limit_bytes:
+                logger.warning(
+                    "Worker %d private memory %.0f MB over %.0f MB, restarting gracefully",
+                    os.getpid(), used / 2**20, self.limit_bytes / 2**20,
+                )
+                # uvicorn stops accepting, finishes the requests in flight and the master forks a replacement
+                self.on_exceeded()
+                return
+
+    def stop(self) -> None:
+        self._halt.set()
+
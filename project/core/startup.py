@@ -0,0 +1,115 @@
+"""
+Inicialização em segundo plano dos serviços pesados (modelo e embeddings).
+
+Os módulos que importam torch/TTS só são importados dentro de ``initialize``,
+assim o servidor consegue abrir a porta imediatamente e responder aos health
+checks enquanto o modelo e os locutores são carregados.
+"""
+import asyncio
+import time
+from typing import TYPE_CHECKING, Any, Optional
+
+from project.core.application import Application
+from project.shared.meta.singleton import SingletonMeta
+
+if TYPE_CHECKING:
+    from project.conversor.service import ConversorService
+    from project.tts.tts_service import SynthesizerService
+    from project.tts.voice_mapping import VoiceMappingRegistry
+
+
+class StartupManager(metaclass=SingletonMeta):
+    """Owns the heavy services and reports their loading progress"""
+
+    def __init__(self):
+        self.app = Application()
+        self.stage = "pending"
+        self.progress = {"done": 0, "total": 0}
+        self.started_at: Optional[float] = None
+        self.ready_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self.conversor_service: Optional["ConversorService"] = None
+        self.synthesizer_service: Optional["SynthesizerService"] = None
+        self.voice_mapping: Optional["VoiceMappingRegistry"] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> asyncio.Task:
+        """Schedule initialize on a worker thread, must be called from the event loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    async def _run(self) -> None:
+        await asyncio.to_thread(self.initialize)
+        if self.is_ready():
+            from project.jobs.service import JobService
+
+            JobService.get_instance().start(self.conversor_service, self.synthesizer_service, self.voice_mapping)
+            await self.precompute_voice_mappings()
+
+    async def precompute_voice_mappings(self) -> None:
+        """Map every speaker to a Kokoro voice while already serving, misses are mapped on demand"""
+        try:
+            mappings = await self.voice_mapping.precompute()
+            self.app.logger.info("Mapped %d speakers to Kokoro voices", len(mappings))
+        except Exception as e:
+            self.app.logger.warning("Could not precompute the voice mappings: %s", e, exc_info=True)
+
+    def initialize(self) -> None:
+        """Load the model, speaker embeddings and TTS provider (blocking)"""
+        if self.stage in ("ready", "loading_model", "loading_speakers", "profiling"):
+            return
+        self.started_at = time.time()
+        self.report_progress("loading_model", 0, 1)
+        try:
+            from project.conversor.service import ConversorService
+            from project.tts.tts_service import SynthesizerService
+            from project.tts.voice_mapping import VoiceMappingRegistry
+
+            self.conversor_service = ConversorService(on_progress=self.report_progress)
+            self.synthesizer_service = SynthesizerService()
+            self.voice_mapping = VoiceMappingRegistry(
+                self.conversor_service.core_service, self.synthesizer_service
+            )
+        except Exception as e:
+            self.stage = "failed"
+            self.error = str(e)
+            self.app.logger.error("Startup failed: %s", e, exc_info=True)
+            return
+
+        self.report_progress("profiling", 0, 1)
+        try:
+            profile = self.conversor_service.core_service.measure_conversion_cost()
+            self.conversor_service.admission_controller.set_profile(None, profile)
+        except Exception as e:
+            # admission keeps the conservative default profile
+            self.app.logger.warning("Could not measure the conversion cost: %s", e, exc_info=True)
+        self.report_progress("profiling", 1, 1)
+
+        self.stage = "ready"
+        self.ready_at = time.time()
+        self.app.logger.info("Startup completed in %.2f seconds", self.ready_at - self.started_at)
+
+    async def shutdown(self) -> None:
+        """Release the resources owned by the services, called from the lifespan"""
+        from project.jobs.service import JobService
+
+        if JobService._instance is not None:
+            await JobService._instance.stop()
+        if self.synthesizer_service is not None:
+            await self.synthesizer_service.close()
+
+    def report_progress(self, stage: str, done: int, total: int) -> None:
+        self.stage = stage
+        self.progress = {"done": done, "total": total}
+
+    def is_ready(self) -> bool:
+        return self.stage == "ready"
+
+    def get_status(self) -> dict[str, Any]:
+        status: dict[str, Any] = {"stage": self.stage, "progress": self.progress}
+        if self.started_at is not None:
+            status["elapsed_seconds"] = round((self.ready_at or time.time()) - self.started_at, 3)
+        if self.error is not None:
+            status["error"] = self.error
+        return status
@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class ModelSwapDTO(BaseModel):
+    model_path: str = Field(..., description="Diretório com config.json e model.pth do novo checkpoint, dentro de MODELS_DIR_PATH")
+    drain_timeout: Optional[float] = Field(
+        None, gt=0, description="Tempo máximo (s) para aguardar conversões no modelo anterior"
+    )
+
+
+class ProfilingDTO(BaseModel):
+    requests: int = Field(1, ge=1, le=100, description="Quantas conversões perfilar (ou guardar, com min_duration_ms)")
+    min_duration_ms: Optional[float] = Field(
+        None, gt=0, description="Guarda só as conversões mais lentas que isto, perfilando todas enquanto armado"
+    )
+    timeout_s: float = Field(300, gt=0, le=86400, description="Desarma depois deste tempo (s) mesmo sem capturas")
@@ -3,14 +3,17 @@ from typing import Optional
 from pydantic import BaseModel, Field
 
 
-#TODO criar endpoint de tts com conversão com voz mapeada 
 class RvcTtsDTO(BaseModel):
+    # voice: Kokoro base voice, target_voice: speaker the audio is converted to
     voice: Optional[str] = None
     target_voice: Optional[str] = None
     text: str
+    model_id: Optional[str] = None
+    lang_code: Optional[str] = None
 
 class RvcDTO(BaseModel):
     target_voice: Optional[str] = None
+    model_id: Optional[str] = None
 
 
 class KokoroTtsDto(BaseModel):
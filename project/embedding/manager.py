@@ -1,60 +1,70 @@
+import logging
 import os
-from typing import Dict, Any
+from typing import Callable, Dict, Any, Optional
 import torch
 from project.embedding.factory import EmbeddingFactory
-from project.core.application import Application
+from project.shared.metrics.registry import MetricsRegistry
 
-app = Application()
+logger = logging.getLogger(__name__)
+_lookups = MetricsRegistry().counter(
+    "speaker_embedding_lookups_total", "Speaker embedding lookups by cache result", ["result"]
+)
+
+
+def _hit_ratio() -> float:
+    hits, misses = _lookups.labels(result="hit").value, _lookups.labels(result="miss").value
+    return hits / (hits + misses) if hits + misses else 0.0
+
+
+MetricsRegistry().gauge(
+    "speaker_embedding_cache_hit_ratio", "Share of speaker embedding lookups served from memory"
+).set_function(_hit_ratio)
 
 
 class EmbeddingManager:
-    def __init__(self, factory: EmbeddingFactory, speakers_path: str):
+    def __init__(
+        self,
+        factory: EmbeddingFactory,
+        speakers_path: str,
+        preload: bool = True,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+    ):
         self.factory = factory
         self.speakers_path = speakers_path
-        print(f"Speakers path: {speakers_path}")
-        print(f"Speakers path: {speakers_path}")
+        self.on_progress = on_progress
         self.embeddings: Dict[str, torch.Tensor] = {}
 
-        self.load_all_speakers()
-        print(f"Initialized EmbeddingManager with speakers path: {speakers_path}")
-        print(f"Initialized EmbeddingManager with speakers path: {speakers_path}")
+        if preload:
+            self.load_all_speakers()
+        logger.info("Initialized EmbeddingManager with speakers path: %s", speakers_path)
 
     def load_all_speakers(self) -> None:
-        print("Loading all speakers")
-        print("Loading all speakers")
-        for speaker_name in os.listdir(self.speakers_path):
-            print(f"Loading speaker: {speaker_name}")
-            if speaker_name.endswith(".wav"):
-                speaker_name = speaker_name[:-4]
-                self.load_speaker(speaker_name)
+        speaker_files = [name for name in os.listdir(self.speakers_path) if name.endswith(".wav")]
+        for index, speaker_name in enumerate(speaker_files):
+            self.load_speaker(speaker_name[:-4])
+            if self.on_progress is not None:
+                self.on_progress(index + 1, len(speaker_files))
 
     def load_speaker(self, speaker_name: str) -> None:
-        print(f"Loading speaker: {speaker_name}")
+        logger.debug("Loading speaker: %s", speaker_name)
         wav_path = f"{self.speakers_path}/{speaker_name}.wav"
         if not os.path.exists(wav_path):
-            app.logger.error(f"Speaker file not found: {wav_path}")
+            logger.error("Speaker file not found: %s", wav_path)
             raise FileNotFoundError(f"Speaker file not found: {wav_path}")
         self.embeddings[speaker_name] = self.factory.create_embedding(wav_path)
-        app.logger.debug(f"Successfully loaded embedding for speaker: {speaker_name}")
-        print(f"Successfully loaded embedding for speaker: {speaker_name}")
+        logger.debug("Successfully loaded embedding for speaker: %s", speaker_name)
 
     def get_embedding(self, speaker_name: str) -> torch.Tensor:
-        app.logger.debug(f"Getting embedding for speaker: {speaker_name}")
-        app.logger.debug(f"Available speakers: {list(self.embeddings.keys())}")
-
-        if speaker_name not in self.embeddings:
-            print(f"Speaker {speaker_name} not loaded, loading now...")
-            print(f"Speaker {speaker_name} not loaded, loading now...")
+        if speaker_name in self.embeddings:
+            _lookups.labels(result="hit").inc()
+        else:
+            _lookups.labels(result="miss").inc()
+            logger.info("Speaker %s not loaded, loading now", speaker_name)
             self.load_speaker(speaker_name)
 
-        embedding = self.embeddings[speaker_name]
-        app.logger.debug(
-            f"Retrieved embedding for {speaker_name} with shape: {embedding.shape}"
-        )
-        return embedding
+        return self.embeddings[speaker_name]
 
     def get_all_embeddings_names(self) -> list:
-        app.logger.debug("Getting all embedding names")
         return list(self.embeddings.keys())
 
     def get_similarity_matrix(self) -> Dict[str, Dict[str, float]]:
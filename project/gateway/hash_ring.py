@@ -0,0 +1,69 @@
+"""
+Anel de hash consistente.
+
+Cada nó ocupa ``virtual_nodes`` posições no anel (hash BLAKE2 de ``"{nó}#{i}"``) e
+uma chave pertence ao primeiro nó depois do seu hash, seguindo no sentido
+horário; os nós seguintes distintos são as réplicas. Quando um nó entra ou sai só
+as chaves do trecho dele mudam de dono (cerca de 1/N), em vez de quase todas como
+em ``hash % N``.
+"""
+import bisect
+import hashlib
+from typing import Dict, Iterable, List, Tuple
+
+
+def _position(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Nodes and their virtual positions, kept sorted for bisect lookups"""
+
+    def __init__(self, nodes: Iterable[str] = (), virtual_nodes: int = 160):
+        self.virtual_nodes = virtual_nodes
+        self._points: List[Tuple[int, str]] = []
+        self._nodes: Dict[str, None] = {}
+        for node in nodes:
+            self.add(node)
+
+    @property
+    def nodes(self) -> List[str]:
+        return list(self._nodes)
+
+    def __contains__(self, node: str) -> bool:
+        return node in self._nodes
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def add(self, node: str) -> None:
+        if node in self._nodes:
+            return
+        self._nodes[node] = None
+        for index in range(self.virtual_nodes):
+            bisect.insort(self._points, (_position(f"{node}#{index}"), node))
+
+    def remove(self, node: str) -> None:
+        if self._nodes.pop(node, 0) is None:
+            self._points = [point for point in self._points if point[1] != node]
+
+    def preference(self, key: str, count: int = 0) -> List[str]:
+        """Distinct nodes for key in ring order: owner first, then replicas; count 0 means every node"""
+        if not self._points:
+            return []
+        count = min(count or len(self._nodes), len(self._nodes))
+        start = bisect.bisect(self._points, (_position(key),))
+        nodes: List[str] = []
+        for offset in range(len(self._points)):
+            node = self._points[(start + offset) % len(self._points)][1]
+            if node not in nodes:
+                nodes.append(node)
+                if len(nodes) == count:
+                    break
+        return nodes
+
+    def owner(self, key: str) -> str:
+        nodes = self.preference(key, 1)
+        if not nodes:
+            raise LookupError("The ring has no nodes")
+        return nodes[0]
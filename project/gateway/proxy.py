@@ -0,0 +1,231 @@
+"""
+Gateway com afinidade por locutor.
+
+As conversões (``/api/rvc``, ``/api/rvc/multi``, ``/api/tts`` e ``POST /api/jobs``)
+são roteadas pela chave ``(model_id, speaker)`` num anel de hash consistente sobre
+os nós de ``GATEWAY_NODES``, então cada nó recebe sempre o mesmo pedaço da
+biblioteca de locutores e modelos e mantém os caches dele quentes. Se o dono da
+chave não responde (erro de conexão) ou devolve 502/503/504, a requisição vai
+para a próxima réplica do anel (até ``GATEWAY_REPLICAS`` nós). O resto do tráfego
+vai para o nó com menos requisições pendentes; ``GET /api/jobs/...`` procura o job
+em todos os nós.
+
+Cada nó tem health check ativo (``/health/ready``): um nó fora do ar ou sem
+modelo carregado sai do anel e volta quando fica pronto, e só as chaves dele mudam
+de dono. ``join``/``leave`` adicionam e removem nós em tempo de execução (pela
+rota ``/gateway/nodes`` só com ``GATEWAY_ADMIN_TOKEN`` definido).
+
+Um ``POST`` só vai para a réplica quando a conexão nem chegou a ser aberta: se o nó
+caiu depois de receber a requisição, repetir criaria o job duas vezes. Um nó conta
+como pendente até o corpo da resposta ser liberado (``release``), então respostas em
+streaming pesam na escolha do nó menos carregado.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+import aiohttp
+
+from project.core.application import Application
+from project.gateway.hash_ring import HashRing
+from project.shared.metrics.registry import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+ROUTED_PATHS = frozenset({"/api/rvc", "/api/rvc/multi", "/api/tts", "/api/jobs"})
+RETRY_STATUSES = frozenset({502, 503, 504})
+# hop-by-hop headers and the ones aiohttp recomputes
+SKIPPED_HEADERS = frozenset(
+    {"connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te", "trailer", "transfer-encoding",
+     "upgrade", "host", "content-length"}
+)
+
+
+class GatewayUnavailable(Exception):
+    """No node could answer the request"""
+
+    def __init__(self, message: str = "No backend node available", retry_after: int = 5):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def routing_key(model_id: Optional[str], speaker: str) -> str:
+    return f"{model_id or ''}\x1f{speaker}"
+
+
+@dataclass
+class Node:
+    url: str
+    healthy: bool = True
+    outstanding: int = 0
+
+
+class GatewayProxy:
+    """Consistent-hash routing and failover over the backend nodes"""
+
+    _instance = None
+
+    def __init__(
+        self,
+        urls: Iterable[str],
+        virtual_nodes: int = 160,
+        replicas: int = 2,
+        health_interval_s: float = 5.0,
+        timeout_s: float = 300.0,
+    ):
+        self.ring = HashRing(virtual_nodes=virtual_nodes)
+        self.nodes: Dict[str, Node] = {}
+        self.replicas = max(1, replicas)
+        self.health_interval_s = health_interval_s
+        self.timeout = aiohttp.ClientTimeout(total=timeout_s)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._health_task: Optional[asyncio.Task] = None
+
+        metrics = MetricsRegistry()
+        self._requests = metrics.counter("gateway_requests_total", "Requests answered per backend node", ["node"])
+        self._failovers = metrics.counter(
+            "gateway_failovers_total", "Requests sent to the next node of the ring", ["reason"]
+        )
+        self._up = metrics.gauge("gateway_node_up", "1 while the node is in the ring", ["node"])
+        metrics.gauge("gateway_ring_nodes", "Nodes currently in the ring").set_function(lambda: len(self.ring))
+        for url in urls:
+            self.join(url)
+
+    @classmethod
+    def get_instance(cls) -> "GatewayProxy":
+        if cls._instance is None:
+            envs = Application().envs
+            cls._instance = GatewayProxy(
+                [url for url in envs.GATEWAY_NODES.split(",") if url.strip()],
+                virtual_nodes=envs.GATEWAY_VIRTUAL_NODES,
+                replicas=envs.GATEWAY_REPLICAS,
+                health_interval_s=envs.GATEWAY_HEALTH_INTERVAL_S,
+                timeout_s=envs.GATEWAY_TIMEOUT_S,
+            )
+        return cls._instance
+
+    def join(self, url: str) -> Node:
+        url = url.strip().rstrip("/")
+        node = self.nodes.get(url)
+        if node is None:
+            node = self.nodes[url] = Node(url)
+            self._up.labels(node=url).set_function(lambda n=node: float(n.url in self.ring))
+            self.ring.add(url)
+            logger.info("[Gateway] %s joined, %d nodes in the ring", url, len(self.ring))
+        return node
+
+    def leave(self, url: str) -> None:
+        url = url.strip().rstrip("/")
+        if self.nodes.pop(url, None) is not None:
+            self.ring.remove(url)
+            logger.info("[Gateway] %s left, %d nodes in the ring", url, len(self.ring))
+
+    def _set_healthy(self, node: Node, healthy: bool) -> None:
+        if healthy == node.healthy or self.nodes.get(node.url) is not node:
+            return
+        node.healthy = healthy
+        if healthy:
+            self.ring.add(node.url)
+        else:
+            self.ring.remove(node.url)
+        logger.warning("[Gateway] %s is now %s", node.url, "in the ring" if healthy else "out of the ring")
+
+    def candidates(self, key: Optional[str], every_node: bool = False) -> List[Node]:
+        """Owner and replicas of key, or the least loaded nodes when there is no key"""
+        if key is not None:
+            urls = self.ring.preference(key, 0 if every_node else self.replicas)
+            return [self.nodes[url] for url in urls]
+        nodes = sorted((self.nodes[url] for url in self.ring.nodes), key=lambda node: node.outstanding)
+        return nodes if every_node else nodes[: self.replicas]
+
+    async def start(self) -> None:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=self.timeout, auto_decompress=False)
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def close(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _health_loop(self) -> None:
+        while True:
+            await self.check_health()
+            await asyncio.sleep(self.health_interval_s)
+
+    async def check_health(self) -> None:
+        await asyncio.gather(*(self._check(node) for node in list(self.nodes.values())))
+
+    async def _check(self, node: Node) -> None:
+        try:
+            async with self._session.get(f"{node.url}/health/ready", timeout=aiohttp.ClientTimeout(total=5)) as response:
+                healthy = response.status == 200
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            healthy = False
+        self._set_healthy(node, healthy)
+
+    async def forward(
+        self,
+        method: str,
+        path: str,
+        headers: Mapping[str, str],
+        body: bytes,
+        key: Optional[str],
+        retry_not_found: bool = False,
+    ) -> Tuple[aiohttp.ClientResponse, Node]:
+        """
+        Send the request to the first node of its preference list that answers.
+
+        The caller reads the response and must hand it back to release().
+        """
+        headers = {name: value for name, value in headers.items() if name.lower() not in SKIPPED_HEADERS}
+        nodes = self.candidates(key, every_node=retry_not_found)
+        if not nodes:
+            raise GatewayUnavailable()
+        for index, node in enumerate(nodes):
+            last = index == len(nodes) - 1
+            node.outstanding += 1
+            try:
+                response = await self._session.request(method, f"{node.url}{path}", headers=headers, data=body)
+            except BaseException as e:
+                node.outstanding -= 1
+                if not isinstance(e, (aiohttp.ClientConnectionError, asyncio.TimeoutError)):
+                    raise
+                logger.warning("[Gateway] %s failed: %s", node.url, e)
+                # connection refused or reset: out of the ring until its health check passes
+                if isinstance(e, aiohttp.ClientConnectorError):
+                    self._set_healthy(node, False)
+                elif method == "POST":
+                    # the node may already have acted on it, a retry could create a second job
+                    raise GatewayUnavailable(f"{node.url} failed after the request was sent: {e}") from e
+                if last:
+                    raise GatewayUnavailable(f"No node answered, last error from {node.url}: {e}") from e
+                self._failovers.labels(reason="connection").inc()
+                continue
+            if not last and (response.status in RETRY_STATUSES or (retry_not_found and response.status == 404)):
+                self.release(response, node)
+                self._failovers.labels(reason=str(response.status)).inc()
+                continue
+            self._requests.labels(node=node.url).inc()
+            return response, node
+        raise GatewayUnavailable()
+
+    def release(self, response: aiohttp.ClientResponse, node: Node) -> None:
+        """Once the body is read, or abandoned: the node stops counting the request"""
+        response.release()
+        node.outstanding -= 1
+
+    def get_status(self) -> List[dict]:
+        return [
+            {"url": node.url, "in_ring": node.url in self.ring, "outstanding": node.outstanding}
+            for node in self.nodes.values()
+        ]
@@ -0,0 +1,117 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from project.core.application import Application
+from project.gateway.proxy import ROUTED_PATHS, SKIPPED_HEADERS, GatewayProxy, Node, routing_key
+from typing import Optional
+import aiohttp
+import secrets
+import uuid
+
+router = APIRouter()
+
+PROXIED_METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"]
+FORM_TYPES = ("multipart/form-data", "application/x-www-form-urlencoded")
+
+
+@router.get("/health/live", tags=["Health"], summary="Gateway liveness probe")
+async def live():
+    return {"status": "alive"}
+
+
+@router.get("/health/ready",
+    tags=["Health"],
+    summary="Gateway readiness probe",
+    description="Return 200 while at least one backend node is in the ring",
+)
+async def ready():
+    nodes = GatewayProxy.get_instance().get_status()
+    if not any(node["in_ring"] for node in nodes):
+        return JSONResponse(status_code=503, content={"status": "no_nodes", "nodes": nodes})
+    return {"status": "ready", "nodes": nodes}
+
+
+@router.get("/gateway/nodes", tags=["Gateway"], summary="Backend nodes and whether they are in the ring")
+async def get_nodes():
+    return GatewayProxy.get_instance().get_status()
+
+
+def require_admin_token(authorization: Optional[str] = Header(None)) -> None:
+    """Changing the ring decides who receives the uploads, so it needs GATEWAY_ADMIN_TOKEN"""
+    token = Application().envs.GATEWAY_ADMIN_TOKEN
+    if not token:
+        raise HTTPException(status_code=403, detail="Runtime node changes are disabled, use GATEWAY_NODES")
+    if not secrets.compare_digest((authorization or "").encode(), f"Bearer {token}".encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@router.post("/gateway/nodes",
+    tags=["Gateway"],
+    summary="Add a backend node to the ring",
+    dependencies=[Depends(require_admin_token)],
+)
+async def join_node(url: str):
+    gateway = GatewayProxy.get_instance()
+    gateway.join(url)
+    return gateway.get_status()
+
+
+@router.delete("/gateway/nodes",
+    tags=["Gateway"],
+    summary="Remove a backend node from the ring",
+    dependencies=[Depends(require_admin_token)],
+)
+async def leave_node(url: str):
+    gateway = GatewayProxy.get_instance()
+    gateway.leave(url)
+    return gateway.get_status()
+
+
+async def request_routing_key(request: Request) -> Optional[str]:
+    """(model_id, speaker) of a conversion request, None for everything else"""
+    if request.method != "POST" or request.url.path not in ROUTED_PATHS:
+        return None
+    if not request.headers.get("content-type", "").startswith(FORM_TYPES):
+        return None
+    # the body is already buffered for the retries, the form is parsed from it
+    form = await request.form()
+    try:
+        speakers = [name.strip() for value in form.getlist("speakers") for name in str(value).split(",") if name.strip()]
+        speaker = speakers[0] if speakers else str(form.get("speaker") or "voice")
+        return routing_key(form.get("model_id") or None, speaker)
+    finally:
+        await form.close()
+
+
+class ProxiedResponse(StreamingResponse):
+    """Streams the node's response and releases it when done, also when the client left first"""
+
+    def __init__(self, gateway: GatewayProxy, upstream: aiohttp.ClientResponse, node: Node):
+        headers = {name: value for name, value in upstream.headers.items() if name.lower() not in SKIPPED_HEADERS}
+        headers["X-Gateway-Node"] = node.url
+        super().__init__(upstream.content.iter_chunked(64 * 1024), status_code=upstream.status, headers=headers)
+        self.gateway = gateway
+        self.upstream = upstream
+        self.node = node
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.gateway.release(self.upstream, self.node)
+
+
+@router.api_route("/{path:path}", methods=PROXIED_METHODS, include_in_schema=False)
+async def proxy(request: Request, path: str):
+    body = await request.body()
+    key = await request_routing_key(request)
+    headers = dict(request.headers)
+    # the same id in the gateway's and the node's logs
+    headers.setdefault("x-request-id", uuid.uuid4().hex)
+    if request.client is not None:
+        headers["x-forwarded-for"] = request.client.host
+    target = request.url.path + (f"?{request.url.query}" if request.url.query else "")
+    # job ids only exist on the node that created them
+    find_job = request.method == "GET" and request.url.path.startswith("/api/jobs/")
+    gateway = GatewayProxy.get_instance()
+    response, node = await gateway.forward(request.method, target, headers, body, key, retry_not_found=find_job)
+    return ProxiedResponse(gateway, response, node)
@@ -0,0 +1,290 @@
+"""
+Jobs assíncronos de conversão.
+
+``POST /api/jobs`` grava a entrada em ``JOBS_DIR`` e o job no ``JobStore``; os
+workers (``JOBS_WORKERS``) pegam os jobs da fila e convertem arquivos em segmentos
+de ``JOBS_SEGMENT_S`` segundos (emendados com crossfade) ou textos pelo pipeline de
+texto longo, atualizando o progresso. O resultado é um WAV em ``JOBS_DIR/results``
+que expira depois de ``JOBS_RESULT_TTL_S``. Jobs na fila sobrevivem a um restart e
+os que estavam rodando voltam para a fila quando o heartbeat fica velho.
+"""
+import asyncio
+import os
+import shutil
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+from fastapi import UploadFile
+
+from project.conversor.admission.controller import AdmissionRejected
+from project.conversor.admission.scheduler import ANONYMOUS, BULK, SchedulingContext, set_scheduling_context
+from project.conversor.audio.crossfade import join_segments
+from project.conversor.audio.pcm import PCM_SAMPLE_RATE, encode_wav
+from project.core.application import Application
+from project.core.logging_pipeline import set_request_id
+from project.dto.tts_dto import RvcDTO, RvcTtsDTO
+from project.jobs.store import Job, JobStore
+from project.shared.metrics.registry import MetricsRegistry
+from project.tts.long_text import LongTextPipeline
+
+KIND_RVC, KIND_TTS = "rvc", "tts"
+# overlap between file segments, crossfaded when joining
+OVERLAP_S = 0.05
+# rejections caused by the current load, the other ones fail the same way on every attempt
+TRANSIENT_REJECTIONS = ("queue_full", "queue_too_slow", "queue_timeout", "preempted")
+
+
+class JobService:
+    """Background workers over the persistent job store"""
+
+    _instance = None
+
+    def __init__(
+        self,
+        jobs_dir: str,
+        workers: int = 1,
+        result_ttl_s: float = 3600.0,
+        segment_s: float = 30.0,
+        stale_after_s: float = 60.0,
+        poll_interval_s: float = 2.0,
+    ):
+        self.app = Application()
+        self.jobs_dir = jobs_dir
+        self.inputs_dir = os.path.join(jobs_dir, "inputs")
+        self.results_dir = os.path.join(jobs_dir, "results")
+        os.makedirs(self.inputs_dir, exist_ok=True)
+        os.makedirs(self.results_dir, exist_ok=True)
+        self.store = JobStore(os.path.join(jobs_dir, "jobs.sqlite3"))
+        self.workers = workers
+        self.result_ttl_s = result_ttl_s
+        self.segment = int(segment_s * PCM_SAMPLE_RATE)
+        self.overlap = int(OVERLAP_S * PCM_SAMPLE_RATE)
+        self.stale_after_s = stale_after_s
+        self.poll_interval_s = poll_interval_s
+        self.conversor_service = None
+        self.synthesizer_service = None
+        self.voice_mapping = None
+        self._running: Dict[str, Job] = {}
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+        metrics = MetricsRegistry()
+        self._finished = metrics.counter("jobs_finished_total", "Finished conversion jobs", ["kind", "status"])
+        self._duration = metrics.histogram("job_duration_seconds", "Time from claim to result per job", ["kind"])
+        metrics.gauge("jobs_running", "Jobs being converted by this process").set_function(lambda: len(self._running))
+
+    @classmethod
+    def get_instance(cls) -> "JobService":
+        if cls._instance is None:
+            envs = Application().envs
+            cls._instance = JobService(
+                jobs_dir=envs.JOBS_DIR,
+                workers=envs.JOBS_WORKERS,
+                result_ttl_s=envs.JOBS_RESULT_TTL_S,
+                segment_s=envs.JOBS_SEGMENT_S,
+            )
+        return cls._instance
+
+    async def submit(self, kind: str, params: dict, audio_file: Optional[UploadFile] = None) -> Job:
+        """Persist the input and queue the job, returns before any conversion work"""
+        input_path = None
+        if audio_file is not None:
+            extension = os.path.splitext(audio_file.filename or "")[1] or ".wav"
+            input_path = os.path.join(self.inputs_dir, f"{os.urandom(16).hex()}{extension}")
+            await asyncio.to_thread(self._save_upload, audio_file, input_path)
+        job = await asyncio.to_thread(self.store.create, kind, params, input_path)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    @staticmethod
+    def _save_upload(audio_file: UploadFile, path: str) -> None:
+        audio_file.file.seek(0)
+        with open(path, "wb") as f:
+            shutil.copyfileobj(audio_file.file, f, length=1024 * 1024)
+        if os.path.getsize(path) == 0:
+            os.remove(path)
+            raise ValueError("Audio file is empty")
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    def start(self, conversor_service, synthesizer_service, voice_mapping=None) -> None:
+        """Start the workers once the conversion services are ready, called from the event loop"""
+        self.conversor_service = conversor_service
+        self.synthesizer_service = synthesizer_service
+        self.voice_mapping = voice_mapping
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._maintenance()))
+        self.app.logger.info("[Jobs] Started %d workers", self.workers)
+
+    async def stop(self) -> None:
+        interrupted = list(self._running)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # interrupted jobs go back to the queue for the next process
+        await asyncio.to_thread(self.store.requeue, interrupted)
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                job = await asyncio.to_thread(self.store.claim_next)
+                if job is None:
+                    self._wakeup.clear()
+                    try:
+                        # other processes sharing the store do not set our event, poll as well
+                        await asyncio.wait_for(self._wakeup.wait(), self.poll_interval_s)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await self.run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # e.g. the store locked by another process for longer than its timeout
+                self.app.logger.error("[Jobs] Worker failed: %s", e, exc_info=True)
+                await asyncio.sleep(self.poll_interval_s)
+
+    async def _maintenance(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.store.heartbeat, list(self._running))
+                requeued = await asyncio.to_thread(self.store.requeue_stale, self.stale_after_s)
+                if requeued:
+                    self.app.logger.warning("[Jobs] Requeued %d interrupted jobs", requeued)
+                    self._wakeup.set()
+                await self.expire_results()
+            except Exception as e:
+                self.app.logger.error("[Jobs] Maintenance failed: %s", e, exc_info=True)
+            await asyncio.sleep(min(self.stale_after_s / 3, 10.0))
+
+    async def expire_results(self) -> int:
+        expired = await asyncio.to_thread(self.store.expire)
+        for job in expired:
+            for path in (job.result_path, job.input_path):
+                if path and os.path.exists(path):
+                    os.remove(path)
+        return len(expired)
+
+    async def run(self, job: Job) -> None:
+        """Convert one claimed job and record its result or error"""
+        self._running[job.id] = job
+        # background work never delays interactive requests, and shares fairly across tenants
+        set_scheduling_context(SchedulingContext(priority=BULK, tenant=job.params.get("tenant") or ANONYMOUS))
+        set_request_id(job.id)
+        started = time.perf_counter()
+        timings: Dict[str, Any] = {"queued_s": round((job.started_at or time.time()) - job.created_at, 3)}
+        try:
+            if job.kind == KIND_RVC:
+                audio = await self._convert_file(job, timings)
+            elif job.kind == KIND_TTS:
+                audio = await self._convert_text(job, timings)
+            else:
+                raise ValueError(f"Unknown job kind: {job.kind}")
+            result_path = os.path.join(self.results_dir, f"{job.id}.wav")
+            wav = encode_wav(audio, samplerate=PCM_SAMPLE_RATE)
+            await asyncio.to_thread(self._write, result_path, wav)
+            timings["total_s"] = round(time.perf_counter() - started, 3)
+            timings["audio_s"] = round(len(audio) / PCM_SAMPLE_RATE, 3)
+            await asyncio.to_thread(self.store.complete, job.id, result_path, timings, self.result_ttl_s)
+            self._finished.labels(kind=job.kind, status="succeeded").inc()
+            self.app.logger.info("[Jobs] %s finished in %.2f s", job.id, timings["total_s"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            timings["total_s"] = round(time.perf_counter() - started, 3)
+            self.app.logger.error("[Jobs] %s failed: %s", job.id, e, exc_info=True)
+            await asyncio.to_thread(self.store.fail, job.id, str(e), timings, self.result_ttl_s)
+            self._finished.labels(kind=job.kind, status="failed").inc()
+        finally:
+            self._running.pop(job.id, None)
+            self._duration.labels(kind=job.kind).observe(time.perf_counter() - started)
+        if job.input_path and os.path.exists(job.input_path):
+            os.remove(job.input_path)
+
+    @staticmethod
+    def _write(path: str, data: bytes) -> None:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _progress(self, job: Job):
+        def logged(future: asyncio.Future) -> None:
+            if not future.cancelled() and future.exception() is not None:
+                self.app.logger.warning("[Jobs] Could not record the progress of %s: %s", job.id, future.exception())
+
+        def report(done: int, total: int) -> None:
+            # heartbeat and progress in one write, off the event loop
+            future = asyncio.get_running_loop().run_in_executor(
+                None, self.store.update_progress, job.id, done / max(total, 1)
+            )
+            future.add_done_callback(logged)
+
+        return report
+
+    async def _convert(self, dto: RvcDTO, audio: np.ndarray, source_embedding: Any = None) -> np.ndarray:
+        """Background work waits for capacity instead of failing on a busy admission"""
+        while True:
+            try:
+                return await self.conversor_service.convert_audio_array(dto, audio, source_embedding)
+            except AdmissionRejected as e:
+                if e.reason not in TRANSIENT_REJECTIONS:
+                    raise
+                await asyncio.sleep(e.retry_after)
+
+    async def _convert_file(self, job: Job, timings: Dict[str, Any]) -> np.ndarray:
+        import librosa
+
+        params = job.params
+        await self.conversor_service.core_service.ensure_model(params.get("model_id"))
+        start = time.perf_counter()
+        audio, _ = await asyncio.to_thread(librosa.load, job.input_path, sr=PCM_SAMPLE_RATE, mono=True)
+        timings["load_s"] = round(time.perf_counter() - start, 3)
+        if len(audio) == 0:
+            raise ValueError("Audio file is empty")
+
+        dto = RvcDTO(target_voice=params.get("speaker"), model_id=params.get("model_id"))
+        report = self._progress(job)
+        step = self.segment - self.overlap
+        offsets = list(range(0, max(len(audio) - self.overlap, 1), step))
+        converted = []
+        start = time.perf_counter()
+        # each segment repeats the tail of the previous one, joined with a crossfade
+        for index, offset in enumerate(offsets):
+            piece = audio[offset:offset + self.segment]
+            output = np.asarray(await self._convert(dto, piece), dtype=np.float32)[:len(piece)]
+            converted.append(np.pad(output, (0, len(piece) - len(output))))
+            report(index + 1, len(offsets))
+        timings["conversion_s"] = round(time.perf_counter() - start, 3)
+        timings["segments"] = len(offsets)
+        return join_segments(converted, self.overlap)
+
+    async def _convert_text(self, job: Job, timings: Dict[str, Any]) -> np.ndarray:
+        params = job.params
+        speaker, model_id, lang_code = params.get("speaker"), params.get("model_id"), params.get("lang_code", "a")
+        await self.conversor_service.core_service.ensure_model(model_id)
+        mapping = await self.voice_mapping.resolve(speaker, model_id) if self.voice_mapping else None
+        voice = mapping.voice if mapping else None
+        source_embedding = mapping.source_embedding if mapping else None
+        dto = RvcDTO(target_voice=speaker, model_id=model_id)
+        pipeline = LongTextPipeline(
+            lambda segment: self.synthesizer_service.synthesize_samples(
+                RvcTtsDTO(text=segment, voice=voice, target_voice=speaker, model_id=model_id, lang_code=lang_code)
+            ),
+            lambda audio: self._convert(dto, audio, source_embedding),
+            synthesis_concurrency=min(4, self.synthesizer_service.tts_provider.max_connections),
+            conversion_concurrency=self.app.envs.CONVERSION_WORKERS,
+            on_progress=self._progress(job),
+        )
+        start = time.perf_counter()
+        audio, segment_timings = await pipeline.run(params["text"], lang_code)
+        timings["conversion_s"] = round(time.perf_counter() - start, 3)
+        timings["segments"] = len(segment_timings)
+        return audio
@@ -0,0 +1,212 @@
+"""
+Armazenamento persistente dos jobs de conversão em SQLite.
+
+Cada job guarda tipo, parâmetros, status, progresso, tempos e os caminhos do
+arquivo de entrada e do resultado. Os jobs ``running`` mandam heartbeat; se o
+processo morrer, o heartbeat para e o job volta para a fila. A reserva do próximo
+job usa ``BEGIN IMMEDIATE``, então vários processos podem compartilhar o banco.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, EXPIRED = "queued", "running", "succeeded", "failed", "expired"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    params TEXT NOT NULL,
+    input_path TEXT,
+    result_path TEXT,
+    progress REAL NOT NULL DEFAULT 0,
+    error TEXT,
+    timings TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    heartbeat_at REAL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+"""
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    status: str
+    params: dict
+    input_path: Optional[str] = None
+    result_path: Optional[str] = None
+    progress: float = 0.0
+    error: Optional[str] = None
+    timings: dict = field(default_factory=dict)
+    created_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    heartbeat_at: Optional[float] = None
+    expires_at: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        """Public view, without the local file paths and the tenant"""
+        data = asdict(self)
+        data["params"] = {key: value for key, value in self.params.items() if key != "tenant"}
+        data.pop("input_path")
+        data.pop("result_path")
+        data.pop("heartbeat_at")
+        return data
+
+
+class JobStore:
+    """Thread-safe SQLite job table"""
+
+    def __init__(self, path: str):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        # autocommit, transactions are opened explicitly where needed
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def create(self, kind: str, params: dict, input_path: Optional[str] = None, job_id: Optional[str] = None) -> Job:
+        job = Job(
+            id=job_id or uuid.uuid4().hex,
+            kind=kind,
+            status=QUEUED,
+            params=params,
+            input_path=input_path,
+            created_at=time.time(),
+        )
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, status, params, input_path, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job.id, kind, QUEUED, json.dumps(params), input_path, job.created_at),
+            )
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_job(row) if row else None
+
+    def claim_next(self) -> Optional[Job]:
+        """Move the oldest queued job to running and return it"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, started_at = ?, heartbeat_at = ? WHERE id = ?",
+                        (RUNNING, now, now, row["id"]),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        job = self._to_job(row)
+        job.status, job.started_at, job.heartbeat_at = RUNNING, now, now
+        return job
+
+    def update_progress(self, job_id: str, progress: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET progress = ?, heartbeat_at = ? WHERE id = ? AND status = ?",
+                (progress, time.time(), job_id, RUNNING),
+            )
+
+    def heartbeat(self, job_ids: List[str]) -> None:
+        if not job_ids:
+            return
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET heartbeat_at = ? WHERE status = ? AND id IN ({','.join('?' * len(job_ids))})",
+                (time.time(), RUNNING, *job_ids),
+            )
+
+    def complete(self, job_id: str, result_path: str, timings: dict, ttl_s: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result_path = ?, timings = ?, progress = 1, finished_at = ?, "
+                "expires_at = ? WHERE id = ?",
+                (SUCCEEDED, result_path, json.dumps(timings), now, now + ttl_s, job_id),
+            )
+
+    def fail(self, job_id: str, error: str, timings: dict, ttl_s: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, timings = ?, finished_at = ?, expires_at = ? WHERE id = ?",
+                (FAILED, error, json.dumps(timings), now, now + ttl_s, job_id),
+            )
+
+    def requeue_stale(self, stale_after_s: float) -> int:
+        """Put back running jobs whose worker stopped sending heartbeats"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, progress = 0, started_at = NULL WHERE status = ? AND heartbeat_at < ?",
+                (QUEUED, RUNNING, time.time() - stale_after_s),
+            )
+        return cursor.rowcount
+
+    def requeue(self, job_ids: List[str]) -> None:
+        """Put back running jobs this process gave up on (shutdown)"""
+        if not job_ids:
+            return
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET status = ?, progress = 0, started_at = NULL "
+                f"WHERE status = ? AND id IN ({','.join('?' * len(job_ids))})",
+                (QUEUED, RUNNING, *job_ids),
+            )
+
+    def expire(self) -> List[Job]:
+        """Mark finished jobs past their expiry, return them so their files can be removed"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status IN (?, ?) AND expires_at < ?", (SUCCEEDED, FAILED, now)
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE jobs SET status = ? WHERE id = ?", [(EXPIRED, row["id"]) for row in rows]
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [self._to_job(row) for row in rows]
+
+    def count_by_status(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    @staticmethod
+    def _to_job(row: sqlite3.Row) -> Job:
+        data = dict(row)
+        data["params"] = json.loads(data["params"])
+        data["timings"] = json.loads(data["timings"]) if data["timings"] else {}
+        return Job(**data)
@@ -0,0 +1,104 @@
+"""
+Conversão e carregamento de checkpoints em formato mapeável em memória.
+
+O ``model.pth`` (pickle) precisa ser desserializado e copiado para tensores novos a
+cada inicialização. ``convert_checkpoint`` grava os pesos uma única vez em
+``model.safetensors``; ``load_mmap_state_dict`` mapeia esse arquivo com ``mmap``
+(MAP_PRIVATE) e devolve tensores que apontam direto para as páginas do arquivo,
+carregadas sob demanda e compartilhadas entre processos pelo page cache.
+
+Uso:
+    python -m project.model.checkpoint convert /path/to/models/openvoice_v2
+"""
+import argparse
+import json
+import os
+import struct
+from typing import Dict
+
+import torch
+
+SAFETENSORS_FILENAME = "model.safetensors"
+
+SAFETENSORS_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+
+
+def mmap_checkpoint_path(checkpoint_path: str) -> str:
+    """Return the memory-mappable counterpart of a ``.pth`` checkpoint"""
+    return os.path.join(os.path.dirname(checkpoint_path), SAFETENSORS_FILENAME)
+
+
+def convert_checkpoint(model_dir: str) -> str:
+    """Write ``model.pth`` of a model directory as ``model.safetensors``"""
+    from safetensors.torch import save_file  # type: ignore
+
+    checkpoint_path = os.path.join(model_dir, "model.pth")
+    state = torch.load(checkpoint_path, map_location="cpu", weights_only=False)
+    state_dict = state["model"] if "model" in state else state
+    # safetensors does not store aliased storages, give every tensor its own copy
+    tensors = {name: tensor.detach().contiguous().clone() for name, tensor in state_dict.items()}
+
+    output_path = os.path.join(model_dir, SAFETENSORS_FILENAME)
+    tmp_path = output_path + ".tmp"
+    save_file(tensors, tmp_path, metadata={"source": "model.pth"})
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+def load_mmap_state_dict(path: str) -> Dict[str, torch.Tensor]:
+    """
+    Map a safetensors file and return tensors backed by the mapped pages.
+
+    Nothing is read up front: pages are faulted in as the weights are used and,
+    as the mapping is private, they stay shared with the page cache (and with
+    other processes mapping the same file) until a tensor is written to.
+    """
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        (header_size,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_size))
+    header.pop("__metadata__", None)
+    data_start = 8 + header_size
+
+    storage = torch.UntypedStorage.from_file(path, shared=False, nbytes=file_size)
+    state_dict = {}
+    for name, info in header.items():
+        dtype = SAFETENSORS_DTYPES[info["dtype"]]
+        begin, end = info["data_offsets"]
+        itemsize = torch.empty((), dtype=dtype).element_size()
+        byte_offset = data_start + begin
+        if byte_offset % itemsize:
+            raise ValueError(f"Tensor {name} is not aligned in {path}")
+        tensor = torch.empty(0, dtype=dtype)
+        tensor.set_(storage, byte_offset // itemsize, torch.Size(info["shape"]))
+        if tensor.numel() * itemsize != end - begin:
+            raise ValueError(f"Tensor {name} has inconsistent size in {path}")
+        state_dict[name] = tensor
+    return state_dict
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkpoint utilities")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    convert_parser = subparsers.add_parser("convert", help="Convert model.pth to model.safetensors")
+    convert_parser.add_argument("model_dir", help="Directory with config.json and model.pth")
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        output_path = convert_checkpoint(args.model_dir)
+        print(f"Checkpoint written to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,19 @@ from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from TTS.vc.configs.openvoice_config import OpenVoiceConfig  # type: ignore
 from TTS.vc.models.openvoice import OpenVoice  # type: ignore
-from typing import Type, Any, Tuple
+from TTS.utils.audio.torch_transforms import wav_to_spec  # type: ignore
+from typing import Type, Any, List, Tuple
+from project.model.checkpoint import load_mmap_state_dict, mmap_checkpoint_path
+import copy
+import importlib
+import json
+import logging
+import threading
 import torch
 import os
 
+logger = logging.getLogger(__name__)
+
 
 @dataclass
 class ModelConfig:
@@ -13,6 +22,7 @@ class ModelConfig:
 
     config_path: str
     model_path: str
+    use_mmap: bool = True
 
 
 class VoiceModel(ABC):
@@ -44,6 +54,29 @@ class VoiceModel(ABC):
         """Run inference on source spectrogram with auxiliary input"""
         pass
 
+    @abstractmethod
+    def spectrogram(self, src: Any) -> torch.Tensor:
+        """Spectrogram as computed by extract_se, without the speaker encoder"""
+        pass
+
+    @abstractmethod
+    def inference_multi(self, src_spec: torch.Tensor, g_src: torch.Tensor, g_tgts: torch.Tensor) -> torch.Tensor:
+        """Inference of one source for several targets g_tgts [B, C, 1], returns [B, 1, T]"""
+        pass
+
+    def inference_reduced_precision(self, src_spec: torch.Tensor, aux_input: Any) -> Any:
+        """Cheaper inference for the overload quality tiers, models without one run the normal inference"""
+        return self.inference(src_spec, aux_input)
+
+    def prepare_reduced_precision(self) -> None:
+        """Build what inference_reduced_precision needs at load time, so the memory footprint counts it"""
+        pass
+
+    def memory_modules(self) -> List[torch.nn.Module]:
+        """Modules whose weights the model holds, for the registry's memory budget"""
+        module = getattr(self, "model", None)
+        return [module] if isinstance(module, torch.nn.Module) else []
+
 
 class OpenVoiceModelAdapter(VoiceModel):
     """Adapter for OpenVoice model to work with our interface"""
@@ -51,15 +84,42 @@ class OpenVoiceModelAdapter(VoiceModel):
     def __init__(self, config: ModelConfig):
         self.config = OpenVoiceConfig(config.config_path)
         self.model = OpenVoice(self.config)
+        self._reduced_dec = None
+        self._reduced_lock = threading.Lock()
 
     def load_checkpoint(self, config: ModelConfig) -> None:
+        mmap_path = mmap_checkpoint_path(config.model_path)
+        if config.use_mmap and os.path.exists(mmap_path):
+            try:
+                self._load_mmap_checkpoint(config.model_path, mmap_path)
+                return
+            except Exception as e:
+                logger.warning("Memory-mapped checkpoint %s failed, falling back to .pth: %s", mmap_path, e)
         self.model.load_checkpoint(self.config, config.model_path, eval=True)
 
+    def _load_mmap_checkpoint(self, checkpoint_path: str, mmap_path: str) -> None:
+        """Assign the mapped tensors as the module parameters, without copying them"""
+        # same audio settings coqui's OpenVoice.load_checkpoint reads from config.json
+        config_path = os.path.join(os.path.dirname(checkpoint_path), "config.json")
+        with open(config_path, encoding="utf-8") as f:
+            data = json.load(f)["data"]
+        audio = self.model.config.audio
+        audio.input_sample_rate = data["sampling_rate"]
+        audio.output_sample_rate = data["sampling_rate"]
+        audio.fft_size = data["filter_length"]
+        audio.hop_length = data["hop_length"]
+        audio.win_length = data["win_length"]
+
+        self.model.load_state_dict(load_mmap_state_dict(mmap_path), strict=True, assign=True)
+        self.model.eval()
+
     def to_cuda(self) -> None:
         self.model.cuda()
+        self._rebuild_reduced_decoder()
 
     def to_cpu(self) -> None:
         self.model.cpu()
+        self._rebuild_reduced_decoder()
 
     def extract_se(self, src: str) -> Tuple[torch.Tensor, Any]:
         """Extract speaker embedding from audio file using OpenVoice model"""
@@ -69,16 +129,99 @@ class OpenVoiceModelAdapter(VoiceModel):
         """Run inference using OpenVoice model"""
         return self.model.inference(src_spec, aux_input)
 
+    def prepare_reduced_precision(self) -> None:
+        self._reduced_decoder()
+
+    def memory_modules(self) -> List[torch.nn.Module]:
+        return [self.model] + ([self._reduced_dec] if self._reduced_dec is not None else [])
+
+    def _rebuild_reduced_decoder(self) -> None:
+        """A prepared copy follows the model to its new device and dtype"""
+        prepared = self._reduced_dec is not None
+        self._reduced_dec = None
+        if prepared:
+            self._reduced_decoder()
+
+    def _reduced_decoder(self) -> torch.nn.Module:
+        """Copy of the decoder in bfloat16 (float16 on GPU), built at load time or on first use"""
+        with self._reduced_lock:
+            if self._reduced_dec is None:
+                # built outside the request's inference mode so the copy holds ordinary tensors;
+                # the weight norm stays: removing it from the copy would break the shared parametrized class
+                with torch.inference_mode(False), torch.no_grad():
+                    dec = copy.deepcopy(self.model.dec)
+                    dtype = torch.float16 if next(dec.parameters()).is_cuda else torch.bfloat16
+                    self._reduced_dec = dec.to(dtype).eval()
+            return self._reduced_dec
+
+    @torch.inference_mode()
+    def inference_reduced_precision(self, src_spec: torch.Tensor, aux_input: Any) -> Any:
+        """Encoder and flows in float32 like inference, the decoder (most of the cost) in reduced precision"""
+        model = self.model
+        g_src, g_tgt = aux_input["g_src"], aux_input["g_tgt"]
+        x_lengths = torch.tensor([src_spec.shape[-1]], device=src_spec.device)
+        z, _, _, y_mask = model.enc_q(
+            src_spec, x_lengths, g=g_src if not model.zero_g else torch.zeros_like(g_src), tau=model.tau
+        )
+        z_p = model.flow(z, y_mask, g=g_src)
+        z_hat = model.flow(z_p, y_mask, g=g_tgt, reverse=True)
+        dec = self._reduced_decoder()
+        dtype = next(dec.parameters()).dtype
+        g_dec = g_tgt if not model.zero_g else torch.zeros_like(g_tgt)
+        o_hat = dec((z_hat * y_mask).to(dtype), g=g_dec.to(dtype))
+        return {"model_outputs": o_hat.float(), "y_mask": y_mask}
+
+    def spectrogram(self, src: Any) -> torch.Tensor:
+        audio_config = self.model.config.audio
+        y = self.model.load_audio(src).unsqueeze(0)
+        return wav_to_spec(
+            y,
+            n_fft=audio_config.fft_size,
+            hop_length=audio_config.hop_length,
+            win_length=audio_config.win_length,
+            center=False,
+        ).to(self.model.device)
+
+    def inference_multi(self, src_spec: torch.Tensor, g_src: torch.Tensor, g_tgts: torch.Tensor) -> torch.Tensor:
+        """The source is encoded once, only the reverse flow and the decoder run per target"""
+        model = self.model
+        x_lengths = torch.tensor([src_spec.shape[-1]], device=src_spec.device)
+        z, _, _, y_mask = model.enc_q(
+            src_spec, x_lengths, g=g_src if not model.zero_g else torch.zeros_like(g_src), tau=model.tau
+        )
+        z_p = model.flow(z, y_mask, g=g_src)
+        # a batched decoder pays off on GPU; on CPU it is slower than one target at a time
+        step = g_tgts.shape[0] if src_spec.is_cuda else 1
+        outputs = []
+        for start in range(0, g_tgts.shape[0], step):
+            g_tgt = g_tgts[start:start + step]
+            batch_z_p, batch_mask = z_p.expand(g_tgt.shape[0], -1, -1), y_mask.expand(g_tgt.shape[0], -1, -1)
+            z_hat = model.flow(batch_z_p, batch_mask, g=g_tgt, reverse=True)
+            outputs.append(model.dec(z_hat * batch_mask, g=g_tgt if not model.zero_g else torch.zeros_like(g_tgt)))
+        return torch.cat(outputs)
+
+
+def load_model_class(path: str) -> Type[VoiceModel]:
+    """Resolve a ``package.module:Class`` path, an empty path is the OpenVoice adapter"""
+    if not path:
+        return OpenVoiceModelAdapter
+    module_name, _, class_name = path.replace(":", ".").rpartition(".")
+    model_class = getattr(importlib.import_module(module_name), class_name)
+    if not (isinstance(model_class, type) and issubclass(model_class, VoiceModel)):
+        raise TypeError(f"{path} is not a VoiceModel")
+    return model_class
+
 
 class ModelFactory:
     """Factory for creating voice models with better testability"""
 
-    def __init__(self, model_class: Type[VoiceModel] = OpenVoiceModelAdapter):
+    def __init__(self, model_class: Type[VoiceModel] = OpenVoiceModelAdapter, use_mmap: bool = True):
         self.model_class = model_class
+        self.use_mmap = use_mmap
 
     def create_model(self, model_path: str) -> VoiceModel:
         config_path = os.path.join(model_path, "config.json")
-        config = ModelConfig(config_path=config_path, model_path=model_path)
+        config = ModelConfig(config_path=config_path, model_path=model_path, use_mmap=self.use_mmap)
         model = self.model_class(config)
         model.load_checkpoint(config)
 
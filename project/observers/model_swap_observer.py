@@ -0,0 +1,17 @@
+from abc import abstractmethod
+from typing import Any
+from project.observers.observer import Observer
+
+
+class ModelSwapObserver(Observer):
+    """Observer that keeps per-model state and takes part in a model hot-swap."""
+
+    @abstractmethod
+    def prepare_swap(self, model: Any) -> Any:
+        """Build the state needed to serve the candidate model, raise to abort the swap."""
+        pass
+
+    @abstractmethod
+    def commit_swap(self, model: Any, prepared: Any) -> None:
+        """Switch new requests to the candidate model using the prepared state."""
+        pass
@@ -0,0 +1,100 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+from project.conversor.audio.archive import stream_zip
+from project.core.application import Application
+from project.dto.model_dto import ModelSwapDTO, ProfilingDTO
+from project.router.dependencies import get_conversor_service, require_admin_token
+from project.shared.metrics.profiling import Profiler
+import os
+
+app = Application()
+router = APIRouter(prefix="/admin")
+
+
+@router.post("/model/swap",
+    summary="Hot-swap the voice conversion checkpoint",
+    description="Load, warm and switch to a new checkpoint in the background, draining requests on the current one",
+    response_class=JSONResponse,
+    status_code=202,
+    dependencies=[Depends(require_admin_token)],
+)
+async def swap_model(dto: ModelSwapDTO, conversor_service=Depends(get_conversor_service)):
+    models_dir = os.path.realpath(app.envs.MODELS_DIR_PATH)
+    # relative paths are taken from MODELS_DIR_PATH, and nothing may point outside of it
+    model_path = os.path.realpath(os.path.join(models_dir, dto.model_path))
+    if os.path.commonpath([models_dir, model_path]) != models_dir or model_path == models_dir:
+        raise HTTPException(status_code=400, detail="model_path must be a directory under MODELS_DIR_PATH")
+    if not os.path.exists(os.path.join(model_path, "model.pth")):
+        raise HTTPException(status_code=404, detail=f"Checkpoint not found in {dto.model_path}")
+
+    model_manager = conversor_service.core_service.model_manager
+    try:
+        model_manager.swap_model(model_path, dto.drain_timeout)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    app.logger.info("Model swap to %s started", model_path)
+    return model_manager.get_swap_status()
+
+
+@router.get("/model/swap",
+    summary="Model hot-swap status",
+    description="Return the progress of the last checkpoint hot-swap",
+    response_class=JSONResponse,
+)
+async def get_swap_status(conversor_service=Depends(get_conversor_service)):
+    return conversor_service.core_service.model_manager.get_swap_status()
+
+
+@router.post("/profiling",
+    summary="Profile the next conversions",
+    description="Capture torch.profiler traces and Python stack samples of the next conversions, "
+    "or of those slower than min_duration_ms",
+    response_class=JSONResponse,
+    dependencies=[Depends(require_admin_token)],
+)
+async def arm_profiling(dto: ProfilingDTO):
+    return Profiler.get_instance().arm(dto.requests, dto.min_duration_ms, dto.timeout_s)
+
+
+@router.delete("/profiling",
+    summary="Stop profiling",
+    description="Disarm the capture, requests already being profiled are still saved",
+    response_class=JSONResponse,
+    dependencies=[Depends(require_admin_token)],
+)
+async def disarm_profiling():
+    return Profiler.get_instance().disarm()
+
+
+@router.get("/profiling",
+    summary="Profiling status and saved captures",
+    description="Return whether a capture is armed and the summaries of the saved profiles, newest first",
+    response_class=JSONResponse,
+    dependencies=[Depends(require_admin_token)],
+)
+async def get_profiling_status():
+    profiler = Profiler.get_instance()
+    return {**profiler.get_status(), "captures": profiler.captures()}
+
+
+@router.get("/profiling/{capture_id}",
+    summary="Download a saved profile",
+    description="Return a ZIP with the torch traces, the folded Python stacks and the summary of a capture",
+    response_class=StreamingResponse,
+    dependencies=[Depends(require_admin_token)],
+)
+async def download_profile(capture_id: str):
+    paths = Profiler.get_instance().capture_files(capture_id)
+    if paths is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    async def entries():
+        for path in paths:
+            with open(path, "rb") as f:
+                yield os.path.basename(path), f.read()
+
+    return StreamingResponse(
+        stream_zip(entries()),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="profile-{capture_id}.zip"'},
+    )
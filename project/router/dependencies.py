@@ -0,0 +1,81 @@
+from fastapi import Header, HTTPException
+from project.conversor.admission.controller import AdmissionRejected
+from project.conversor.admission.scheduler import (
+    PRIORITIES,
+    SchedulingContext,
+    set_scheduling_context,
+    tenant_id,
+)
+from project.core.application import Application
+from project.core.startup import StartupManager
+from typing import Optional
+import secrets
+import time
+
+
+def get_startup_manager() -> StartupManager:
+    return StartupManager()
+
+
+def ensure_ready() -> StartupManager:
+    """Reject requests with 503 while the model and speakers are still loading"""
+    startup = get_startup_manager()
+    if not startup.is_ready():
+        raise HTTPException(
+            status_code=503,
+            detail={"message": "Service is starting", **startup.get_status()},
+            headers={"Retry-After": "5"},
+        )
+    return startup
+
+
+def require_admin_token(authorization: Optional[str] = Header(None)) -> None:
+    """Model swaps and profiles (which keep request stacks) are admin actions, so they need ADMIN_TOKEN"""
+    token = Application().envs.ADMIN_TOKEN
+    if not token:
+        raise HTTPException(status_code=403, detail="Admin routes are disabled, set ADMIN_TOKEN")
+    if not secrets.compare_digest((authorization or "").encode(), f"Bearer {token}".encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+def get_conversor_service():
+    return ensure_ready().conversor_service
+
+
+def get_synthesizer_service():
+    return ensure_ready().synthesizer_service
+
+
+def get_voice_mapping():
+    return ensure_ready().voice_mapping
+
+
+def get_job_service():
+    # jobs are accepted (and persisted) while the model is still loading
+    from project.jobs.service import JobService
+
+    return JobService.get_instance()
+
+
+def scheduling(default_priority: str):
+    """Dependency setting the SchedulingContext of a route from the request headers"""
+
+    async def dependency(
+        x_priority: Optional[str] = Header(None, description="interactive, standard or bulk"),
+        x_deadline_ms: Optional[float] = Header(None, description="Time budget of the request in milliseconds"),
+        x_api_key: Optional[str] = Header(None, description="Tenant for fair queuing"),
+    ) -> SchedulingContext:
+        priority = (x_priority or default_priority).lower()
+        if priority not in PRIORITIES:
+            raise HTTPException(status_code=422, detail=f"X-Priority must be one of {', '.join(PRIORITIES)}")
+        deadline = None
+        if x_deadline_ms is not None:
+            if x_deadline_ms <= 0:
+                raise AdmissionRejected("deadline")
+            deadline = time.monotonic() + x_deadline_ms / 1000
+        context = SchedulingContext(priority=priority, tenant=tenant_id(x_api_key), deadline=deadline)
+        # async dependencies run in the request task, the endpoint and its subtasks see the context
+        set_scheduling_context(context)
+        return context
+
+    return dependency
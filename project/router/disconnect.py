@@ -0,0 +1,84 @@
+"""
+Cancela a requisição quando o cliente desconecta antes da resposta terminar.
+
+Depois que o app leu o corpo inteiro, o middleware passa a escutar o ``receive``
+do servidor: só pode chegar ``http.disconnect``. Se ele chegar antes do fim da
+resposta, o token da requisição é cancelado (os workers param na próxima etapa) e
+a task do app recebe ``CancelledError`` (a espera na fila de admissão é
+abandonada). Quem chamar ``receive`` de novo no app, como o ``StreamingResponse``,
+recebe a mesma mensagem de desconexão.
+"""
+import asyncio
+from typing import Iterable
+
+from project.conversor.cancellation import (
+    DISCONNECT,
+    CancellationToken,
+    reset_cancellation_token,
+    set_cancellation_token,
+)
+
+
+class CancelOnDisconnectMiddleware:
+    """Pure ASGI middleware, only for the paths that run conversions"""
+
+    def __init__(self, app, paths: Iterable[str]):
+        self.app = app
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        token = CancellationToken()
+        context_token = set_cancellation_token(token)
+        body_read = asyncio.Event()
+        disconnected = asyncio.get_running_loop().create_future()
+        response_sent = False
+
+        async def app_receive():
+            if body_read.is_set():
+                # the watcher owns the server's receive now
+                return await asyncio.shield(disconnected)
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                if not disconnected.done():
+                    disconnected.set_result(message)
+                body_read.set()
+            elif not message.get("more_body", False):
+                body_read.set()
+            return message
+
+        async def app_send(message):
+            nonlocal response_sent
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_sent = True
+            await send(message)
+
+        async def watch():
+            await body_read.wait()
+            if not disconnected.done():
+                message = await receive()
+                if not disconnected.done():
+                    disconnected.set_result(message)
+
+        task = asyncio.ensure_future(self.app(scope, app_receive, app_send))
+        watcher = asyncio.ensure_future(watch())
+        try:
+            await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            if not task.done() and not response_sent:
+                token.cancel(DISCONNECT)
+                task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                if not token.cancelled:
+                    # cancelled from outside (server shutdown), not by this middleware
+                    raise
+        finally:
+            watcher.cancel()
+            if not task.done():
+                task.cancel()
+            token.record()
+            reset_cancellation_token(context_token)
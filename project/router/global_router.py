@@ -1,8 +1,10 @@
 from fastapi import APIRouter
 from project.core.application import Application
 from project.router.rvc_router import router as rvc_router
+from project.router.admin_router import router as admin_router
 
 app = Application()
 router = APIRouter()
 
 router.include_router(rvc_router)
+router.include_router(admin_router)
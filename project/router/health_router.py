@@ -0,0 +1,31 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from project.router.dependencies import get_startup_manager
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+
+@router.get("/live",
+    summary="Liveness probe",
+    description="Return 200 while the process is serving requests, 503 if startup failed for good",
+    response_class=JSONResponse,
+)
+async def live():
+    startup = get_startup_manager()
+    if startup.stage == "failed":
+        return JSONResponse(status_code=503, content={"status": "failed", **startup.get_status()})
+    return {"status": "alive"}
+
+
+@router.get("/ready",
+    summary="Readiness probe",
+    description="Return 200 once the model and speaker embeddings are loaded, 503 with the loading progress otherwise",
+    response_class=JSONResponse,
+)
+async def ready():
+    startup = get_startup_manager()
+    status = startup.get_status()
+    if not startup.is_ready():
+        state = "failed" if startup.stage == "failed" else "starting"
+        return JSONResponse(status_code=503, content={"status": state, **status})
+    return {"status": "ready", **status}
@@ -0,0 +1,79 @@
+from fastapi import APIRouter, Depends, File, Form, Header, HTTPException, UploadFile
+from fastapi.responses import FileResponse, JSONResponse
+from project.conversor.admission.scheduler import tenant_id
+from project.jobs.service import KIND_RVC, KIND_TTS
+from project.jobs.store import EXPIRED, FAILED, SUCCEEDED
+from project.router.dependencies import get_job_service
+from typing import Optional
+
+router = APIRouter()
+
+
+def job_view(job) -> dict:
+    view = job.to_dict()
+    if job.status == SUCCEEDED:
+        view["result_url"] = f"/api/jobs/{job.id}/result"
+    return view
+
+
+@router.post("/jobs",
+    summary="Queue a voice conversion or TTS job",
+    description="Accept an audio file or a text and return a job id right away; poll /jobs/{id} for progress",
+    response_class=JSONResponse,
+    status_code=202,
+)
+async def create_job(
+    audio_file: Optional[UploadFile] = File(None, description="Audio file to be converted"),
+    text: Optional[str] = Form(None, description="Text to synthesize and convert"),
+    speaker: str = Form("voice", description="Target speaker for voice conversion"),
+    model_id: Optional[str] = Form(None, description="Voice conversion model id"),
+    lang_code: str = Form("a", description="Kokoro language code"),
+    x_api_key: Optional[str] = Header(None, description="Tenant for fair queuing"),
+    job_service=Depends(get_job_service),
+):
+    if (audio_file is None) == (not text):
+        raise HTTPException(status_code=422, detail="Send either audio_file or text")
+    # the job store only ever sees the hashed tenant, never the API key
+    params = {"speaker": speaker, "model_id": model_id, "tenant": tenant_id(x_api_key)}
+    try:
+        if audio_file is not None:
+            job = await job_service.submit(KIND_RVC, params, audio_file)
+        else:
+            job = await job_service.submit(KIND_TTS, {**params, "text": text, "lang_code": lang_code})
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return JSONResponse(status_code=202, content=job_view(job), headers={"Location": f"/api/jobs/{job.id}"})
+
+
+@router.get("/jobs/{job_id}",
+    summary="Job status",
+    description="Return the status, progress and timings of a job",
+    response_class=JSONResponse,
+)
+async def get_job(job_id: str, job_service=Depends(get_job_service)):
+    job = await job_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_view(job)
+
+
+@router.get("/jobs/{job_id}/result",
+    summary="Download a job result",
+    description="Return the converted WAV of a finished job",
+    response_class=FileResponse,
+)
+async def get_job_result(job_id: str, job_service=Depends(get_job_service)):
+    job = await job_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status == EXPIRED:
+        raise HTTPException(status_code=410, detail="Job result expired")
+    if job.status == FAILED:
+        raise HTTPException(status_code=409, detail={"status": job.status, "error": job.error})
+    if job.status != SUCCEEDED:
+        raise HTTPException(
+            status_code=409,
+            detail={"status": job.status, "progress": job.progress},
+            headers={"Retry-After": "5"},
+        )
+    return FileResponse(job.result_path, media_type="audio/wav", filename=f"{job.id}.wav")
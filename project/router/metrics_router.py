@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from project.shared.metrics import pipeline  # noqa: F401  registers the pipeline and process metrics
+from project.shared.metrics.registry import MetricsRegistry
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics",
+    summary="Prometheus metrics",
+    description="Expose the process metrics in the Prometheus text format",
+    response_class=PlainTextResponse,
+)
+async def metrics():
+    return PlainTextResponse(MetricsRegistry().render(), media_type="text/plain; version=0.0.4")
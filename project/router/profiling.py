@@ -0,0 +1,62 @@
+"""
+Perfila as conversões que o ``Profiler`` armado pede.
+
+A sessão fica no contexto da requisição, os workers de conversão ligam o
+``torch.profiler`` quando a encontram. Depois da resposta o resumo (status,
+duração, tempo por estágio) vai para o ``Profiler``, que exporta os traces numa
+thread à parte, fora da latência da requisição.
+"""
+import asyncio
+from time import perf_counter
+from typing import Iterable, Optional
+
+from project.core.logging_pipeline import get_request_id
+from project.shared.metrics.pipeline import get_request_timings
+from project.shared.metrics.profiling import Profiler, reset_profile_session, set_profile_session
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware, only for the paths that run conversions"""
+
+    def __init__(self, app, paths: Iterable[str], profiler: Optional[Profiler] = None):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        profiler = self.profiler or Profiler.get_instance()
+        session = profiler.start(scope["path"])
+        if session is None:
+            await self.app(scope, receive, send)
+            return
+
+        context_token = set_profile_session(session)
+        start = perf_counter()
+        status = 500
+
+        async def profiled_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, profiled_send)
+        finally:
+            reset_profile_session(context_token)
+            timings = get_request_timings()
+            summary = {
+                "path": scope["path"],
+                "method": scope["method"],
+                "status": status,
+                "request_id": get_request_id(),
+                "duration_ms": round(1000 * (perf_counter() - start), 1),
+                "stages_ms": {
+                    name: round(1000 * seconds, 1) for name, seconds in (timings.snapshot() if timings else {}).items()
+                },
+            }
+            # not awaited: exporting the traces must not hold the response, nor be cancelled with it
+            asyncio.get_running_loop().run_in_executor(None, profiler.finish, session, summary)
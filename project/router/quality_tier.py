@@ -0,0 +1,45 @@
+"""
+Escolhe o nível de qualidade de cada conversão e o devolve no header ``X-Quality-Tier``.
+
+O nível vem do ``QualityGovernor`` na entrada da requisição e fica no contexto até
+o fim, inclusive nos workers. A latência das respostas que não são erro do
+servidor volta para o governor como sinal do SLO.
+"""
+import time
+from typing import Iterable, Optional
+
+from project.conversor.admission.quality import QualityGovernor, reset_quality_tier, set_quality_tier
+
+
+class QualityTierMiddleware:
+    """Pure ASGI middleware, only for the paths that run conversions"""
+
+    def __init__(self, app, paths: Iterable[str], governor: Optional[QualityGovernor] = None):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.governor = governor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        governor = self.governor or QualityGovernor.get_instance()
+        tier = governor.choose()
+        context_token = set_quality_tier(tier)
+        start = time.perf_counter()
+        status = 500
+
+        async def tier_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-quality-tier", tier.name.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, tier_send)
+        finally:
+            reset_quality_tier(context_token)
+            if status < 500:
+                governor.observe(time.perf_counter() - start)
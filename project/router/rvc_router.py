@@ -1,72 +1,102 @@
-from fastapi import APIRouter, UploadFile, File, Form
-from fastapi.responses import JSONResponse, FileResponse
-from project.conversor.service import ConversorService
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
+from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse
+from project.conversor.admission.controller import AdmissionRejected
+from project.conversor.admission.scheduler import INTERACTIVE, STANDARD
+from project.conversor.audio.archive import stream_zip
+from project.conversor.audio.pcm import encode_wav
+from project.conversor.cancellation import ConversionCancelled
 from project.core.application import Application
 from project.dto.tts_dto import RvcTtsDTO, RvcDTO
-from project.tts.tts_service import SynthesizerService
+from project.router.dependencies import get_conversor_service, get_synthesizer_service, get_voice_mapping, scheduling
+from project.shared.metrics.pipeline import stage
+from project.shared.metrics.registry import MetricsRegistry
+from project.tts.long_text import LongTextPipeline
+from project.tts.voice_mapping import VoiceMapping
+from typing import AsyncIterator, List, Optional, Tuple
 import io
+import json
+import logging
 import os
 import soundfile as sf
 import tempfile
+import time
 
 app = Application()
+logger = logging.getLogger(__name__)
 router = APIRouter()
-conversor_service = ConversorService()
-synthesizer_service = SynthesizerService()
+time_to_first_audio = MetricsRegistry().histogram(
+    "tts_time_to_first_audio_seconds", "Time until the first converted audio is sent", ["mode"]
+)
+
+
+async def ensure_model_available(conversor_service, model_id: Optional[str]) -> None:
+    """Load the requested model, unknown model ids are reported as 404"""
+    try:
+        await conversor_service.core_service.ensure_model(model_id)
+    except (FileNotFoundError, ValueError) as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.get("/models",
+    summary="List resident voice conversion models",
+    description="Return the models currently loaded and the memory budget usage",
+    response_class=JSONResponse,
+)
+async def list_models(conversor_service=Depends(get_conversor_service)):
+    return conversor_service.core_service.model_registry.get_status()
+
+@router.get("/voice-mapping",
+    summary="List the Kokoro voice chosen for each speaker",
+    description="Return the Kokoro base voice mapped to each target speaker and its embedding similarity",
+    response_class=JSONResponse,
+)
+async def list_voice_mapping(voice_mapping=Depends(get_voice_mapping)):
+    return voice_mapping.get_status()
 
 @router.post("/rvc",
     summary="Convert voice from file and stream audio",
     description="Convert voice from file and return audio stream",
     response_class=JSONResponse,
+    dependencies=[Depends(scheduling(STANDARD))],
 )
 async def apply_rvc(
     audio_file: UploadFile = File(..., description="Audio file to be converted"),
     speaker: str = Form("voice", description="Target speaker for voice conversion"),
+    model_id: Optional[str] = Form(None, description="Voice conversion model id"),
+    conversor_service=Depends(get_conversor_service),
 ):
-    print(f"\n\n\nStarting voice conversion for file: {audio_file.filename}")
+    logger.info("Starting voice conversion of %s to %s", audio_file.filename, speaker)
+    await ensure_model_available(conversor_service, model_id)
     try:
         dto = RvcDTO(
-            target_voice=speaker
+            target_voice=speaker,
+            model_id=model_id,
         )
-        print(f"Created DTO: {dto}")
-        
-        print("Converting audio...")
         audio_buffer = await conversor_service.get_converted_audio(dto, audio_file)
-        print("Audio conversion completed")
-        
+
         if isinstance(audio_buffer, io.BytesIO):
-            print("Converting BytesIO to bytes")
             audio_bytes = audio_buffer.getvalue()
         else:
-            print("audio_buffer", type(audio_buffer))
             audio_bytes = audio_buffer
-            
-        print(f"Audio size: {len(audio_bytes)} bytes")
-
-        # Inspecionar o tipo e o conteúdo do audio_buffer
-        print(f"Type of audio_buffer: {type(audio_buffer)}")
-        if isinstance(audio_buffer, io.BytesIO):
-            print(f"BytesIO buffer size: {audio_buffer.getbuffer().nbytes} bytes")
-        else:
-            print(f"Buffer content type: {type(audio_buffer)}")
 
         if audio_bytes is None or len(audio_bytes) == 0:
-            app.logger.error("Audio buffer is empty. Conversion might have failed.")
+            logger.error("Audio buffer is empty. Conversion might have failed.")
             return JSONResponse(
                 status_code=500,
                 content={"status": "error", "message": "Audio buffer is empty. Conversion failed."},
             )
 
-        print(f"Audio buffer size: {len(audio_bytes)} bytes")
+        logger.debug("Converted audio: %d samples", len(audio_bytes))
 
         # Converter o numpy.ndarray para um arquivo de áudio válido
         temp_file_path = tempfile.mktemp(suffix=".wav")
-        app.logger.debug("Saving numpy array as a valid WAV file...")
+        logger.debug("Saving numpy array as a valid WAV file...")
         try:
-            sf.write(temp_file_path, audio_bytes, samplerate=24000)
-            app.logger.info(f"Audio successfully saved as WAV file: {temp_file_path}")
+            with stage("encode").time():
+                sf.write(temp_file_path, audio_bytes, samplerate=24000)
+            logger.debug("Audio saved as WAV file: %s", temp_file_path)
         except Exception as e:
-            app.logger.error(f"Failed to save audio as WAV file: {str(e)}")
+            logger.error("Failed to save audio as WAV file: %s", e)
             return JSONResponse(
                 status_code=500,
                 content={"status": "error", "message": "Failed to save audio as WAV file."},
@@ -74,17 +104,17 @@ async def apply_rvc(
 
         # Verificar se o arquivo foi salvo corretamente
         if not os.path.exists(temp_file_path):
-            app.logger.error("Temporary file was not created.")
+            logger.error("Temporary file was not created.")
             return JSONResponse(
                 status_code=500,
                 content={"status": "error", "message": "Failed to create temporary file."},
             )
 
         file_size = os.path.getsize(temp_file_path)
-        app.logger.info(f"Temporary file size: {file_size} bytes")
+        logger.debug("Temporary file size: %d bytes", file_size)
 
         if file_size == 0:
-            app.logger.error("Temporary file is empty.")
+            logger.error("Temporary file is empty.")
             return JSONResponse(
                 status_code=500,
                 content={"status": "error", "message": "Temporary file is empty."},
@@ -94,113 +124,189 @@ async def apply_rvc(
         return FileResponse(temp_file_path, media_type="audio/wav", filename="converted_audio.wav")
 
     except Exception as e:
-        app.logger.error(f"Error during voice conversion: {str(e)}", exc_info=True)
+        logger.error("Error during voice conversion: %s", e, exc_info=True)
         raise
 
 
+@router.post("/rvc/multi",
+    summary="Convert one input to several speakers",
+    description="Convert an audio file (or a synthesized text) to every listed speaker and return a ZIP with one WAV per speaker",
+    response_class=StreamingResponse,
+    dependencies=[Depends(scheduling(STANDARD))],
+)
+async def apply_rvc_multi(
+    speakers: List[str] = Form(..., description="Target speakers, repeated or comma separated"),
+    audio_file: Optional[UploadFile] = File(None, description="Audio file to be converted"),
+    text: Optional[str] = Form(None, description="Text to synthesize instead of an audio file"),
+    model_id: Optional[str] = Form(None, description="Voice conversion model id"),
+    lang_code: str = Form("a", description="Kokoro language code"),
+    conversor_service=Depends(get_conversor_service),
+    synthesizer_service=Depends(get_synthesizer_service),
+):
+    targets = list(dict.fromkeys(name.strip() for value in speakers for name in value.split(",") if name.strip()))
+    if not targets:
+        raise HTTPException(status_code=422, detail="No speaker given")
+    if len(targets) > app.envs.MULTI_TARGET_MAX_SPEAKERS:
+        raise HTTPException(
+            status_code=422, detail=f"At most {app.envs.MULTI_TARGET_MAX_SPEAKERS} speakers per request"
+        )
+    if (audio_file is None) == (not text):
+        raise HTTPException(status_code=422, detail="Send either audio_file or text")
+    await ensure_model_available(conversor_service, model_id)
+    available = set(await conversor_service.get_speakers())
+    unknown = [name for name in targets if name not in available]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Unknown speakers: {', '.join(unknown)}")
+
+    # decoded (or synthesized) once for every speaker
+    if audio_file is not None:
+        try:
+            audio_array, temp_file_path = await conversor_service.audio_loading_service.load_from_upload_file(audio_file)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        conversor_service.audio_loading_service.cleanup_temp_file(temp_file_path)
+    else:
+        audio_array = await synthesizer_service.synthesize_samples(
+            RvcTtsDTO(text=text, model_id=model_id, lang_code=lang_code)
+        )
+
+    results = conversor_service.convert_audio_array_multi(audio_array, targets, model_id)
+    # the first batch runs before the response starts, so admission and conversion errors keep their status
+    first = await anext(results)
+    return StreamingResponse(
+        stream_zip(wav_entries(first, results)),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="converted_audio.zip"'},
+    )
+
+
+async def wav_entries(
+    first: Tuple[str, object], results: AsyncIterator[Tuple[str, object]]
+) -> AsyncIterator[Tuple[str, bytes]]:
+    """One {speaker}.wav entry per converted speaker"""
+    try:
+        speaker, audio = first
+        yield f"{speaker}.wav", encode_wav(audio, samplerate=24000)
+        async for speaker, audio in results:
+            yield f"{speaker}.wav", encode_wav(audio, samplerate=24000)
+    finally:
+        await results.aclose()
+
+
 @router.post("/tts",
     summary="Synthesize text and apply voice conversion",
     description="Synthesize text using KokoroTTS and apply voice conversion",
     response_class=JSONResponse,
+    dependencies=[Depends(scheduling(INTERACTIVE))],
 )
 async def apply_rvc_in_tts(
     text: str = Form(..., description="Text to synthesize"),
     speaker: str = Form("voice", description="Target speaker for voice conversion"),
+    model_id: Optional[str] = Form(None, description="Voice conversion model id"),
+    stream: bool = Form(False, description="Stream converted audio while it is synthesized"),
+    lang_code: str = Form("a", description="Kokoro language code, also used to split long texts"),
+    conversor_service=Depends(get_conversor_service),
+    synthesizer_service=Depends(get_synthesizer_service),
+    voice_mapping=Depends(get_voice_mapping),
 ):
-    print(f"\n\n\nStarting TTS and voice conversion for text: {text}")
+    logger.info("Starting TTS and voice conversion of %d characters to %s", len(text), speaker)
+    started_at = time.perf_counter()
+    await ensure_model_available(conversor_service, model_id)
+    # synthesize with the Kokoro voice closest to the speaker, its embedding is the conversion source
+    mapping = await voice_mapping.resolve(speaker, model_id)
+    voice = mapping.voice if mapping else None
+    source_embedding = mapping.source_embedding if mapping else None
+    if stream:
+        dto = RvcTtsDTO(text=text, voice=voice, target_voice=speaker, model_id=model_id, lang_code=lang_code)
+        pcm_chunks = synthesizer_service.stream_audio(dto)
+        return StreamingResponse(
+            conversor_service.stream_converted_wav(
+                RvcDTO(target_voice=speaker, model_id=model_id), pcm_chunks, started_at, source_embedding
+            ),
+            media_type="audio/wav",
+        )
+    if len(text) >= app.envs.LONG_TEXT_MIN_CHARS:
+        return await convert_long_text(
+            text, speaker, model_id, lang_code, conversor_service, synthesizer_service, started_at, mapping
+        )
     try:
-        # Step 1: Synthesize audio using KokoroTTS
-        print("Synthesizing audio using KokoroTTS...")
-        dto = RvcTtsDTO(text=text, voice=speaker)
-        audio_data = await synthesizer_service.synthesize_audio(dto)
-        print("Audio synthesis completed")
-
-        # Validate synthesized audio_data
-        if not audio_data:
-            app.logger.error("Synthesized audio data is None or empty.")
+        # Step 1: Synthesize raw 24 kHz samples using KokoroTTS
+        dto = RvcTtsDTO(text=text, voice=voice, target_voice=speaker, model_id=model_id, lang_code=lang_code)
+        audio_array = await synthesizer_service.synthesize_samples(dto)
+
+        # Validate synthesized samples
+        if audio_array is None or len(audio_array) == 0:
+            logger.error("Synthesized audio data is None or empty.")
             return JSONResponse(
                 status_code=500,
                 content={"status": "error", "message": "Synthesized audio data is invalid."},
             )
 
-        # Wrap audio_data into a file-like object with a filename
-        audio_file = UploadFile(
-            file=io.BytesIO(audio_data),
-            filename="synthesized_audio.wav",
-        )
-
-        # Step 2: Apply voice conversion
-        dto = RvcDTO(target_voice=speaker)
-        print("Applying voice conversion...")
+        # Step 2: Apply voice conversion straight on the samples (no temp file, decode or resample)
+        dto = RvcDTO(target_voice=speaker, model_id=model_id)
         try:
-            audio_buffer = await conversor_service.get_converted_audio(dto, audio_file)
+            audio_buffer = await conversor_service.convert_audio_array(dto, audio_array, source_embedding)
+        except (AdmissionRejected, ConversionCancelled):
+            raise
         except Exception as e:
-            app.logger.error(f"Error during audio conversion: {str(e)}")
+            logger.error("Error during audio conversion: %s", e)
             return JSONResponse(
                 status_code=500,
                 content={"status": "error", "message": "Audio conversion failed."},
             )
 
-        print("Voice conversion completed")
-
         # Validate audio_buffer
-        if audio_buffer is None:
-            app.logger.error("Audio buffer is None. Conversion might have failed.")
-            return JSONResponse(
-                status_code=500,
-                content={"status": "error", "message": "Audio buffer is None. Conversion failed."},
-            )
-
-        if isinstance(audio_buffer, io.BytesIO):
-            print("Converting BytesIO to bytes")
-            audio_bytes = audio_buffer.getvalue()
-        else:
-            print("audio_buffer", type(audio_buffer))
-            audio_bytes = audio_buffer
-
-        if audio_bytes is None or len(audio_bytes) == 0:
-            app.logger.error("Audio bytes are empty. Conversion might have failed.")
-            return JSONResponse(
-                status_code=500,
-                content={"status": "error", "message": "Audio bytes are empty. Conversion failed."},
-            )
-
-        print(f"Audio size: {len(audio_bytes)} bytes")
-
-        # Convert numpy.ndarray to a valid audio file
-        temp_file_path = tempfile.mktemp(suffix=".wav")
-        app.logger.debug("Saving numpy array as a valid WAV file...")
-        try:
-            sf.write(temp_file_path, audio_bytes, samplerate=24000)
-            app.logger.info(f"Audio successfully saved as WAV file: {temp_file_path}")
-        except Exception as e:
-            app.logger.error(f"Failed to save audio as WAV file: {str(e)}")
-            return JSONResponse(
-                status_code=500,
-                content={"status": "error", "message": "Failed to save audio as WAV file."},
-            )
-
-        # Verificar se o arquivo foi salvo corretamente
-        if not os.path.exists(temp_file_path):
-            app.logger.error("Temporary file was not created.")
-            return JSONResponse(
-                status_code=500,
-                content={"status": "error", "message": "Failed to create temporary file."},
-            )
-
-        file_size = os.path.getsize(temp_file_path)
-        app.logger.info(f"Temporary file size: {file_size} bytes")
-
-        if file_size == 0:
-            app.logger.error("Temporary file is empty.")
+        if audio_buffer is None or len(audio_buffer) == 0:
+            logger.error("Audio buffer is empty. Conversion might have failed.")
             return JSONResponse(
                 status_code=500,
-                content={"status": "error", "message": "Temporary file is empty."},
+                content={"status": "error", "message": "Audio buffer is empty. Conversion failed."},
             )
 
-        # Return the file as a response
-        return FileResponse(temp_file_path, media_type="audio/wav", filename="converted_audio.wav")
+        # Encode the WAV in memory and return it
+        wav_bytes = encode_wav(audio_buffer, samplerate=24000)
+        logger.debug("Audio size: %d bytes", len(wav_bytes))
+        time_to_first_audio.labels(mode="full").observe(time.perf_counter() - started_at)
+        return Response(
+            content=wav_bytes,
+            media_type="audio/wav",
+            headers={"Content-Disposition": 'attachment; filename="converted_audio.wav"'},
+        )
 
     except Exception as e:
-        app.logger.error(f"Error during TTS and voice conversion: {str(e)}", exc_info=True)
-        raise
\ No newline at end of file
+        logger.error("Error during TTS and voice conversion: %s", e, exc_info=True)
+        raise
+
+async def convert_long_text(
+    text: str,
+    speaker: str,
+    model_id: Optional[str],
+    lang_code: str,
+    conversor_service,
+    synthesizer_service,
+    started_at: float,
+    mapping: Optional[VoiceMapping] = None,
+) -> Response:
+    """Synthesize and convert sentence by sentence in parallel, joined back in order"""
+    conversion_dto = RvcDTO(target_voice=speaker, model_id=model_id)
+    voice = mapping.voice if mapping else None
+    source_embedding = mapping.source_embedding if mapping else None
+    pipeline = LongTextPipeline(
+        lambda segment: synthesizer_service.synthesize_samples(
+            RvcTtsDTO(text=segment, voice=voice, target_voice=speaker, model_id=model_id, lang_code=lang_code)
+        ),
+        lambda audio: conversor_service.convert_audio_array(conversion_dto, audio, source_embedding),
+        synthesis_concurrency=min(4, synthesizer_service.tts_provider.max_connections),
+        conversion_concurrency=app.envs.CONVERSION_WORKERS,
+    )
+    audio, timings = await pipeline.run(text, lang_code)
+    logger.info("Long text converted in %d segments: %s", len(timings), timings)
+    time_to_first_audio.labels(mode="full").observe(time.perf_counter() - started_at)
+    return Response(
+        content=encode_wav(audio, samplerate=24000),
+        media_type="audio/wav",
+        headers={
+            "Content-Disposition": 'attachment; filename="converted_audio.wav"',
+            "X-Segment-Timings": json.dumps(timings, separators=(",", ":")),
+        },
+    )
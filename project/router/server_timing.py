@@ -0,0 +1,43 @@
+"""
+Header ``Server-Timing`` com o tempo de cada estágio da requisição.
+
+Os estágios medidos com ``stage()`` (e a espera na fila de admissão) somam num
+``RequestTimings`` posto no contexto da requisição, inclusive nos workers; quando
+a resposta começa o header sai com cada estágio e o ``total``. Em respostas em
+streaming só entram os estágios que rodaram antes do primeiro byte.
+"""
+from time import perf_counter
+
+from project.shared.metrics.pipeline import (
+    RequestTimings,
+    reset_request_timings,
+    server_timing_header,
+    set_request_timings,
+)
+
+
+class ServerTimingMiddleware:
+    """Pure ASGI middleware, for every HTTP response"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        context_token = set_request_timings(timings)
+        start = perf_counter()
+
+        async def timed_send(message):
+            if message["type"] == "http.response.start":
+                value = server_timing_header(timings.snapshot(), perf_counter() - start)
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", value.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            reset_request_timings(context_token)
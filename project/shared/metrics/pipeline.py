@@ -0,0 +1,163 @@
+"""
+Métricas do pipeline de conversão, compartilhadas pelos módulos instrumentados.
+
+``stage(nome)`` devolve o histograma já resolvido do estágio, então medir um
+estágio no caminho quente custa só um ``perf_counter`` e um ``observe``. A mesma
+medida soma no ``RequestTimings`` da requisição corrente (quando há um no
+contexto), de onde sai o header ``Server-Timing``. A memória do processo é lida
+no momento do scrape, não durante as requisições.
+"""
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from time import perf_counter
+from typing import Dict, Iterator, Optional
+
+import psutil  # type: ignore
+
+from project.shared.metrics.registry import Histogram, MetricsRegistry
+
+STAGES = (
+    "upload_read",
+    "decode",
+    "embedding_lookup",
+    "extract_se",
+    "spectrogram",
+    "inference",
+    "postprocess",
+    "encode",
+    "kokoro",
+)
+
+_metrics = MetricsRegistry()
+_stage_seconds = _metrics.histogram(
+    "pipeline_stage_seconds",
+    "Time spent in each stage of the conversion pipeline",
+    ["stage"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+
+class RequestTimings:
+    """Seconds per stage of one request, summed when a stage runs more than once"""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        # stages run on the event loop and on the conversion workers
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self.stages)
+
+
+_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def get_request_timings() -> Optional[RequestTimings]:
+    return _timings.get()
+
+
+def set_request_timings(timings: Optional[RequestTimings]) -> Token:
+    return _timings.set(timings)
+
+
+def reset_request_timings(token: Token) -> None:
+    _timings.reset(token)
+
+
+def add_request_timing(name: str, seconds: float) -> None:
+    """Time spent by the current request outside the pipeline stages, like the admission queue"""
+    timings = _timings.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+class Stage:
+    """Histogram of a stage that also adds to the current request's timings"""
+
+    def __init__(self, name: str, histogram: Histogram):
+        self.name = name
+        self.histogram = histogram
+
+    def observe(self, value: float) -> None:
+        self.histogram.observe(value)
+        add_request_timing(self.name, value)
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the duration of the block, also when it raises"""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - start)
+
+    @property
+    def count(self) -> int:
+        return self.histogram.count
+
+    @property
+    def sum(self) -> float:
+        return self.histogram.sum
+
+
+_stages: Dict[str, Stage] = {name: Stage(name, _stage_seconds.labels(stage=name)) for name in STAGES}
+
+input_duration = _metrics.histogram(
+    "conversion_input_duration_seconds",
+    "Duration of the audio sent to each conversion",
+    buckets=(0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0, 600.0),
+)
+real_time_factor = _metrics.histogram(
+    "conversion_real_time_factor",
+    "Conversion time divided by the audio duration, below 1 is faster than real time",
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0),
+)
+in_flight = _metrics.gauge("conversions_in_flight", "Conversions admitted and running")
+
+
+def stage(name: str) -> Stage:
+    return _stages[name]
+
+
+def server_timing_header(timings: Dict[str, float], total_s: Optional[float] = None) -> str:
+    """``Server-Timing`` value, durations in milliseconds in the order the stages first ran"""
+    entries = [f"{name};dur={1000 * seconds:.1f}" for name, seconds in timings.items()]
+    if total_s is not None:
+        entries.append(f"total;dur={1000 * total_s:.1f}")
+    return ", ".join(entries)
+
+
+def _cuda_memory_allocated() -> float:
+    # only when the model code already imported torch, scraping never imports it
+    torch = sys.modules.get("torch")
+    if torch is None or not torch.cuda.is_available():
+        return 0.0
+    return float(torch.cuda.memory_allocated())
+
+
+_process = psutil.Process()
+
+
+def _reset_process_in_child() -> None:
+    # psutil.Process keeps its pid, a worker forked from a preloaded master must report itself
+    global _process
+    _process = psutil.Process()
+
+
+os.register_at_fork(after_in_child=_reset_process_in_child)
+
+_metrics.gauge("process_resident_memory_bytes", "Resident memory of this process") \
+    .set_function(lambda: _process.memory_info().rss)
+_metrics.gauge("process_virtual_memory_bytes", "Virtual memory of this process") \
+    .set_function(lambda: _process.memory_info().vms)
+_metrics.gauge("process_threads", "Threads of this process").set_function(lambda: _process.num_threads())
+_metrics.gauge("cuda_memory_allocated_bytes", "GPU memory held by tensors of this process") \
+    .set_function(_cuda_memory_allocated)
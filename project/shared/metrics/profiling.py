@@ -0,0 +1,289 @@
+"""
+Captura de perfis sob demanda.
+
+``POST /admin/profiling`` arma o ``Profiler``: as próximas N conversões (ou, com
+``min_duration_ms``, até N conversões que passarem do limite enquanto a captura
+está armada) são perfiladas e salvas em ``PROFILE_DIR/<id>/``:
+
+- ``torch-<n>.json``: trace do ``torch.profiler`` de cada trecho da requisição nos
+  workers de conversão (abre no Perfetto ou em ``chrome://tracing``), e
+  ``torch_ops.txt`` com os operadores que mais gastaram.
+- ``python.folded``: pilhas Python amostradas a cada ``PROFILE_SAMPLE_INTERVAL_MS``
+  nas threads da requisição (o worker enquanto ela roda nele e o event loop, que é
+  compartilhado com as outras requisições), no formato do flamegraph.pl/speedscope.
+- ``summary.json``: rota, status, duração e tempo por estágio.
+
+O ``torch.profiler`` só enxerga a thread onde foi ligado e só um roda por vez, por
+isso ele é ligado dentro do worker; um trecho que o encontra ocupado por outra
+requisição fica só com as amostras Python. No modo ``min_duration_ms`` toda
+conversão é perfilada enquanto a captura está armada e só as lentas são
+exportadas, depois da resposta. As capturas mais antigas que
+``PROFILE_MAX_CAPTURES`` são apagadas.
+"""
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from project.core.application import Application
+from project.shared.metrics.registry import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+CAPTURE_ID = re.compile(r"^\d{8}-\d{6}-[0-9a-f]{6}$")
+
+
+class ProfileSession:
+    """Profile of one request, kept in memory until the Profiler saves or drops it"""
+
+    def __init__(self, directory: str, path: str, torch_lock: threading.Lock):
+        self.id = os.path.basename(directory)
+        self.directory = directory
+        self.path = path
+        self.started_at = time.time()
+        # threshold of the capture the session belongs to, None keeps it whatever its duration
+        self.min_duration_s: Optional[float] = None
+        # the thread that starts the session is the event loop's
+        self.threads: Dict[int, str] = {threading.get_ident(): "event_loop"}
+        self.samples: Counter = Counter()
+        self.torch_profiles: List[Any] = []
+        self.torch_skipped = 0
+        # one torch.profiler at a time in the process
+        self._torch_lock = torch_lock
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def worker(self) -> Iterator[None]:
+        """Around a call on a conversion worker: samples its thread and, when free, runs torch.profiler on it"""
+        ident = threading.get_ident()
+        with self._lock:
+            self.threads[ident] = "worker"
+        try:
+            if not self._torch_lock.acquire(blocking=False):
+                self.torch_skipped += 1
+                yield
+                return
+            try:
+                # the worker already runs the model, so torch is imported
+                from torch.profiler import ProfilerActivity, profile  # type: ignore
+                import torch
+
+                activities = [ProfilerActivity.CPU]
+                if torch.cuda.is_available():
+                    activities.append(ProfilerActivity.CUDA)
+                profiler = profile(activities=activities, record_shapes=True)
+                # kept also when the call raises, a cancelled conversion is worth a look too
+                self.torch_profiles.append(profiler)
+                with profiler:
+                    yield
+            finally:
+                self._torch_lock.release()
+        finally:
+            with self._lock:
+                self.threads.pop(ident, None)
+
+    def sample(self, frames: Dict[int, Any]) -> None:
+        with self._lock:
+            threads = list(self.threads.items())
+        for ident, role in threads:
+            frame = frames.get(ident)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join([role] + stack[::-1])] += 1
+
+    def save(self, summary: Dict[str, Any]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        for index, profiler in enumerate(self.torch_profiles):
+            profiler.export_chrome_trace(os.path.join(self.directory, f"torch-{index}.json"))
+            with open(os.path.join(self.directory, "torch_ops.txt"), "a", encoding="utf-8") as f:
+                f.write(f"torch-{index}.json\n")
+                f.write(profiler.key_averages().table(sort_by="self_cpu_time_total", row_limit=30))
+                f.write("\n")
+        with open(os.path.join(self.directory, "python.folded"), "w", encoding="utf-8") as f:
+            f.writelines(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+        summary = {
+            "id": self.id,
+            "started_at": self.started_at,
+            **summary,
+            "python_samples": sum(self.samples.values()),
+            "torch_traces": len(self.torch_profiles),
+            "torch_skipped": self.torch_skipped,
+        }
+        with open(os.path.join(self.directory, "summary.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+
+_session: ContextVar[Optional[ProfileSession]] = ContextVar("profile_session", default=None)
+
+
+def get_profile_session() -> Optional[ProfileSession]:
+    return _session.get()
+
+
+def set_profile_session(session: Optional[ProfileSession]) -> Token:
+    return _session.set(session)
+
+
+def reset_profile_session(token: Token) -> None:
+    _session.reset(token)
+
+
+class Profiler:
+    """Arms captures from the admin endpoint and owns the saved traces"""
+
+    _instance = None
+
+    def __init__(
+        self,
+        directory: str,
+        max_captures: int = 20,
+        sample_interval_s: float = 0.005,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.directory = directory
+        self.max_captures = max_captures
+        self.sample_interval_s = sample_interval_s
+        self.clock = clock
+        self.remaining = 0
+        self.min_duration_s: Optional[float] = None
+        self.expires_at = 0.0
+        self._torch_lock = threading.Lock()
+        self._active: set = set()
+        self._sampler: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._captures = MetricsRegistry().counter(
+            "profiling_captures_total", "Requests profiled on demand, saved or dropped under the threshold", ["result"]
+        )
+
+    @classmethod
+    def get_instance(cls) -> "Profiler":
+        if cls._instance is None:
+            envs = Application().envs
+            cls._instance = Profiler(
+                envs.PROFILE_DIR,
+                max_captures=envs.PROFILE_MAX_CAPTURES,
+                sample_interval_s=envs.PROFILE_SAMPLE_INTERVAL_MS / 1000,
+            )
+        return cls._instance
+
+    def arm(self, requests: int, min_duration_ms: Optional[float] = None, timeout_s: float = 300) -> dict:
+        """Profile the next requests, or keep only those slower than min_duration_ms"""
+        with self._lock:
+            self.remaining = requests
+            self.min_duration_s = None if min_duration_ms is None else min_duration_ms / 1000
+            self.expires_at = self.clock() + timeout_s
+        logger.info("Profiling armed for %d requests (min duration %s ms)", requests, min_duration_ms)
+        return self.get_status()
+
+    def disarm(self) -> dict:
+        with self._lock:
+            self.remaining = 0
+        return self.get_status()
+
+    def _armed(self) -> bool:
+        return self.remaining > 0 and self.clock() < self.expires_at
+
+    def start(self, path: str) -> Optional[ProfileSession]:
+        """Session for a request starting now, None when no capture is armed"""
+        with self._lock:
+            if not self._armed():
+                return None
+            if self.min_duration_s is None:
+                self.remaining -= 1
+            capture_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+            session = ProfileSession(os.path.join(self.directory, capture_id), path, self._torch_lock)
+            session.min_duration_s = self.min_duration_s
+            self._active.add(session)
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample, name="profile-sampler", daemon=True)
+                self._sampler.start()
+        return session
+
+    def finish(self, session: ProfileSession, summary: Dict[str, Any]) -> bool:
+        """Save the capture, or drop it when it is under the slow-request threshold"""
+        with self._lock:
+            self._active.discard(session)
+            keep = True
+            if session.min_duration_s is not None:
+                keep = self.remaining > 0 and summary["duration_ms"] >= 1000 * session.min_duration_s
+                if keep:
+                    self.remaining -= 1
+        if not keep:
+            self._captures.labels(result="dropped").inc()
+            return False
+        try:
+            session.save(summary)
+        except Exception as e:
+            logger.warning("Could not save profile %s: %s", session.id, e)
+            shutil.rmtree(session.directory, ignore_errors=True)
+            return False
+        self._captures.labels(result="saved").inc()
+        self._prune()
+        logger.info("Profile %s saved for %s (%.1f ms)", session.id, session.path, summary["duration_ms"])
+        return True
+
+    def _sample(self) -> None:
+        while True:
+            with self._lock:
+                sessions = list(self._active)
+                if not sessions:
+                    self._sampler = None
+                    return
+            frames = sys._current_frames()
+            for session in sessions:
+                session.sample(frames)
+            del frames
+            time.sleep(self.sample_interval_s)
+
+    def _capture_ids(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        names = [name for name in os.listdir(self.directory) if CAPTURE_ID.match(name)]
+        # oldest first, the ids only have second resolution
+        return sorted(names, key=lambda name: (os.path.getmtime(os.path.join(self.directory, name)), name))
+
+    def _prune(self) -> None:
+        for capture_id in self._capture_ids()[:-self.max_captures]:
+            shutil.rmtree(os.path.join(self.directory, capture_id), ignore_errors=True)
+
+    def captures(self) -> List[dict]:
+        """Summaries of the saved captures, newest first"""
+        summaries = []
+        for capture_id in reversed(self._capture_ids()):
+            try:
+                with open(os.path.join(self.directory, capture_id, "summary.json"), encoding="utf-8") as f:
+                    summaries.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return summaries
+
+    def capture_files(self, capture_id: str) -> Optional[List[str]]:
+        """Paths of the files of a saved capture, None when it does not exist"""
+        directory = os.path.join(self.directory, capture_id)
+        if not CAPTURE_ID.match(capture_id) or not os.path.isdir(directory):
+            return None
+        return [os.path.join(directory, name) for name in sorted(os.listdir(directory))]
+
+    def get_status(self) -> dict:
+        with self._lock:
+            armed = self._armed()
+            return {
+                "armed": armed,
+                "remaining": self.remaining if armed else 0,
+                "min_duration_ms": None if self.min_duration_s is None else 1000 * self.min_duration_s,
+                "expires_in_s": max(0.0, self.expires_at - self.clock()) if armed else 0.0,
+                "active": len(self._active),
+            }
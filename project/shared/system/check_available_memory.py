@@ -4,15 +4,25 @@ import logging
 logger = logging.getLogger("uvicorn")
 
 
-def check_available_memory():
+def get_available_memory() -> int:
+    """
+    Return the available memory in the system, in bytes.
+    """
+    return psutil.virtual_memory().available
+
+
+def check_available_memory(min_available_gb: float = 1.3):
     """
     Check the available memory in the system.
 
+    Args:
+        min_available_gb (float): Minimum amount of free memory, in GB.
+
     Returns:
-        bool: True if the available memory is greater than or equal to 1.3 GB, False otherwise.
+        bool: True if the available memory is greater than or equal to min_available_gb, False otherwise.
     """
-    available_memory = psutil.virtual_memory().available
+    available_memory = get_available_memory()
     available_memory_gb = available_memory / (1024 ** 3)
     logger.info("Available memory: %s GB", available_memory_gb)
 
-    return available_memory_gb >= 1.3
+    return available_memory_gb >= min_available_gb
@@ -10,4 +10,17 @@ def get_device_name() -> str:
     return torch.cuda.get_device_name(get_device())
 
 def get_device_properties():
-    return torch.cuda.get_device_properties(0)
\ No newline at end of file
+    return torch.cuda.get_device_properties(0)
+
+def module_memory_bytes(module: torch.nn.Module) -> int:
+    """Bytes held by the parameters and buffers of a module."""
+    total = 0
+    for tensor in list(module.parameters()) + list(module.buffers()):
+        total += tensor.numel() * tensor.element_size()
+    return total
+
+
+def release_cached_memory() -> None:
+    """Return cached allocator blocks to the device after a model is dropped."""
+    if gpu_is_available():
+        torch.cuda.empty_cache()
@@ -0,0 +1,199 @@
+"""
+Pool de instâncias Kokoro.
+
+Cada endpoint tem health check ativo, um circuit breaker alimentado pelo tráfego
+real e o número de requisições em andamento; a escolha é pelo endpoint disponível
+com menos requisições pendentes. O pool também guarda os tempos até o primeiro
+byte recentes, usados para calcular o atraso (p95) das requisições hedged.
+"""
+import asyncio
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Iterable, List, Optional
+
+import aiohttp
+import numpy as np
+
+from project.core.application import Application
+from project.shared.metrics.registry import MetricsRegistry
+
+
+class KokoroUnavailable(Exception):
+    """No Kokoro endpoint is healthy with its circuit closed"""
+
+    def __init__(self, message: str = "No Kokoro endpoint available", retry_after: int = 5):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures, lets one trial request through after reset_timeout_s"""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout_s: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allows(self) -> bool:
+        if self.state == self.OPEN and self.clock() - self.opened_at >= self.reset_timeout_s:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            return not self._trial_in_flight
+        return self.state == self.CLOSED
+
+    def on_request(self) -> None:
+        if self.state == self.HALF_OPEN:
+            self._trial_in_flight = True
+
+    def on_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def on_abandon(self) -> None:
+        """The trial request was cancelled before it said anything about the endpoint"""
+        self._trial_in_flight = False
+
+    def on_failure(self) -> None:
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = self.clock()
+
+
+@dataclass
+class KokoroEndpoint:
+    url: str
+    breaker: CircuitBreaker
+    healthy: bool = True
+    outstanding: int = 0
+    ttfb_samples: Deque[float] = field(default_factory=lambda: deque(maxlen=200))
+
+    @property
+    def health_url(self) -> str:
+        # Kokoro serves /health at the root, next to the /v1 API
+        base = self.url.rstrip("/")
+        return (base[: -len("/v1")] if base.endswith("/v1") else base) + "/health"
+
+    def available(self) -> bool:
+        return self.healthy and self.breaker.allows()
+
+
+class EndpointPool:
+    """Least-outstanding-requests balancing over healthy Kokoro endpoints"""
+
+    def __init__(
+        self,
+        urls: Iterable[str],
+        failure_threshold: int = 3,
+        reset_timeout_s: float = 30.0,
+        health_interval_s: float = 10.0,
+        hedge_quantile: float = 0.95,
+        hedge_min_delay_s: float = 0.05,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.app = Application()
+        self.endpoints: List[KokoroEndpoint] = [
+            KokoroEndpoint(url.rstrip("/"), CircuitBreaker(failure_threshold, reset_timeout_s, clock))
+            for url in urls
+        ]
+        if not self.endpoints:
+            raise ValueError("At least one Kokoro endpoint is required")
+        self.health_interval_s = health_interval_s
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay_s = hedge_min_delay_s
+        self._health_task: Optional[asyncio.Task] = None
+
+        metrics = MetricsRegistry()
+        outstanding = metrics.gauge("kokoro_endpoint_outstanding", "Requests in flight per Kokoro endpoint", ["endpoint"])
+        up = metrics.gauge("kokoro_endpoint_up", "1 when the endpoint is healthy and its circuit closed", ["endpoint"])
+        for endpoint in self.endpoints:
+            outstanding.labels(endpoint=endpoint.url).set_function(lambda e=endpoint: e.outstanding)
+            up.labels(endpoint=endpoint.url).set_function(lambda e=endpoint: float(e.healthy and e.breaker.state == "closed"))
+        self._failures = metrics.counter("kokoro_endpoint_failures_total", "Failed Kokoro requests", ["endpoint"])
+
+    def choose(self, exclude: Iterable[KokoroEndpoint] = ()) -> KokoroEndpoint:
+        excluded = {id(endpoint) for endpoint in exclude}
+        candidates = [e for e in self.endpoints if id(e) not in excluded and e.available()]
+        if not candidates:
+            raise KokoroUnavailable()
+        fewest = min(e.outstanding for e in candidates)
+        # random among the least loaded so idle endpoints share the traffic
+        return random.choice([e for e in candidates if e.outstanding == fewest])
+
+    def acquire(self, endpoint: KokoroEndpoint) -> None:
+        endpoint.outstanding += 1
+        endpoint.breaker.on_request()
+
+    def release(self, endpoint: KokoroEndpoint, success: Optional[bool], ttfb_s: Optional[float] = None) -> None:
+        """success None means the request was abandoned (hedge loser) and says nothing about the endpoint"""
+        endpoint.outstanding -= 1
+        if success:
+            endpoint.breaker.on_success()
+            if ttfb_s is not None:
+                endpoint.ttfb_samples.append(ttfb_s)
+        elif success is False:
+            endpoint.breaker.on_failure()
+            self._failures.labels(endpoint=endpoint.url).inc()
+            if endpoint.breaker.state == CircuitBreaker.OPEN:
+                self.app.logger.warning("[Kokoro] Circuit opened for %s", endpoint.url)
+        else:
+            endpoint.breaker.on_abandon()
+
+    def hedge_delay(self) -> float:
+        """p95 of the recent time to first byte across the pool"""
+        samples = [s for endpoint in self.endpoints for s in endpoint.ttfb_samples]
+        if len(samples) < 20:
+            return max(self.hedge_min_delay_s, 1.0)
+        return max(float(np.quantile(samples, self.hedge_quantile)), self.hedge_min_delay_s)
+
+    def start_health_checks(self, session: aiohttp.ClientSession) -> None:
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.create_task(self._health_loop(session))
+
+    async def stop_health_checks(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+
+    async def _health_loop(self, session: aiohttp.ClientSession) -> None:
+        while True:
+            await self.check_health(session)
+            await asyncio.sleep(self.health_interval_s)
+
+    async def check_health(self, session: aiohttp.ClientSession) -> None:
+        await asyncio.gather(*(self._check(session, endpoint) for endpoint in self.endpoints))
+
+    async def _check(self, session: aiohttp.ClientSession, endpoint: KokoroEndpoint) -> None:
+        try:
+            async with session.get(endpoint.health_url, timeout=aiohttp.ClientTimeout(total=5)) as response:
+                healthy = response.status < 500
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            healthy = False
+        if healthy != endpoint.healthy:
+            self.app.logger.warning("[Kokoro] %s is now %s", endpoint.url, "healthy" if healthy else "unhealthy")
+        endpoint.healthy = healthy
+
+    def get_status(self) -> list[dict]:
+        return [
+            {
+                "url": endpoint.url,
+                "healthy": endpoint.healthy,
+                "circuit": endpoint.breaker.state,
+                "outstanding": endpoint.outstanding,
+            }
+            for endpoint in self.endpoints
+        ]
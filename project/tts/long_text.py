@@ -0,0 +1,96 @@
+"""
+Modo texto longo: o texto é dividido em frases, cada frase é sintetizada e
+convertida em paralelo e o áudio é remontado na ordem original com pausas curtas.
+
+A concorrência com o Kokoro fica limitada pelo pool de conexões do
+``TtsProvider`` e a da conversão pelos workers do ``CoreConversionService``.
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+import numpy as np
+
+from project.conversor.audio.crossfade import join_with_pauses
+from project.shared.metrics.registry import MetricsRegistry
+from project.tts.text_splitter import split_text
+
+
+class LongTextPipeline:
+    """Fans sentences out to synthesis and conversion and joins them back in order"""
+
+    def __init__(
+        self,
+        synthesize: Callable[[str], Awaitable[np.ndarray]],
+        convert: Callable[[np.ndarray], Awaitable[np.ndarray]],
+        sample_rate: int = 24000,
+        pause_s: float = 0.12,
+        fade_s: float = 0.005,
+        max_chars: int = 250,
+        min_chars: int = 60,
+        synthesis_concurrency: int = 4,
+        conversion_concurrency: int = 2,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+    ):
+        self.synthesize = synthesize
+        self.convert = convert
+        self.sample_rate = sample_rate
+        self.pause = int(pause_s * sample_rate)
+        self.fade = int(fade_s * sample_rate)
+        self.max_chars = max_chars
+        self.min_chars = min_chars
+        # one request must not take every Kokoro connection or flood the admission queue
+        self.synthesis_concurrency = synthesis_concurrency
+        self.conversion_concurrency = conversion_concurrency
+        self.on_progress = on_progress
+        self._stage_seconds = MetricsRegistry().histogram(
+            "tts_segment_stage_seconds", "Per-segment time of the long-text pipeline", ["stage"]
+        )
+
+    async def _segment(
+        self, index: int, text: str, synthesis: asyncio.Semaphore, conversion: asyncio.Semaphore
+    ) -> Tuple[np.ndarray, dict]:
+        start = time.perf_counter()
+        async with synthesis:
+            audio = await self.synthesize(text)
+        synthesized = time.perf_counter()
+        async with conversion:
+            converted = await self.convert(audio)
+        finished = time.perf_counter()
+        self._stage_seconds.labels(stage="synthesis").observe(synthesized - start)
+        self._stage_seconds.labels(stage="conversion").observe(finished - synthesized)
+        return converted, {
+            "index": index,
+            "chars": len(text),
+            "audio_s": round(len(audio) / self.sample_rate, 3),
+            "synthesis_s": round(synthesized - start, 3),
+            "conversion_s": round(finished - synthesized, 3),
+        }
+
+    async def run(self, text: str, lang_code: str = "a") -> Tuple[np.ndarray, List[dict]]:
+        """Return the joined converted audio and the timings of every segment"""
+        segments = split_text(text, lang_code, self.max_chars, self.min_chars)
+        synthesis = asyncio.Semaphore(self.synthesis_concurrency)
+        conversion = asyncio.Semaphore(self.conversion_concurrency)
+        tasks = [
+            asyncio.create_task(self._segment(i, segment, synthesis, conversion))
+            for i, segment in enumerate(segments)
+        ]
+        if self.on_progress is not None:
+            done = 0
+
+            def report(_):
+                nonlocal done
+                done += 1
+                self.on_progress(done, len(tasks))
+
+            for task in tasks:
+                task.add_done_callback(report)
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        audio = join_with_pauses([converted for converted, _ in results], self.pause, self.fade)
+        return audio, [timings for _, timings in results]
@@ -0,0 +1,207 @@
+"""
+Cache de sínteses do Kokoro.
+
+A chave é o hash do payload enviado ao Kokoro com o texto normalizado (Unicode NFC,
+espaços colapsados), então voz, velocidade, idioma e demais opções fazem parte dela.
+O valor é o PCM 16-bit cru. Há um LRU em memória limitado em bytes e, opcionalmente,
+uma camada em disco (um arquivo ``.pcm`` por chave, LRU pelo mtime). Requisições
+iguais simultâneas esperam a mesma chamada ao Kokoro.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional
+
+from project.core.application import Application
+from project.shared.metrics.registry import MetricsRegistry
+
+# these only change how the audio is delivered, not the samples
+TRANSPORT_FIELDS = ("stream", "response_format", "download_format", "return_download_link")
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+def cache_key(payload: dict) -> str:
+    """Stable hash of everything in a Kokoro payload that affects the samples"""
+    fields = {k: v for k, v in payload.items() if k not in TRANSPORT_FIELDS}
+    fields["input"] = normalize_text(fields.get("input", ""))
+    return hashlib.sha256(json.dumps(fields, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+class SynthesisCache:
+    """Memory LRU with an optional disk tier and coalescing of identical misses"""
+
+    def __init__(
+        self,
+        max_memory_bytes: int,
+        disk_dir: Optional[str] = None,
+        max_disk_bytes: int = 0,
+    ):
+        self.app = Application()
+        self.max_memory_bytes = max_memory_bytes
+        self.disk_dir = disk_dir or None
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self.memory_bytes = 0
+        self.disk_bytes = 0
+        self._disk_lock = threading.Lock()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self.disk_bytes = sum(size for _, size, _ in self._disk_entries())
+
+        metrics = MetricsRegistry()
+        self._requests = metrics.counter("tts_cache_requests_total", "TTS cache lookups by result", ["result"])
+        self._bytes_saved = metrics.counter("tts_cache_bytes_saved_total", "PCM bytes served without calling Kokoro")
+        metrics.gauge("tts_cache_memory_bytes", "PCM bytes held in the memory tier").set_function(
+            lambda: self.memory_bytes
+        )
+        metrics.gauge("tts_cache_disk_bytes", "PCM bytes held in the disk tier").set_function(lambda: self.disk_bytes)
+        metrics.gauge("tts_cache_hit_ratio", "Share of TTS lookups served without calling Kokoro").set_function(
+            self.hit_ratio
+        )
+
+    def hit_ratio(self) -> float:
+        counts = {result: self._requests.labels(result=result).value for result in ("memory", "disk", "coalesced", "miss")}
+        total = sum(counts.values())
+        return (total - counts["miss"]) / total if total else 0.0
+
+    async def get_or_synthesize(self, key: str, synthesize: Callable[[], Awaitable[bytes]]) -> bytes:
+        """Return the cached PCM for key, calling synthesize once for concurrent misses"""
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+            return self._hit("memory", data)
+
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            try:
+                return self._hit("coalesced", await asyncio.shield(pending))
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # the request that was synthesizing went away, take over
+                return await self.get_or_synthesize(key, synthesize)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            data = await self._read_disk(key)
+            if data is not None:
+                self._hit("disk", data)
+            else:
+                self._requests.labels(result="miss").inc()
+                data = await synthesize()
+                await self._write_disk(key, data)
+            self._store_memory(key, data)
+            future.set_result(data)
+            return data
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # waiters get the error, mark it retrieved in case there are none
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Memory tier only, for callers that cannot wait on disk"""
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+            self._hit("memory", data)
+        return data
+
+    async def put(self, key: str, data: bytes) -> None:
+        self._store_memory(key, data)
+        await self._write_disk(key, data)
+
+    def _hit(self, result: str, data: bytes) -> bytes:
+        self._requests.labels(result=result).inc()
+        self._bytes_saved.inc(len(data))
+        return data
+
+    def _store_memory(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_memory_bytes or key in self._memory:
+            return
+        self._memory[key] = data
+        self.memory_bytes += len(data)
+        while self.memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self.memory_bytes -= len(evicted)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], key + ".pcm")
+
+    def _disk_entries(self):
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                if name.endswith(".pcm"):
+                    path = os.path.join(root, name)
+                    stat = os.stat(path)
+                    yield path, stat.st_size, stat.st_mtime
+
+    async def _read_disk(self, key: str) -> Optional[bytes]:
+        if not self.disk_dir:
+            return None
+        return await asyncio.to_thread(self._read_disk_sync, key)
+
+    def _read_disk_sync(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # mtime is the LRU order of the disk tier
+            return data
+        except FileNotFoundError:
+            return None
+
+    async def _write_disk(self, key: str, data: bytes) -> None:
+        if not self.disk_dir or len(data) > self.max_disk_bytes:
+            return
+        try:
+            await asyncio.to_thread(self._write_disk_sync, key, data)
+        except OSError as e:
+            self.app.logger.warning("[TtsCache] Could not write %s to disk: %s", key, e)
+
+    def _write_disk_sync(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        with self._disk_lock:
+            existed = os.path.exists(path)
+            os.replace(tmp_path, path)
+            if not existed:
+                self.disk_bytes += len(data)
+            if self.disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        for path, size, _ in sorted(self._disk_entries(), key=lambda entry: entry[2]):
+            if self.disk_bytes <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                self.disk_bytes -= size
+            except FileNotFoundError:
+                pass
+
+    def get_status(self) -> dict:
+        return {
+            "memory_entries": len(self._memory),
+            "memory_bytes": self.memory_bytes,
+            "disk_bytes": self.disk_bytes,
+            "hit_ratio": self.hit_ratio(),
+        }
@@ -0,0 +1,89 @@
+"""
+Divisão de textos longos em frases/orações para síntese em paralelo.
+
+As regras dependem do ``lang_code`` do Kokoro: pontuação de fim de frase (incluindo
+a de CJK), abreviações que não encerram frase em inglês/português/espanhol/etc. e,
+quando uma frase passa de ``max_chars``, corte em orações (``,;:``) e por último em
+espaços. Frases curtas vizinhas são agrupadas até ``min_chars`` para não pagar o
+custo fixo de uma chamada por frase.
+"""
+import re
+from typing import List
+
+# Kokoro lang codes: a/b English, e Spanish, f French, h Hindi, i Italian, p Portuguese, j Japanese, z Chinese
+ABBREVIATIONS = {
+    "a": {"mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc", "e.g", "i.e", "no", "fig", "inc", "ltd"},
+    "b": {"mr", "mrs", "ms", "dr", "prof", "st", "vs", "etc", "e.g", "i.e", "no", "fig", "ltd"},
+    "p": {"sr", "sra", "srta", "dr", "dra", "prof", "profa", "etc", "ex", "nº", "av", "pág", "cia", "ltda"},
+    "e": {"sr", "sra", "srta", "dr", "dra", "prof", "etc", "ej", "pág", "av", "ud", "uds"},
+    "f": {"m", "mme", "mlle", "dr", "pr", "etc", "ex", "av", "p"},
+    "i": {"sig", "sigg", "dott", "prof", "ing", "avv", "ecc", "es", "pag"},
+}
+CJK_LANGS = {"j", "z"}
+
+_LATIN_SENTENCE_END = re.compile(r"([.!?…]+[\"'”’)\]]*)(\s+)")
+_CJK_SENTENCE = re.compile(r"[^。！？!?]*[。！？!?]+[」』”’)]*|[^。！？!?]+$")
+_HINDI_SENTENCE_END = re.compile(r"([।॥.!?]+)(\s+)")
+_CLAUSE_END = re.compile(r"([,;:，；：、]\s*)")
+
+
+def _split_sentences(text: str, lang_code: str) -> List[str]:
+    if lang_code in CJK_LANGS:
+        return _CJK_SENTENCE.findall(text)
+    pattern = _HINDI_SENTENCE_END if lang_code == "h" else _LATIN_SENTENCE_END
+    abbreviations = ABBREVIATIONS.get(lang_code, set())
+
+    sentences: List[str] = []
+    start = 0
+    for match in pattern.finditer(text):
+        candidate = text[start:match.end(1)]
+        last_word = candidate.rsplit(None, 1)[-1].rstrip(".").lower() if candidate.strip() else ""
+        # abbreviations ("Dr. Silva") and initials ("J. Silva") do not end a sentence
+        if match.group(1) == "." and (last_word in abbreviations or (len(last_word) == 1 and last_word.isalpha())):
+            continue
+        sentences.append(candidate)
+        start = match.end()
+    sentences.append(text[start:])
+    return sentences
+
+
+def _split_long(sentence: str, max_chars: int) -> List[str]:
+    """Cut a sentence longer than max_chars at clause marks, then at spaces"""
+    if len(sentence) <= max_chars:
+        return [sentence]
+    pieces: List[str] = []
+    current = ""
+    for part in _CLAUSE_END.split(sentence):
+        if len(current) + len(part) <= max_chars:
+            current += part
+            continue
+        if current:
+            pieces.append(current)
+        current = part
+        while len(current) > max_chars:
+            cut = current.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            pieces.append(current[:cut])
+            current = current[cut:]
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_text(text: str, lang_code: str = "a", max_chars: int = 250, min_chars: int = 60) -> List[str]:
+    """Split text into segments of at most max_chars, merging short sentences up to min_chars"""
+    lang_code = (lang_code or "a").lower()
+    pieces: List[str] = []
+    for sentence in _split_sentences(text.strip(), lang_code):
+        pieces.extend(_split_long(sentence, max_chars))
+
+    segments: List[str] = []
+    joiner = "" if lang_code in CJK_LANGS else " "
+    for piece in (p.strip() for p in pieces):
+        if not piece:
+            continue
+        if segments and len(segments[-1]) < min_chars and len(segments[-1]) + len(piece) < max_chars:
+            segments[-1] = segments[-1] + joiner + piece
+        else:
+            segments.append(piece)
+    return segments
@@ -1,25 +1,154 @@
 import aiohttp
 import asyncio
 import logging
+import time
+from typing import AsyncIterator, List, Optional
 from aiohttp import ClientTimeout
+from project.core.application import Application
+from project.shared.metrics.pipeline import stage
+from project.shared.metrics.registry import MetricsRegistry
+from project.tts.endpoint_pool import EndpointPool, KokoroEndpoint, KokoroUnavailable
+
+DEFAULT_VOICE = "af_kore"
+
+
+class _RequestTimings:
+    """Collects per-request timestamps from the aiohttp trace hooks"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queued = 0.0
+        self.connect = 0.0
+        self.ttfb = 0.0
+        self.body = 0.0
+        self.reused_connection = False
+        self._mark = self.start
+
+    def elapsed(self) -> float:
+        now = time.perf_counter()
+        elapsed, self._mark = now - self._mark, now
+        return elapsed
+
+    def as_dict(self) -> dict:
+        return {
+            "queued_s": self.queued,
+            "connect_s": self.connect,
+            "ttfb_s": self.ttfb,
+            "body_s": self.body,
+            "total_s": time.perf_counter() - self.start,
+            "reused_connection": self.reused_connection,
+        }
+
+
+async def _on_request_start(session, context, params):
+    # requests made without timings (health checks) get a throwaway collector
+    context.timings = (context.trace_request_ctx or {}).get("timings") or _RequestTimings()
+    context.timings.elapsed()
+
+
+async def _on_connection_queued_end(session, context, params):
+    context.timings.queued += context.timings.elapsed()
+
+
+async def _on_connection_create_end(session, context, params):
+    context.timings.connect += context.timings.elapsed()
+
+
+async def _on_connection_reuseconn(session, context, params):
+    context.timings.reused_connection = True
+    context.timings.elapsed()
+
+
+async def _on_request_end(session, context, params):
+    # headers received: time since the connection was ready is the time to first byte
+    context.timings.ttfb += context.timings.elapsed()
+
+
+def _trace_config() -> aiohttp.TraceConfig:
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(_on_request_start)
+    trace_config.on_connection_queued_end.append(_on_connection_queued_end)
+    trace_config.on_connection_create_end.append(_on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(_on_connection_reuseconn)
+    trace_config.on_request_end.append(_on_request_end)
+    return trace_config
 
 
 class TtsProvider:
-    def __init__(self, url="http://localhost:8880/v1"):
-        self.url = url
-        self.logger = logging.getLogger(self.__class__.__name__)
+    """Kokoro client sharing one pooled, keep-alive session across an endpoint pool"""
 
-    async def synthesize(self, text: str, options: dict = None) -> dict:
-        if options is None:
-            options = {}
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        max_connections: Optional[int] = None,
+        keepalive_timeout_s: Optional[float] = None,
+        timeout_s: Optional[float] = None,
+        urls: Optional[List[str]] = None,
+        hedge: Optional[bool] = None,
+    ):
+        envs = Application().envs
+        if urls is None:
+            urls = [url] if url else [u.strip() for u in envs.KOKORO_URLS.split(",") if u.strip()] or [envs.KOKORO_URL]
+        self.url = urls[0]
+        self.max_connections = max_connections or envs.KOKORO_MAX_CONNECTIONS
+        self.keepalive_timeout_s = keepalive_timeout_s or envs.KOKORO_KEEPALIVE_TIMEOUT_S
+        self.timeout_s = timeout_s or envs.KOKORO_TIMEOUT_S
+        self.hedge = envs.KOKORO_HEDGE if hedge is None else hedge
+        self.pool = EndpointPool(
+            urls,
+            failure_threshold=envs.KOKORO_FAILURE_THRESHOLD,
+            reset_timeout_s=envs.KOKORO_CIRCUIT_RESET_S,
+            health_interval_s=envs.KOKORO_HEALTH_INTERVAL_S,
+            hedge_min_delay_s=envs.KOKORO_HEDGE_MIN_DELAY_MS / 1000,
+        )
+        self.logger = logging.getLogger(__name__)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_lock = asyncio.Lock()
 
-        # TODO cadastrar vozes e mapear o cadastro
-        # "af_kore" = voz masculina
-        # "af_alloy" = voz feminina
-        payload = {
+        metrics = MetricsRegistry()
+        self._phase_seconds = metrics.histogram(
+            "kokoro_request_phase_seconds", "Kokoro request time per phase", ["phase"]
+        )
+        self._connections = metrics.counter(
+            "kokoro_connections_total", "Kokoro requests by connection origin", ["origin"]
+        )
+        self._hedge_outcomes = metrics.counter(
+            "kokoro_hedged_requests_total", "Second Kokoro requests fired and which one answered", ["outcome"]
+        )
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Create the shared session on first use, inside the running event loop"""
+        if self._session is None or self._session.closed:
+            async with self._session_lock:
+                if self._session is None or self._session.closed:
+                    # requests above the limit wait in the connector for a free connection
+                    connector = aiohttp.TCPConnector(
+                        limit=self.max_connections,
+                        limit_per_host=self.max_connections,
+                        keepalive_timeout=self.keepalive_timeout_s,
+                    )
+                    self._session = aiohttp.ClientSession(
+                        connector=connector,
+                        timeout=ClientTimeout(total=self.timeout_s),
+                        trace_configs=[_trace_config()],
+                    )
+                    # with a single endpoint there is nothing to route around, the breaker is enough
+                    if len(self.pool.endpoints) > 1:
+                        self.pool.start_health_checks(self._session)
+        return self._session
+
+    async def close(self) -> None:
+        await self.pool.stop_health_checks()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def build_payload(self, text: str, options: dict) -> dict:
+        # the voice comes from the voice mapping (project/tts/voice_mapping.py)
+        return {
             "model": "tts-1-hd",
             "input": text,
-            "voice": "af_kore",
+            "voice": options.get("voice") or DEFAULT_VOICE,
             "response_format": options.get("response_format", "mp3"),
             "download_format": options.get("download_format", "mp3"),
             "speed": options.get("speed", 1),
@@ -32,37 +161,171 @@ class TtsProvider:
             ),
         }
 
-        endpoint = f"{self.url}/audio/speech"
-        timeout = ClientTimeout(total=60)
+    async def synthesize(self, text: str, options: dict = None) -> dict:
+        payload = self.build_payload(text, options or {})
 
         try:
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                # Ensure payload is a dictionary
-                if hasattr(payload, "dict"):
-                    payload = payload.dict()
-
-                async with session.post(endpoint, json=payload) as response:
-                    content_type = response.headers.get("Content-Type", "")
-                    self.logger.info(
-                        f"Received response with content-type: {content_type}"
-                    )
+            session = await self.get_session()
+            if self.hedge and len(self.pool.endpoints) > 1:
+                return await self._hedged(session, payload)
+            endpoint = self.pool.choose()
+            try:
+                return await self._attempt(session, endpoint, payload)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                # fail over once to another endpoint
+                fallback = self._fallback([endpoint])
+                if fallback is None:
+                    raise
+                return await self._attempt(session, fallback, payload)
 
-                    if content_type.startswith("application/json"):
-                        json_response = await response.json()
-                        self.logger.info(f"Response JSON: {json_response}")
-                        return {"success": True, **json_response}
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.logger.error("Error synthesizing speech: %s", e)
+            raise Exception(f"Error synthesizing speech: {str(e)}")
+
+    async def _attempt(
+        self,
+        session: aiohttp.ClientSession,
+        endpoint: KokoroEndpoint,
+        payload: dict,
+        first_byte: Optional[asyncio.Event] = None,
+    ) -> dict:
+        """One request to one endpoint, reporting the outcome to the pool"""
+        timings = _RequestTimings()
+        success: Optional[bool] = None
+        ttfb_s: Optional[float] = None
+        self.pool.acquire(endpoint)
+        try:
+            async with session.post(
+                f"{endpoint.url}/audio/speech", json=payload, trace_request_ctx={"timings": timings}
+            ) as response:
+                ttfb_s = time.perf_counter() - timings.start
+                if first_byte is not None:
+                    first_byte.set()
+                if response.status >= 500:
+                    response.raise_for_status()
+                content_type = response.headers.get("Content-Type", "")
+                self.logger.debug("Received response with content-type: %s from %s", content_type, endpoint.url)
 
+                if content_type.startswith("application/json"):
+                    json_response = await response.json()
+                    timings.body = timings.elapsed()
+                    self._record(timings)
+                    self.logger.debug("Response JSON: %s", json_response)
+                    result = {"success": True, **json_response, "timings": timings.as_dict()}
+                else:
                     audio_data = await response.read()
-                    self.logger.info("Returning audio buffer")
-                    return {
+                    timings.body = timings.elapsed()
+                    self._record(timings)
+                    self.logger.debug("Returning audio buffer")
+                    result = {
                         "success": True,
                         "audio": audio_data,
                         "content_type": content_type,
+                        "timings": timings.as_dict(),
                     }
+            success = True
+            return result
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            success = False
+            raise
+        finally:
+            self.pool.release(endpoint, success, ttfb_s)
 
-        except aiohttp.ClientError as e:
-            self.logger.error(f"Error synthesizing speech: {str(e)}")
-            raise Exception(f"Error synthesizing speech: {str(e)}")
+    def _fallback(self, exclude: List[KokoroEndpoint]) -> Optional[KokoroEndpoint]:
+        try:
+            return self.pool.choose(exclude=exclude)
+        except KokoroUnavailable:
+            return None
+
+    async def _hedged(self, session: aiohttp.ClientSession, payload: dict) -> dict:
+        """Fire a second request if the first has no response headers after the hedge delay"""
+        primary = self.pool.choose()
+        first_byte = asyncio.Event()
+        tasks = {asyncio.create_task(self._attempt(session, primary, payload, first_byte)): primary}
+        waiter = asyncio.create_task(first_byte.wait())
+        try:
+            await asyncio.wait([waiter, *tasks], timeout=self.pool.hedge_delay(), return_when=asyncio.FIRST_COMPLETED)
+            primary_task = next(iter(tasks))
+            primary_failed = primary_task.done() and primary_task.exception() is not None
+            if primary_failed or not first_byte.is_set():
+                secondary = self._fallback([primary])
+                if secondary is not None:
+                    self._hedge_outcomes.labels(outcome="failover" if primary_failed else "fired").inc()
+                    tasks[asyncio.create_task(self._attempt(session, secondary, payload))] = secondary
+
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    if len(tasks) > 1 and tasks[task] is not primary:
+                        self._hedge_outcomes.labels(outcome="secondary_won").inc()
+                    return task.result()
+            raise error
+        finally:
+            waiter.cancel()
+            for task in tasks:
+                task.cancel()
+
+    async def stream(self, text: str, options: dict = None) -> AsyncIterator[bytes]:
+        """Yield raw 16-bit PCM chunks as Kokoro generates them"""
+        options = {**(options or {}), "stream": True, "response_format": "pcm"}
+        payload = self.build_payload(text, options)
+        endpoint = self.pool.choose()
+        tried: List[KokoroEndpoint] = []
+
+        while True:
+            tried.append(endpoint)
+            timings = _RequestTimings()
+            success: Optional[bool] = None
+            ttfb_s: Optional[float] = None
+            started = False
+            error: Optional[BaseException] = None
+            self.pool.acquire(endpoint)
+            try:
+                session = await self.get_session()
+                async with session.post(
+                    f"{endpoint.url}/audio/speech", json=payload, trace_request_ctx={"timings": timings}
+                ) as response:
+                    ttfb_s = time.perf_counter() - timings.start
+                    if response.status >= 500:
+                        response.raise_for_status()
+                    if response.status >= 400:
+                        # the endpoint answered, the request is what it refused: no failover, no breaker failure
+                        success = True
+                        detail = await response.text()
+                        raise Exception(f"Error streaming speech: {response.status} {detail}")
+                    async for chunk in response.content.iter_any():
+                        started = True
+                        yield chunk
+                    timings.body = timings.elapsed()
+                    self._record(timings)
+                success = True
+                return
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                success = False
+                error = e
+            finally:
+                # released before failing over, so the failure is charged to the endpoint that failed
+                self.pool.release(endpoint, success, ttfb_s)
+
+            # fail over until the first byte, after that the stream belongs to one endpoint
+            fallback = None if started else self._fallback(tried)
+            if fallback is None:
+                self.logger.error("Error streaming speech: %s", error)
+                raise Exception(f"Error streaming speech: {str(error)}")
+            self.logger.warning("Kokoro stream failed on %s, failing over: %s", endpoint.url, error)
+            endpoint = fallback
+
+    def _record(self, timings: _RequestTimings) -> None:
+        for phase in ("queued", "connect", "ttfb", "body"):
+            self._phase_seconds.labels(phase=phase).observe(getattr(timings, phase))
+        self._connections.labels(origin="reused" if timings.reused_connection else "new").inc()
+        stage("kokoro").observe(time.perf_counter() - timings.start)
+        self.logger.debug("Kokoro request timings: %s", timings.as_dict())
 
 
 # Example usage
@@ -70,5 +333,6 @@ class TtsProvider:
 #     provider = TtsProvider()
 #     result = await provider.synthesize("Hello world", "voice")
 #     print(result)
+#     await provider.close()
 
 # asyncio.run(main())
@@ -1,26 +1,93 @@
 import requests
+from typing import AsyncIterator
+import numpy as np
+from project.conversor.audio.pcm import decode_tts_audio, float_to_pcm16, pcm16_to_float
 from project.core.application import Application
 from project.dto.tts_dto import KokoroTtsDto, RvcTtsDTO
+from project.tts.synthesis_cache import SynthesisCache, cache_key
 from project.tts.tts_provider import TtsProvider
 
+MB = 1024 * 1024
+# 0.25 s of 16-bit mono audio at 24 kHz
+STREAM_CHUNK_BYTES = 12000
+
+
 class SynthesizerService:
     def __init__(self):
         self.app = Application()
         self.tts_provider = TtsProvider()
+        self.cache = SynthesisCache(
+            max_memory_bytes=self.app.envs.TTS_CACHE_MEMORY_MB * MB,
+            disk_dir=self.app.envs.TTS_CACHE_DIR,
+            max_disk_bytes=self.app.envs.TTS_CACHE_DISK_MB * MB,
+        )
+
+    def _pcm_options(self, dto: RvcTtsDTO) -> dict:
+        options = {"response_format": "pcm"}
+        if dto.voice:
+            options["voice"] = dto.voice
+        if dto.lang_code:
+            options["lang_code"] = dto.lang_code
+        return options
+
+    def _cache_key(self, dto: RvcTtsDTO, options: dict) -> str:
+        return cache_key(self.tts_provider.build_payload(dto.text, options))
+
+    async def synthesize_pcm(self, dto: RvcTtsDTO) -> bytes:
+        """Raw 16-bit PCM at 24 kHz, from the cache when the same synthesis was done before"""
+        options = self._pcm_options(dto)
+        return await self.cache.get_or_synthesize(
+            self._cache_key(dto, options), lambda: self._request_pcm(dto.text, options)
+        )
+
+    async def _request_pcm(self, text: str, options: dict) -> bytes:
+        self.app.logger.debug("Calling KokoroTTS Provider for PCM...")
+        result = await self.tts_provider.synthesize(text=text, options=options)
+        if not result.get("success") or not result.get("audio"):
+            self.app.logger.error("KokoroTTS Provider returned an error.")
+            raise Exception("Failed to synthesize audio.")
+        content_type = result.get("content_type", "")
+        if content_type.startswith("audio/pcm"):
+            return result["audio"]
+        return float_to_pcm16(decode_tts_audio(result["audio"], content_type))
+
+    async def synthesize_samples(self, dto: RvcTtsDTO) -> np.ndarray:
+        """Float32 samples at 24 kHz, Kokoro sends raw PCM so nothing is decoded or resampled"""
+        return pcm16_to_float(await self.synthesize_pcm(dto))
+
+    async def stream_audio(self, dto: RvcTtsDTO) -> AsyncIterator[bytes]:
+        """Raw 16-bit PCM chunks at 24 kHz, yielded while Kokoro synthesizes"""
+        options = self._pcm_options(dto)
+        key = self._cache_key(dto, options)
+        cached = self.cache.get(key)
+        if cached is not None:
+            for offset in range(0, len(cached), STREAM_CHUNK_BYTES):
+                yield cached[offset:offset + STREAM_CHUNK_BYTES]
+            return
+
+        self.app.logger.debug("Streaming from KokoroTTS Provider...")
+        chunks = []
+        async for chunk in self.tts_provider.stream(text=dto.text, options=options):
+            chunks.append(chunk)
+            yield chunk
+        await self.cache.put(key, b"".join(chunks))
+
+    async def close(self) -> None:
+        await self.tts_provider.close()
 
     async def synthesize_audio(self, dto: RvcTtsDTO) -> bytes:
-        self.app.logger.info("Calling KokoroTTS Provider...")
+        self.app.logger.debug("Calling KokoroTTS Provider...")
         try:
             result = await self.tts_provider.synthesize(
                 text=dto.text,
             )
 
             if result.get("success"):
-                self.app.logger.info("KokoroTTS Provider call successful.")
+                self.app.logger.debug("KokoroTTS Provider call successful.")
                 return result.get("audio")
             else:
                 self.app.logger.error("KokoroTTS Provider returned an error.")
                 raise Exception("Failed to synthesize audio.")
         except Exception as e:
-            self.app.logger.error(f"Error calling KokoroTTS Provider: {str(e)}")
+            self.app.logger.error("Error calling KokoroTTS Provider: %s", e)
             raise
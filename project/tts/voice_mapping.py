@@ -0,0 +1,191 @@
+"""
+Mapeamento locutor alvo → voz base do Kokoro.
+
+Cada voz de ``KOKORO_VOICES`` sintetiza uma frase de referência uma única vez e o
+embedding dela é extraído com o modelo de conversão. Para cada locutor alvo a voz
+escolhida é a de maior similaridade de cosseno com o embedding do locutor, e o par
+(embedding da voz, embedding do locutor) fica em cache: a conversão usa o embedding
+da voz como fonte em vez de analisar o áudio sintetizado a cada requisição.
+
+Os embeddings dependem do modelo, então o cache é guardado por ``EmbeddingManager``
+(um por modelo, trocado junto com o modelo em um hot swap). Cada voz lê a frase no
+idioma do prefixo dela (``pf_``/``pm_`` em português, ``bf_``/``bm_`` em inglês
+britânico...). Se nenhuma voz puder ser analisada (Kokoro fora do ar), a falha
+também fica em cache por ``VOICE_MAPPING_RETRY_S`` e as requisições usam a voz
+padrão sem tentar de novo a cada chamada.
+"""
+import asyncio
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from project.core.application import Application
+from project.dto.tts_dto import RvcTtsDTO
+
+# phonetically varied and long enough (~8 s) for a stable embedding
+REFERENCE_TEXT = (
+    "The birch canoe slid on the smooth planks. Glue the sheet to the dark blue background. "
+    "It is easy to tell the depth of a well. These days a chicken leg is a rare dish."
+)
+# by Kokoro lang_code, the first letter of the voice name
+REFERENCE_TEXTS = {
+    "a": REFERENCE_TEXT,
+    "b": REFERENCE_TEXT,
+    "p": (
+        "O rato roeu a roupa do rei de Roma. A chuva forte molhou as janelas da casa amarela. "
+        "Os meninos jogaram bola no campo até o anoitecer. Um café quente faz bem pela manhã."
+    ),
+    "e": (
+        "El viento del norte sopla fuerte sobre la montaña. La niña guardó las llaves en el cajón azul. "
+        "Es fácil medir la profundidad de un pozo. Hoy en día un buen pan es un lujo."
+    ),
+    "f": (
+        "Le vent du nord souffle fort sur la montagne. La fille a rangé les clés dans le tiroir bleu. "
+        "Il est facile de mesurer la profondeur d'un puits. Ces jours-ci, un bon pain est un luxe."
+    ),
+    "i": (
+        "Il vento del nord soffia forte sulla montagna. La bambina ha messo le chiavi nel cassetto blu. "
+        "È facile misurare la profondità di un pozzo. Oggi un buon pane è un lusso."
+    ),
+}
+
+
+def reference_for(voice: str) -> Tuple[str, str]:
+    """(lang_code, text) a voice reads for its analysis, American English when its language has no text"""
+    lang_code = voice[:1]
+    if lang_code not in REFERENCE_TEXTS:
+        return "a", REFERENCE_TEXT
+    return lang_code, REFERENCE_TEXTS[lang_code]
+
+
+def _vector(embedding: Any) -> np.ndarray:
+    if hasattr(embedding, "detach"):
+        embedding = embedding.detach().float().cpu().numpy()
+    return np.asarray(embedding, dtype=np.float32).ravel()
+
+
+def cosine_similarity(a: Any, b: Any) -> float:
+    a, b = _vector(a), _vector(b)
+    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b) + 1e-12))
+
+
+@dataclass
+class VoiceMapping:
+    speaker: str
+    voice: str
+    similarity: float
+    source_embedding: Any
+    target_embedding: Any
+
+
+class VoiceMappingRegistry:
+    """Best Kokoro base voice per target speaker, computed once per model"""
+
+    def __init__(
+        self,
+        core_service,
+        synthesizer_service,
+        voices: Optional[List[str]] = None,
+        retry_s: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.app = Application()
+        self.core_service = core_service
+        self.synthesizer_service = synthesizer_service
+        if voices is None:
+            voices = [v.strip() for v in self.app.envs.KOKORO_VOICES.split(",") if v.strip()]
+        self.voices = voices
+        self.retry_s = self.app.envs.VOICE_MAPPING_RETRY_S if retry_s is None else retry_s
+        self.clock = clock
+        # keyed by EmbeddingManager so a model swap or unload drops the stale embeddings
+        self._voice_embeddings: "weakref.WeakKeyDictionary[Any, Dict[str, Any]]" = weakref.WeakKeyDictionary()
+        self._mappings: "weakref.WeakKeyDictionary[Any, Dict[str, VoiceMapping]]" = weakref.WeakKeyDictionary()
+        # failed analysis per manager: (retry at, error), so an outage costs one attempt per retry_s
+        self._failures: "weakref.WeakKeyDictionary[Any, Tuple[float, Exception]]" = weakref.WeakKeyDictionary()
+        self._lock = asyncio.Lock()
+
+    async def get(self, speaker: str, model_id: Optional[str] = None) -> VoiceMapping:
+        manager = self.core_service.get_embedding_manager(model_id)
+        mappings = self._mappings.setdefault(manager, {})
+        mapping = mappings.get(speaker)
+        if mapping is not None:
+            return mapping
+
+        target_embedding = await asyncio.to_thread(self.core_service.get_speaker_embedding, speaker, model_id)
+        voice_embeddings = await self._get_voice_embeddings(manager, model_id)
+        scores = {voice: cosine_similarity(embedding, target_embedding) for voice, embedding in voice_embeddings.items()}
+        voice = max(scores, key=scores.get)
+        mapping = VoiceMapping(speaker, voice, scores[voice], voice_embeddings[voice], target_embedding)
+        mappings[speaker] = mapping
+        self.app.logger.info("[VoiceMapping] %s -> %s (cosine %.3f)", speaker, voice, scores[voice])
+        return mapping
+
+    async def resolve(self, speaker: str, model_id: Optional[str] = None) -> Optional[VoiceMapping]:
+        """Like get, but None (the default voice) when the mapping cannot be computed"""
+        try:
+            return await self.get(speaker, model_id)
+        except Exception as e:
+            self.app.logger.warning("[VoiceMapping] Using the default voice for %s: %s", speaker, e)
+            return None
+
+    async def precompute(self, model_id: Optional[str] = None) -> List[VoiceMapping]:
+        """Map every known speaker, called once the services are ready"""
+        speakers = await self.core_service.get_speakers()
+        return [await self.get(speaker, model_id) for speaker in speakers]
+
+    async def _get_voice_embeddings(self, manager: Any, model_id: Optional[str]) -> Dict[str, Any]:
+        embeddings = self._voice_embeddings.get(manager)
+        if embeddings is not None:
+            return embeddings
+        self._raise_recent_failure(manager)
+        async with self._lock:
+            embeddings = self._voice_embeddings.get(manager)
+            if embeddings is not None:
+                return embeddings
+            # requests that queued behind a failed analysis do not repeat it
+            self._raise_recent_failure(manager)
+            try:
+                embeddings = await self._analyse_voices(model_id)
+            except Exception as e:
+                self._failures[manager] = (self.clock() + self.retry_s, e)
+                raise
+            self._failures.pop(manager, None)
+            self._voice_embeddings[manager] = embeddings
+            return embeddings
+
+    def _raise_recent_failure(self, manager: Any) -> None:
+        failure = self._failures.get(manager)
+        if failure is not None and self.clock() < failure[0]:
+            raise RuntimeError(f"Voice analysis failed, retrying in {failure[0] - self.clock():.0f} s: {failure[1]}")
+
+    async def _analyse_voices(self, model_id: Optional[str]) -> Dict[str, Any]:
+        results = await asyncio.gather(
+            *(self._voice_embedding(voice, model_id) for voice in self.voices), return_exceptions=True
+        )
+        embeddings = {}
+        for voice, result in zip(self.voices, results):
+            if isinstance(result, Exception):
+                # a voice missing on this Kokoro instance is skipped, not fatal
+                self.app.logger.warning("[VoiceMapping] Could not analyse voice %s: %s", voice, result)
+            else:
+                embeddings[voice] = result
+        if not embeddings:
+            raise RuntimeError("No Kokoro voice could be analysed for the voice mapping")
+        return embeddings
+
+    async def _voice_embedding(self, voice: str, model_id: Optional[str]) -> Any:
+        lang_code, text = reference_for(voice)
+        audio = await self.synthesizer_service.synthesize_samples(
+            RvcTtsDTO(text=text, voice=voice, lang_code=lang_code)
+        )
+        return await self.core_service.extract_embedding(audio, model_id)
+
+    def get_status(self) -> list[dict]:
+        return [
+            {"speaker": mapping.speaker, "voice": mapping.voice, "similarity": round(mapping.similarity, 4)}
+            for mappings in self._mappings.values()
+            for mapping in mappings.values()
+        ]
@@ -0,0 +1,158 @@
+"""
+Testes unitários para o controle de admissão por memória
+"""
+
+import asyncio
+
+import pytest
+from project.conversor.admission.controller import (
+    AdmissionController,
+    AdmissionRejected,
+    CostProfile,
+)
+from project.shared.metrics.registry import MetricsRegistry
+
+MB = 1024 * 1024
+
+# 1 s of audio costs 100 MB and 1 s of compute, independent of any base cost
+PROFILE = CostProfile(
+    base_memory_bytes=0, memory_bytes_per_second=100 * MB, base_seconds=0, seconds_per_second=1.0
+)
+
+
+def make_controller(budget_mb=300, available_mb=10_000, max_queue=4, queue_timeout_s=5.0, profile=PROFILE):
+    controller = AdmissionController(
+        memory_budget_bytes=budget_mb * MB,
+        max_queue=max_queue,
+        queue_timeout_s=queue_timeout_s,
+        memory_headroom_bytes=0,
+        available_memory=lambda: available_mb * MB,
+    )
+    controller.set_profile(None, profile)
+    return controller
+
+
+def test_admits_while_within_budget_and_releases_after():
+    controller = make_controller()
+
+    async def scenario():
+        async with controller.admit(1.0):
+            async with controller.admit(2.0):
+                assert controller.reserved_bytes == 300 * MB
+        assert controller.reserved_bytes == 0
+
+    asyncio.run(scenario())
+
+
+def test_rejects_requests_larger_than_the_budget():
+    controller = make_controller()
+
+    async def scenario():
+        async with controller.admit(4.0):
+            pass
+
+    with pytest.raises(AdmissionRejected) as error:
+        asyncio.run(scenario())
+    assert error.value.reason == "too_large"
+
+
+def test_queued_requests_are_admitted_in_fifo_order():
+    controller = make_controller()
+    order = []
+
+    async def convert(name, duration, hold):
+        async with controller.admit(duration):
+            order.append(name)
+            await hold.wait()
+
+    async def scenario():
+        first_done, others_done = asyncio.Event(), asyncio.Event()
+        first = asyncio.create_task(convert("first", 2.0, first_done))
+        await asyncio.sleep(0)
+        # second does not fit while first runs, third would fit but must not overtake it
+        second = asyncio.create_task(convert("second", 2.0, others_done))
+        third = asyncio.create_task(convert("third", 1.0, others_done))
+        await asyncio.sleep(0.01)
+        assert order == ["first"]
+        assert len(controller._waiters) == 2
+
+        first_done.set()
+        await asyncio.sleep(0.01)
+        others_done.set()
+        await asyncio.gather(first, second, third)
+
+    asyncio.run(scenario())
+    assert order == ["first", "second", "third"]
+    assert controller.reserved_bytes == 0
+
+
+def test_rejects_when_the_queued_work_exceeds_the_timeout():
+    controller = make_controller(queue_timeout_s=1.0)
+
+    async def scenario():
+        async with controller.admit(2.0):
+            with pytest.raises(AdmissionRejected) as error:
+                async with controller.admit(2.0):
+                    pass
+            assert error.value.reason == "queue_too_slow"
+
+    asyncio.run(scenario())
+
+
+def test_rejects_when_the_queue_is_full_or_times_out():
+    fast = CostProfile(0, 100 * MB, 0, 0.001)
+    controller = make_controller(max_queue=1, queue_timeout_s=0.05, profile=fast)
+
+    async def scenario():
+        hold = asyncio.Event()
+
+        async def convert(duration):
+            async with controller.admit(duration):
+                await hold.wait()
+
+        running = asyncio.create_task(convert(2.0))
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(convert(2.0))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as error:
+            await convert(2.0)
+        assert error.value.reason == "queue_full"
+
+        with pytest.raises(AdmissionRejected) as error:
+            await queued
+        assert error.value.reason == "queue_timeout"
+        hold.set()
+        await running
+
+    asyncio.run(scenario())
+    assert controller.reserved_bytes == 0
+    assert not controller._waiters
+
+
+def test_waits_for_system_memory_when_something_is_already_admitted():
+    fast = CostProfile(0, 100 * MB, 0, 0.001)
+    controller = make_controller(available_mb=50, queue_timeout_s=0.01, profile=fast)
+
+    async def scenario():
+        async with controller.admit(1.0):
+            # fits the budget but not the memory left in the system
+            with pytest.raises(AdmissionRejected) as error:
+                async with controller.admit(1.0):
+                    pass
+            assert error.value.reason == "queue_timeout"
+
+    asyncio.run(scenario())
+
+
+def test_metrics_are_rendered_in_prometheus_format():
+    controller = make_controller()
+
+    async def scenario():
+        async with controller.admit(1.0):
+            pass
+
+    asyncio.run(scenario())
+    text = MetricsRegistry().render()
+    assert "# TYPE admission_admitted_total counter" in text
+    assert "admission_memory_reserved_bytes 0.0" in text
+    assert 'admission_wait_seconds_bucket{le="+Inf"}' in text
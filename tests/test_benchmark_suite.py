@@ -0,0 +1,86 @@
+"""
+Testes unitários para o modelo falso, a comparação com o baseline e o teste de carga dos benchmarks
+"""
+
+import os
+import sys
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import fixtures  # noqa: E402
+import load_test  # noqa: E402
+import stub_model  # noqa: E402
+import suite  # noqa: E402
+from project.core.application import Application  # noqa: E402
+from project.model.factory import OpenVoiceModelAdapter, load_model_class  # noqa: E402
+
+
+def test_load_model_class_resolves_voice_models_only():
+    assert load_model_class("") is OpenVoiceModelAdapter
+    assert load_model_class("stub_model:StubVoiceModel") is stub_model.StubVoiceModel
+    assert load_model_class("stub_model.StubVoiceModel") is stub_model.StubVoiceModel
+    with pytest.raises(TypeError):
+        load_model_class("collections:OrderedDict")
+
+
+def test_wrapper_serves_the_stub_model_deterministically(tmp_path, monkeypatch):
+    from project.conversor.processor import VoiceConverterProcessor
+    from project.conversor.wrapper.model_wrapper import VoiceConverterModelWrapper
+
+    monkeypatch.setattr(Application().envs, "VOICE_MODEL_CLASS", "stub_model:StubVoiceModel")
+    model_dir = stub_model.write_checkpoint(str(tmp_path / "model"), hidden=64, layers=2)
+    wrapper = VoiceConverterModelWrapper()
+    wrapper.load_model(model_dir)
+    assert wrapper.model.hidden == 64 and wrapper.model.layers == 2
+
+    processor = VoiceConverterProcessor(wrapper)
+    audio = fixtures.synthetic_voice(1.0, 22050)
+    alice, bruno = (wrapper.extract_se(fixtures.synthetic_voice(2.0, 22050, seed))[0] for seed in (1, 2))
+    first = processor.voice_conversion_with_target_se(audio, alice)
+    assert first.shape == (wrapper.spectrogram(audio).shape[-1] * wrapper.config.audio.hop_length,)
+    np.testing.assert_array_equal(first, processor.voice_conversion_with_target_se(audio, alice))
+    assert not np.allclose(first, processor.voice_conversion_with_target_se(audio, bruno))
+    multi = processor.voice_conversion_multi(audio, [alice, bruno])
+    np.testing.assert_allclose(multi[0], first, atol=1e-6)
+
+
+def report(calibration_ms, **p50):
+    results = OrderedDict(
+        (key, {"p50_ms": value, "p95_ms": value, "peak_rss_mb": 100.0}) for key, value in p50.items()
+    )
+    return {"meta": {"model": "stub", "calibration_ms": calibration_ms}, "results": results}
+
+
+def test_compare_scales_the_baseline_by_machine_speed():
+    baseline = report(10.0, conversion=20.0, decode=2.0)
+
+    # twice as slow everywhere, calibration included: no regression
+    assert suite.compare(report(20.0, conversion=40.0, decode=4.0), baseline, 0.3, 1.0, 0.2) == []
+    # same machine speed, the conversion got slower
+    regressions = suite.compare(report(10.0, conversion=40.0, decode=2.5), baseline, 0.3, 1.0, 0.2)
+    assert [line.split()[0] for line in regressions] == ["conversion", "conversion"]
+    # groups not run are not compared, groups run must keep every scenario
+    assert suite.compare(report(10.0, conversion=20.0), baseline, 0.3, 1.0, 0.2) == []
+    baseline["results"]["conversion/5s"] = baseline["results"]["conversion"]
+    assert suite.compare(report(10.0, conversion=20.0), baseline, 0.3, 1.0, 0.2) == [
+        "conversion/5s: missing from the current run"
+    ]
+
+
+def test_load_test_mix_and_saturation():
+    assert load_test.parse_mix("tts:1, rvc:3") == {"tts": 0.25, "rvc": 0.75}
+
+    healthy = load_test.Step(rate=2.0, elapsed_s=10.0)
+    healthy.outcomes = [load_test.Outcome("rvc", "200", 0.1)] * 20
+    row = load_test.report_step(healthy, slo_p99_ms=500, max_error_rate=0.01)
+    assert row["throughput_rps"] == 2.0 and row["p99_ms"] == 100.0 and row["saturated"] == []
+
+    overloaded = load_test.Step(rate=4.0, elapsed_s=10.0)
+    overloaded.outcomes = [load_test.Outcome("tts", "200", 0.9)] * 30 + [load_test.Outcome("tts", "503", 0.01)] * 10
+    row = load_test.report_step(overloaded, slo_p99_ms=500, max_error_rate=0.01)
+    assert row["errors"] == {"503": 10} and row["endpoints"]["tts"]["error_rate"] == 0.25
+    assert row["saturated"] == ["p99", "errors", "throughput"]
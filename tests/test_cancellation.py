@@ -0,0 +1,122 @@
+"""
+Testes unitários para o cancelamento de conversões (desconexão do cliente e deadline)
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from project.conversor import cancellation
+from project.conversor.admission.scheduler import SchedulingContext, reset_scheduling_context, set_scheduling_context
+from project.conversor.cancellation import (
+    CancellationToken,
+    ConversionCancelled,
+    check_cancelled,
+    reset_cancellation_token,
+    set_cancellation_token,
+)
+from project.conversor.core_conversion_service import CoreConversionService
+from project.router.disconnect import CancelOnDisconnectMiddleware
+
+
+def _cancelled_count(reason: str, stage: str) -> float:
+    return cancellation._cancelled.labels(reason=reason, stage=stage).value
+
+
+def test_a_client_that_leaves_cancels_the_request():
+    started, seen = asyncio.Event(), {}
+
+    async def app(scope, receive, send):
+        await receive()
+        seen["token"] = cancellation.get_cancellation_token()
+        started.set()
+        await asyncio.sleep(10)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+
+    async def main():
+        messages = asyncio.Queue()
+        await messages.put({"type": "http.request", "body": b"audio", "more_body": False})
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        middleware = CancelOnDisconnectMiddleware(app, paths=["/api/rvc"])
+        request = asyncio.ensure_future(middleware({"type": "http", "path": "/api/rvc"}, messages.get, send))
+        await started.wait()
+        await messages.put({"type": "http.disconnect"})
+        await asyncio.wait_for(request, 1)
+        return sent
+
+    before = _cancelled_count("disconnect", cancellation.WAITING)
+    assert asyncio.run(main()) == []
+    assert seen["token"].reason == "disconnect"
+    assert _cancelled_count("disconnect", cancellation.WAITING) == before + 1
+
+
+def test_other_paths_are_passed_through():
+    calls = []
+
+    async def app(scope, receive, send):
+        calls.append(cancellation.get_cancellation_token())
+
+    asyncio.run(CancelOnDisconnectMiddleware(app, paths=["/api/rvc"])({"type": "http", "path": "/health/live"}, None, None))
+    assert calls == [None]
+
+
+def test_cancelled_callers_wait_for_the_worker_and_stop_it_at_the_next_stage():
+    service = object.__new__(CoreConversionService)
+    service.conversion_executor = ThreadPoolExecutor(max_workers=1)
+    running, stages = threading.Event(), []
+
+    def convert():
+        running.set()
+        time.sleep(0.2)
+        stages.append("inference")
+        check_cancelled("postprocess")
+        stages.append("postprocess")
+
+    async def request(token):
+        set_cancellation_token(token)
+        task = asyncio.ensure_future(service._run_on_workers(convert))
+        await asyncio.get_running_loop().run_in_executor(None, running.wait)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # the caller only returns once the worker has stopped
+        assert stages == ["inference"]
+
+    token = CancellationToken()
+    try:
+        asyncio.run(request(token))
+    finally:
+        service.conversion_executor.shutdown()
+    assert token.reason == "disconnect" and token.stage == "postprocess"
+    assert token.compute_s >= 0.2
+
+
+def test_a_passed_deadline_stops_the_conversion():
+    token = set_cancellation_token(CancellationToken())
+    context = set_scheduling_context(SchedulingContext(deadline=time.monotonic() - 1))
+    try:
+        with pytest.raises(ConversionCancelled) as error:
+            check_cancelled("inference")
+    finally:
+        reset_scheduling_context(context)
+        reset_cancellation_token(token)
+    assert error.value.reason == "deadline" and error.value.stage == "inference"
+
+
+def test_the_wasted_compute_is_recorded_once():
+    token = CancellationToken()
+    token.cancel("disconnect")
+    token.cancel("deadline")
+    token.add_compute(1.5)
+    with pytest.raises(ConversionCancelled):
+        token.raise_if_cancelled("batch")
+    before = cancellation._wasted.labels(reason="disconnect").value
+    token.record()
+    token.record()
+    assert cancellation._wasted.labels(reason="disconnect").value == before + 1.5
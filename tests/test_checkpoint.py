@@ -0,0 +1,23 @@
+"""
+Testes unitários para a conversão e o carregamento mapeado de checkpoints
+"""
+
+import torch
+from project.model.checkpoint import SAFETENSORS_FILENAME, convert_checkpoint, load_mmap_state_dict
+
+
+def test_converted_checkpoint_maps_into_module_parameters(tmp_path):
+    source = torch.nn.Sequential(torch.nn.Linear(4, 8), torch.nn.Conv1d(8, 2, 3))
+    torch.save({"model": source.state_dict()}, tmp_path / "model.pth")
+
+    output_path = convert_checkpoint(str(tmp_path))
+    assert output_path.endswith(SAFETENSORS_FILENAME)
+
+    state_dict = load_mmap_state_dict(output_path)
+    target = torch.nn.Sequential(torch.nn.Linear(4, 8), torch.nn.Conv1d(8, 2, 3))
+    target.load_state_dict(state_dict, strict=True, assign=True)
+
+    for name, tensor in source.state_dict().items():
+        assert torch.equal(target.state_dict()[name], tensor)
+    # the parameters reference the mapped file instead of a copy
+    assert target[0].weight.data_ptr() == state_dict["0.weight"].data_ptr()
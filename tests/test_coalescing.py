@@ -0,0 +1,187 @@
+"""
+Testes unitários para a coalescência de conversões idênticas em andamento
+"""
+
+import asyncio
+import time
+
+import numpy as np
+import pytest
+import torch
+from project.conversor.admission.controller import AdmissionRejected
+from project.conversor.admission.scheduler import SchedulingContext, set_scheduling_context
+from project.conversor.cancellation import (
+    CancellationToken,
+    ConversionCancelled,
+    get_cancellation_token,
+    set_cancellation_token,
+)
+from project.conversor.coalescing import ConversionCoalescer, fingerprint
+
+
+class Conversion:
+    """Fake conversion that waits to be released, counting its runs"""
+
+    def __init__(self, result="converted", errors=()):
+        self.result = result
+        self.errors = list(errors)
+        self.runs = 0
+        self.release = asyncio.Event()
+        self.tokens = []
+
+    async def __call__(self):
+        self.runs += 1
+        self.tokens.append(get_cancellation_token())
+        await self.release.wait()
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.result
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_identical_requests_share_one_conversion():
+    async def scenario():
+        coalescer, conversion = ConversionCoalescer(), Conversion()
+        requests = [asyncio.ensure_future(coalescer.run("key", conversion)) for _ in range(3)]
+        await _settle()
+        conversion.release.set()
+        results = await asyncio.gather(*requests)
+        return results, conversion.runs, coalescer.in_flight()
+
+    assert asyncio.run(scenario()) == (["converted"] * 3, 1, 0)
+
+
+def test_the_conversion_survives_its_leader_leaving():
+    async def scenario():
+        coalescer, conversion = ConversionCoalescer(), Conversion()
+        leader = asyncio.ensure_future(coalescer.run("key", conversion))
+        follower = asyncio.ensure_future(coalescer.run("key", conversion))
+        await _settle()
+        leader.cancel()
+        await _settle()
+        conversion.release.set()
+        return await follower, leader.cancelled(), conversion.tokens[0].cancelled
+
+    assert asyncio.run(scenario()) == ("converted", True, False)
+
+
+def test_the_conversion_is_cancelled_when_every_request_left():
+    async def scenario():
+        coalescer, conversion = ConversionCoalescer(), Conversion()
+        requests = [asyncio.ensure_future(coalescer.run("key", conversion)) for _ in range(2)]
+        await _settle()
+        for request in requests:
+            request.cancel()
+        await _settle()
+        return conversion.tokens[0], coalescer.in_flight()
+
+    token, in_flight = asyncio.run(scenario())
+    assert token.reason == "disconnect" and in_flight == 0
+
+
+def test_a_retry_after_every_request_left_starts_a_new_conversion():
+    async def scenario():
+        coalescer, conversion = ConversionCoalescer(), Conversion()
+        first = asyncio.ensure_future(coalescer.run("key", conversion))
+        await _settle()
+        first.cancel()
+        # the client reconnects before the cancelled conversion has unwound
+        retry = asyncio.ensure_future(coalescer.run("key", conversion))
+        await _settle()
+        conversion.release.set()
+        return await retry, conversion.runs, conversion.tokens[0].reason
+
+    assert asyncio.run(scenario()) == ("converted", 2, "disconnect")
+
+
+def test_followers_retry_when_the_leader_is_rejected_but_share_input_errors():
+    async def scenario(error):
+        coalescer, conversion = ConversionCoalescer(), Conversion(errors=[error])
+        leader = asyncio.ensure_future(coalescer.run("key", conversion))
+        follower = asyncio.ensure_future(coalescer.run("key", conversion))
+        await _settle()
+        conversion.release.set()
+        results = await asyncio.gather(leader, follower, return_exceptions=True)
+        return results, conversion.runs
+
+    (leader, follower), runs = asyncio.run(scenario(AdmissionRejected("deadline")))
+    assert isinstance(leader, AdmissionRejected) and follower == "converted" and runs == 2
+
+    (leader, follower), runs = asyncio.run(scenario(ValueError("bad audio")))
+    assert isinstance(leader, ValueError) and follower is leader and runs == 1
+
+
+def test_a_follower_gives_up_at_its_own_deadline_without_cancelling_the_conversion():
+    async def follow(coalescer, conversion):
+        set_scheduling_context(SchedulingContext(deadline=time.monotonic() + 0.05))
+        token = CancellationToken()
+        set_cancellation_token(token)
+        with pytest.raises(ConversionCancelled) as cancelled:
+            await coalescer.run("key", conversion)
+        return cancelled.value.reason, token.reason
+
+    async def scenario():
+        coalescer, conversion = ConversionCoalescer(), Conversion()
+        leader = asyncio.ensure_future(coalescer.run("key", conversion))
+        await _settle()
+        follower = await asyncio.ensure_future(follow(coalescer, conversion))
+        conversion.release.set()
+        return follower, await leader, conversion.tokens[0].cancelled
+
+    assert asyncio.run(scenario()) == (("deadline", "deadline"), "converted", False)
+
+
+def test_fingerprint_covers_audio_speaker_and_source_embedding():
+    audio = np.linspace(-1, 1, 1000, dtype=np.float32)
+    key = fingerprint(audio, "alice", None, None)
+    assert key == fingerprint(audio.copy(), "alice", None, None)
+    assert key != fingerprint(audio, "bruno", None, None)
+    assert key != fingerprint(audio, "alice", "", None)
+    assert key != fingerprint(audio[::-1], "alice", None, None)
+    assert key != fingerprint(audio, "alice", None, torch.zeros(1, 256, 1))
+    assert fingerprint(torch.ones(3)) == fingerprint(np.ones(3, dtype=np.float32))
+
+
+@pytest.mark.parametrize("enabled", [True, False])
+def test_conversor_service_coalesces_only_when_enabled(monkeypatch, enabled):
+    from contextlib import asynccontextmanager
+
+    from project.conversor.service import ConversorService
+    from project.core.application import Application
+    from project.dto.tts_dto import RvcDTO
+
+    class FakeCoreService:
+        def __init__(self):
+            self.conversions = 0
+
+        def get_speaker_embedding(self, speaker, model_id=None):
+            return torch.zeros(1, 256, 1)
+
+        async def convert_voice(self, audio, target_embedding, model_id=None, source_embedding=None):
+            self.conversions += 1
+            await asyncio.sleep(0.01)
+            return audio
+
+    class FakeAdmission:
+        @asynccontextmanager
+        async def admit(self, duration_s, model_id=None):
+            yield
+
+    service = object.__new__(ConversorService)
+    service.app = Application()
+    monkeypatch.setattr(service.app.envs, "COALESCE_CONVERSIONS", enabled)
+    service.core_service = FakeCoreService()
+    service.audio_loading_service = type("Loading", (), {"sample_rate": 24000})()
+    service.admission_controller = FakeAdmission()
+    service.coalescer = ConversionCoalescer()
+    audio = np.ones(2400, dtype=np.float32)
+
+    async def burst():
+        return await asyncio.gather(*(service.convert_audio_array(RvcDTO(target_voice="alice"), audio) for _ in range(4)))
+
+    assert len(asyncio.run(burst())) == 4
+    assert service.core_service.conversions == (1 if enabled else 4)
@@ -0,0 +1,228 @@
+"""
+Testes unitários para o pool de endpoints Kokoro
+"""
+
+import asyncio
+
+import pytest
+from aiohttp import web
+from project.tts.endpoint_pool import CircuitBreaker, EndpointPool, KokoroUnavailable
+from project.tts.tts_provider import TtsProvider
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+async def start_stub(latency_s=0.0, status=200, healthy=True):
+    stats = {"requests": 0}
+
+    async def speech(request):
+        await request.json()
+        stats["requests"] += 1
+        await asyncio.sleep(latency_s)
+        if status >= 400:
+            return web.json_response({"detail": "boom"}, status=status)
+        return web.Response(body=b"RIFF0000WAVE", content_type="audio/wav")
+
+    async def health(request):
+        return web.json_response({"status": "healthy"}, status=200 if healthy else 503)
+
+    app = web.Application()
+    app.router.add_post("/v1/audio/speech", speech)
+    app.router.add_get("/health", health)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/v1", stats
+
+
+def test_choose_prefers_the_endpoint_with_fewest_outstanding_requests():
+    pool = EndpointPool(["http://a/v1", "http://b/v1", "http://c/v1"])
+    a, b, c = pool.endpoints
+    pool.acquire(a)
+    pool.acquire(b)
+    assert pool.choose() is c
+    pool.acquire(c)
+    pool.acquire(c)
+    assert pool.choose() in (a, b)
+    assert pool.choose(exclude=[a, b]) is c
+
+
+def test_breaker_opens_then_lets_one_trial_through_after_the_reset_timeout():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_s=10, clock=clock)
+    breaker.on_failure()
+    assert breaker.allows()
+    breaker.on_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allows()
+
+    clock.now = 10
+    assert breaker.allows() and breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.on_request()
+    assert not breaker.allows()  # only one trial at a time
+    breaker.on_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 20
+    assert breaker.allows()
+    breaker.on_request()
+    breaker.on_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allows()
+
+
+def test_no_available_endpoint_raises_kokoro_unavailable():
+    pool = EndpointPool(["http://a/v1"], failure_threshold=1)
+    endpoint = pool.endpoints[0]
+    pool.acquire(endpoint)
+    pool.release(endpoint, success=False)
+    with pytest.raises(KokoroUnavailable):
+        pool.choose()
+
+
+def test_failing_endpoint_is_cut_off_while_requests_succeed_on_the_healthy_one():
+    async def scenario():
+        bad_runner, bad_url, bad_stats = await start_stub(status=500)
+        good_runner, good_url, good_stats = await start_stub()
+        provider = TtsProvider(urls=[bad_url, good_url], hedge=False)
+        try:
+            results = []
+            bad = provider.pool.endpoints[0]
+            # the choice between idle endpoints is random, keep going until the breaker trips
+            while bad.breaker.state != CircuitBreaker.OPEN and len(results) < 100:
+                results.append(await provider.synthesize(f"text {len(results)}"))
+            results += [await provider.synthesize("after") for _ in range(5)]
+            states = {e.url: e.breaker.state for e in provider.pool.endpoints}
+        finally:
+            await provider.close()
+            await bad_runner.cleanup()
+            await good_runner.cleanup()
+        return results, states, bad_url, good_url, bad_stats, good_stats
+
+    results, states, bad_url, good_url, bad_stats, good_stats = asyncio.run(scenario())
+    assert all(result["audio"] == b"RIFF0000WAVE" for result in results)
+    assert states[bad_url] == CircuitBreaker.OPEN
+    assert states[good_url] == CircuitBreaker.CLOSED
+    # the default threshold stops traffic to the failing endpoint after 3 errors
+    assert bad_stats["requests"] == 3
+    assert good_stats["requests"] == len(results)
+
+
+def test_hedged_request_is_answered_by_the_fast_endpoint():
+    async def scenario():
+        slow_runner, slow_url, slow_stats = await start_stub(latency_s=2.0)
+        fast_runner, fast_url, fast_stats = await start_stub(latency_s=0.01)
+        provider = TtsProvider(urls=[slow_url, fast_url], hedge=True)
+        slow, fast = provider.pool.endpoints
+        provider.pool.hedge_delay = lambda: 0.05
+        try:
+            # make sure the slow endpoint is picked first
+            fast.outstanding += 1
+            task = asyncio.create_task(provider.synthesize("text"))
+            await asyncio.sleep(0.01)
+            fast.outstanding -= 1
+            start = asyncio.get_running_loop().time()
+            result = await task
+            elapsed = asyncio.get_running_loop().time() - start
+            await asyncio.sleep(0)
+            outstanding = [slow.outstanding, fast.outstanding]
+            slow_state = slow.breaker.state
+        finally:
+            await provider.close()
+            await slow_runner.cleanup()
+            await fast_runner.cleanup()
+        return result, elapsed, outstanding, slow_state, slow_stats, fast_stats
+
+    result, elapsed, outstanding, slow_state, slow_stats, fast_stats = asyncio.run(scenario())
+    assert result["audio"] == b"RIFF0000WAVE"
+    assert elapsed < 1.0
+    assert slow_stats["requests"] == 1 and fast_stats["requests"] == 1
+    # the cancelled loser is released without counting as a failure
+    assert outstanding == [0, 0]
+    assert slow_state == CircuitBreaker.CLOSED
+
+
+def test_stream_failover_charges_the_failure_to_the_endpoint_that_failed():
+    async def scenario():
+        bad_runner, bad_url, _ = await start_stub(status=500)
+        good_runner, good_url, good_stats = await start_stub()
+        provider = TtsProvider(urls=[bad_url, good_url], hedge=False)
+        bad, good = provider.pool.endpoints
+        try:
+            # make sure the failing endpoint is picked first
+            good.outstanding += 1
+            chunks = provider.stream("text")
+            first = await chunks.__anext__()
+            good.outstanding -= 1
+            body = first + b"".join([chunk async for chunk in chunks])
+            state = [(e.outstanding, e.breaker.failures, e.breaker.state) for e in (bad, good)]
+        finally:
+            await provider.close()
+            await bad_runner.cleanup()
+            await good_runner.cleanup()
+        return body, state, good_stats
+
+    body, state, good_stats = asyncio.run(scenario())
+    assert body == b"RIFF0000WAVE" and good_stats["requests"] == 1
+    assert state == [(0, 1, CircuitBreaker.CLOSED), (0, 0, CircuitBreaker.CLOSED)]
+
+
+def test_stream_client_errors_neither_fail_over_nor_trip_the_breaker():
+    async def scenario():
+        refusing_runner, refusing_url, _ = await start_stub(status=422)
+        other_runner, other_url, other_stats = await start_stub()
+        provider = TtsProvider(urls=[refusing_url, other_url], hedge=False)
+        refusing, other = provider.pool.endpoints
+        other.outstanding += 1
+        try:
+            with pytest.raises(Exception, match="422"):
+                async for _ in provider.stream("text"):
+                    pass
+            other.outstanding -= 1
+            state = (refusing.outstanding, refusing.breaker.failures)
+        finally:
+            await provider.close()
+            await refusing_runner.cleanup()
+            await other_runner.cleanup()
+        return state, other_stats
+
+    state, other_stats = asyncio.run(scenario())
+    assert state == (0, 0) and other_stats["requests"] == 0
+
+
+def test_hedge_delay_follows_the_p95_of_recent_first_bytes():
+    pool = EndpointPool(["http://a/v1", "http://b/v1"], hedge_min_delay_s=0.05)
+    assert pool.hedge_delay() == 1.0  # not enough samples yet
+    a, b = pool.endpoints
+    for i in range(100):
+        endpoint = a if i % 2 else b
+        pool.acquire(endpoint)
+        pool.release(endpoint, success=True, ttfb_s=(i + 1) / 1000)
+    assert pool.hedge_delay() == pytest.approx(0.095, abs=0.002)
+
+
+def test_health_check_marks_a_down_endpoint_unavailable():
+    async def scenario():
+        up_runner, up_url, _ = await start_stub()
+        down_runner, down_url, _ = await start_stub(healthy=False)
+        provider = TtsProvider(urls=[up_url, down_url, "http://127.0.0.1:1/v1"])
+        try:
+            session = await provider.get_session()
+            await provider.pool.check_health(session)
+            status = provider.pool.get_status()
+            chosen = {provider.pool.choose().url for _ in range(10)}
+        finally:
+            await provider.close()
+            await up_runner.cleanup()
+            await down_runner.cleanup()
+        return status, chosen, up_url
+
+    status, chosen, up_url = asyncio.run(scenario())
+    assert [endpoint["healthy"] for endpoint in status] == [True, False, False]
+    assert chosen == {up_url}
@@ -0,0 +1,166 @@
+"""
+Testes unitários para o hot-swap do FileModelManager
+"""
+
+import threading
+import time
+
+import pytest
+import torch
+from fastapi.testclient import TestClient
+from project.conversor.manager.file_model_manager import FileModelManager
+from project.core.application import Application
+from project.observers.model_swap_observer import ModelSwapObserver
+
+
+class FakeWrapper:
+    def __init__(self):
+        self.model = None
+        self.in_flight = 0
+        self.retired = False
+        self._idle = threading.Event()
+        self._idle.set()
+
+    def load_model(self, model_path):
+        self.model = model_path
+
+    def extract_se(self, audio):
+        return torch.zeros(1, 4, 1), torch.zeros(1, 8, 10)
+
+    def inference(self, src_spec, aux_input):
+        return {"model_outputs": torch.zeros(1, 1, 100)}
+
+    def acquire(self):
+        self.in_flight += 1
+        self._idle.clear()
+
+    def release(self):
+        self.in_flight -= 1
+        if self.in_flight == 0:
+            self._idle.set()
+            if self.retired:
+                self.unload()
+
+    def wait_idle(self, timeout=None):
+        return self._idle.wait(timeout)
+
+    def retire(self):
+        self.retired = True
+        if self.in_flight == 0:
+            self.unload()
+
+    def unload(self):
+        self.model = None
+
+
+class FakeObserver(ModelSwapObserver):
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.committed = None
+
+    def update(self, event):
+        pass
+
+    def prepare_swap(self, model):
+        if self.fail:
+            raise ValueError("embedding validation failed")
+        return "prepared"
+
+    def commit_swap(self, model, prepared):
+        self.committed = (model, prepared)
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    FileModelManager._instance = None
+    manager = FileModelManager.get_instance()
+    monkeypatch.setattr(FileModelManager, "wrapper_factory", FakeWrapper)
+    manager.model = FakeWrapper()
+    manager.model.load_model("/models/old")
+    manager.model_path = "/models/old"
+    yield manager
+    FileModelManager._instance = None
+
+
+def wait_for_state(manager, *states, timeout=5.0):
+    deadline = time.time() + timeout
+    while manager.swap_status.state not in states:
+        assert time.time() < deadline, manager.swap_status
+        time.sleep(0.01)
+
+
+def test_swap_switches_and_drains_previous_model(manager):
+    observer = FakeObserver()
+    manager.add_observer(observer)
+    previous = manager.model
+    previous.acquire()
+
+    manager.swap_model("/models/new")
+    wait_for_state(manager, "draining")
+
+    assert manager.model is not previous
+    assert manager.model_path == "/models/new"
+    assert observer.committed == (manager.model, "prepared")
+    assert previous.model == "/models/old"
+
+    previous.release()
+    wait_for_state(manager, "completed")
+    assert previous.model is None
+
+
+def test_failed_warmup_rolls_back(manager):
+    manager.add_observer(FakeObserver(fail=True))
+    previous = manager.model
+
+    manager.swap_model("/models/broken")
+    wait_for_state(manager, "rolled_back")
+
+    assert manager.model is previous
+    assert manager.model_path == "/models/old"
+    assert "embedding validation failed" in manager.swap_status.error
+
+
+def test_previous_model_is_kept_until_its_last_conversion_after_the_drain_timeout(manager):
+    previous = manager.model
+    previous.acquire()
+
+    manager.swap_model("/models/new", drain_timeout=0.05)
+    wait_for_state(manager, "draining")
+    with pytest.raises(RuntimeError):
+        manager.swap_model("/models/other")
+
+    wait_for_state(manager, "completed")
+    assert previous.model == "/models/old"
+    previous.release()
+    assert previous.model is None
+
+
+def test_swap_route_needs_the_admin_token_and_a_path_under_the_models_dir(manager, tmp_path, monkeypatch):
+    from app import server
+    from project.router.dependencies import get_conversor_service
+
+    (tmp_path / "new").mkdir()
+    (tmp_path / "new" / "model.pth").touch()
+    envs = Application().envs
+    monkeypatch.setattr(envs, "MODELS_DIR_PATH", str(tmp_path))
+    monkeypatch.setattr(envs, "ADMIN_TOKEN", "")
+    service = type("Service", (), {"core_service": type("Core", (), {"model_manager": manager})})()
+    server.dependency_overrides[get_conversor_service] = lambda: service
+    client = TestClient(server)
+    try:
+        assert client.post("/api/admin/model/swap", json={"model_path": "new"}).status_code == 403
+        monkeypatch.setattr(envs, "ADMIN_TOKEN", "secret")
+        headers = {"Authorization": "Bearer secret"}
+        assert client.post(
+            "/api/admin/model/swap", json={"model_path": "new"}, headers={"Authorization": "Bearer x"}
+        ).status_code == 401
+        for outside in ("..", "/etc", "new/../.."):
+            assert client.post(
+                "/api/admin/model/swap", json={"model_path": outside}, headers=headers
+            ).status_code == 400
+        response = client.post("/api/admin/model/swap", json={"model_path": "new"}, headers=headers)
+        assert response.status_code == 202
+        assert response.json()["model_path"] == str((tmp_path / "new").resolve())
+        wait_for_state(manager, "completed")
+    finally:
+        server.dependency_overrides.pop(get_conversor_service)
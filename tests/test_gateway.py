@@ -0,0 +1,201 @@
+"""
+Testes unitários para o gateway (anel de hash consistente, afinidade por locutor e failover)
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from aiohttp import web
+from project.gateway.hash_ring import HashRing
+from project.gateway.proxy import GatewayProxy, routing_key
+
+NODES = [f"http://node-{index}" for index in range(4)]
+KEYS = [routing_key(None, f"speaker_{index}") for index in range(2000)]
+
+
+def test_the_ring_spreads_keys_and_lists_distinct_replicas():
+    ring = HashRing(NODES)
+    owners = [ring.owner(key) for key in KEYS]
+    for node in NODES:
+        assert 0.15 < owners.count(node) / len(KEYS) < 0.35
+    preference = ring.preference(KEYS[0], 3)
+    assert len(set(preference)) == 3 and preference[0] == owners[0]
+    assert ring.preference(KEYS[0]) == ring.preference(KEYS[0], 4)
+
+
+def test_only_the_keys_of_a_node_move_when_it_leaves_or_joins():
+    ring = HashRing(NODES)
+    before = {key: ring.owner(key) for key in KEYS}
+    ring.remove(NODES[1])
+    after = {key: ring.owner(key) for key in KEYS}
+    moved = [key for key in KEYS if before[key] != after[key]]
+    assert all(before[key] == NODES[1] for key in moved)
+    # the leaving node's keys go to its replica
+    assert all(after[key] == HashRing(NODES).preference(key, 2)[1] for key in moved)
+
+    ring.add("http://node-4")
+    joined = {key: ring.owner(key) for key in KEYS}
+    moved = [key for key in KEYS if after[key] != joined[key]]
+    assert all(joined[key] == "http://node-4" for key in moved)
+    assert len(moved) / len(KEYS) < 0.35
+
+
+class Backend:
+    """aiohttp app standing in for one node"""
+
+    def __init__(self, name, status=200, jobs=()):
+        self.name = name
+        self.status = status
+        self.jobs = set(jobs)
+        self.speakers = []
+        self.runner = None
+        self.url = None
+
+    async def convert(self, request):
+        form = await request.post()
+        self.speakers.append(form.get("speaker"))
+        return web.Response(status=self.status, body=f"{self.name}:{form.get('speaker')}".encode())
+
+    async def job(self, request):
+        if request.match_info["job_id"] not in self.jobs:
+            return web.json_response({"detail": "Job not found"}, status=404)
+        return web.json_response({"node": self.name})
+
+    async def create_job(self, request):
+        await request.post()
+        self.speakers.append("job")
+        # the node dies after reading the request, the job may exist
+        request.transport.close()
+        return web.json_response({"id": "job-1"}, status=202)
+
+    async def ready(self, request):
+        return web.json_response({"status": "ready"})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/api/rvc", self.convert)
+        app.router.add_get("/api/jobs/{job_id}", self.job)
+        app.router.add_post("/api/jobs", self.create_job)
+        app.router.add_get("/health/ready", self.ready)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+@pytest.fixture
+def gateway_of(monkeypatch):
+    """Run scenario(client, gateway, backends) against the gateway app in front of the given backends"""
+
+    def run(backends, scenario):
+        from gateway import server
+
+        async def main():
+            for backend in backends:
+                await backend.start()
+            gateway = GatewayProxy([backend.url for backend in backends], health_interval_s=3600)
+            monkeypatch.setattr(GatewayProxy, "_instance", gateway)
+            await gateway.start()
+            transport = httpx.ASGITransport(app=server)
+            try:
+                async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+                    return await scenario(client, gateway, backends)
+            finally:
+                await gateway.close()
+                for backend in backends:
+                    await backend.stop()
+
+        return asyncio.run(main())
+
+    return run
+
+
+def convert(client, speaker):
+    return client.post("/api/rvc", files={"audio_file": ("a.wav", b"RIFF")}, data={"speaker": speaker})
+
+
+def test_each_speaker_always_goes_to_the_node_that_owns_it(gateway_of):
+    async def scenario(client, gateway, backends):
+        served = {}
+        for speaker in [f"speaker_{index}" for index in range(12)] * 2:
+            response = await convert(client, speaker)
+            assert response.status_code == 200
+            node = response.headers["X-Gateway-Node"]
+            assert served.setdefault(speaker, node) == node
+            assert node == gateway.ring.owner(routing_key(None, speaker))
+        return set(served.values())
+
+    assert len(gateway_of([Backend("a"), Backend("b"), Backend("c")], scenario)) >= 2
+
+
+def test_requests_fail_over_to_the_replica(gateway_of):
+    async def scenario(client, gateway, backends):
+        owner_url = gateway.ring.owner(routing_key(None, "alice"))
+        owner = next(backend for backend in backends if backend.url == owner_url)
+        replica_url = gateway.ring.preference(routing_key(None, "alice"), 2)[1]
+
+        owner.status = 503
+        busy = await convert(client, "alice")
+        await owner.stop()
+        down = await convert(client, "alice")
+        return busy, down, replica_url, owner_url in gateway.ring
+
+    busy, down, replica_url, owner_in_ring = gateway_of([Backend("a"), Backend("b"), Backend("c")], scenario)
+    assert busy.status_code == 200 and busy.headers["X-Gateway-Node"] == replica_url
+    assert down.status_code == 200 and down.headers["X-Gateway-Node"] == replica_url
+    assert not owner_in_ring
+
+
+def test_jobs_are_found_on_the_node_that_created_them(gateway_of):
+    async def scenario(client, gateway, backends):
+        found = await client.get("/api/jobs/job-1")
+        missing = await client.get("/api/jobs/job-2")
+        return found, missing
+
+    found, missing = gateway_of([Backend("a"), Backend("b", jobs=["job-1"]), Backend("c")], scenario)
+    assert found.status_code == 200 and found.json() == {"node": "b"}
+    assert missing.status_code == 404
+
+
+def test_a_post_is_not_repeated_on_the_replica_once_it_was_sent(gateway_of):
+    async def scenario(client, gateway, backends):
+        response = await client.post("/api/jobs", files={"audio_file": ("a.wav", b"RIFF")}, data={"speaker": "alice"})
+        return response, sum(backend.speakers.count("job") for backend in backends)
+
+    response, created = gateway_of([Backend("a"), Backend("b"), Backend("c")], scenario)
+    assert response.status_code == 503 and created == 1
+
+
+def test_a_node_counts_the_request_until_its_body_is_released(gateway_of):
+    async def scenario(client, gateway, backends):
+        key = routing_key(None, "alice")
+        response, node = await gateway.forward("POST", "/api/rvc", {}, b"speaker=alice", key)
+        streaming = node.outstanding
+        gateway.release(response, node)
+        await convert(client, "alice")
+        return streaming, [node.outstanding for node in gateway.nodes.values()]
+
+    streaming, after = gateway_of([Backend("a"), Backend("b")], scenario)
+    assert streaming == 1 and after == [0, 0]
+
+
+def test_runtime_node_changes_need_the_admin_token(gateway_of, monkeypatch):
+    from project.core.application import Application
+
+    async def scenario(client, gateway, backends):
+        disabled = await client.post("/gateway/nodes", params={"url": "http://intruder"})
+        monkeypatch.setattr(Application().envs, "GATEWAY_ADMIN_TOKEN", "secret")
+        wrong = await client.post("/gateway/nodes", params={"url": "http://intruder"}, headers={"Authorization": "Bearer x"})
+        joined = await client.post(
+            "/gateway/nodes", params={"url": "http://node-2"}, headers={"Authorization": "Bearer secret"}
+        )
+        return disabled.status_code, wrong.status_code, joined.status_code, sorted(gateway.nodes)
+
+    disabled, wrong, joined, nodes = gateway_of([Backend("a")], scenario)
+    assert (disabled, wrong, joined) == (403, 401, 200)
+    assert "http://intruder" not in nodes and "http://node-2" in nodes
@@ -0,0 +1,256 @@
+"""
+Testes unitários para os jobs assíncronos de conversão
+"""
+
+import asyncio
+import io
+import sqlite3
+import time
+
+import numpy as np
+import pytest
+import soundfile as sf
+from fastapi.testclient import TestClient
+from project.conversor.admission.controller import AdmissionRejected
+from project.conversor.admission.scheduler import tenant_id
+from project.jobs.service import KIND_RVC, KIND_TTS, JobService
+from project.jobs.store import EXPIRED, FAILED, QUEUED, RUNNING, SUCCEEDED, JobStore
+from project.router.dependencies import get_job_service
+
+
+class FakeCoreService:
+    async def ensure_model(self, model_id=None):
+        pass
+
+
+class FakeConversorService:
+    def __init__(self, fail=False, rejections=()):
+        self.core_service = FakeCoreService()
+        self.calls = []
+        self.fail = fail
+        self.rejections = list(rejections)
+
+    async def convert_audio_array(self, dto, audio, source_embedding=None):
+        if self.fail:
+            raise ValueError("conversion failed")
+        if self.rejections:
+            raise AdmissionRejected(self.rejections.pop(0), retry_after=0)
+        self.calls.append(len(audio))
+        await asyncio.sleep(0)
+        return audio * 0.5
+
+
+class FakeProvider:
+    max_connections = 4
+
+
+class FakeSynthesizer:
+    tts_provider = FakeProvider()
+
+    async def synthesize_samples(self, dto):
+        return np.full(2400, 0.2, dtype=np.float32)
+
+
+def wav_upload(seconds: float) -> bytes:
+    buffer = io.BytesIO()
+    sf.write(buffer, np.sin(np.linspace(0, 800 * seconds, int(24000 * seconds))).astype(np.float32) * 0.3, 24000, format="WAV")
+    return buffer.getvalue()
+
+
+class Upload:
+    def __init__(self, data: bytes, filename="input.wav"):
+        self.file = io.BytesIO(data)
+        self.filename = filename
+
+
+def make_service(tmp_path, **kwargs) -> JobService:
+    return JobService(str(tmp_path), segment_s=kwargs.pop("segment_s", 1.0), poll_interval_s=0.05, **kwargs)
+
+
+async def wait_for(service, job_id, statuses=(SUCCEEDED, FAILED), timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = await service.get(job_id)
+        if job.status in statuses:
+            return job
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"job {job_id} is still {job.status}")
+
+
+def test_store_claims_jobs_in_order_and_requeues_stale_ones(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    first = store.create(KIND_TTS, {"text": "a"})
+    second = store.create(KIND_TTS, {"text": "b"})
+
+    claimed = store.claim_next()
+    assert claimed.id == first.id and claimed.status == RUNNING
+    assert store.requeue_stale(60) == 0
+    time.sleep(0.01)
+    assert store.requeue_stale(0) == 1
+    assert store.get(first.id).status == QUEUED
+    assert [store.claim_next().id, store.claim_next().id] == [first.id, second.id]
+    assert store.claim_next() is None
+
+
+def test_file_job_is_converted_in_segments_with_progress_and_timings(tmp_path):
+    async def scenario():
+        service = make_service(tmp_path)
+        conversor = FakeConversorService()
+        service.start(conversor, FakeSynthesizer())
+        try:
+            job = await service.submit(KIND_RVC, {"speaker": "voice"}, Upload(wav_upload(3.5)))
+            assert job.status == QUEUED
+            return await wait_for(service, job.id), conversor
+        finally:
+            await service.stop()
+
+    job, conversor = asyncio.run(scenario())
+    assert job.status == SUCCEEDED
+    assert job.progress == 1
+    assert job.timings["segments"] == len(conversor.calls) == 4
+    assert {"queued_s", "load_s", "conversion_s", "total_s"} <= set(job.timings)
+    audio, sample_rate = sf.read(job.result_path)
+    assert sample_rate == 24000
+    assert abs(len(audio) - 3.5 * 24000) <= 1
+    # the input upload is removed once the job is done
+    assert not list((tmp_path / "inputs").iterdir())
+
+
+def test_text_job_and_failed_job(tmp_path):
+    async def scenario():
+        service = make_service(tmp_path)
+        service.start(FakeConversorService(), FakeSynthesizer())
+        try:
+            tts = await service.submit(KIND_TTS, {"speaker": "voice", "text": "One. Two. Three.", "lang_code": "a"})
+            done = await wait_for(service, tts.id)
+            service.conversor_service = FakeConversorService(fail=True)
+            broken = await service.submit(KIND_TTS, {"speaker": "voice", "text": "Hello."})
+            failed = await wait_for(service, broken.id)
+            return done, failed
+        finally:
+            await service.stop()
+
+    done, failed = asyncio.run(scenario())
+    assert done.status == SUCCEEDED and done.timings["segments"] == 1
+    assert failed.status == FAILED and failed.error == "conversion failed"
+
+
+def test_queued_jobs_survive_a_restart(tmp_path):
+    async def submit():
+        service = make_service(tmp_path)
+        job = await service.submit(KIND_RVC, {"speaker": "voice"}, Upload(wav_upload(0.5)))
+        service.store.close()
+        return job.id
+
+    async def restart(job_id):
+        service = make_service(tmp_path)
+        service.start(FakeConversorService(), FakeSynthesizer())
+        try:
+            return await wait_for(service, job_id)
+        finally:
+            await service.stop()
+
+    job_id = asyncio.run(submit())
+    assert asyncio.run(restart(job_id)).status == SUCCEEDED
+
+
+def test_a_worker_survives_a_locked_store(tmp_path):
+    async def scenario():
+        service = make_service(tmp_path)
+        claim_next, failures = service.store.claim_next, []
+
+        def locked_once():
+            if not failures:
+                failures.append(1)
+                raise sqlite3.OperationalError("database is locked")
+            return claim_next()
+
+        service.store.claim_next = locked_once
+        service.start(FakeConversorService(), FakeSynthesizer())
+        try:
+            job = await service.submit(KIND_TTS, {"speaker": "voice", "text": "Hello."})
+            return await wait_for(service, job.id), failures
+        finally:
+            await service.stop()
+
+    job, failures = asyncio.run(scenario())
+    assert failures == [1] and job.status == SUCCEEDED
+
+
+def test_results_expire(tmp_path):
+    async def scenario():
+        # the maintenance pass after start runs again only after stale_after_s / 3, not during the test
+        service = make_service(tmp_path, result_ttl_s=0.3)
+        service.start(FakeConversorService(), FakeSynthesizer())
+        try:
+            job = await service.submit(KIND_TTS, {"speaker": "voice", "text": "Hello."})
+            done = await wait_for(service, job.id)
+            assert done.status == SUCCEEDED
+            await asyncio.sleep(0.35)
+            assert await service.expire_results() == 1
+            return done, await service.get(job.id)
+        finally:
+            await service.stop()
+
+    done, expired = asyncio.run(scenario())
+    assert expired.status == EXPIRED
+    assert not (tmp_path / "results" / f"{done.id}.wav").exists()
+
+
+def test_busy_admission_is_retried_and_other_rejections_fail_the_job(tmp_path):
+    async def scenario():
+        service = make_service(tmp_path)
+        conversor = FakeConversorService(rejections=["queue_full", "preempted", "too_large"])
+        service.start(conversor, FakeSynthesizer())
+        try:
+            job = await service.submit(KIND_TTS, {"speaker": "voice", "text": "Hello."})
+            return await wait_for(service, job.id), conversor.rejections
+        finally:
+            await service.stop()
+
+    failed, left = asyncio.run(scenario())
+    assert failed.status == FAILED and "too_large" in failed.error
+    assert left == []
+
+
+@pytest.fixture
+def client(tmp_path):
+    from app import server
+
+    service = make_service(tmp_path)
+    server.dependency_overrides[get_job_service] = lambda: service
+    yield TestClient(server), service
+    server.dependency_overrides.clear()
+
+
+def test_job_routes(client):
+    client, service = client
+    assert client.post("/api/jobs", data={"speaker": "voice"}).status_code == 422
+
+    response = client.post(
+        "/api/jobs",
+        files={"audio_file": ("a.wav", wav_upload(0.5))},
+        data={"speaker": "voice"},
+        headers={"X-API-Key": "secret-key"},
+    )
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+    assert "tenant" not in response.json()["params"]
+    stored = service.store.get(job_id).params["tenant"]
+    assert stored == tenant_id("secret-key") and "secret-key" not in stored
+    assert response.headers["Location"] == f"/api/jobs/{job_id}"
+
+    assert client.get(f"/api/jobs/{job_id}").json()["status"] == QUEUED
+    assert client.get(f"/api/jobs/{job_id}/result").status_code == 409
+    assert client.get("/api/jobs/unknown").status_code == 404
+
+    async def run_queued():
+        service.conversor_service, service.synthesizer_service = FakeConversorService(), FakeSynthesizer()
+        await service.run(service.store.claim_next())
+
+    asyncio.run(run_queued())
+    status = client.get(f"/api/jobs/{job_id}").json()
+    assert status["status"] == SUCCEEDED and status["result_url"] == f"/api/jobs/{job_id}/result"
+    result = client.get(status["result_url"])
+    assert result.status_code == 200
+    assert result.headers["content-type"] == "audio/wav"
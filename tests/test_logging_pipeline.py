@@ -0,0 +1,91 @@
+"""
+Testes unitários para o pipeline de logs (fila, JSON, request id e níveis por módulo)
+"""
+
+import asyncio
+import json
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from project.conversor.core_conversion_service import CoreConversionService
+from project.core import logging_pipeline
+from project.core.application import Application
+
+
+@pytest.fixture
+def restore_logging():
+    yield
+    envs = Application().envs
+    logging.getLogger("project.conversor").setLevel(logging.NOTSET)
+    logging_pipeline.configure_logging(envs.LOG_LEVEL, envs.LOG_LEVELS, envs.LOG_FORMAT, envs.LOG_FILE)
+
+
+def test_records_are_written_as_json_by_the_writer_thread(tmp_path, restore_logging):
+    log_file = tmp_path / "app.log"
+    logging_pipeline.configure_logging("INFO", fmt="json", file_path=str(log_file))
+    token = logging_pipeline.set_request_id("req-1")
+    try:
+        logging.getLogger("project.test").info("converted %d samples", 24000)
+    finally:
+        logging_pipeline.reset_request_id(token)
+    logging.getLogger("project.test").info("outside a request")
+    logging_pipeline.shutdown_logging()
+
+    first, second = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert first["message"] == "converted 24000 samples" and first["request_id"] == "req-1"
+    assert first["logger"] == "project.test" and first["level"] == "INFO"
+    assert first["thread"] == threading.current_thread().name
+    assert second["request_id"] == logging_pipeline.NO_REQUEST
+
+
+def test_levels_are_checked_before_formatting(restore_logging):
+    logging_pipeline.configure_logging("INFO", module_levels="project.conversor=DEBUG")
+    formatted = []
+
+    class Expensive:
+        def __str__(self):
+            formatted.append(True)
+            return "expensive"
+
+    logging.getLogger("project.embedding.manager").debug("speakers: %s", Expensive())
+    assert not formatted
+    assert logging.getLogger("project.conversor.processor").isEnabledFor(logging.DEBUG)
+    assert logging_pipeline.parse_module_levels("a=debug, b.c=WARNING") == {"a": logging.DEBUG, "b.c": logging.WARNING}
+
+
+def test_a_full_queue_drops_records_instead_of_blocking(monkeypatch):
+    handler = logging_pipeline.NonBlockingQueueHandler(queue.SimpleQueue())
+    monkeypatch.setattr(logging_pipeline, "_queue_size", 1)
+    dropped = logging_pipeline._dropped.value
+    record = logging.LogRecord("project", logging.INFO, __file__, 1, "message %s", ("a",), None)
+    handler.emit(record)
+    handler.emit(record)
+    assert handler.queue.qsize() == 1
+    assert logging_pipeline._dropped.value == dropped + 1
+    assert handler.queue.get().msg == "message a"
+
+
+def test_conversion_workers_log_with_the_request_id():
+    service = object.__new__(CoreConversionService)
+    service.conversion_executor = ThreadPoolExecutor(max_workers=1)
+
+    async def request():
+        logging_pipeline.set_request_id("req-2")
+        return await service._run_on_workers(logging_pipeline.get_request_id)
+
+    try:
+        assert asyncio.run(request()) == "req-2"
+    finally:
+        service.conversion_executor.shutdown()
+
+
+def test_responses_carry_the_request_id():
+    from fastapi.testclient import TestClient
+    from app import server
+
+    client = TestClient(server)
+    assert client.get("/health/live", headers={"X-Request-ID": "abc"}).headers["X-Request-ID"] == "abc"
+    assert len(client.get("/health/live").headers["X-Request-ID"]) == 32
@@ -0,0 +1,73 @@
+"""
+Testes unitários para o modo texto longo (síntese e conversão em paralelo)
+"""
+
+import asyncio
+
+import numpy as np
+from project.tts.long_text import LongTextPipeline
+
+SAMPLE_RATE = 24000
+
+
+def test_segments_run_in_parallel_and_are_joined_in_order():
+    active = {"synthesis": 0, "conversion": 0}
+    peak = {"synthesis": 0, "conversion": 0}
+
+    async def track(stage, delay):
+        active[stage] += 1
+        peak[stage] = max(peak[stage], active[stage])
+        await asyncio.sleep(delay)
+        active[stage] -= 1
+
+    async def synthesize(text):
+        # later sentences finish first, the output must still follow the text order
+        index = int(text.split()[1].rstrip("."))
+        await track("synthesis", 0.01 * (6 - index))
+        return np.full(SAMPLE_RATE // 10, float(index), dtype=np.float32)
+
+    async def convert(audio):
+        await track("conversion", 0.005)
+        return audio
+
+    pipeline = LongTextPipeline(
+        synthesize, convert, pause_s=0.01, fade_s=0, min_chars=0, synthesis_concurrency=3, conversion_concurrency=2
+    )
+    text = " ".join(f"Sentence {i}." for i in range(6))
+    audio, timings = asyncio.run(pipeline.run(text))
+
+    levels = [value for value in np.unique(audio) if value != 0]
+    assert levels == [1.0, 2.0, 3.0, 4.0, 5.0]
+    first_nonzero = [int(np.argmax(audio == level)) for level in levels]
+    assert first_nonzero == sorted(first_nonzero)
+    assert len(audio) == 6 * SAMPLE_RATE // 10 + 5 * int(0.01 * SAMPLE_RATE)
+    assert [t["index"] for t in timings] == list(range(6))
+    assert peak == {"synthesis": 3, "conversion": 2}
+
+
+def test_a_failed_segment_cancels_the_others():
+    cancelled = []
+
+    async def synthesize(text):
+        if text.startswith("Bad"):
+            raise ValueError("Kokoro failed")
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(text)
+            raise
+
+    async def convert(audio):
+        return audio
+
+    async def scenario():
+        pipeline = LongTextPipeline(synthesize, convert, min_chars=0)
+        try:
+            await pipeline.run("Good one. Bad one. Good two.")
+        except ValueError:
+            await asyncio.sleep(0)
+            return True
+        return False
+
+    assert asyncio.run(scenario())
+    assert sorted(cancelled) == ["Good one.", "Good two."]
@@ -0,0 +1,108 @@
+"""
+Testes unitários para ModelRegistry
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from project.conversor.manager.model_registry import ModelRegistry
+
+MB = 1024 * 1024
+
+
+class FakeWrapper:
+    loads = 0
+    lock = threading.Lock()
+
+    def __init__(self):
+        self.model = None
+        self.in_flight = 0
+
+    def load_model(self, model_path):
+        time.sleep(0.05)
+        with FakeWrapper.lock:
+            FakeWrapper.loads += 1
+        self.model = model_path
+
+    def memory_footprint(self):
+        return 100 * MB
+
+    def acquire(self):
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+
+    def unload(self):
+        self.model = None
+
+
+@pytest.fixture
+def models_dir(tmp_path):
+    for model_id in ("pt_br", "en_us", "es"):
+        (tmp_path / model_id).mkdir()
+        (tmp_path / model_id / "model.pth").write_bytes(b"")
+    FakeWrapper.loads = 0
+    return str(tmp_path)
+
+
+def make_registry(models_dir, budget_mb=250):
+    return ModelRegistry(
+        models_dir=models_dir,
+        memory_budget_bytes=budget_mb * MB,
+        wrapper_factory=FakeWrapper,
+        memory_check=lambda: True,
+    )
+
+
+def test_concurrent_first_requests_share_one_load(models_dir):
+    registry = make_registry(models_dir)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(registry.get("pt_br")))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert FakeWrapper.loads == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_least_recently_used_model_is_evicted_over_budget(models_dir):
+    registry = make_registry(models_dir)
+    registry.get("pt_br")
+    registry.get("en_us")
+    registry.get("pt_br")
+    registry.get("es")
+
+    assert registry.is_resident("pt_br")
+    assert registry.is_resident("es")
+    assert not registry.is_resident("en_us")
+
+
+def test_models_in_use_and_pinned_are_not_evicted(models_dir):
+    registry = make_registry(models_dir, budget_mb=150)
+    default = FakeWrapper()
+    registry.register(registry.default_model_id, default)
+
+    async def scenario():
+        async with registry.use("pt_br"):
+            registry.get("en_us")
+            assert registry.is_resident("pt_br")
+
+    asyncio.run(scenario())
+
+    assert registry.is_resident(registry.default_model_id)
+
+
+def test_unknown_model_id_is_rejected(models_dir):
+    registry = make_registry(models_dir)
+    with pytest.raises(FileNotFoundError):
+        registry.get("missing")
+    with pytest.raises(ValueError):
+        registry.get("../etc")
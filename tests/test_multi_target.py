@@ -0,0 +1,182 @@
+"""
+Testes unitários para a conversão de uma entrada para vários locutores
+"""
+
+import asyncio
+import io
+import zipfile
+from contextlib import asynccontextmanager
+
+import numpy as np
+import pytest
+import soundfile as sf
+import torch
+from fastapi.testclient import TestClient
+from project.conversor.audio.archive import stream_zip
+from project.conversor.processor import VoiceConverterProcessor
+from project.conversor.service import ConversorService
+from project.router.dependencies import get_conversor_service, get_synthesizer_service
+
+SPEAKERS = {"alice": 1.0, "bruno": 2.0, "carla": 3.0}
+
+
+class FakeModel:
+    """Output of each target is the source spectrogram times the target embedding"""
+
+    def __init__(self):
+        self.extractions = 0
+        self.batches = []
+
+    def extract_se(self, src):
+        self.extractions += 1
+        return torch.zeros(1, 4, 1), self.spectrogram(src)
+
+    def spectrogram(self, src):
+        return torch.as_tensor(src).view(1, 1, -1)
+
+    def inference_multi(self, src_spec, g_src, g_tgts):
+        self.batches.append(g_tgts.shape[0])
+        return src_spec.expand(g_tgts.shape[0], -1, -1) * g_tgts[:, :1, :]
+
+
+class FakeAdmission:
+    def __init__(self):
+        self.durations = []
+
+    @asynccontextmanager
+    async def admit(self, duration_s, model_id=None):
+        self.durations.append(duration_s)
+        yield
+
+
+class FakeCoreService:
+    def __init__(self):
+        self.model = FakeModel()
+        self.processor = VoiceConverterProcessor(self.model)
+        self.extractions = 0
+
+    async def ensure_model(self, model_id=None):
+        pass
+
+    async def get_speakers(self):
+        return list(SPEAKERS)
+
+    def get_speaker_embedding(self, speaker, model_id=None):
+        return torch.full((1, 4, 1), SPEAKERS[speaker])
+
+    async def extract_embedding(self, audio, model_id=None):
+        self.extractions += 1
+        return self.model.extract_se(audio)[0]
+
+    async def convert_voice_multi(self, audio, target_embeddings, model_id=None, source_embedding=None):
+        return self.processor.voice_conversion_multi(audio, target_embeddings, source_embedding)
+
+
+class FakeLoadingService:
+    sample_rate = 24000
+
+
+def make_conversor(batch_size=8) -> ConversorService:
+    service = object.__new__(ConversorService)
+    service.core_service = FakeCoreService()
+    service.audio_loading_service = FakeLoadingService()
+    service.admission_controller = FakeAdmission()
+    service.app = type("App", (), {"envs": type("Envs", (), {"MULTI_TARGET_BATCH_SIZE": batch_size})()})()
+    return service
+
+
+def test_processor_analyses_the_source_once_for_every_target():
+    model = FakeModel()
+    src = np.linspace(-0.5, 0.5, 240, dtype=np.float32)
+    outputs = VoiceConverterProcessor(model).voice_conversion_multi(
+        src, [torch.full((1, 4, 1), 2.0), torch.full((1, 4, 1), 3.0)]
+    )
+    assert model.extractions == 1 and model.batches == [2]
+    np.testing.assert_allclose(outputs[0], src * 2)
+    np.testing.assert_allclose(outputs[1], src * 3)
+
+
+def test_service_converts_in_batches_with_one_source_analysis():
+    async def scenario():
+        service = make_conversor(batch_size=2)
+        audio = np.full(24000, 0.1, dtype=np.float32)
+        results = [item async for item in service.convert_audio_array_multi(audio, ["alice", "bruno", "carla"])]
+        return service, results
+
+    service, results = asyncio.run(scenario())
+    assert [speaker for speaker, _ in results] == ["alice", "bruno", "carla"]
+    np.testing.assert_allclose(results[2][1], 0.3, rtol=1e-6)
+    # extracted once up front, batches only recompute the spectrogram
+    assert service.core_service.extractions == 1 and service.core_service.model.extractions == 1
+    assert service.core_service.model.batches == [2, 1]
+    # admission is charged per target
+    assert service.admission_controller.durations == [2.0, 1.0]
+
+
+def test_stream_zip_yields_a_valid_archive_entry_by_entry():
+    async def entries():
+        yield "a.wav", b"first"
+        yield "b.wav", b"second"
+
+    async def collect():
+        return [chunk async for chunk in stream_zip(entries())]
+
+    chunks = asyncio.run(collect())
+    assert len(chunks) == 3 and all(chunks[:2])
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+        assert archive.namelist() == ["a.wav", "b.wav"]
+        assert archive.read("b.wav") == b"second"
+
+
+class FakeSynthesizer:
+    async def synthesize_samples(self, dto):
+        return np.full(2400, 0.1, dtype=np.float32)
+
+
+@pytest.fixture
+def client():
+    from app import server
+
+    conversor = make_conversor()
+    server.dependency_overrides[get_conversor_service] = lambda: conversor
+    server.dependency_overrides[get_synthesizer_service] = lambda: FakeSynthesizer()
+    yield TestClient(server)
+    server.dependency_overrides.clear()
+
+
+def test_multi_route_returns_one_wav_per_speaker(client):
+    response = client.post("/api/rvc/multi", data={"text": "Hello.", "speakers": ["alice,bruno", "carla", "alice"]})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert archive.namelist() == ["alice.wav", "bruno.wav", "carla.wav"]
+        audio, sample_rate = sf.read(io.BytesIO(archive.read("bruno.wav")))
+    assert sample_rate == 24000 and len(audio) == 2400
+
+    assert client.post("/api/rvc/multi", data={"text": "Hello.", "speakers": "alice,nobody"}).status_code == 404
+    assert client.post("/api/rvc/multi", data={"speakers": "alice"}).status_code == 422
+
+
+def test_multi_target_inference_runs_through_the_model_adapter():
+    from TTS.vc.configs.openvoice_config import OpenVoiceConfig  # type: ignore
+    from TTS.vc.models.openvoice import OpenVoice  # type: ignore
+    from project.conversor.wrapper.model_wrapper import VoiceConverterModelWrapper
+    from project.model.factory import OpenVoiceModelAdapter
+
+    torch.manual_seed(0)
+    adapter = object.__new__(OpenVoiceModelAdapter)
+    adapter.model = OpenVoice(OpenVoiceConfig()).eval()
+    # no sampling in the encoder, so both paths give the same audio
+    adapter.model.tau = 0.0
+    adapter.config = adapter.model.config
+    wrapper = object.__new__(VoiceConverterModelWrapper)
+    wrapper.model = adapter
+    processor = VoiceConverterProcessor(wrapper)
+    audio = np.sin(np.linspace(0, 2000, 11025)).astype(np.float32) * 0.3
+    targets = [torch.randn(1, adapter.model.args.gin_channels, 1) for _ in range(2)]
+    with torch.inference_mode():
+        multi = processor.voice_conversion_multi(audio, targets)
+        single = [processor.voice_conversion_with_target_se(audio, target) for target in targets]
+    assert len(multi) == 2
+    for a, b in zip(multi, single):
+        assert np.allclose(a, b, atol=1e-5)
@@ -0,0 +1,45 @@
+"""
+Testes unitários para o caminho PCM sem decodificação do TTS
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+from project.conversor.audio.pcm import decode_tts_audio, encode_wav, float_to_pcm16
+from project.dto.tts_dto import RvcTtsDTO
+from project.tts.tts_provider import TtsProvider
+from project.tts.tts_service import SynthesizerService
+
+
+def tone(seconds=0.5, rate=24000):
+    t = np.arange(int(seconds * rate)) / rate
+    return (0.3 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+
+def test_raw_pcm_is_decoded_without_codecs():
+    audio = tone()
+    decoded = decode_tts_audio(float_to_pcm16(audio), "audio/pcm")
+    assert decoded.dtype == np.float32
+    np.testing.assert_allclose(decoded, audio, atol=1 / 16384)
+
+
+def test_wav_bodies_are_accepted_at_the_native_rate_only():
+    audio = tone()
+    np.testing.assert_allclose(decode_tts_audio(encode_wav(audio), "audio/wav"), audio, atol=1 / 16384)
+    with pytest.raises(ValueError):
+        decode_tts_audio(encode_wav(audio, samplerate=22050), "audio/wav")
+
+
+def test_synthesizer_requests_pcm_and_returns_samples():
+    class FakeProvider(TtsProvider):
+        async def synthesize(self, text, options=None):
+            self.options = options
+            return {"success": True, "audio": float_to_pcm16(tone()), "content_type": "audio/pcm"}
+
+    service = SynthesizerService()
+    service.tts_provider = FakeProvider()
+    samples = asyncio.run(service.synthesize_samples(RvcTtsDTO(text="hello")))
+
+    assert service.tts_provider.options["response_format"] == "pcm"
+    assert samples.shape == (12000,)
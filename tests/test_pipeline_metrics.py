@@ -0,0 +1,99 @@
+"""
+Testes unitários para as métricas por estágio do pipeline
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+import numpy as np
+import pytest
+import torch
+from fastapi.testclient import TestClient
+from project.conversor.coalescing import ConversionCoalescer
+from project.conversor.processor import VoiceConverterProcessor
+from project.conversor.service import ConversorService
+from project.core.application import Application
+from project.dto.tts_dto import RvcDTO
+from project.shared.metrics.pipeline import in_flight, input_duration, real_time_factor, stage
+from project.shared.metrics.registry import Histogram
+
+
+def test_histogram_time_observes_the_block_even_when_it_raises():
+    histogram = Histogram("test_block_seconds", "test")
+    with histogram.time():
+        pass
+    with pytest.raises(ValueError):
+        with histogram.time():
+            raise ValueError("boom")
+    assert histogram.count == 2
+
+
+class FakeModel:
+    def extract_se(self, src):
+        return torch.zeros(1, 4, 1), torch.as_tensor(src).view(1, 1, -1)
+
+    def inference_multi(self, src_spec, g_src, g_tgts):
+        return src_spec.expand(g_tgts.shape[0], -1, -1)
+
+
+def test_processor_times_each_stage():
+    before = {name: stage(name).count for name in ("extract_se", "inference", "postprocess")}
+    VoiceConverterProcessor(FakeModel()).voice_conversion_multi(np.zeros(240, dtype=np.float32), [torch.ones(1, 4, 1)])
+    assert all(stage(name).count == count + 1 for name, count in before.items())
+
+
+class FakeCoreService:
+    def get_speaker_embedding(self, speaker, model_id=None):
+        return torch.ones(1, 4, 1)
+
+    async def convert_voice(self, audio, target_embedding, model_id=None, source_embedding=None):
+        assert in_flight.value == 1
+        await asyncio.sleep(0.01)
+        return audio
+
+
+class FakeAdmission:
+    @asynccontextmanager
+    async def admit(self, duration_s, model_id=None):
+        yield
+
+
+def test_conversions_report_duration_real_time_factor_and_in_flight():
+    service = object.__new__(ConversorService)
+    service.core_service = FakeCoreService()
+    service.audio_loading_service = type("Loading", (), {"sample_rate": 24000})()
+    service.admission_controller = FakeAdmission()
+    service.app = Application()
+    service.coalescer = ConversionCoalescer()
+    durations, factors, factor_sum = input_duration.count, real_time_factor.count, real_time_factor.sum
+
+    asyncio.run(service.convert_audio_array(RvcDTO(target_voice="voice"), np.zeros(12000, dtype=np.float32)))
+    assert input_duration.count == durations + 1
+    assert real_time_factor.count == factors + 1
+    assert in_flight.value == 0
+    # at least 10 ms for 0.5 s of audio
+    assert 0.02 <= real_time_factor.sum - factor_sum < 1.0
+
+
+def test_metrics_endpoint_exposes_stages_and_process_memory():
+    from app import server
+
+    text = TestClient(server).get("/metrics").text
+    assert 'pipeline_stage_seconds_bucket{stage="kokoro",le="+Inf"}' in text
+    assert "conversion_real_time_factor_count" in text
+    assert "speaker_embedding_cache_hit_ratio" in text
+    rss = next(line for line in text.splitlines() if line.startswith("process_resident_memory_bytes "))
+    assert float(rss.split()[1]) > 0
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_process_metrics_follow_the_forked_worker():
+    from project.shared.metrics import pipeline
+
+    pid = os.fork()
+    if pid == 0:
+        # a preloaded worker must report its own process, not the master's
+        os._exit(0 if pipeline._process.pid == os.getpid() else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
@@ -0,0 +1,155 @@
+"""
+Testes unitários para a captura de perfis sob demanda e o header Server-Timing
+"""
+
+import asyncio
+import io
+import json
+import os
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+from fastapi.testclient import TestClient
+from project.conversor.core_conversion_service import CoreConversionService
+from project.core.application import Application
+from project.router.profiling import ProfilingMiddleware
+from project.router.server_timing import ServerTimingMiddleware
+from project.shared.metrics.pipeline import add_request_timing, stage
+from project.shared.metrics.profiling import Profiler
+
+
+def test_the_server_timing_header_lists_the_stages_of_the_request():
+    service = object.__new__(CoreConversionService)
+    service.conversion_executor = ThreadPoolExecutor(max_workers=1)
+
+    async def app(scope, receive, send):
+        stage("decode").observe(0.012)
+        add_request_timing("admission", 0.5)
+        # stages on the conversion workers count too
+        await service._run_on_workers(stage("inference").observe, 1.25)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def main():
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        await ServerTimingMiddleware(app)({"type": "http", "path": "/api/rvc"}, None, send)
+        return dict(sent[0]["headers"])[b"server-timing"].decode()
+
+    header = asyncio.run(main())
+    assert header.startswith("decode;dur=12.0, admission;dur=500.0, inference;dur=1250.0, total;dur=")
+
+
+def test_every_response_of_the_app_carries_server_timing():
+    from app import server
+
+    response = TestClient(server).get("/metrics")
+    assert "total;dur=" in response.headers["server-timing"]
+
+
+def _work(seconds):
+    deadline = time.perf_counter() + seconds
+    a = torch.randn(64, 64)
+    while time.perf_counter() < deadline:
+        a = torch.tanh(a @ a)
+    return "converted"
+
+
+def _request(profiler, path="/api/rvc", seconds=0.05):
+    """One request through the profiling middleware, converting on a worker"""
+    service = object.__new__(CoreConversionService)
+    service.conversion_executor = ThreadPoolExecutor(max_workers=1)
+
+    async def app(scope, receive, send):
+        await service._run_on_workers(_work, seconds)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def main():
+        async def send(message):
+            pass
+
+        middleware = ProfilingMiddleware(app, paths=["/api/rvc"], profiler=profiler)
+        await middleware({"type": "http", "path": path, "method": "POST"}, None, send)
+
+    # asyncio.run waits for the export on the default executor
+    asyncio.run(main())
+
+
+def test_the_next_requests_are_profiled_and_saved(tmp_path):
+    profiler = Profiler(str(tmp_path), sample_interval_s=0.001)
+    profiler.arm(2)
+    for _ in range(3):
+        _request(profiler)
+
+    captures = profiler.captures()
+    assert len(captures) == 2 and not profiler.get_status()["armed"]
+    files = [os.path.basename(path) for path in profiler.capture_files(captures[0]["id"])]
+    assert files == ["python.folded", "summary.json", "torch-0.json", "torch_ops.txt"]
+    assert captures[0]["path"] == "/api/rvc" and captures[0]["status"] == 200
+    assert captures[0]["torch_traces"] == 1 and captures[0]["python_samples"] > 0
+    with open(os.path.join(tmp_path, captures[0]["id"], "python.folded")) as f:
+        assert any(line.startswith("worker;") and "_work (test_profiling.py" in line for line in f)
+    with open(os.path.join(tmp_path, captures[0]["id"], "torch-0.json")) as f:
+        assert any(event.get("name") == "aten::mm" for event in json.load(f)["traceEvents"])
+
+
+def test_only_requests_above_the_threshold_are_kept(tmp_path):
+    profiler = Profiler(str(tmp_path), max_captures=2)
+    profiler.arm(2, min_duration_ms=150)
+    fast, slow, slower, late = (profiler.start("/api/rvc") for _ in range(4))
+    assert profiler.get_status()["active"] == 4
+    assert not profiler.finish(fast, {"path": "/api/rvc", "duration_ms": 20.0})
+    assert profiler.finish(slow, {"path": "/api/rvc", "duration_ms": 400.0})
+    assert profiler.finish(slower, {"path": "/api/rvc", "duration_ms": 900.0})
+    # two slow requests were asked for
+    assert not profiler.finish(late, {"path": "/api/rvc", "duration_ms": 900.0})
+    assert [capture["duration_ms"] for capture in profiler.captures()] == [900.0, 400.0]
+    assert not os.path.exists(fast.directory) and profiler.start("/api/rvc") is None
+
+    # the oldest captures go past max_captures
+    profiler.arm(1)
+    newest = profiler.start("/api/rvc")
+    profiler.finish(newest, {"path": "/api/rvc", "duration_ms": 10.0})
+    assert [capture["id"] for capture in profiler.captures()] == [newest.id, slower.id]
+
+
+def test_the_admin_endpoints_arm_list_and_download_captures(tmp_path, monkeypatch):
+    from app import server
+
+    profiler = Profiler(str(tmp_path))
+    monkeypatch.setattr(Profiler, "_instance", profiler)
+    monkeypatch.setattr(Application().envs, "ADMIN_TOKEN", "")
+    client = TestClient(server)
+    assert client.post("/api/admin/profiling", json={"requests": 1}).status_code == 403
+
+    monkeypatch.setattr(Application().envs, "ADMIN_TOKEN", "secret")
+    assert client.get("/api/admin/profiling", headers={"Authorization": "Bearer x"}).status_code == 401
+    client.headers["Authorization"] = "Bearer secret"
+    armed = client.post("/api/admin/profiling", json={"requests": 3, "min_duration_ms": 500}).json()
+    assert armed["armed"] and armed["remaining"] == 3 and armed["min_duration_ms"] == 500
+    assert client.delete("/api/admin/profiling").json()["armed"] is False
+
+    profiler.arm(1)
+    _request(profiler)
+    status = client.get("/api/admin/profiling").json()
+    capture_id = status["captures"][0]["id"]
+    response = client.get(f"/api/admin/profiling/{capture_id}")
+    assert response.status_code == 200 and response.headers["content-type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert "summary.json" in archive.namelist() and "torch-0.json" in archive.namelist()
+    assert client.get("/api/admin/profiling/..%2F..").status_code == 404
+    assert client.get("/api/admin/profiling/20240101-000000-abcdef").status_code == 404
+
+
+def test_nothing_is_profiled_unless_armed_and_only_on_the_conversion_paths(tmp_path):
+    profiler = Profiler(str(tmp_path))
+    _request(profiler)
+    profiler.arm(1)
+    _request(profiler, path="/health")
+    assert profiler.captures() == [] and profiler.get_status()["remaining"] == 1
@@ -0,0 +1,169 @@
+"""
+Testes unitários para os níveis de qualidade sob sobrecarga
+"""
+
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+import torch
+from project.conversor.admission.controller import AdmissionRejected
+from project.conversor.admission.quality import (
+    FULL,
+    QualityGovernor,
+    get_quality_tier,
+    reset_quality_tier,
+    set_quality_tier,
+)
+from project.conversor.service import ConversorService
+from project.dto.tts_dto import RvcDTO
+from project.router.quality_tier import QualityTierMiddleware
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_governor(depth=0, **kwargs):
+    state = {"depth": depth}
+    clock = Clock()
+    governor = QualityGovernor(queue_depth=lambda: state["depth"], clock=clock, **kwargs)
+    return governor, state, clock
+
+
+def test_the_queue_depth_escalates_at_once_and_the_cooldown_steps_down_one_level_at_a_time():
+    governor, state, clock = make_governor(queue_depths=(4, 8), cooldown_s=15)
+    assert governor.choose().name == "full"
+    state["depth"] = 5
+    assert governor.choose().name == "reduced"
+    state["depth"] = 9
+    assert governor.choose().name == "capped"
+
+    state["depth"] = 0
+    assert governor.choose().name == "capped"
+    clock.now += 10
+    assert governor.choose().name == "capped"
+    clock.now += 5
+    assert governor.choose().name == "reduced"
+    clock.now += 14
+    assert governor.choose().name == "reduced"
+    clock.now += 1
+    assert governor.choose().name == "full"
+
+
+def test_the_latency_p95_over_the_window_escalates_past_the_slo():
+    governor, _, clock = make_governor(slo_s=1.0, window_s=30, min_samples=10)
+    for _ in range(9):
+        governor.observe(5.0)
+    # too few samples to judge
+    assert governor.update().name == "full"
+    governor.observe(1.5)
+    assert governor.update().name == "capped"
+    for _ in range(200):
+        governor.observe(1.5)
+    assert governor.target_level() == 1
+    clock.now += 31
+    assert governor.latency_p95() is None and governor.target_level() == 0
+
+
+def test_the_middleware_sets_the_tier_and_reports_it_in_a_header():
+    governor, state, _ = make_governor(queue_depths=(1, 2))
+    state["depth"] = 1
+    seen = {}
+
+    async def app(scope, receive, send):
+        seen.setdefault(scope["path"], get_quality_tier())
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"audio/wav")]})
+        await send({"type": "http.response.body", "body": b"RIFF"})
+
+    async def main():
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        middleware = QualityTierMiddleware(app, paths=["/api/rvc"], governor=governor)
+        await middleware({"type": "http", "path": "/api/rvc"}, None, send)
+        await middleware({"type": "http", "path": "/health"}, None, send)
+        return sent
+
+    sent = asyncio.run(main())
+    assert seen["/api/rvc"].name == "reduced" and seen["/health"] is FULL
+    assert (b"x-quality-tier", b"reduced") in sent[0]["headers"]
+    assert (b"x-quality-tier", b"reduced") not in sent[2]["headers"]
+    assert len(governor._latencies) == 1
+    assert get_quality_tier() is FULL
+
+
+def test_the_capped_tier_rejects_long_inputs_before_they_queue():
+    governor, state, _ = make_governor(queue_depths=(1, 2), max_input_s=2.0)
+    state["depth"] = 2
+    service = object.__new__(ConversorService)
+    service.audio_loading_service = type("Loading", (), {"sample_rate": 24000})()
+    service.app = type("App", (), {"envs": type("Envs", (), {"COALESCE_CONVERSIONS": False})()})()
+    service._convert_admitted = lambda *args: asyncio.sleep(0, result="converted")
+
+    token = set_quality_tier(governor.choose())
+    try:
+        assert asyncio.run(service.convert_audio_array(RvcDTO(target_voice="voice"), np.zeros(24000))) == "converted"
+        with pytest.raises(AdmissionRejected) as error:
+            asyncio.run(service.convert_audio_array(RvcDTO(target_voice="voice"), np.zeros(72000)))
+    finally:
+        reset_quality_tier(token)
+    assert error.value.reason == "input_too_long"
+
+
+def test_the_reduced_precision_decoder_stays_close_to_the_full_one():
+    from TTS.vc.configs.openvoice_config import OpenVoiceConfig  # type: ignore
+    from TTS.vc.models.openvoice import OpenVoice  # type: ignore
+    from project.model.factory import OpenVoiceModelAdapter, VoiceModel
+
+    torch.manual_seed(0)
+    adapter = object.__new__(OpenVoiceModelAdapter)
+    adapter.model = OpenVoice(OpenVoiceConfig()).eval()
+    adapter.config = adapter.model.config
+    adapter._reduced_dec, adapter._reduced_lock = None, threading.Lock()
+    # tau 0 makes the posterior encoder deterministic
+    adapter.model.tau = 0.0
+    audio = np.sin(np.linspace(0, 2000, 11025)).astype(np.float32) * 0.3
+    with torch.inference_mode():
+        g, spec = adapter.extract_se(audio)
+        aux_input = {"g_src": g, "g_tgt": torch.roll(g, 1, dims=1)}
+        full = adapter.inference(spec, aux_input)["model_outputs"]
+        reduced = adapter.inference_reduced_precision(spec, aux_input)["model_outputs"]
+        again = adapter.inference(spec, aux_input)["model_outputs"]
+    assert reduced.dtype == torch.float32 and reduced.shape == full.shape
+    assert float(torch.linalg.norm(reduced - full) / torch.linalg.norm(full)) < 0.2
+    # the full model keeps its float32 weight-normalized decoder
+    assert torch.equal(again, full)
+
+    # models without a cheaper variant run their normal inference
+    only_inference = type("OnlyInference", (), {"inference": lambda self, spec, aux: "full"})()
+    assert VoiceModel.inference_reduced_precision(only_inference, spec, {}) == "full"
+
+
+def test_the_memory_footprint_counts_the_reduced_precision_decoder():
+    from TTS.vc.configs.openvoice_config import OpenVoiceConfig  # type: ignore
+    from TTS.vc.models.openvoice import OpenVoice  # type: ignore
+    from project.conversor.wrapper.model_wrapper import VoiceConverterModelWrapper
+    from project.model.factory import OpenVoiceModelAdapter
+    from project.shared.system.torch_util import module_memory_bytes
+
+    adapter = object.__new__(OpenVoiceModelAdapter)
+    adapter.model = OpenVoice(OpenVoiceConfig()).eval()
+    adapter._reduced_dec, adapter._reduced_lock = None, threading.Lock()
+    wrapper = object.__new__(VoiceConverterModelWrapper)
+    wrapper.model = adapter
+    full = wrapper.memory_footprint()
+    assert full == module_memory_bytes(adapter.model)
+
+    adapter.prepare_reduced_precision()
+    # the bfloat16 copy is half the float32 decoder
+    assert wrapper.memory_footprint() == full + module_memory_bytes(adapter.model.dec) // 2
+    adapter.to_cpu()
+    assert adapter._reduced_dec is not None and wrapper.memory_footprint() > full
@@ -0,0 +1,148 @@
+"""
+Testes unitários para o escalonamento por prioridade, deadline e tenant
+"""
+
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+from project.conversor.admission.controller import AdmissionController, AdmissionRejected, CostProfile
+from project.conversor.admission.scheduler import (
+    BULK,
+    INTERACTIVE,
+    STANDARD,
+    FairQueue,
+    SchedulingContext,
+    Ticket,
+    get_scheduling_context,
+    parse_tenant_weights,
+    set_scheduling_context,
+    tenant_id,
+)
+from project.router.dependencies import scheduling
+from project.shared.metrics.registry import MetricsRegistry
+
+MB = 1024 * 1024
+PROFILE = CostProfile(base_memory_bytes=0, memory_bytes_per_second=100 * MB, base_seconds=0, seconds_per_second=0.01)
+
+
+def make_controller(max_queue=8, queue_timeout_s=5.0, tenant_weights=None):
+    controller = AdmissionController(
+        memory_budget_bytes=100 * MB,
+        max_queue=max_queue,
+        queue_timeout_s=queue_timeout_s,
+        memory_headroom_bytes=0,
+        available_memory=lambda: 10_000 * MB,
+        tenant_weights=tenant_weights,
+    )
+    controller.set_profile(None, PROFILE)
+    return controller
+
+
+def ticket(tenant, priority=STANDARD, seconds=1.0):
+    return Ticket(None, 0, seconds, SchedulingContext(priority=priority, tenant=tenant))
+
+
+def test_fair_queue_interleaves_tenants_by_weight_and_serves_classes_by_priority():
+    queue = FairQueue(parse_tenant_weights("heavy:1, light:2"))
+    for _ in range(4):
+        queue.push(ticket("heavy"))
+    queue.push(ticket("light"))
+    queue.push(ticket("light"))
+    queue.push(ticket("bulk-user", priority=BULK))
+    queue.push(ticket("live", priority=INTERACTIVE))
+    order = [(t.context.priority, t.context.tenant) for t in (queue.pop() for _ in range(len(queue)))]
+    assert order == [
+        (INTERACTIVE, "live"),
+        # light weighs 2, so both of its requests finish (virtually) before heavy's second one
+        (STANDARD, "light"),
+        (STANDARD, "heavy"),
+        (STANDARD, "light"),
+        (STANDARD, "heavy"),
+        (STANDARD, "heavy"),
+        (STANDARD, "heavy"),
+        (BULK, "bulk-user"),
+    ]
+
+
+async def convert(controller, order, name, context, hold):
+    set_scheduling_context(context)
+    async with controller.admit(1.0):
+        order.append(name)
+        await hold.wait()
+
+
+def test_interactive_requests_overtake_a_bulk_backlog_and_evict_it_when_full():
+    controller = make_controller(max_queue=2)
+    order = []
+
+    async def scenario():
+        hold = asyncio.Event()
+        running = asyncio.create_task(convert(controller, order, "running", SchedulingContext(priority=BULK), hold))
+        await asyncio.sleep(0)
+        bulk = [
+            asyncio.create_task(convert(controller, order, f"bulk{i}", SchedulingContext(priority=BULK), hold))
+            for i in range(2)
+        ]
+        await asyncio.sleep(0)
+        live = asyncio.create_task(convert(controller, order, "live", SchedulingContext(priority=INTERACTIVE), hold))
+        await asyncio.sleep(0)
+        # the queue was full: the newest bulk request made room
+        with pytest.raises(AdmissionRejected) as error:
+            await bulk[1]
+        assert error.value.reason == "preempted"
+        hold.set()
+        await asyncio.gather(running, bulk[0], live)
+
+    asyncio.run(scenario())
+    assert order == ["running", "live", "bulk0"]
+    assert controller.reserved_bytes == 0 and not controller._waiters
+
+
+def test_unmeetable_deadlines_are_dropped_before_running():
+    controller = make_controller()
+    order = []
+
+    async def scenario():
+        hold = asyncio.Event()
+        running = asyncio.create_task(convert(controller, order, "running", SchedulingContext(), hold))
+        await asyncio.sleep(0)
+        # 1 s of audio needs 10 ms of compute
+        with pytest.raises(AdmissionRejected) as error:
+            await convert(controller, order, "late", SchedulingContext(deadline=time.monotonic() + 0.005), hold)
+        assert error.value.reason == "deadline"
+
+        queued = asyncio.create_task(
+            convert(controller, order, "expires", SchedulingContext(deadline=time.monotonic() + 0.05), hold)
+        )
+        await asyncio.sleep(0.1)
+        with pytest.raises(AdmissionRejected) as error:
+            await queued
+        assert error.value.reason == "deadline"
+        hold.set()
+        await running
+
+    asyncio.run(scenario())
+    assert order == ["running"]
+    assert controller.reserved_bytes == 0 and not controller._waiters
+    text = MetricsRegistry().render()
+    assert 'admission_deadline_dropped_total{priority="standard"}' in text
+    assert 'admission_queue_depth{priority="bulk"}' in text
+    assert 'admission_class_wait_seconds_count{priority="standard"}' in text
+
+
+def test_scheduling_dependency_reads_the_headers():
+    async def scenario():
+        context = await scheduling(INTERACTIVE)(x_priority=None, x_deadline_ms=500, x_api_key="key-a")
+        return context, get_scheduling_context()
+
+    context, current = asyncio.run(scenario())
+    assert current is context
+    assert context.priority == INTERACTIVE and context.tenant == tenant_id("key-a")
+    assert 0.4 < context.remaining() <= 0.5
+
+    with pytest.raises(HTTPException):
+        asyncio.run(scheduling(STANDARD)(x_priority="urgent", x_deadline_ms=None, x_api_key=None))
+    with pytest.raises(AdmissionRejected):
+        asyncio.run(scheduling(STANDARD)(x_priority=None, x_deadline_ms=0, x_api_key=None))
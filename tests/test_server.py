@@ -0,0 +1,58 @@
+"""
+Testes unitários para o servidor de produção (gunicorn + workers uvicorn)
+"""
+
+import gc
+import os
+import runpy
+import threading
+
+import torch
+from project.core import server
+from project.core.startup import StartupManager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_torch_threads_split_the_cpus_between_workers(monkeypatch):
+    monkeypatch.setattr(server, "available_cpus", lambda: 8)
+    assert server.torch_threads_per_worker(4) == 2
+    assert server.torch_threads_per_worker(16) == 1
+    assert server.torch_threads_per_worker(4, configured=3) == 3
+
+
+def test_memory_watchdog_restarts_only_over_the_limit():
+    exceeded = threading.Event()
+    below = server.MemoryWatchdog(2**50, interval_s=0.01, on_exceeded=exceeded.set)
+    below.start()
+    assert not exceeded.wait(0.1)
+    below.stop()
+    below.join()
+
+    above = server.MemoryWatchdog(1, interval_s=0.01, on_exceeded=exceeded.set)
+    above.start()
+    assert exceeded.wait(2)
+    above.join(2)
+    assert not above.is_alive()
+
+
+def test_preload_initializes_in_the_master_and_freezes_the_heap(monkeypatch):
+    startup = StartupManager()
+    monkeypatch.setattr(startup, "initialize", lambda: setattr(startup, "stage", "ready"))
+    threads = torch.get_num_threads()
+    try:
+        assert server.preload_services()
+        assert startup.is_ready() and gc.get_freeze_count() > 0
+        assert torch.get_num_threads() == 1
+    finally:
+        gc.unfreeze()
+        torch.set_num_threads(threads)
+        startup.stage = "pending"
+
+
+def test_gunicorn_config_uses_the_uvloop_worker_and_recycles_workers():
+    config = runpy.run_path(os.path.join(ROOT, "gunicorn.conf.py"))
+    assert config["worker_class"] == "project.core.server.UvloopWorker"
+    assert server.UvloopWorker.CONFIG_KWARGS == {"loop": "uvloop", "http": "httptools"}
+    assert config["preload_app"] is True and config["max_requests"] > 0 and config["max_requests_jitter"] > 0
+    assert callable(config["on_starting"]) and callable(config["post_fork"])
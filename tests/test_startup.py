@@ -0,0 +1,60 @@
+"""
+Testes unitários para a inicialização em segundo plano e os health checks
+"""
+
+import subprocess
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+from project.core.startup import StartupManager
+
+
+@pytest.fixture
+def startup():
+    startup = StartupManager()
+    startup.stage = "pending"
+    startup.progress = {"done": 0, "total": 0}
+    startup.error = None
+    yield startup
+    startup.stage = "pending"
+
+
+@pytest.fixture
+def client():
+    from app import server
+
+    # no context manager: the lifespan (and the real model load) is not started
+    return TestClient(server)
+
+
+def test_importing_app_does_not_load_torch_or_tts():
+    code = "import sys, app; print(any(m in sys.modules for m in ('torch', 'TTS')))"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert output.stdout.strip().splitlines()[-1] == "False"
+
+
+def test_ready_reports_progress_while_loading(startup, client):
+    startup.report_progress("loading_speakers", 3, 10)
+
+    assert client.get("/health/live").status_code == 200
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["stage"] == "loading_speakers"
+    assert response.json()["progress"] == {"done": 3, "total": 10}
+
+
+def test_requests_are_rejected_until_ready(startup, client):
+    response = client.post("/api/rvc", files={"audio_file": ("a.wav", b"RIFF")})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+
+    startup.stage = "ready"
+    assert client.get("/health/ready").status_code == 200
+
+
+def test_failed_startup_fails_liveness(startup, client):
+    startup.stage = "failed"
+    startup.error = "Model base path does not exist"
+    assert client.get("/health/live").status_code == 503
+    assert client.get("/health/ready").json()["status"] == "failed"
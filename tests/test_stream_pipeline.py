@@ -0,0 +1,95 @@
+"""
+Testes unitários para o pipeline de streaming TTS → conversão
+"""
+
+import asyncio
+import struct
+
+import numpy as np
+from project.conversor.audio.crossfade import crossfade, join_segments
+from project.conversor.audio.pcm import float_to_pcm16, pcm16_to_float, wav_stream_header
+from project.conversor.stream.pipeline import StreamingConversionPipeline
+
+SAMPLE_RATE = 24000
+
+
+def speech(seconds):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.2 * np.sin(2 * np.pi * 200 * t) * (np.mod(t, 0.7) < 0.5)).astype(np.float32)
+
+
+async def chunks(data, size, log=None):
+    # odd sizes split int16 samples across chunks, as the network does
+    for offset in range(0, len(data), size):
+        if log is not None:
+            log.append("chunk")
+        yield data[offset:offset + size]
+        await asyncio.sleep(0)
+
+
+async def identity(audio):
+    return audio
+
+
+def collect(pipeline, source):
+    async def scenario():
+        return [audio async for audio in pipeline.run(source)]
+
+    return asyncio.run(scenario())
+
+
+def test_identity_conversion_reconstructs_the_stream():
+    audio = speech(5.0)
+    pcm = float_to_pcm16(audio)
+    pipeline = StreamingConversionPipeline(identity, segment_s=1.0)
+
+    output = np.concatenate(collect(pipeline, chunks(pcm, 4001)))
+
+    assert len(output) == len(audio)
+    np.testing.assert_allclose(output, pcm16_to_float(pcm), atol=1e-6)
+    assert len(pipeline.segment_timings) > 3
+
+
+def test_first_audio_is_sent_before_the_input_ends():
+    events = []
+    pipeline = StreamingConversionPipeline(identity, first_segment_s=0.25, segment_s=1.0)
+
+    async def scenario():
+        async for _ in pipeline.run(chunks(float_to_pcm16(speech(3.0)), 2400, events)):
+            events.append("audio")
+
+    asyncio.run(scenario())
+    assert events.index("audio") < len(events) - 1 - events[::-1].index("chunk")
+    assert pipeline.time_to_first_audio is not None
+
+
+def test_segment_boundaries_are_crossfaded():
+    # a converter that shifts the level per call makes the seams visible
+    calls = []
+
+    async def convert(audio):
+        calls.append(len(audio))
+        return np.full(len(audio), float(len(calls)), dtype=np.float32)
+
+    pipeline = StreamingConversionPipeline(convert, first_segment_s=0.5, segment_s=0.5, overlap_s=0.05)
+    output = np.concatenate(collect(pipeline, chunks(float_to_pcm16(speech(1.2)), 4800)))
+
+    assert np.max(np.abs(np.diff(output))) < 0.001
+
+
+def test_crossfade_helpers():
+    tail = np.ones(100, dtype=np.float32)
+    head = np.zeros(100, dtype=np.float32)
+    faded = crossfade(tail, head)
+    assert faded[0] == 1.0 and faded[-1] == 0.0
+
+    joined = join_segments([np.ones(300, dtype=np.float32), np.ones(300, dtype=np.float32)], overlap=100)
+    assert len(joined) == 500
+    np.testing.assert_allclose(joined, 1.0)
+
+
+def test_wav_stream_header_describes_16_bit_mono_pcm():
+    header = wav_stream_header(SAMPLE_RATE)
+    assert header[:4] == b"RIFF" and header[8:12] == b"WAVE" and header[36:40] == b"data"
+    _, audio_format, channels, rate, _, _, bits = struct.unpack("<IHHIIHH", header[16:36])
+    assert (audio_format, channels, rate, bits) == (1, 1, SAMPLE_RATE, 16)
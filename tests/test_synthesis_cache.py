@@ -0,0 +1,112 @@
+"""
+Testes unitários para o cache de sínteses do TTS
+"""
+
+import asyncio
+
+from project.dto.tts_dto import RvcTtsDTO
+from project.tts.synthesis_cache import SynthesisCache, cache_key
+from project.tts.tts_provider import TtsProvider
+from project.tts.tts_service import SynthesizerService
+
+
+def payload(text, **options):
+    return TtsProvider(url="http://kokoro").build_payload(text, options)
+
+
+def test_key_normalizes_text_and_covers_synthesis_options():
+    assert cache_key(payload("Olá,  mundo ")) == cache_key(payload("Olá, mundo"))
+    assert cache_key(payload("hello", response_format="pcm")) == cache_key(payload("hello", stream=True))
+    assert cache_key(payload("hello")) != cache_key(payload("hello", speed=1.2))
+    assert cache_key(payload("hello")) != cache_key(payload("hello", lang_code="p"))
+
+
+def test_memory_tier_is_a_bounded_lru():
+    cache = SynthesisCache(max_memory_bytes=10)
+
+    async def scenario():
+        for key in ("a", "b"):
+            await cache.get_or_synthesize(key, lambda: asyncio.sleep(0, b"12345"))
+        cache.get("a")  # a becomes the most recently used
+        await cache.get_or_synthesize("c", lambda: asyncio.sleep(0, b"12345"))
+
+    asyncio.run(scenario())
+    assert list(cache._memory) == ["a", "c"]
+    assert cache.memory_bytes == 10
+
+
+def test_concurrent_identical_requests_are_coalesced():
+    cache = SynthesisCache(max_memory_bytes=1024)
+    calls = []
+
+    async def synthesize():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return b"pcm"
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_or_synthesize("k", synthesize) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == [b"pcm"] * 5
+    assert len(calls) == 1
+    assert cache.hit_ratio() > 0
+
+
+def test_errors_reach_every_coalesced_request():
+    cache = SynthesisCache(max_memory_bytes=1024)
+
+    async def synthesize():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("Kokoro down")
+
+    async def scenario():
+        return await asyncio.gather(
+            *(cache.get_or_synthesize("k", synthesize) for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert not cache._in_flight and not cache._memory
+
+
+def test_disk_tier_survives_restarts_and_is_bounded(tmp_path):
+    async def fill(cache):
+        for key in ("aa1", "bb2", "cc3"):
+            await cache.get_or_synthesize(key, lambda: asyncio.sleep(0, b"x" * 100))
+
+    asyncio.run(fill(SynthesisCache(max_memory_bytes=0, disk_dir=str(tmp_path), max_disk_bytes=250)))
+
+    restarted = SynthesisCache(max_memory_bytes=0, disk_dir=str(tmp_path), max_disk_bytes=250)
+    assert restarted.disk_bytes == 200
+
+    async def read():
+        async def fail():
+            raise AssertionError("should be served from disk")
+
+        return await restarted.get_or_synthesize("cc3", fail)
+
+    assert asyncio.run(read()) == b"x" * 100
+
+
+def test_synthesizer_serves_repeated_prompts_from_the_cache():
+    class FakeProvider(TtsProvider):
+        calls = 0
+
+        async def synthesize(self, text, options=None):
+            FakeProvider.calls += 1
+            return {"success": True, "audio": b"\x00\x01" * 10, "content_type": "audio/pcm"}
+
+        async def stream(self, text, options=None):
+            raise AssertionError("cached audio must not be streamed from Kokoro")
+            yield b""
+
+    service = SynthesizerService()
+    service.tts_provider = FakeProvider()
+
+    async def scenario():
+        await service.synthesize_samples(RvcTtsDTO(text="Press one for billing."))
+        await service.synthesize_samples(RvcTtsDTO(text="Press  one for billing. "))
+        return b"".join([chunk async for chunk in service.stream_audio(RvcTtsDTO(text="Press one for billing."))])
+
+    assert asyncio.run(scenario()) == b"\x00\x01" * 10
+    assert FakeProvider.calls == 1
@@ -0,0 +1,39 @@
+"""
+Testes unitários para a divisão de textos longos
+"""
+
+from project.tts.text_splitter import split_text
+
+
+def test_splits_sentences_but_not_abbreviations_or_initials():
+    text = "Hello Mr. Smith, this is J. Doe. How are you today? I am fine!"
+    assert split_text(text, "a", max_chars=80, min_chars=0) == [
+        "Hello Mr. Smith, this is J. Doe.",
+        "How are you today?",
+        "I am fine!",
+    ]
+
+
+def test_portuguese_abbreviations():
+    text = "A Dra. Ana chegou. O Sr. João saiu."
+    assert split_text(text, "p", min_chars=0) == ["A Dra. Ana chegou.", "O Sr. João saiu."]
+
+
+def test_long_sentences_are_cut_at_clauses_then_spaces():
+    text = "first clause is here, second clause follows; " + "word " * 40
+    segments = split_text(text, "a", max_chars=50, min_chars=0)
+    assert all(len(segment) <= 50 for segment in segments)
+    assert segments[0] == "first clause is here, second clause follows;"
+    assert " ".join(segments).split() == text.split()
+
+
+def test_short_sentences_are_merged():
+    assert split_text("Yes. No. Maybe. Fine.", "a", min_chars=10) == ["Yes. No. Maybe.", "Fine."]
+
+
+def test_cjk_sentences_keep_their_punctuation():
+    assert split_text("今日は良い天気です。散歩に行きましょう！終わり", "j", min_chars=0) == [
+        "今日は良い天気です。",
+        "散歩に行きましょう！",
+        "終わり",
+    ]
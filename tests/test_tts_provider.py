@@ -0,0 +1,119 @@
+"""
+Testes unitários para o cliente Kokoro com sessão compartilhada
+"""
+
+import asyncio
+
+from aiohttp import web
+from project.tts.tts_provider import TtsProvider
+
+
+async def start_stub(latency_s=0.0):
+    stats = {"connections": set(), "in_flight": 0, "max_in_flight": 0}
+
+    async def speech(request):
+        await request.json()
+        stats["connections"].add(request.transport.get_extra_info("peername"))
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        await asyncio.sleep(latency_s)
+        stats["in_flight"] -= 1
+        return web.Response(body=b"RIFF0000WAVE", content_type="audio/wav")
+
+    app = web.Application()
+    app.router.add_post("/v1/audio/speech", speech)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/v1", stats
+
+
+def test_sequential_requests_reuse_one_connection():
+    async def scenario():
+        runner, url, stats = await start_stub()
+        provider = TtsProvider(url=url, max_connections=4)
+        try:
+            results = [await provider.synthesize(f"text {i}") for i in range(5)]
+        finally:
+            await provider.close()
+            await runner.cleanup()
+        return results, stats
+
+    results, stats = asyncio.run(scenario())
+    assert all(result["audio"] == b"RIFF0000WAVE" for result in results)
+    assert len(stats["connections"]) == 1
+    assert not results[0]["timings"]["reused_connection"]
+    assert all(result["timings"]["reused_connection"] for result in results[1:])
+
+
+def test_concurrency_is_bounded_by_the_connection_limit():
+    async def scenario():
+        runner, url, stats = await start_stub(latency_s=0.02)
+        provider = TtsProvider(url=url, max_connections=2)
+        try:
+            results = await asyncio.gather(*(provider.synthesize(f"text {i}") for i in range(8)))
+        finally:
+            await provider.close()
+            await runner.cleanup()
+        return results, stats
+
+    results, stats = asyncio.run(scenario())
+    assert stats["max_in_flight"] == 2
+    assert len(stats["connections"]) == 2
+    # requests above the limit wait for a pooled connection
+    assert max(result["timings"]["queued_s"] for result in results) > 0
+
+
+def test_timings_cover_each_phase_and_close_releases_the_session():
+    async def scenario():
+        runner, url, _ = await start_stub(latency_s=0.01)
+        provider = TtsProvider(url=url)
+        try:
+            result = await provider.synthesize("text")
+            session = await provider.get_session()
+            await provider.close()
+            return result["timings"], session.closed
+        finally:
+            await runner.cleanup()
+
+    timings, closed = asyncio.run(scenario())
+    assert set(timings) == {"queued_s", "connect_s", "ttfb_s", "body_s", "total_s", "reused_connection"}
+    assert timings["ttfb_s"] >= 0.01
+    assert timings["total_s"] >= timings["ttfb_s"]
+    assert closed
+
+
+def test_stream_requests_pcm_and_yields_chunks_as_they_arrive():
+    received = {}
+
+    async def speech(request):
+        received.update(await request.json())
+        response = web.StreamResponse()
+        await response.prepare(request)
+        for _ in range(3):
+            await response.write(b"\x00\x01" * 100)
+            await asyncio.sleep(0.01)
+        await response.write_eof()
+        return response
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_post("/v1/audio/speech", speech)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        provider = TtsProvider(url=f"http://127.0.0.1:{port}/v1")
+        try:
+            return [chunk async for chunk in provider.stream("text")]
+        finally:
+            await provider.close()
+            await runner.cleanup()
+
+    chunks = asyncio.run(scenario())
+    assert received["stream"] is True and received["response_format"] == "pcm"
+    assert len(chunks) >= 2
+    assert b"".join(chunks) == b"\x00\x01" * 300
@@ -0,0 +1,200 @@
+"""
+Testes unitários para o mapeamento de locutores para vozes do Kokoro
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+import torch
+from project.conversor.processor import VoiceConverterProcessor
+from project.tts.voice_mapping import REFERENCE_TEXT, VoiceMappingRegistry, reference_for
+
+VOICE_EMBEDDINGS = {
+    "af_bella": [1.0, 0.0, 0.0],
+    "am_adam": [0.0, 1.0, 0.0],
+    "pf_dora": [0.0, 0.0, 1.0],
+}
+SPEAKER_EMBEDDINGS = {
+    "alice": [0.9, 0.1, 0.2],
+    "bruno": [0.1, 0.8, 0.3],
+}
+
+
+class FakeSynthesizer:
+    def __init__(self, missing=()):
+        self.calls = []
+        self.langs = {}
+        self.missing = set(missing)
+
+    async def synthesize_samples(self, dto):
+        self.calls.append(dto.voice)
+        self.langs[dto.voice] = dto.lang_code
+        if dto.voice in self.missing:
+            raise Exception("voice not found")
+        await asyncio.sleep(0)
+        # the "audio" carries the voice so the fake extractor can tell them apart
+        return np.array(VOICE_EMBEDDINGS[dto.voice], dtype=np.float32)
+
+
+class FakeCoreService:
+    def __init__(self):
+        self.manager = object.__new__(type("EmbeddingManager", (), {}))
+        self.extractions = 0
+
+    def get_embedding_manager(self, model_id=None):
+        return self.manager
+
+    def get_speaker_embedding(self, speaker, model_id=None):
+        return torch.tensor(SPEAKER_EMBEDDINGS[speaker]).view(1, -1, 1)
+
+    async def extract_embedding(self, audio, model_id=None):
+        self.extractions += 1
+        return torch.from_numpy(audio).view(1, -1, 1)
+
+    async def get_speakers(self):
+        return list(SPEAKER_EMBEDDINGS)
+
+
+def test_each_speaker_gets_the_most_similar_voice():
+    async def scenario():
+        registry = VoiceMappingRegistry(FakeCoreService(), FakeSynthesizer(), voices=list(VOICE_EMBEDDINGS))
+        return await registry.get("alice"), await registry.get("bruno")
+
+    alice, bruno = asyncio.run(scenario())
+    assert alice.voice == "af_bella"
+    assert bruno.voice == "am_adam"
+    assert alice.similarity > 0.9
+    assert torch.equal(alice.source_embedding, torch.tensor(VOICE_EMBEDDINGS["af_bella"]).view(1, -1, 1))
+
+
+def test_voices_are_analysed_once_for_all_speakers_and_requests():
+    async def scenario():
+        core, synthesizer = FakeCoreService(), FakeSynthesizer()
+        registry = VoiceMappingRegistry(core, synthesizer, voices=list(VOICE_EMBEDDINGS))
+        await asyncio.gather(*(registry.get(speaker) for speaker in ["alice", "bruno"] * 5))
+        await registry.precompute()
+        return core, synthesizer, registry
+
+    core, synthesizer, registry = asyncio.run(scenario())
+    assert sorted(synthesizer.calls) == sorted(VOICE_EMBEDDINGS)
+    assert core.extractions == len(VOICE_EMBEDDINGS)
+    assert {entry["speaker"]: entry["voice"] for entry in registry.get_status()} == {
+        "alice": "af_bella",
+        "bruno": "am_adam",
+    }
+
+
+def test_a_new_model_recomputes_the_voice_embeddings():
+    async def scenario():
+        core, synthesizer = FakeCoreService(), FakeSynthesizer()
+        registry = VoiceMappingRegistry(core, synthesizer, voices=list(VOICE_EMBEDDINGS))
+        await registry.get("alice")
+        # a hot swap replaces the embedding manager
+        core.manager = object.__new__(type("EmbeddingManager", (), {}))
+        await registry.get("alice")
+        return core
+
+    assert asyncio.run(scenario()).extractions == 2 * len(VOICE_EMBEDDINGS)
+
+
+def test_voices_missing_on_kokoro_are_skipped():
+    async def scenario(missing):
+        registry = VoiceMappingRegistry(FakeCoreService(), FakeSynthesizer(missing), voices=list(VOICE_EMBEDDINGS))
+        return await registry.get("alice")
+
+    assert asyncio.run(scenario({"af_bella"})).voice == "pf_dora"
+    with pytest.raises(RuntimeError):
+        asyncio.run(scenario(set(VOICE_EMBEDDINGS)))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_a_failed_analysis_is_retried_only_after_the_backoff():
+    async def scenario():
+        clock, synthesizer = FakeClock(), FakeSynthesizer(missing=VOICE_EMBEDDINGS)
+        registry = VoiceMappingRegistry(
+            FakeCoreService(), synthesizer, voices=list(VOICE_EMBEDDINGS), retry_s=60, clock=clock
+        )
+        results = await asyncio.gather(*(registry.resolve("alice") for _ in range(5)))
+        calls_during_outage = len(synthesizer.calls)
+        synthesizer.missing = set()
+        clock.now = 30
+        before_retry = await registry.resolve("alice")
+        clock.now = 61
+        after_retry = await registry.resolve("alice")
+        return results, calls_during_outage, before_retry, after_retry, synthesizer
+
+    results, calls_during_outage, before_retry, after_retry, synthesizer = asyncio.run(scenario())
+    assert results == [None] * 5 and before_retry is None
+    # one analysis for all the requests of the outage
+    assert calls_during_outage == len(VOICE_EMBEDDINGS)
+    assert after_retry.voice == "af_bella" and len(synthesizer.calls) == 2 * len(VOICE_EMBEDDINGS)
+
+
+def test_each_voice_is_analysed_in_its_own_language():
+    async def scenario():
+        synthesizer = FakeSynthesizer()
+        registry = VoiceMappingRegistry(FakeCoreService(), synthesizer, voices=list(VOICE_EMBEDDINGS))
+        await registry.get("alice")
+        return synthesizer.langs
+
+    assert asyncio.run(scenario()) == {"af_bella": "a", "am_adam": "a", "pf_dora": "p"}
+    assert reference_for("bm_george")[0] == "b"
+    assert reference_for("zf_xiaobei") == ("a", REFERENCE_TEXT)
+
+
+class FakeModel:
+    def __init__(self):
+        self.extract_calls = 0
+        self.aux_input = None
+
+    def extract_se(self, src):
+        self.extract_calls += 1
+        return torch.ones(1, 3, 1), torch.zeros(1, 4, 5)
+
+    def spectrogram(self, src):
+        return torch.zeros(1, 4, 5)
+
+    def inference(self, src_spec, aux_input):
+        self.aux_input = aux_input
+        return {"model_outputs": torch.zeros(1, 1, 8)}
+
+
+def test_precomputed_source_embedding_skips_source_analysis():
+    model = FakeModel()
+    processor = VoiceConverterProcessor(model)
+    source = torch.full((1, 3, 1), 2.0)
+    result = processor.voice_conversion_with_target_se(np.zeros(8, dtype=np.float32), torch.ones(1, 3, 1), source)
+
+    assert result.shape == (8,)
+    assert model.extract_calls == 0
+    assert torch.equal(model.aux_input["g_src"], source)
+
+    processor.voice_conversion_with_target_se(np.zeros(8, dtype=np.float32), torch.ones(1, 3, 1))
+    assert model.extract_calls == 1
+
+
+def test_precomputed_source_embedding_runs_through_the_model_adapter():
+    from TTS.vc.configs.openvoice_config import OpenVoiceConfig  # type: ignore
+    from TTS.vc.models.openvoice import OpenVoice  # type: ignore
+    from project.conversor.wrapper.model_wrapper import VoiceConverterModelWrapper
+    from project.model.factory import OpenVoiceModelAdapter
+
+    adapter = object.__new__(OpenVoiceModelAdapter)
+    adapter.model = OpenVoice(OpenVoiceConfig()).eval()
+    adapter.config = adapter.model.config
+    wrapper = object.__new__(VoiceConverterModelWrapper)
+    wrapper.model = adapter
+    audio = np.sin(np.linspace(0, 2000, 11025)).astype(np.float32) * 0.3
+    with torch.inference_mode():
+        source, expected = wrapper.extract_se(audio)
+        assert torch.equal(wrapper.spectrogram(audio), expected)
+        result = VoiceConverterProcessor(wrapper).voice_conversion_with_target_se(audio, source, source)
+    assert result.ndim == 1 and result.size > 0